@@ -0,0 +1,290 @@
+"""
+Price feeds aggregated from several exchange APIs.
+
+An Asset is one query id and the sources that price it. Every source of
+every asset is fetched concurrently, each under its own timeout, and the
+prices are aggregated for all assets at once as one (query ids x sources)
+NumPy array: sources further than `max_deviation` scaled median absolute
+deviations from the median are rejected, then the median or trimmed mean
+of the rest is the asset's value.
+
+Sources are configured per query id in config.yml, either as a bare url
+returning a number or as a mapping with the JSON path of the price in the
+response, e.g.
+
+    apis:
+      ALGO/USD:
+        coingecko:
+          url: https://api.coingecko.com/api/v3/simple/price?ids=algorand&vs_currencies=usd
+          path: algorand.usd
+        coinbase:
+          url: https://api.coinbase.com/v2/prices/ALGO-USD/spot
+          path: data.amount
+          timeout: 2
+
+A source that fails or times out is priced at its last good value while
+that is at most `max_age` seconds old.
+"""
+import asyncio
+import time
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import aiohttp
+import numpy as np
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_DECIMALS = 6
+# a last good value older than this isn't used in place of a failed fetch
+DEFAULT_MAX_AGE = 300.0
+MAX_DEVIATION = 3.0
+# sources within this fraction of the median are never rejected, even when the others agree exactly
+MIN_DEVIATION = 0.005
+TRIM = 0.2
+# scales a median absolute deviation to a standard deviation for normally distributed prices
+MAD_SCALE = 1.4826
+
+
+class PriceError(Exception):
+    """No source of an asset produced a usable price."""
+
+
+class Source:
+    """
+    One API endpoint pricing an asset.
+
+    Args:
+        name (str): name of the source, e.g. the exchange
+        url (str): endpoint returning JSON
+        path (str, optional): dotted path of the price in the response, e.g. "data.0.price";
+            the whole response is the price if None
+        timeout (float): seconds the fetch may take
+    """
+
+    def __init__(self, name: str, url: str, path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.name = name
+        self.url = url
+        self.path = path
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, name: str, config: Union[str, Dict[str, Any]]) -> "Source":
+        """Build a source from a url or a {url, path, timeout} mapping."""
+        if isinstance(config, str):
+            return cls(name, config)
+        return cls(name, config["url"], config.get("path"), float(config.get("timeout", DEFAULT_TIMEOUT)))
+
+    def parse(self, response: Any) -> float:
+        """Return the price in a decoded JSON response."""
+        value = response
+        for key in self.path.split(".") if self.path else []:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        price = float(value)
+        if not np.isfinite(price) or price <= 0:
+            raise ValueError("{} returned a non-positive price: {}".format(self.name, value))
+        return price
+
+    def __repr__(self) -> str:
+        return "Source({!r}, {!r})".format(self.name, self.url)
+
+
+def _sources(config: Union[Dict[str, Any], List[Any]]) -> List[Source]:
+    if isinstance(config, dict):
+        return [Source.from_config(name, c) for name, c in config.items()]
+    return [Source.from_config(c if isinstance(c, str) else c["url"], c) for c in config]
+
+
+class Asset:
+    """
+    A price feed for one query id, aggregated over its sources.
+
+    Args:
+        query_id (str): the query id the price is reported to
+        sources (dict or list): name -> url or {url, path, timeout}, or a list of them, see the module doc
+        decimals (int): `price` is the value in units of 10**-decimals
+        method (str): "median" or "trimmed_mean" of the accepted sources
+        max_age (float): seconds a source's last good value stands in for a failed fetch
+    """
+
+    def __init__(
+        self,
+        query_id: str,
+        sources: Union[Dict[str, Any], List[Any]],
+        decimals: int = DEFAULT_DECIMALS,
+        method: str = "median",
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> None:
+        if method not in ("median", "trimmed_mean"):
+            raise ValueError("unknown aggregation method: {}".format(method))
+        self.query_id = query_id
+        self.sources = _sources(sources)
+        self.decimals = decimals
+        self.method = method
+        self.max_age = max_age
+
+        self.value: Optional[float] = None
+        # source name -> (price, time.time() it was fetched)
+        self.last_good: Dict[str, Tuple[float, float]] = {}
+        # source name -> why its last fetch failed
+        self.errors: Dict[str, str] = {}
+        # source name -> whether its price was used in the last aggregate
+        self.accepted: Dict[str, bool] = {}
+
+    @property
+    def price(self) -> Optional[int]:
+        """The last aggregated value as a fixed-point integer with `decimals` decimals, for reporting."""
+        if self.value is None:
+            return None
+        return int(round(self.value * 10**self.decimals))
+
+    def update_price(self) -> float:
+        """Fetch every source and aggregate them into `value`; raises PriceError if none has a usable price."""
+        update_prices([self])
+        return self.value
+
+    async def update_price_async(self, session: Optional[aiohttp.ClientSession] = None) -> float:
+        """update_price for code already running in an event loop."""
+        await update_prices_async([self], session)
+        return self.value
+
+    def _row(self, fetched: Iterable[Union[float, BaseException]], now: float) -> List[float]:
+        """Record the fetch results and return this asset's row of prices, NaN where unknown."""
+        row = []
+        for source, result in zip(self.sources, fetched):
+            if isinstance(result, BaseException):
+                # timeouts stringify to "", name them by type
+                error = type(result).__name__
+                self.errors[source.name] = "{}: {}".format(error, result) if str(result) else error
+                price, at = self.last_good.get(source.name, (np.nan, -np.inf))
+                row.append(price if now - at <= self.max_age else np.nan)
+            else:
+                self.errors.pop(source.name, None)
+                self.last_good[source.name] = (result, now)
+                row.append(result)
+        return row
+
+    def __repr__(self) -> str:
+        return "Asset({!r}, value={})".format(self.query_id, self.value)
+
+
+## FETCHING
+async def _fetch(session: aiohttp.ClientSession, source: Source) -> float:
+    timeout = aiohttp.ClientTimeout(total=source.timeout)
+    async with session.get(source.url, timeout=timeout) as resp:
+        resp.raise_for_status()
+        return source.parse(await resp.json(content_type=None))
+
+
+async def fetch_all(
+    sources: List[Source], session: Optional[aiohttp.ClientSession] = None
+) -> List[Union[float, BaseException]]:
+    """Fetch every source concurrently; a failed fetch's entry is its exception."""
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await fetch_all(sources, session)
+    return await asyncio.gather(*(_fetch(session, s) for s in sources), return_exceptions=True)
+
+
+## AGGREGATION
+class Aggregate:
+    """
+    Prices of several assets aggregated over their sources.
+
+    Attributes:
+        median (np.ndarray): per asset median of the accepted prices, NaN if none
+        trimmed_mean (np.ndarray): per asset mean of the accepted prices without the `trim` tails
+        accepted (np.ndarray): (assets x sources) mask of the prices that weren't rejected
+        count (np.ndarray): per asset number of accepted prices
+    """
+
+    def __init__(self, median: np.ndarray, trimmed_mean: np.ndarray, accepted: np.ndarray) -> None:
+        self.median = median
+        self.trimmed_mean = trimmed_mean
+        self.accepted = accepted
+        self.count = accepted.sum(axis=1)
+
+
+def aggregate(
+    prices: np.ndarray, max_deviation: float = MAX_DEVIATION, min_deviation: float = MIN_DEVIATION, trim: float = TRIM
+) -> Aggregate:
+    """
+    Aggregate an (assets x sources) array of prices, NaN where a source has no price.
+
+    A price is rejected as an outlier when it is further from its row's
+    median than both `max_deviation` scaled median absolute deviations and
+    `min_deviation` times the median. The trimmed mean drops floor(n * trim)
+    prices from each end of a row's n accepted prices.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    known = ~np.isnan(prices)
+    empty = ~known.any(axis=1)
+    # all-NaN rows would warn in nanmedian, give them a placeholder and blank them at the end
+    safe = np.where(empty[:, None], 0.0, prices)
+
+    center = np.nanmedian(safe, axis=1)
+    distance = np.abs(safe - center[:, None])
+    mad = np.nanmedian(distance, axis=1)
+    threshold = np.maximum(max_deviation * MAD_SCALE * mad, min_deviation * np.abs(center))
+    accepted = known & (distance <= threshold[:, None])
+
+    kept = np.where(accepted, prices, np.nan)
+    count = accepted.sum(axis=1)
+    median = np.full(len(prices), np.nan)
+    median[count > 0] = np.nanmedian(kept[count > 0], axis=1)
+
+    # NaNs sort last, so each row's accepted prices are its first `count` columns
+    ordered = np.sort(kept, axis=1)
+    cut = np.floor(count * trim).astype(int)
+    ranks = np.arange(prices.shape[1])
+    inner = (ranks >= cut[:, None]) & (ranks < (count - cut)[:, None])
+    with np.errstate(invalid="ignore"):
+        trimmed_mean = np.where(inner, ordered, 0.0).sum(axis=1) / inner.sum(axis=1)
+
+    return Aggregate(median, trimmed_mean, accepted)
+
+
+## UPDATING
+async def update_prices_async(assets: List[Asset], session: Optional[aiohttp.ClientSession] = None) -> Aggregate:
+    """
+    Fetch every source of every asset concurrently and aggregate all assets in one pass.
+
+    Each asset's `value` is set; raises PriceError naming the assets no
+    source could price, after updating the others.
+    """
+    sources = [source for asset in assets for source in asset.sources]
+    fetched = await fetch_all(sources, session)
+    now = time.time()
+
+    width = max((len(asset.sources) for asset in assets), default=1)
+    prices = np.full((len(assets), width), np.nan)
+    start = 0
+    for i, asset in enumerate(assets):
+        end = start + len(asset.sources)
+        prices[i, : len(asset.sources)] = asset._row(fetched[start:end], now)
+        start = end
+
+    result = aggregate(prices)
+    failed = []
+    for i, asset in enumerate(assets):
+        value = result.median[i] if asset.method == "median" else result.trimmed_mean[i]
+        asset.accepted = {s.name: bool(result.accepted[i, j]) for j, s in enumerate(asset.sources)}
+        if np.isnan(value):
+            failed.append(asset)
+        else:
+            asset.value = float(value)
+
+    if failed:
+        raise PriceError(
+            "no usable price for {}".format("; ".join("{} {}".format(a.query_id, a.errors) for a in failed))
+        )
+    return result
+
+
+def update_prices(assets: List[Asset]) -> Aggregate:
+    """update_prices_async for synchronous callers."""
+    return asyncio.run(update_prices_async(assets))
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from src.assets.asset import aggregate
+from src.assets.asset import Asset
+from src.assets.asset import PriceError
+from src.assets.asset import update_prices
+from src.utils.testing.exchange import FakeExchange
+
+
+@pytest.fixture
+def exchange():
+    prices = {
+        "a": {"data": {"amount": "1.00"}},
+        "b": {"algorand": {"usd": 1.02}},
+        "c": [{"price": 0.98}],
+        "d": 0.99,
+        "eth": {"price": 3000.5},
+    }
+    with FakeExchange(prices) as exchange:
+        yield exchange
+
+
+def _sources(exchange):
+    return {
+        "a": {"url": exchange.url("a"), "path": "data.amount"},
+        "b": {"url": exchange.url("b"), "path": "algorand.usd"},
+        "c": {"url": exchange.url("c"), "path": "0.price"},
+        "d": exchange.url("d"),
+    }
+
+
+def test_update_price(exchange):
+    asset = Asset("ALGO/USD", _sources(exchange))
+
+    assert asset.update_price() == pytest.approx(0.995)
+    assert asset.price == 995_000
+    assert all(asset.accepted.values())
+    assert exchange.requests == 4
+
+
+def test_outliers_are_rejected():
+    prices = np.array([[1.0, 1.01, 0.99, 1.0, 50.0], [10.0, 10.1, np.nan, np.nan, np.nan]])
+
+    result = aggregate(prices)
+
+    assert result.accepted.tolist() == [[True, True, True, True, False], [True, True, False, False, False]]
+    assert result.median == pytest.approx([1.0, 10.05])
+    assert result.trimmed_mean == pytest.approx([1.0, 10.05])
+
+
+def test_close_agreement_is_never_an_outlier():
+    # the others agree exactly, so the MAD is 0, but 0.1% off stays within MIN_DEVIATION
+    result = aggregate(np.array([[2.0, 2.0, 2.0, 2.002]]))
+
+    assert result.accepted.all()
+
+
+def test_trimmed_mean_drops_tails():
+    result = aggregate(np.array([[1.0, 2.0, 3.0, 4.0, 5.0]]), max_deviation=100, trim=0.2)
+
+    assert result.trimmed_mean == pytest.approx([3.0])
+
+
+def test_empty_row_is_nan():
+    result = aggregate(np.array([[np.nan, np.nan], [1.0, np.nan]]))
+
+    assert np.isnan(result.median[0]) and np.isnan(result.trimmed_mean[0])
+    assert result.median[1] == 1.0
+    assert result.count.tolist() == [0, 1]
+
+
+def test_sources_fetched_concurrently_with_timeouts(exchange):
+    for path in "abc":
+        exchange.delays[path] = 0.3
+    exchange.delays["d"] = 5
+    sources = _sources(exchange)
+    sources["d"] = {"url": exchange.url("d"), "timeout": 0.5}
+    asset = Asset("ALGO/USD", sources)
+
+    asset.update_price()
+
+    # the four sources were requested at once
+    assert exchange.maxInFlight == 4
+    assert asset.value == pytest.approx(1.0)
+    assert asset.errors["d"].startswith("TimeoutError")
+    assert not asset.accepted["d"]
+
+
+def test_last_good_value_stands_in(exchange):
+    asset = Asset("ALGO/USD", _sources(exchange))
+    asset.update_price()
+
+    exchange.failures["a"] = 503
+    exchange.failures["b"] = 500
+    exchange.prices["c"] = [{"price": 0.97}]
+    asset.update_price()
+
+    assert set(asset.errors) == {"a", "b"}
+    assert asset.value == pytest.approx(0.995)
+
+    asset.max_age = 0
+    asset.update_price()
+    assert asset.value == pytest.approx(0.98)
+
+
+def test_all_sources_failing_raises(exchange):
+    asset = Asset("ALGO/USD", {"x": exchange.url("missing")})
+
+    with pytest.raises(PriceError, match="ALGO/USD"):
+        asset.update_price()
+    assert asset.value is None and asset.price is None
+
+
+def test_many_assets_in_one_pass(exchange):
+    algo = Asset("ALGO/USD", _sources(exchange))
+    eth = Asset("ETH/USD", [{"url": exchange.url("eth"), "path": "price"}], method="trimmed_mean")
+
+    result = update_prices([algo, eth])
+
+    assert result.accepted.shape == (2, 4)
+    assert algo.value == pytest.approx(0.995)
+    assert eth.price == 3_000_500_000
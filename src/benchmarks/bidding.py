@@ -0,0 +1,59 @@
+"""
+Onboard BIDDERS bidders onto an auction app against a fake node that runs
+the programs and sleeps ROUND_DELAY seconds per block: Scripts.bid one
+bidder at a time versus placeBids signing and submitting them all at once.
+
+usage: python -m src.benchmarks.bidding
+"""
+import time
+from typing import List
+from typing import Tuple
+
+from algosdk import account
+
+from src.scripts.bid import placeBids
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+BIDDERS = 500
+ROUND_DELAY = 0.01
+
+
+def _setup() -> Tuple[FakeAlgodClient, Scripts, List[Account]]:
+    client = FakeAlgodClient(FakeLedger(roundDelay=ROUND_DELAY, executePrograms=True))
+    accounts = [Account(account.generate_account()[0]) for _ in range(BIDDERS + 1)]
+    for a in accounts:
+        client.ledger.fund(a.getAddress(), 1_000_000)
+    s = Scripts(client, accounts[0], accounts[0], accounts[0])
+    s.deploy(app_id=1, query_id="1")
+    return client, s, accounts[1:]
+
+
+def serial() -> Tuple[FakeAlgodClient, float]:
+    client, s, bidders = _setup()
+    start = time.perf_counter()
+    for i, bidder in enumerate(bidders):
+        s.bid(bidder, i)
+    return client, time.perf_counter() - start
+
+
+def bulk() -> Tuple[FakeAlgodClient, float]:
+    client, s, bidders = _setup()
+    start = time.perf_counter()
+    outcomes, _ = placeBids(client, s.app_id, [(bidder, i) for i, bidder in enumerate(bidders)])
+    assert all(o.ok for o in outcomes)
+    return client, time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{BIDDERS} bids, {ROUND_DELAY * 1000:.0f}ms per block")
+    print(f"{'':>8} {'seconds':>8} {'bids/s':>8} {'rounds':>8}")
+    for name, run in [("serial", serial), ("bulk", bulk)]:
+        client, seconds = run()
+        print(f"{name:>8} {seconds:>8.2f} {BIDDERS / seconds:>8.0f} {client.ledger.round:>8}")
+
+
+if __name__ == "__main__":
+    main()
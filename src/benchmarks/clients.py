@@ -0,0 +1,51 @@
+"""
+Compare per-request latency of the stock AlgodClient (a new connection per
+request) with PooledAlgodClient (keep-alive connection pool) against a fake
+algod served over local HTTP.
+
+usage: python -m src.benchmarks.clients
+"""
+import statistics
+import time
+from typing import Callable
+from typing import List
+
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.clients import PooledAlgodClient
+from src.utils.testing.ledger import FakeAlgodServer
+from src.utils.testing.ledger import FakeLedger
+
+REQUESTS = 500
+TOKEN = "a" * 64
+
+
+def _latencies(call: Callable[[], object]) -> List[float]:
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main() -> None:
+    with FakeAlgodServer(FakeLedger()) as server:
+        clients = [
+            ("AlgodClient", AlgodClient(TOKEN, server.address)),
+            ("PooledAlgodClient", PooledAlgodClient(TOKEN, server.address)),
+        ]
+
+        print(f"{REQUESTS} sequential requests against {server.address}")
+        print(f"{'client':>18} {'call':>16} {'mean ms':>8} {'p99 ms':>8} {'connections':>12}")
+        for name, client in clients:
+            for callName, call in [("status", client.status), ("suggested_params", client.suggested_params)]:
+                before = server.connections
+                latencies = sorted(_latencies(call))
+                mean = statistics.mean(latencies) * 1000
+                p99 = latencies[int(len(latencies) * 0.99)] * 1000
+                print(f"{name:>18} {callName:>16} {mean:>8.3f} {p99:>8.3f} {server.connections - before:>12}")
+
+
+if __name__ == "__main__":
+    main()
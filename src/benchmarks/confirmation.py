@@ -0,0 +1,72 @@
+"""
+Compare how the number of algod requests grows with the number of transactions
+being confirmed: one waitForTransaction poll loop per txid (the previous
+behaviour) versus a single ConfirmationTracker for the whole batch.
+
+usage: python -m src.benchmarks.confirmation
+"""
+from typing import Callable
+from typing import List
+
+from algosdk import account
+from algosdk.future import transaction
+
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import PendingTxnResponse
+from src.utils.util import waitForTransactions
+
+BATCH_SIZES = [1, 10, 50, 200, 1000]
+TXNS_PER_BLOCK = 100
+
+
+def perTransactionWait(client: FakeAlgodClient, txID: str, timeout: int = 10) -> PendingTxnResponse:
+    """the per-txid polling loop waitForTransaction used before the tracker"""
+    lastRound = client.status()["last-round"]
+    startRound = lastRound
+
+    while lastRound < startRound + timeout:
+        pending_txn = client.pending_transaction_info(txID)
+        if pending_txn.get("confirmed-round", 0) > 0:
+            return PendingTxnResponse(pending_txn)
+        client.status_after_block(lastRound + 1)
+        lastRound += 1
+
+    raise Exception("Transaction {} not confirmed after {} rounds".format(txID, timeout))
+
+
+def serial(client: FakeAlgodClient, txIDs: List[str]) -> None:
+    for txID in txIDs:
+        perTransactionWait(client, txID, timeout=100)
+
+
+def batched(client: FakeAlgodClient, txIDs: List[str]) -> None:
+    waitForTransactions(client, txIDs, timeout=100)
+
+
+def measure(n: int, wait: Callable[[FakeAlgodClient, List[str]], None]) -> int:
+    client = FakeAlgodClient(FakeLedger(maxTxnsPerBlock=TXNS_PER_BLOCK))
+    sender = Account(account.generate_account()[0])
+    client.ledger.fund(sender.getAddress(), 10_000_000_000)
+
+    sp = client.suggested_params()
+    txIDs = []
+    for i in range(n):
+        txn = transaction.PaymentTxn(sender.getAddress(), sp, sender.getAddress(), 0, note=str(i).encode())
+        txIDs.append(client.send_transaction(txn.sign(sender.getPrivateKey())))
+
+    client.calls.clear()
+    wait(client, txIDs)
+    return client.totalCalls
+
+
+def main() -> None:
+    print(f"algod requests to confirm N transactions ({TXNS_PER_BLOCK} txns per block)")
+    print(f"{'N':>6} {'per-txid':>10} {'tracker':>10}")
+    for n in BATCH_SIZES:
+        print(f"{n:>6} {measure(n, serial):>10} {measure(n, batched):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Settle GAMES auction apps of BIDDERS bidders each once their tellor value
+updates, against a fake node that runs the programs and sleeps ROUND_DELAY
+seconds per block: one CloseOut at a time, each signed by its bidder and
+waited on, versus the SettlementKeeper's grouped, pipelined settlement of
+every game at once with its own key.
+
+usage: python -m src.benchmarks.keeper
+"""
+import base64
+import time
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from algosdk import account
+from algosdk.future import transaction
+
+from src.scripts.keeper import SettlementKeeper
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.params import getParamsProvider
+from src.utils.testing.auction import TELLOR_STUB
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import waitForTransaction
+
+GAMES = 20
+BIDDERS = 20
+ROUND_DELAY = 0.01
+
+
+def _account(client: FakeAlgodClient) -> Account:
+    a = Account(account.generate_account()[0])
+    client.ledger.fund(a.getAddress(), 10_000_000)
+    return a
+
+
+def _send(client: FakeAlgodClient, signer: Account, txn: transaction.Transaction) -> transaction.Transaction:
+    client.send_transaction(txn.sign(signer.getPrivateKey()))
+    return txn
+
+
+def _setup() -> Tuple[FakeAlgodClient, Dict[int, List[Account]], Account, int]:
+    client = FakeAlgodClient(FakeLedger(roundDelay=ROUND_DELAY, executePrograms=True))
+    tipper = _account(client)
+    sp = getParamsProvider(client).get()
+
+    stub = base64.b64decode(client.compile(TELLOR_STUB)["result"])
+    create = transaction.ApplicationCreateTxn(
+        tipper.getAddress(),
+        sp,
+        transaction.OnComplete.NoOpOC,
+        stub,
+        stub,
+        transaction.StateSchema(0, 1),
+        transaction.StateSchema(0, 0),
+        app_args=[(1).to_bytes(8, "big")],
+    )
+    tellor = waitForTransaction(client, _send(client, tipper, create).get_txid()).applicationIndex
+
+    games: Dict[int, List[Account]] = {}
+    last = None
+    for _ in range(GAMES):
+        s = Scripts(client, tipper, tipper, tipper)
+        s.deploy(app_id=tellor, query_id="1")
+        games[s.app_id] = [_account(client) for _ in range(BIDDERS)]
+        for i, bidder in enumerate(games[s.app_id]):
+            txns = s._bid_txns(bidder, i, sp)
+            client.send_transactions([txn.sign(bidder.getPrivateKey()) for txn in txns])
+            last = txns[-1]
+    waitForTransaction(client, last.get_txid())
+    return client, games, tipper, tellor
+
+
+def _update(client: FakeAlgodClient, tipper: Account, tellor: int) -> None:
+    txn = transaction.ApplicationNoOpTxn(
+        tipper.getAddress(), getParamsProvider(client).get(), tellor, app_args=[(7).to_bytes(8, "big")]
+    )
+    waitForTransaction(client, _send(client, tipper, txn).get_txid())
+
+
+def _measured(client: FakeAlgodClient, start: float, round: int, calls: int) -> Tuple[float, int, int]:
+    return time.perf_counter() - start, client.ledger.round - round, client.totalCalls - calls
+
+
+def serial() -> Tuple[float, int, int]:
+    client, games, tipper, tellor = _setup()
+    _update(client, tipper, tellor)
+    start, round, calls = time.perf_counter(), client.ledger.round, client.totalCalls
+    for app_id, bidders in games.items():
+        s = Scripts(client, tipper, tipper, tipper, app_id)
+        for bidder in bidders:
+            txn = s._settle_txn(bidder, tellor, getParamsProvider(client).get())
+            waitForTransaction(client, _send(client, bidder, txn).get_txid())
+    return _measured(client, start, round, calls)
+
+
+def keeper() -> Tuple[float, int, int]:
+    client, games, tipper, tellor = _setup()
+    k = SettlementKeeper(client, tipper)
+    for app_id, bidders in games.items():
+        k.track(app_id, [b.getAddress() for b in bidders])
+    _update(client, tipper, tellor)
+    start, round, calls = time.perf_counter(), client.ledger.round, client.totalCalls
+    k.poll()
+    assert k.summary()["games"] == {"settled": GAMES}, k.summary()
+    return _measured(client, start, round, calls)
+
+
+def main() -> None:
+    print(f"{GAMES} games of {BIDDERS} bidders, {ROUND_DELAY * 1000:.0f}ms per block")
+    print(f"{'':>8} {'seconds':>8} {'rounds':>8} {'requests':>9}")
+    for name, run in [("serial", serial), ("keeper", keeper)]:
+        seconds, rounds, requests = run()
+        print(f"{name:>8} {seconds:>8.2f} {rounds:>8} {requests:>9}")
+
+
+if __name__ == "__main__":
+    main()
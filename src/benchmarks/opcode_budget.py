@@ -0,0 +1,43 @@
+"""
+Fail when a branch of the auction contract costs more opcodes than its budget.
+
+Budgets leave headroom under the 700 opcode limit of an app call, so a
+change that makes a path grow (e.g. with the number of bidders) fails here
+before it fails on chain. Run src.utils.testing.profiler to see which
+PyTeal lines a branch spends its cost on.
+
+usage: python -m src.benchmarks.opcode_budget [--bidders N] [--budget settle=100 ...]
+"""
+import argparse
+
+from src.utils.testing.profiler import parseBudgets
+from src.utils.testing.profiler import profileAuction
+
+BUDGETS = {"create": 100, "bid": 100, "settle": 200, "clear": 50}
+BIDDERS = 64
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bidders", type=int, default=BIDDERS)
+    parser.add_argument("--budget", nargs="*", default=[], help="branch=opcodes, e.g. settle=100")
+    args = parser.parse_args()
+
+    profiles = profileAuction(args.bidders, {**BUDGETS, **parseBudgets(args.budget)})
+
+    print(f"worst-case opcode cost per branch with {args.bidders} bidders")
+    print(f"{'branch':>8} {'cost':>6} {'budget':>7}")
+    for profile in profiles.values():
+        flag = "  OVER BUDGET" if profile.overBudget else ""
+        print(f"{profile.name:>8} {profile.cost:>6} {profile.budget:>7}{flag}")
+
+    over = [p for p in profiles.values() if p.overBudget]
+    for profile in over:
+        print()
+        print(profile.format(top=5))
+    if over:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
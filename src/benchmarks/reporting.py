@@ -0,0 +1,57 @@
+"""
+Measure report throughput of the serial Scripts.report path against
+Scripts.report_pipelined, on a fake node that takes ROUND_DELAY seconds per block.
+
+usage: python -m src.benchmarks.reporting
+"""
+import time
+
+from algosdk import account
+
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+REPORTS = 200
+ROUND_DELAY = 0.02
+IN_FLIGHT = [1, 8, 32, 128]
+
+
+def _scripts() -> Scripts:
+    client = FakeAlgodClient(FakeLedger(roundDelay=ROUND_DELAY))
+    reporter = Account(account.generate_account()[0])
+    client.ledger.fund(reporter.getAddress(), 10_000_000_000)
+    return Scripts(client=client, tipper=None, reporter=reporter, governance_address=None, app_id=1234)
+
+
+def _reports():
+    return [(b"1", str(3000 + i).encode()) for i in range(REPORTS)]
+
+
+def _row(mode: str, s: Scripts, elapsed: float) -> str:
+    blocks = s.client.ledger.round - 1
+    return f"{mode:>14} {blocks:>8} {elapsed:>9.2f} {REPORTS / elapsed:>10.1f} {s.client.totalCalls:>9}"
+
+
+def main() -> None:
+    print(f"{REPORTS} reports, {ROUND_DELAY * 1000:.0f}ms per block")
+    print(f"{'mode':>14} {'blocks':>8} {'seconds':>9} {'reports/s':>10} {'requests':>9}")
+
+    s = _scripts()
+    start = time.perf_counter()
+    for query_id, value in _reports():
+        s.report(query_id, value)
+    elapsed = time.perf_counter() - start
+    print(_row("serial", s, elapsed))
+
+    for inFlight in IN_FLIGHT:
+        s = _scripts()
+        start = time.perf_counter()
+        s.report_pipelined(_reports(), max_in_flight=inFlight)
+        elapsed = time.perf_counter() - start
+        print(_row(f"pipelined/{inFlight}", s, elapsed))
+
+
+if __name__ == "__main__":
+    main()
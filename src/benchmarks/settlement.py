@@ -0,0 +1,36 @@
+"""
+Opcode cost of the auction contract's bid and settle paths as the number of
+bidders grows, measured with the TEAL interpreter in src.utils.testing.avm.
+
+The previous layout appended every bidder to one global byte slice and had
+settle() loop over it: settle cost 48 + 23 opcodes per bidder, and the 4th
+bid failed because the slice outgrew the 128 byte key/value limit. Bids now
+live in local state and each CloseOut settles one bid against a running
+best guess, so both paths cost the same for any number of bidders.
+
+usage: python -m src.benchmarks.settlement
+"""
+from src.utils.testing.auction import AuctionSimulator
+from src.utils.testing.avm import APP_BUDGET
+
+BIDDER_COUNTS = [2, 4, 16, 64, 256]
+VALUE = 5000
+
+
+def measure(n: int):
+    sim = AuctionSimulator(VALUE)
+    bids = [sim.bid(VALUE - n // 2 + i) for i in range(n)]
+    settles = [sim.settle(b) for b in list(sim.bidders)]
+    return max(b.cost for b in bids), max(s.cost for s in settles[:-1]), settles[-1].cost
+
+
+def main() -> None:
+    print(f"opcode cost per app call (budget {APP_BUDGET})")
+    print(f"{'bidders':>8} {'bid':>6} {'settle':>8} {'last settle':>12}")
+    for n in BIDDER_COUNTS:
+        bid, settle, last = measure(n)
+        print(f"{n:>8} {bid:>6} {settle:>8} {last:>12}")
+
+
+if __name__ == "__main__":
+    main()
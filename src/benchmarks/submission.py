@@ -0,0 +1,80 @@
+"""
+Measure sustained TPS and confirmation latency of the streaming Submitter
+against a fake node with a bounded pool and ROUND_DELAY seconds per block,
+for different worker counts and rate limits.
+
+usage: python -m src.benchmarks.submission
+"""
+import base64
+import os
+import tempfile
+from typing import Optional
+
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+
+from src.scripts.factory import SignedBatch
+from src.scripts.factory import signRaw
+from src.scripts.submitter import Submitter
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+TRANSACTIONS = 2000
+ROUND_DELAY = 0.02
+TXNS_PER_BLOCK = 500
+POOL_CAPACITY = 1000
+RUNS = [(1, None), (8, None), (32, None), (8, 2000.0)]
+
+
+def _client() -> FakeAlgodClient:
+    return FakeAlgodClient(
+        FakeLedger(roundDelay=ROUND_DELAY, maxTxnsPerBlock=TXNS_PER_BLOCK, poolCapacity=POOL_CAPACITY)
+    )
+
+
+def _write(client: FakeAlgodClient, path: str) -> None:
+    sender = Account(account.generate_account()[0])
+    client.ledger.fund(sender.getAddress(), 10_000_000_000)
+    sp = client.suggested_params()
+    sp.last = sp.first + 1000
+    jobs = [
+        (
+            sender.getPrivateKey(),
+            base64.b64decode(
+                encoding.msgpack_encode(
+                    transaction.PaymentTxn(sender.getAddress(), sp, sender.getAddress(), 0, note=str(i).encode())
+                )
+            ),
+        )
+        for i in range(TRANSACTIONS)
+    ]
+    SignedBatch([[stxn] for stxn in signRaw(jobs)]).write(path)
+
+
+def _row(workers: int, rate: Optional[float], submitter: Submitter, path: str) -> str:
+    m = submitter.submitFiles([path]).snapshot()
+    limit = "-" if rate is None else f"{rate:.0f}"
+    return (
+        f"{workers:>8} {limit:>6} {m['retries']:>8} {m['seconds']:>8.2f} {m['tps']:>8.0f} "
+        f"{m['latency_p50'] * 1000:>8.0f} {m['latency_p90'] * 1000:>8.0f} {m['latency_p99'] * 1000:>8.0f}"
+    )
+
+
+def main() -> None:
+    print(f"{TRANSACTIONS} payments, {ROUND_DELAY * 1000:.0f}ms and {TXNS_PER_BLOCK} txns per block")
+    print(
+        f"{'workers':>8} {'rate':>6} {'retries':>8} {'seconds':>8} {'tps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for workers, rate in RUNS:
+            client = _client()
+            path = os.path.join(directory, f"{workers}-{rate}.stxn")
+            _write(client, path)
+            print(_row(workers, rate, Submitter(client, workers=workers, rate=rate), path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Reproducible timings of the hot paths: TEAL generation and compilation,
+state decoding, key handling, signing and Scripts round trips against an
+in-process FakeLedger.
+
+Each benchmark is a setup function registered with @benchmark that returns
+the callable to time. Like asv, setup runs again before every repeat, so
+stateful calls (e.g. stake, which needs a new reporter every time) can be
+prepared outside the timed loop. Results are written as JSON, keyed by the
+current commit, and a run can be compared against an earlier one:
+
+usage: python -m src.benchmarks.suite [-k NAME] [--repeat N] [--output DIR] [--compare OLD.json [NEW.json]]
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk import account
+from algosdk import encoding
+from algosdk import mnemonic
+from algosdk.future import transaction
+from pyteal import compileTeal
+from pyteal import Mode
+
+from src.contracts.approval import approval_program
+from src.scripts.factory import signRaw
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.store import LocalStore
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import decodeLocalStates
+from src.utils.util import decodeState
+from src.utils.util import fullyCompileContract
+from src.utils.util import StateView
+
+REPEAT = 5
+OUTPUT = ".benchmarks"
+# a benchmark more than this much slower than before is a regression
+THRESHOLD = 0.10
+STATE_ENTRIES = 1000
+# a full global state, and the local state of many accounts of one app
+GLOBAL_SLOTS = 64
+LOCAL_SLOTS = 16
+LOCAL_ACCOUNTS = 1000
+APP_ID = 1234
+
+Setup = Callable[[], Callable[[], Any]]
+
+# name -> (setup, calls per repeat, None to calibrate)
+BENCHMARKS: Dict[str, Tuple[Setup, Optional[int]]] = {}
+
+
+def benchmark(name: str, number: Optional[int] = None) -> Callable[[Setup], Setup]:
+    """Register a setup function returning the callable timed as `name`, `number` calls per repeat."""
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = (setup, number)
+        return setup
+
+    return register
+
+
+@benchmark("teal.compileTeal")
+def tealGeneration():
+    return lambda: compileTeal(approval_program(), mode=Mode.Application, version=5)
+
+
+@benchmark("teal.fullyCompileContract")
+def tealCompilation():
+    client = FakeAlgodClient(FakeLedger())
+    return lambda: fullyCompileContract(client, approval_program())
+
+
+def _stateArray(entries: int):
+    return [
+        {
+            "key": base64.b64encode(b"key-%d" % i).decode(),
+            "value": {"type": 2, "uint": i}
+            if i % 2
+            else {"type": 1, "bytes": base64.b64encode(b"value-%d" % i).decode()},
+        }
+        for i in range(entries)
+    ]
+
+
+def _accounts():
+    return [
+        {"address": str(i), "apps-local-state": [{"id": APP_ID, "key-value": _stateArray(LOCAL_SLOTS)}]}
+        for i in range(LOCAL_ACCOUNTS)
+    ]
+
+
+@benchmark("state.decodeState")
+def stateDecoding():
+    stateArray = _stateArray(STATE_ENTRIES)
+    return lambda: decodeState(stateArray)
+
+
+@benchmark("state.decodeState.lookup")
+def eagerLookup():
+    stateArray = _stateArray(GLOBAL_SLOTS)
+    return lambda: decodeState(stateArray)[b"key-5"]
+
+
+@benchmark("state.StateView.lookup")
+def lazyLookup():
+    stateArray = _stateArray(GLOBAL_SLOTS)
+    return lambda: StateView(stateArray)[b"key-5"]
+
+
+@benchmark("state.StateView.decode")
+def lazyDecoding():
+    stateArray = _stateArray(STATE_ENTRIES)
+    return lambda: StateView(stateArray).decode()
+
+
+@benchmark("state.local.decodeState")
+def eagerLocalStates():
+    accounts = _accounts()
+
+    def scan():
+        for info in accounts:
+            for app in info["apps-local-state"]:
+                if app["id"] == APP_ID:
+                    decodeState(app["key-value"])[b"key-5"]
+
+    return scan
+
+
+@benchmark("state.local.decodeLocalStates")
+def lazyLocalStates():
+    accounts = _accounts()
+
+    def scan():
+        for state in decodeLocalStates(accounts, APP_ID).values():
+            state[b"key-5"]
+
+    return scan
+
+
+@benchmark("account.FromMnemonic")
+def accountFromMnemonic():
+    words = mnemonic.from_private_key(account.generate_account()[0])
+    return lambda: Account.FromMnemonic(words)
+
+
+def _payment(sender: Account) -> transaction.PaymentTxn:
+    sp = transaction.SuggestedParams(1000, 1, 1000, base64.b64encode(bytes(32)).decode(), "bench-v1", flat_fee=True)
+    return transaction.PaymentTxn(sender.getAddress(), sp, sender.getAddress(), 0)
+
+
+@benchmark("sign.sdk")
+def sdkSigning():
+    sender = Account(account.generate_account()[0])
+    txn = _payment(sender)
+    return lambda: txn.sign(sender.getPrivateKey())
+
+
+@benchmark("sign.raw")
+def rawSigning():
+    sender = Account(account.generate_account()[0])
+    job = (sender.getPrivateKey(), base64.b64decode(encoding.msgpack_encode(_payment(sender))))
+    return lambda: signRaw([job])
+
+
+def _scripts() -> Scripts:
+    client = FakeAlgodClient(FakeLedger())
+    reporter = Account(account.generate_account()[0])
+    client.ledger.fund(reporter.getAddress(), 10_000_000_000)
+    return Scripts(client=client, tipper=None, reporter=reporter, governance_address=None, app_id=APP_ID)
+
+
+@benchmark("scripts.report")
+def scriptsReport():
+    s = _scripts()
+    values = iter(range(sys.maxsize))
+    return lambda: s.report(b"1", str(next(values)).encode())
+
+
+@benchmark("store.account")
+def storeAccount():
+    client = FakeAlgodClient(FakeLedger())
+    store = LocalStore(client, ":memory:", statusTtl=3600)
+    # a followed store serves reads without asking algod for the latest round
+    store.sync()
+    address = account.generate_account()[1]
+    store.account(address)
+    return lambda: store.account(address, maxAge=10)
+
+
+STAKES = 50
+
+
+@benchmark("scripts.stake", number=STAKES)
+def scriptsStake():
+    s = _scripts()
+    reporters = [Account(account.generate_account()[0]) for _ in range(STAKES)]
+    for reporter in reporters:
+        s.client.ledger.fund(reporter.getAddress(), 10_000_000)
+    it = iter(reporters)
+
+    def stake():
+        s.reporter = next(it)
+        s.stake(1_000_000)
+
+    return stake
+
+
+def measure(name: str, repeat: int = REPEAT) -> Dict[str, Any]:
+    """Time one benchmark: seconds per call of each repeat, and their summary."""
+    setup, number = BENCHMARKS[name]
+    if number is None:
+        number, _ = timeit.Timer(setup()).autorange()
+
+    perCall = []
+    for _ in range(repeat):
+        timer = timeit.Timer(setup())
+        perCall.append(timer.timeit(number) / number)
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "times": perCall,
+        "min": min(perCall),
+        "median": statistics.median(perCall),
+        "mean": statistics.mean(perCall),
+        "stdev": statistics.stdev(perCall) if repeat > 1 else 0.0,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: Optional[List[str]] = None, repeat: int = REPEAT) -> Dict[str, Any]:
+    """Run `names` (every benchmark by default) and return the results document."""
+    return {
+        "commit": _commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {name: measure(name, repeat) for name in names or BENCHMARKS},
+    }
+
+
+def save(results: Dict[str, Any], directory: str = OUTPUT) -> str:
+    """Write `results` to <directory>/<commit>.json and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "{}.json".format((results["commit"] or "worktree")[:12]))
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare the medians of the benchmarks both result documents have.
+
+    Returns:
+        list: one row per benchmark, with the old and new medians, their ratio and whether it's a regression
+    """
+    rows = []
+    for name, result in new["benchmarks"].items():
+        if name not in old["benchmarks"]:
+            continue
+        before, after = old["benchmarks"][name]["median"], result["median"]
+        ratio = after / before if before else float("inf")
+        rows.append({"name": name, "old": before, "new": after, "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+
+def _duration(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "{:.2f}{}".format(seconds / scale, unit)
+    return "{:.0f}ns".format(seconds / 1e-9)
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=OUTPUT, help="directory results are written to")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="earlier results, and optionally newer ones")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parsed = parser.parse_args(args)
+
+    if parsed.compare and len(parsed.compare) > 1:
+        with open(parsed.compare[1]) as f:
+            new = json.load(f)
+    else:
+        start = time.perf_counter()
+        new = run([name for name in BENCHMARKS if parsed.filter in name], parsed.repeat)
+        print(f"{'benchmark':>28} {'median':>10} {'min':>10} {'stdev':>10} {'calls':>7}")
+        for name, result in new["benchmarks"].items():
+            print(
+                f"{name:>28} {_duration(result['median']):>10} {_duration(result['min']):>10} "
+                f"{_duration(result['stdev']):>10} {result['number']:>7}"
+            )
+        print(f"wrote {save(new, parsed.output)} in {time.perf_counter() - start:.1f}s")
+
+    if parsed.compare:
+        with open(parsed.compare[0]) as f:
+            old = json.load(f)
+        rows = compare(old, new, parsed.threshold)
+        print(f"\n{old['commit'] or 'worktree'} -> {new['commit'] or 'worktree'}")
+        print(f"{'benchmark':>28} {'old':>10} {'new':>10} {'ratio':>7}")
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['name']:>28} {_duration(row['old']):>10} {_duration(row['new']):>10} "
+                f"{row['ratio']:>7.2f}{flag}"
+            )
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from src.benchmarks import suite
+
+
+def test_run_saves_json(tmp_path):
+    results = suite.run(["state.decodeState"], repeat=2)
+    path = suite.save(results, str(tmp_path))
+
+    with open(path) as f:
+        saved = json.load(f)
+    result = saved["benchmarks"]["state.decodeState"]
+    assert list(saved["benchmarks"]) == ["state.decodeState"]
+    assert len(result["times"]) == 2 and result["min"] <= result["median"]
+    assert path.endswith("{}.json".format((saved["commit"] or "worktree")[:12]))
+
+
+def test_setup_runs_before_every_repeat(monkeypatch):
+    setups = []
+    monkeypatch.setitem(suite.BENCHMARKS, "noop", (lambda: setups.append(1) or (lambda: None), 10))
+
+    result = suite.measure("noop", repeat=3)
+
+    assert len(setups) == 3
+    assert result["number"] == 10
+
+
+def test_compare_flags_regressions():
+    def doc(**medians):
+        return {"benchmarks": {name: {"median": median} for name, median in medians.items()}}
+
+    rows = suite.compare(doc(a=1.0, b=1.0, gone=1.0), doc(a=1.05, b=1.5, new=1.0), threshold=0.1)
+
+    assert [(row["name"], row["regression"]) for row in rows] == [("a", False), ("b", True)]
+    assert rows[1]["ratio"] == pytest.approx(1.5)
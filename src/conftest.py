@@ -0,0 +1,32 @@
+"""
+Runs the test suite against an in-process fake node instead of the sandbox.
+
+Set USE_SANDBOX=1 to run against the node configured in config.yml (the
+local sandbox by default) instead.
+"""
+import os
+import weakref
+
+import pytest
+
+import src.utils.clients as clients
+import src.utils.testing.provisioning as provisioning
+import src.utils.testing.setup as setup
+from src.utils.clients import ClientRegistry
+from src.utils.testing.node import FakeNode
+
+
+@pytest.fixture(autouse=True)
+def node(monkeypatch):
+    """The FakeNode the shared clients of the default network talk to, None with USE_SANDBOX."""
+    if os.environ.get("USE_SANDBOX"):
+        yield None
+        return
+
+    node = FakeNode()
+    registry = ClientRegistry()
+    node.install(registry)
+    monkeypatch.setattr(clients, "_registry", registry)
+    monkeypatch.setattr(setup, "kmdAccounts", None)
+    monkeypatch.setattr(provisioning, "_pools", weakref.WeakKeyDictionary())
+    yield node
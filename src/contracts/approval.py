@@ -20,6 +20,7 @@ def approval_program():
     program = Cond(
         [Txn.application_id() == Int(0), create()],
         [Txn.on_completion() == OnComplete.OptIn, bid()],
+        [Txn.on_completion() == OnComplete.NoOp, settle_bidder()],
         # [Txn.on_completion() == OnComplete.DeleteApplication, Return(is_governance)],
         # [Txn.on_completion() == OnComplete.UpdateApplication, Return(is_governance)],
         [Txn.on_completion() == OnComplete.CloseOut, settle()],
@@ -29,16 +30,29 @@ def approval_program():
 
 
 def clear_state_program():
-    return Approve()
+    return leave()
 
 
 if __name__ == "__main__":
-    with open("auction_approval.teal", "w") as f:
-        compiled = compileTeal(approval_program(), mode=Mode.Application, version=5)
-        f.write(compiled)
-
-    with open("auction_clear_state.teal", "w") as f:
-        compiled = compileTeal(clear_state_program(), mode=Mode.Application, version=5)
-        f.write(compiled)
+    import sys
+
+    from src.utils.artifacts import get_program_cache
+
+    cache = get_program_cache()
+    programs = {
+        "auction_approval.teal": cache.teal("approval", approval_program),
+        "auction_clear_state.teal": cache.teal("clear_state", clear_state_program),
+    }
+
+    if "--check" in sys.argv[1:]:
+        # exit non-zero if the checked in TEAL is out of date with the PyTeal source
+        stale = [path for path, teal in programs.items() if open(path).read() != teal + "\n"]
+        for path in stale:
+            print(path, "is out of date")
+        sys.exit(1 if stale else 0)
+
+    for path, teal in programs.items():
+        with open(path, "w") as f:
+            f.write(teal + "\n")
 
     print("compiled!")
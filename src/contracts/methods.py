@@ -5,7 +5,12 @@ from pyteal import *
 tellor_app_id = Bytes("tellor_app_id")
 tellor_query_id = Bytes("tellor_query_id")
 tellor_value = Bytes("tellor_value")
-bidders = Bytes("bidders")
+num_bidders = Bytes("num_bidders")
+winner = Bytes("winner")
+closeness = Bytes("closeness")
+
+# local variables
+prediction = Bytes("prediction")
 
 """
 functions listed in alphabetical order
@@ -30,8 +35,10 @@ def create():
     return Seq(
         [
             # TODO assert application args length is correct
-            App.globalPut(tellor_app_id, Txn.application_args[0]),
+            App.globalPut(tellor_app_id, Btoi(Txn.application_args[0])),
             App.globalPut(tellor_query_id, Txn.application_args[1]),
+            App.globalPut(num_bidders, Int(0)),
+            App.globalPut(winner, Bytes("")),
             Approve(),
         ]
     )
@@ -41,14 +48,21 @@ def bid():
     """
     bid 1 algo to place a prediction on the value reported to the tellor oracle
 
+    the prediction is kept in the bidder's local state,
+    so the cost of a bid doesn't depend on the number of bidders
+
     Txn args:
-    1) prediction (int) -- the price of the asset the bidder predicts
+    0) prediction (int) -- the price of the asset the bidder predicts
     """
     on_stake_tx_index = Txn.group_index() - Int(1)
+    latched = App.globalGetEx(Int(0), tellor_value)
 
     # enforced two part Gtxn: 1) send token to contract, 2) stake
     return Seq(
         [
+            # no bids once settlement has read the value
+            latched,
+            Assert(Not(latched.hasValue())),
             Assert(
                 And(
                     Gtxn[on_stake_tx_index].sender() == Txn.sender(),
@@ -57,66 +71,153 @@ def bid():
                     Gtxn[on_stake_tx_index].type_enum() == TxnType.Payment,
                 ),
             ),
-            # record bid amount
+            # record prediction
             # bids are 1 algo
-            App.globalPut(Txn.sender(), Int(1)),
+            App.localPut(Txn.sender(), prediction, Btoi(Txn.application_args[0])),
+            App.globalPut(num_bidders, App.globalGet(num_bidders) + Int(1)),
+            Approve(),
+        ]
+    )
+
+
+def _payout(receiver):
+    """closes the app account, pot included, out to `receiver` with an inner payment"""
+    return Seq(
+        [
+            InnerTxnBuilder.Begin(),
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.type_enum: TxnType.Payment,
+                    TxnField.receiver: receiver,
+                    TxnField.close_remainder_to: receiver,
+                }
+            ),
+            InnerTxnBuilder.Submit(),
+        ]
+    )
+
+
+def _settle(bidder, guess):
+    """
+    compares `bidder`'s prediction `guess` against the tellor value,
+    keeps the closest prediction so far and rewards the winner once every bid is settled
+
+    the first settlement latches the tellor value in tellor_value, so every
+    prediction is compared against the same value and no more bids are taken;
+    the prediction is deleted, so each bid is settled once
+    """
+
+    actual = App.globalGetEx(App.globalGet(tellor_app_id), Bytes("value"))
+    latched = App.globalGetEx(Int(0), tellor_value)
+    value = ScratchVar(TealType.uint64)
+    distance = ScratchVar(TealType.uint64)
+
+    return Seq(
+        [
+            latched,
             If(
-                App.globalGet(bidders) == Bytes(""),
-                App.globalPut(bidders, Txn.sender()),
-                App.globalPut(bidders, Concat(App.globalGet(bidders), Txn.sender())),
+                Not(latched.hasValue()),
+                Seq(
+                    [
+                        actual,
+                        Assert(actual.hasValue()),
+                        App.globalPut(tellor_value, Btoi(actual.value())),
+                    ]
+                ),
             ),
-            Approve(),
+            value.store(App.globalGet(tellor_value)),
+            distance.store(If(guess > value.load(), guess - value.load(), value.load() - guess)),
+            If(
+                Or(App.globalGet(winner) == Bytes(""), distance.load() < App.globalGet(closeness)),
+                Seq(
+                    [
+                        App.globalPut(winner, bidder),
+                        App.globalPut(closeness, distance.load()),
+                    ]
+                ),
+            ),
+            App.localDel(bidder, prediction),
+            App.globalPut(num_bidders, App.globalGet(num_bidders) - Int(1)),
+            If(App.globalGet(num_bidders) == Int(0), _payout(App.globalGet(winner))),
         ]
     )
 
 
 def settle():
     """
-    reads tellor value, calculates closest prediction, rewards winner
+    settles the sender's own bid, if nobody settled it yet
+
+    called on CloseOut transaction by a bidder
+    (settlement is incremental: each settlement compares one prediction
+    against the running best, so its cost doesn't depend on the number of bidders)
 
-    called on CloseOut transaction
+    Txn applications:
+    1) tellor app id
     """
+    guess = App.localGetEx(Txn.sender(), Int(0), prediction)
 
-    actual = App.globalGetEx(App.globalGet(tellor_app_id), Bytes("value"))
-    counter = ScratchVar(TealType.uint64)
-    closeness = ScratchVar(TealType.uint64)
-    winner = ScratchVar(TealType.bytes)
-    prediction = ScratchVar(TealType.uint64)
-    # while counter < len(str(App.globalGet(bidders))):
-    #     winner = Extract(App.globalGet(bidders), Int(counter), Int(32))
-    #     prediction = App.globalGet(winner)
-    #     current_closeness = abs(prediction - actual)
-
-    #     if current_closeness < closeness:
-    #         closeness = current_closeness
+    return Seq(
+        [
+            guess,
+            If(guess.hasValue(), _settle(Txn.sender(), guess.value())),
+            Approve(),
+        ]
+    )
+
+
+def settle_bidder():
+    """
+    settles the bid of another account, so anyone (e.g. a keeper) can settle
+    every bid without the bidders' keys
+
+    called on NoOp transaction by anyone, one bid per call
+
+    Txn accounts:
+    1) the bidder
+
+    Txn applications:
+    1) tellor app id
+    """
+    guess = App.localGetEx(Txn.accounts[1], Int(0), prediction)
+
+    return Seq(
+        [
+            guess,
+            Assert(guess.hasValue()),
+            _settle(Txn.accounts[1], guess.value()),
+            Approve(),
+        ]
+    )
+
+
+def leave():
+    """
+    removes a bidder who clears their state instead of settling,
+    so the remaining bidders can still settle
+
+    called from the clear state program; an unsettled bid is forfeited.
+    if the last unsettled bidder clears, the pot goes to the winner so far,
+    or back to the creator if nobody settled
+    """
+    guess = App.localGetEx(Txn.sender(), Int(0), prediction)
 
     return Seq(
         [
-            Assert(Len(App.globalGet(bidders)) >= Int(64)),
-            actual,
-            prediction.store(Int(0)),
-            counter.store(Int(0)),
-            closeness.store(Int(2 ** 16)),
-            winner.store(Extract(App.globalGet(bidders), counter.load(), Int(32))),
-            While(counter.load() < Len(App.globalGet(bidders))).Do(
+            guess,
+            If(
+                guess.hasValue(),
                 Seq(
                     [
+                        App.globalPut(num_bidders, App.globalGet(num_bidders) - Int(1)),
                         If(
-                            App.globalGet(winner.load()) < closeness.load(),
-                            winner.store(Extract(App.globalGet(bidders), counter.load(), Int(32))),
+                            App.globalGet(num_bidders) == Int(0),
+                            _payout(
+                                If(App.globalGet(winner) == Bytes(""), Global.creator_address(), App.globalGet(winner))
+                            ),
                         ),
-                        counter.store(counter.load() + Int(32)),
                     ]
-                )
-            ),
-            InnerTxnBuilder.Begin(),
-            InnerTxnBuilder.SetFields(
-                {
-                    TxnField.type_enum: TxnType.Payment,
-                    TxnField.close_remainder_to: App.globalGet(winner.load()),
-                }
+                ),
             ),
-            InnerTxnBuilder.Submit(),
             Approve(),
         ]
     )
@@ -0,0 +1,132 @@
+import pytest
+from algosdk.future import transaction
+
+from src.utils.testing.auction import AuctionSimulator
+from src.utils.testing.avm import APP_BUDGET
+
+VALUE = 5000
+
+
+@pytest.fixture
+def sim():
+    return AuctionSimulator(VALUE)
+
+
+def test_closest_prediction_wins(sim):
+    predictions = [3000, 5200, 4900, 7000]
+    for p in predictions:
+        sim.bid(p)
+    winner = sim.bidders[2]
+    before = sim.balance(winner)
+
+    results = [sim.settle(b) for b in list(sim.bidders)]
+
+    assert all(r.approved for r in results)
+    assert results[-1].innerTxns[0]["CloseRemainderTo"] == winner.getAddress()
+    assert sim.balance(winner) > before
+    assert sim.ledger.balances[sim.scripts.app_address] == 0
+
+
+def test_settle_cost_does_not_grow_with_bidders():
+    costs = {}
+    for n in (2, 4, 32):
+        sim = AuctionSimulator(VALUE)
+        bids = [sim.bid(VALUE + i) for i in range(n)]
+        settles = [sim.settle(b) for b in list(sim.bidders)]
+        costs[n] = (max(b.cost for b in bids), max(s.cost for s in settles))
+
+    assert costs[2] == costs[4] == costs[32]
+    assert max(costs[32]) < APP_BUDGET
+
+
+def test_clear_state_keeps_settlement_live(sim):
+    for p in (4000, 6000, 5100):
+        sim.bid(p)
+    leaver = sim.bidders.pop(0)
+    sim.call([transaction.ApplicationClearStateTxn(leaver.getAddress(), sim.params(), sim.appID)])
+
+    results = [sim.settle(b) for b in sim.bidders]
+
+    assert results[-1].innerTxns[0]["CloseRemainderTo"] == sim.bidders[1].getAddress()
+
+
+def test_last_bidder_clearing_pays_out(sim):
+    for p in (4000, 5100):
+        sim.bid(p)
+    sim.settle(sim.bidders[1])
+    leaver = sim.bidders[0]
+
+    result = sim.call([transaction.ApplicationClearStateTxn(leaver.getAddress(), sim.params(), sim.appID)])
+
+    assert result.innerTxns[0]["CloseRemainderTo"] == sim.bidders[1].getAddress()
+    assert sim.ledger.balances[sim.scripts.app_address] == 0
+
+
+def test_pot_returns_to_creator_when_everyone_clears(sim):
+    sim.bid(4000)
+
+    result = sim.call([transaction.ApplicationClearStateTxn(sim.bidders[0].getAddress(), sim.params(), sim.appID)])
+
+    assert result.innerTxns[0]["CloseRemainderTo"] == sim.tipper.getAddress()
+
+
+def test_settlement_uses_the_value_latched_by_the_first_settle(sim):
+    for p in (4000, 6500, 5100):
+        sim.bid(p)
+    sim.settle(sim.bidders[0])
+    # the oracle moves to 6500 halfway through settlement
+    sim.call(
+        [
+            transaction.ApplicationNoOpTxn(
+                sim.tipper.getAddress(), sim.params(), sim.tellorAppID, [(6500).to_bytes(8, "big")]
+            )
+        ]
+    )
+
+    results = [sim.settle(b) for b in sim.bidders[1:]]
+
+    assert results[-1].innerTxns[0]["CloseRemainderTo"] == sim.bidders[2].getAddress()
+
+
+def test_no_bids_once_settlement_started(sim):
+    sim.bid(4000)
+    sim.bid(6000)
+    sim.settle(sim.bidders[0])
+
+    with pytest.raises(Exception, match="assert failed"):
+        sim.bid(VALUE)
+
+
+def test_anyone_can_settle_a_bid(sim):
+    for p in (4000, 5100, 6000):
+        sim.bid(p)
+    keeper = sim.newAccount()
+
+    results = [sim.settle_bidder(b, keeper) for b in sim.bidders]
+
+    assert results[-1].innerTxns[0]["CloseRemainderTo"] == sim.bidders[1].getAddress()
+    assert sim.ledger.balances[sim.scripts.app_address] == 0
+    with pytest.raises(Exception, match="assert failed"):
+        sim.settle_bidder(sim.bidders[0], keeper)
+
+
+def test_settled_bidders_leave_without_settling_again(sim):
+    for p in (4000, 5100, 6000):
+        sim.bid(p)
+    sim.settle_bidder(sim.bidders[0])
+    sim.settle_bidder(sim.bidders[1])
+    sim.settle(sim.bidders[1])
+    sim.call([transaction.ApplicationClearStateTxn(sim.bidders[0].getAddress(), sim.params(), sim.appID)])
+
+    result = sim.settle_bidder(sim.bidders[2])
+
+    assert result.innerTxns[0]["CloseRemainderTo"] == sim.bidders[1].getAddress()
+
+
+def test_bid_requires_payment(sim):
+    bidder = sim.newAccount()
+    pay, bid = sim.scripts._bid_txns(bidder, 5000, sim.params())
+    pay.amt = 1
+
+    with pytest.raises(Exception, match="assert failed"):
+        sim.call([pay, bid])
@@ -0,0 +1,130 @@
+from base64 import b64decode
+from typing import List
+
+import src.scripts.scripts as scripts
+from src.contracts.approval import approval_program
+from src.contracts.approval import clear_state_program
+from src.scripts.scripts import ScriptsBase
+from src.utils.account import Account
+from src.utils.artifacts import get_program_cache
+from src.utils.async_clients import AsyncAlgodClient
+from src.utils.util import PendingTxnResponse
+from src.utils.util import StateView
+
+
+class AsyncScripts(ScriptsBase):
+    """
+    asyncio counterparts of the Scripts contract calls
+
+    every instance built on the same AsyncAlgodClient shares its connection pool,
+    params cache and confirmation tracker, so hundreds of calls can be awaited
+    concurrently from one event loop, e.g. with asyncio.gather
+
+    note:
+    these scripts are only examples.
+    they haven't been audited.
+    """
+
+    client: AsyncAlgodClient
+
+    async def _send(self, signedTxns: List) -> PendingTxnResponse:
+        await self.client.send_transactions(signedTxns)
+        return (await self.client.tracker.wait([signedTxns[-1].get_txid()]))[0]
+
+    async def get_contracts(self):
+        """
+        Get the compiled TEAL contracts for the tellor contract,
+        sharing the in-memory and on-disk caches of Scripts.get_contracts
+
+        Returns:
+            A tuple of 2 byte strings. The first is the approval program, and the
+            second is the clear state program.
+        """
+        if len(scripts.APPROVAL_PROGRAM) == 0:
+            cache = get_program_cache()
+            network = (await self.client.params.get()).gen
+
+            programs = []
+            for name, program in (("approval", approval_program), ("clear_state", clear_state_program)):
+                teal = cache.teal(name, program)
+                compiled = cache.lookup_program(teal, network)
+                if compiled is None:
+                    compiled = b64decode((await self.client.compile(teal))["result"])
+                    cache.store_program(teal, network, compiled)
+                programs.append(compiled)
+            scripts.APPROVAL_PROGRAM, scripts.CLEAR_STATE_PROGRAM = programs
+
+        return scripts.APPROVAL_PROGRAM, scripts.CLEAR_STATE_PROGRAM
+
+    async def deploy(self, app_id: int, query_id: str) -> int:
+        """
+        Deploy a new tellor reporting contract and fund its app account, see Scripts.deploy
+
+        Returns:
+            int: The ID of the newly created app.
+        """
+        approval, clear = await self.get_contracts()
+
+        txn = self._deploy_txn(approval, clear, app_id, query_id, await self.client.params.get())
+        response = await self._send([txn.sign(self.tipper.getPrivateKey())])
+
+        assert response.applicationIndex is not None and response.applicationIndex > 0
+        self._set_app_id(response.applicationIndex)
+
+        # bids to an app account below the minimum balance are rejected
+        fundTxn = self._fund_app_txn(await self.client.params.get())
+        await self._send([fundTxn.sign(self.tipper.getPrivateKey())])
+        return self.app_id
+
+    async def stake(self, stake_amount=None) -> None:
+        """
+        Send the stake payment and call stake() on the contract, see Scripts.stake
+
+        Args:
+            stake_amount (int): override stake_amount for testing purposes
+        """
+        if stake_amount is None:
+            appInfo = await self.client.application_info(self.app_id)
+            stake_amount = StateView(appInfo["params"]["global-state"])[b"stake_amount"]
+
+        payTxn, stakeInTx = self._stake_txns(stake_amount, await self.client.params.get())
+        await self._send([payTxn.sign(self.reporter.getPrivateKey()), stakeInTx.sign(self.reporter.getPrivateKey())])
+
+    async def bid(self, bidder: Account, prediction: int) -> PendingTxnResponse:
+        """
+        Pay the bid amount and opt the bidder in with their prediction, see Scripts.bid
+
+        Args:
+            bidder (src.utils.account.Account): the account placing the bid
+            prediction (int): the value the bidder predicts the tellor oracle will report
+        """
+        payTxn, bidTxn = self._bid_txns(bidder, prediction, await self.client.params.get())
+        return await self._send([payTxn.sign(bidder.getPrivateKey()), bidTxn.sign(bidder.getPrivateKey())])
+
+    async def report(self, query_id: bytes, value: bytes) -> PendingTxnResponse:
+        """
+        Call report() on the contract to set the current value on the contract
+
+        Args:
+            - query_id (bytes): the unique identifier representing the type of data requested
+            - value (bytes): the data the reporter submits on chain
+        """
+        txn = self._report_txn(query_id, value, await self.client.params.get())
+        return await self._send([txn.sign(self.reporter.getPrivateKey())])
+
+    async def vote(self, gov_vote: int) -> PendingTxnResponse:
+        """
+        Call vote() on the contract, only callable by governance address
+
+        Args:
+            gov_vote (int, 0 or 1): binary decision to approve or reject a value
+        """
+        txn = self._vote_txn(gov_vote, await self.client.params.get())
+        return await self._send([txn.sign(self.governance_address.getPrivateKey())])
+
+    async def withdraw(self) -> PendingTxnResponse:
+        """
+        Call withdraw() on the contract to send the reporter their stake back
+        """
+        txn = self._withdraw_txn(await self.client.params.get())
+        return await self._send([txn.sign(self.reporter.getPrivateKey())])
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from algosdk import account
+from algosdk.logic import get_application_address
+
+from src.scripts.async_scripts import AsyncScripts
+from src.scripts.scripts import APP_FUNDING
+from src.scripts.scripts import BID_AMOUNT
+from src.utils.account import Account
+from src.utils.async_clients import AsyncAlgodClient
+from src.utils.testing.ledger import FakeAlgodServer
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import PendingTxnResponse
+
+
+@pytest.fixture
+def server():
+    with FakeAlgodServer(FakeLedger(roundDelay=0.01)) as server:
+        yield server
+
+
+def _account(ledger: FakeLedger) -> Account:
+    a = Account(account.generate_account()[0])
+    ledger.fund(a.getAddress(), 10_000_000_000)
+    return a
+
+
+def test_async_scripts_round_trip(server):
+    tipper, reporter, governance = (_account(server.ledger) for _ in range(3))
+
+    async def run():
+        async with AsyncAlgodClient("a" * 64, server.address) as client:
+            s = AsyncScripts(client=client, tipper=tipper, reporter=reporter, governance_address=governance)
+            app_id = await s.deploy(app_id=1, query_id="1")
+            await s.stake(stake_amount=1_000_000)
+            await s.report(b"1", b"3500")
+            await s.vote(1)
+            await s.withdraw()
+            return app_id
+
+    app_id = asyncio.run(run())
+
+    assert app_id in server.ledger.apps
+    assert server.ledger.balances[get_application_address(app_id)] == APP_FUNDING + 1_000_000
+
+
+def test_bid_on_a_deployed_app(server):
+    tipper, bidder = _account(server.ledger), _account(server.ledger)
+
+    async def run():
+        async with AsyncAlgodClient("a" * 64, server.address) as client:
+            s = AsyncScripts(client=client, tipper=tipper, reporter=None, governance_address=None)
+            await s.deploy(app_id=1, query_id="1")
+            await s.bid(bidder, 5000)
+            return s.app_address
+
+    app_address = asyncio.run(run())
+
+    assert server.ledger.balances[app_address] == APP_FUNDING + BID_AMOUNT
+
+
+def test_hundreds_of_concurrent_reports(server):
+    reporters = [_account(server.ledger) for _ in range(10)]
+
+    async def run():
+        async with AsyncAlgodClient("a" * 64, server.address) as client:
+            instances = [
+                AsyncScripts(client=client, tipper=None, reporter=r, governance_address=None, app_id=1234)
+                for r in reporters
+            ]
+            return await asyncio.gather(
+                *(s.report(b"1", str(price).encode()) for s in instances for price in range(30))
+            )
+
+    responses = asyncio.run(run())
+
+    assert len(responses) == 300
+    assert all(isinstance(r, PendingTxnResponse) and r.confirmedRound for r in responses)
+    # all reports share blocks instead of taking one block each
+    assert server.ledger.round < 30
@@ -0,0 +1,137 @@
+"""
+Place many bids on an auction app at once.
+
+Every (bidder, prediction) pair becomes a pay + OptIn group (see
+methods.bid). The groups are built and signed by a TransactionFactory,
+across processes for large batches, and streamed to algod by a Submitter,
+which keeps many groups in flight and confirms them all with one
+ConfirmationTracker. Each bid succeeds or fails on its own, so an
+underfunded bidder or one who already bid doesn't hold up the others.
+
+A bids file lists the bidders' mnemonics and their predictions:
+
+    [{"mnemonic": "word word ...", "prediction": 5000}, ...]
+
+usage: python -m src.scripts.bid APP_ID BIDS.json [--rate TPS] [--workers N] [-n NETWORK]
+"""
+import argparse
+import json
+import sys
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk.v2client.algod import AlgodClient
+
+from src.scripts.factory import TransactionFactory
+from src.scripts.factory import txidOf
+from src.scripts.submitter import DEFAULT_WORKERS
+from src.scripts.submitter import SubmitMetrics
+from src.scripts.submitter import Submitter
+from src.utils.account import Account
+from src.utils.clients import algod_client
+from src.utils.params import getParamsProvider
+
+DUPLICATE_BIDDER = "bidder listed more than once"
+
+
+class BidOutcome:
+    """
+    What happened to one bid.
+
+    Attributes:
+        address (str): the bidder
+        prediction (int): the value bid on
+        txid (str, optional): the OptIn transaction, None if the bid wasn't sent
+        error (str, optional): why the bid wasn't placed, None if it was
+    """
+
+    def __init__(self, address: str, prediction: int, txid: Optional[str], error: Optional[str] = None) -> None:
+        self.address = address
+        self.prediction = prediction
+        self.txid = txid
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return "BidOutcome({}, {}, {})".format(self.address, self.prediction, "ok" if self.ok else self.error)
+
+
+def placeBids(
+    client: AlgodClient,
+    app_id: int,
+    bids: Iterable[Tuple[Account, int]],
+    workers: int = DEFAULT_WORKERS,
+    rate: Optional[float] = None,
+    signers: Optional[int] = None,
+) -> Tuple[List[BidOutcome], SubmitMetrics]:
+    """
+    Place a bid for every (bidder, prediction) pair and wait for them to confirm.
+
+    Args:
+        client (AlgodClient): the node bids are sent to
+        app_id (int): the auction app
+        bids (iterable of (Account, int)): bidders and their predictions
+        workers (int): groups submitted concurrently
+        rate (float, optional): sustained transactions per second, unlimited if None
+        signers (int, optional): signing processes, see TransactionFactory
+    Returns:
+        list of BidOutcome, one per pair in order, and the SubmitMetrics of the run
+    """
+    bids = list(bids)
+    seen = set()
+    unique: List[Tuple[Account, int]] = []
+    for bidder, prediction in bids:
+        if bidder.getAddress() not in seen:
+            seen.add(bidder.getAddress())
+            unique.append((bidder, prediction))
+
+    factory = TransactionFactory(app_id, getParamsProvider(client).get(), workers=signers)
+    batch = factory.bid([bidder for bidder, _ in unique], [prediction for _, prediction in unique])
+    metrics = Submitter(client, workers, rate).submit(batch)
+
+    placed = {}
+    for (bidder, prediction), group in zip(unique, batch):
+        txids = [txidOf(signed) for signed in group]
+        error = next((metrics.errors[txid] for txid in txids if txid in metrics.errors), None)
+        placed[bidder.getAddress()] = BidOutcome(bidder.getAddress(), prediction, txids[-1], error)
+
+    outcomes = []
+    for bidder, prediction in bids:
+        outcome = placed.pop(bidder.getAddress(), None)
+        outcomes.append(outcome or BidOutcome(bidder.getAddress(), prediction, None, DUPLICATE_BIDDER))
+    return outcomes, metrics
+
+
+def readBids(path: str) -> List[Tuple[Account, int]]:
+    """Read a bids file of {mnemonic, prediction} objects."""
+    with open(path) as f:
+        return [(Account.FromMnemonic(entry["mnemonic"]), int(entry["prediction"])) for entry in json.load(f)]
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Place many bids on an auction app")
+    parser.add_argument("app_id", type=int)
+    parser.add_argument("bids", help="JSON file of {mnemonic, prediction} objects")
+    parser.add_argument("--rate", type=float, default=None, help="sustained transactions per second")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("-n", "--network", default=None, help="network in the nodes section of config.yml")
+    parsed = parser.parse_args(args)
+
+    outcomes, metrics = placeBids(
+        algod_client(parsed.network), parsed.app_id, readBids(parsed.bids), parsed.workers, parsed.rate
+    )
+    for outcome in outcomes:
+        print(outcome.address, outcome.prediction, "ok" if outcome.ok else outcome.error)
+    placed = sum(outcome.ok for outcome in outcomes)
+    seconds = metrics.snapshot()["seconds"]
+    print("{} of {} bids placed in {:.2f}s: {:.1f} bids/s".format(placed, len(outcomes), seconds, placed / seconds))
+    print(metrics.format())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from algosdk import account
+
+import src.utils.artifacts as artifacts
+from src.scripts.bid import DUPLICATE_BIDDER
+from src.scripts.bid import main
+from src.scripts.bid import placeBids
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.testing.provisioning import getAccountPool
+
+
+@pytest.fixture
+def scripts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getAccountPool(client).get()
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    return s
+
+
+def test_place_bids(scripts):
+    client = scripts.client
+    bidders = getAccountPool(client).getMany(20)
+    unfunded = Account(account.generate_account()[0])
+    bids = [(bidder, 100 + i) for i, bidder in enumerate(bidders)] + [(unfunded, 1), (bidders[0], 7)]
+
+    outcomes, metrics = placeBids(client, scripts.app_id, bids)
+
+    assert [o.ok for o in outcomes] == [True] * 20 + [False, False]
+    assert outcomes[-1].error == DUPLICATE_BIDDER and outcomes[-1].txid is None
+    assert outcomes[-2].txid is not None
+    assert metrics.confirmed == 40
+    scripts.state.load()
+    assert scripts.state[b"num_bidders"] == 20
+    for bidder, prediction in bids[:20]:
+        assert scripts.state.getLocal(bidder.getAddress())[b"prediction"] == prediction
+
+
+def test_cli(scripts, tmp_path, capsys):
+    bidders = getAccountPool(scripts.client).getMany(3)
+    path = tmp_path / "bids.json"
+    path.write_text(json.dumps([{"mnemonic": b.getMnemonic(), "prediction": 10} for b in bidders]))
+
+    main([str(scripts.app_id), str(path)])
+
+    out = capsys.readouterr().out
+    assert "3 of 3 bids placed" in out
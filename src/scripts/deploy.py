@@ -1,20 +1,86 @@
 """
 deployment script for testnet or devnet
+
+deploys an auction app for every (tellor app id, query id) pair in the
+`deployments` list of config.yml:
+
+    deployments:
+      - {tellor_app_id: 1234, query_id: "btc/usd"}
+
+or, without one, for the query id from -qid on tellor_app_id[network].
+the programs are compiled once for all the apps, the creates are sent in
+atomic groups from a pool of workers, the new app accounts are funded once
+the creates confirm, and the new app ids are written to the app registry
+(apps.json), where get_configs reads them from.
 """
 import os
 import sys
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
 
 from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
+from src.scripts.factory import TransactionFactory
 from src.scripts.scripts import Scripts
+from src.scripts.submitter import DEFAULT_WORKERS
+from src.scripts.submitter import Submitter
 from src.utils.account import Account
+from src.utils.clients import algod_client
 from src.utils.configs import get_configs
-from src.utils.testing.resources import fundAccount
-from src.utils.testing.resources import getTemporaryAccount
+from src.utils.configs import REGISTRY_PATH
+from src.utils.configs import write_registry
+from src.utils.params import getParamsProvider
+from src.utils.testing.provisioning import getAccountPool
+from src.utils.util import PendingTxnResponse
 
 
-def deploy(query_id: str, query_data: str, network: str):
+def deployApps(
+    client: AlgodClient, tipper: Account, apps: Sequence[Tuple[int, str]], workers: int = DEFAULT_WORKERS
+) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    Deploy an auction app for every (tellor app id, query id) pair, and fund each app account with APP_FUNDING.
+
+    Args:
+        client (AlgodClient): the node apps are deployed on
+        tipper (src.utils.account.Account): the account creating the apps
+        apps (sequence of (int, str)): the tellor app and query id of every app, one app per query id
+        workers (int): groups of creates submitted concurrently
+    Returns:
+        the app id of every query id deployed, and the reason every query id failed to deploy or be funded
+    """
+    query_ids = [query_id for _, query_id in apps]
+    if len(set(query_ids)) != len(query_ids):
+        raise ValueError("every query id can only be deployed once")
+
+    approval, clear = Scripts(client, tipper, tipper, tipper).get_contracts(client)
+    factory = TransactionFactory(None, getParamsProvider(client).get(), tipper=tipper)
+    batch = factory.create(approval, clear, apps)
+    queryOf = dict(zip(batch.txids, query_ids))
+
+    deployed: Dict[str, int] = {}
+
+    def confirmed(txid: str, response: PendingTxnResponse) -> None:
+        deployed[queryOf[txid]] = response.applicationIndex
+
+    submitter = Submitter(client, workers)
+    metrics = submitter.submit(batch, on_confirmed=confirmed)
+    failed = {queryOf[txid]: reason for txid, reason in metrics.errors.items() if txid in queryOf}
+
+    # bids to an app account below the minimum balance are rejected, so every new app is funded
+    funded = [query_id for query_id in query_ids if query_id in deployed]
+    funding = factory.fund([deployed[query_id] for query_id in funded])
+    fundingOf = dict(zip(funding.txids, funded))
+    metrics = submitter.submit(funding)
+    for txid, reason in metrics.errors.items():
+        if txid in fundingOf:
+            failed[fundingOf[txid]] = "app {} created but not funded, {}".format(deployed[fundingOf[txid]], reason)
+    return deployed, failed
+
+
+def deploy(apps: List[Tuple[int, str]], network: str):
     """
     quick deployment scheme, works on:
     - local private network
@@ -23,35 +89,34 @@ def deploy(query_id: str, query_data: str, network: str):
 
     load_dotenv()
 
-    algo_address = "http://localhost:4001"
-    algo_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-    client = AlgodClient(algod_address=algo_address, algod_token=algo_token)
+    client = algod_client(network)
 
     print("current network: ", network)
     if network == "testnet":
-        reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
+        tipper = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
     elif network == "devnet":
-        tipper = getTemporaryAccount(client)
-        reporter = getTemporaryAccount(client)
-        governance = getTemporaryAccount(client)
-
-        fundAccount(client, reporter.addr)
-        fundAccount(client, reporter.addr)
-        fundAccount(client, reporter.addr)
+        tipper = getAccountPool(client).get()
     else:
         raise Exception("invalid network selected")
 
-    s = Scripts(client=client, tipper=tipper, reporter=reporter, governance_address=governance)
+    deployed, failed = deployApps(client, tipper, apps)
+    write_registry(network, deployed)
 
-    app_id = s.deploy_tellor_flex(
-        query_id=query_id,
-        query_data=query_data,
-    )
+    for query_id, app_id in sorted(deployed.items()):
+        print(f"query id {query_id}: app id {app_id}")
+    for query_id, reason in sorted(failed.items()):
+        print(f"query id {query_id}: not deployed, {reason}")
+    print(f"{len(deployed)} of {len(apps)} apps deployed on {network}, app ids written to {REGISTRY_PATH}")
 
-    print(f"App deployed on {network}. App id: ", app_id)
-    print("please update config.yaml with new app_id.")
+
+def main(args: List[str]) -> None:
+    config = get_configs(args)
+    if config.get("deployments"):
+        apps = [(int(d["tellor_app_id"]), str(d["query_id"])) for d in config.deployments]
+    else:
+        apps = [(int(config.tellor_app_id[config.network]), config.query_id)]
+    deploy(apps, network=config.network)
 
 
-config = get_configs(sys.argv[1:])
-deploy(query_id=config.query_id, query_data=config.query_data, network=config.network)
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+import pytest
+
+import src.utils.artifacts as artifacts
+from src.scripts.deploy import deployApps
+from src.scripts.scripts import APP_FUNDING
+from src.scripts.scripts import Scripts
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.state import getAppState
+from src.utils.testing.provisioning import getAccountPool
+
+
+@pytest.fixture
+def tipper(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    return getAccountPool(algod_client()).get()
+
+
+def test_deploy_apps(tipper, node):
+    client = algod_client()
+    apps = [(100 + i, "query-{}".format(i)) for i in range(40)]
+    client.calls.clear()
+
+    deployed, failed = deployApps(client, tipper, apps)
+
+    assert failed == {}
+    assert sorted(deployed) == sorted(query_id for _, query_id in apps)
+    assert len(set(deployed.values())) == 40
+    for tellor_app_id, query_id in apps:
+        state = getAppState(client, deployed[query_id])
+        assert state[b"tellor_app_id"] == tellor_app_id
+        assert state[b"tellor_query_id"] == query_id.encode()
+    # 40 creates and 40 fundings in 3 atomic groups each, compiled once
+    assert client.calls["submit"] == 6
+    assert client.calls["compile"] <= 2
+
+
+def test_deployed_apps_take_bids(tipper, node):
+    client = algod_client()
+
+    deployed, failed = deployApps(client, tipper, [(100, "btc/usd")])
+
+    scripts = Scripts(client, tipper, tipper, tipper, deployed["btc/usd"])
+    assert client.account_info(scripts.app_address)["amount"] == APP_FUNDING
+    scripts.bid(getAccountPool(client).get(), 3400)
+    assert client.account_info(scripts.app_address)["amount"] == APP_FUNDING + 1000
+
+
+def test_deploy_apps_refuses_repeated_query_ids(tipper):
+    with pytest.raises(ValueError):
+        deployApps(algod_client(), tipper, [(1, "a"), (2, "a")])
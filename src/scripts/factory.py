@@ -0,0 +1,243 @@
+"""
+Offline, bulk construction and signing of Scripts transactions.
+
+A TransactionFactory builds the same transactions as Scripts (through the
+ScriptsBase builders) for whole arrays of inputs at once, from suggested
+params given up front, so it needs no node and can run on an air-gapped
+machine. Signing is ed25519 over b"TX" + the msgpack of each transaction;
+large batches are signed across a process pool.
+
+Batches are written as concatenated msgpack SignedTxn objects, the format
+`goal clerk sign` produces, ready for a submitter to stream to algod.
+Transactions of one atomic group are adjacent and share their group id.
+"""
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import msgpack
+from algosdk import encoding
+from algosdk.future import transaction
+from nacl.signing import SigningKey
+
+from src.scripts.scripts import APP_FUNDING
+from src.scripts.scripts import ScriptsBase
+from src.utils.account import Account
+
+# batches smaller than this are signed in-process, a pool costs more to start
+POOL_THRESHOLD = 2000
+CHUNK_SIZE = 500
+# transactions in an atomic group, algod's limit
+MAX_GROUP_SIZE = 16
+
+# (base64 private key, msgpack of the unsigned transaction)
+SigningJob = Tuple[str, bytes]
+
+
+def signRaw(jobs: Sequence[SigningJob]) -> List[bytes]:
+    """Sign msgpack-encoded transactions, returning msgpack-encoded SignedTxns."""
+    # signing keys are only kept for the call, so secret keys don't outlive the batch in memory
+    keys: Dict[str, SigningKey] = {}
+    signed = []
+    for privateKey, raw in jobs:
+        key = keys.get(privateKey)
+        if key is None:
+            key = keys[privateKey] = SigningKey(base64.b64decode(privateKey)[:32])
+        signature = key.sign(b"TX" + raw).signature
+        signed.append(msgpack.packb({"sig": signature, "txn": msgpack.unpackb(raw, raw=False)}, use_bin_type=True))
+    return signed
+
+
+def txidOf(signed: bytes) -> str:
+    """Return the txid of a msgpack-encoded SignedTxn."""
+    txn = msgpack.unpackb(signed, raw=False)["txn"]
+    digest = encoding.checksum(b"TX" + msgpack.packb(txn, use_bin_type=True))
+    return base64.b32encode(digest).decode().strip("=")
+
+
+def _chunks(length: int, size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, length, size):
+        yield start, min(start + size, length)
+
+
+def _atomicGroups(
+    txns: List[transaction.Transaction], signer: Account, size: int
+) -> List[List[Tuple[transaction.Transaction, Account]]]:
+    """Group `txns` atomically, `size` at a time, all signed by `signer`."""
+    groups = []
+    for start, end in _chunks(len(txns), size):
+        group = txns[start:end]
+        if len(group) > 1:
+            group = transaction.assign_group_id(group)
+        groups.append([(txn, signer) for txn in group])
+    return groups
+
+
+class SignedBatch:
+    """
+    Signed transaction groups, in submission order.
+
+    Attributes:
+        groups (list of list of bytes): msgpack-encoded SignedTxns, one list per atomic group
+    """
+
+    def __init__(self, groups: List[List[bytes]]) -> None:
+        self.groups = groups
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self.groups)
+
+    def __iter__(self) -> Iterator[List[bytes]]:
+        return iter(self.groups)
+
+    @property
+    def txids(self) -> List[str]:
+        """The txid of every transaction, group by group."""
+        return [txidOf(signed) for group in self.groups for signed in group]
+
+    def write(self, path: str) -> None:
+        """Write the batch as concatenated msgpack SignedTxns."""
+        with open(path, "wb") as f:
+            for group in self.groups:
+                f.write(b"".join(group))
+
+
+def streamSignedFile(path: str) -> Iterator[List[bytes]]:
+    """
+    Read a file of concatenated msgpack SignedTxns, e.g. from SignedBatch.write or `goal clerk sign`, lazily.
+
+    Yields:
+        list: the msgpack-encoded SignedTxns of one group, adjacent transactions with the same group id together
+    """
+    with open(path, "rb") as f:
+        group: List[bytes] = []
+        lastGroup = None
+        for stxn in msgpack.Unpacker(f, raw=False):
+            groupID = stxn["txn"].get("grp")
+            if group and (groupID is None or groupID != lastGroup):
+                yield group
+                group = []
+            group.append(msgpack.packb(stxn, use_bin_type=True))
+            lastGroup = groupID
+        if group:
+            yield group
+
+
+def readSignedFile(path: str) -> List[List[bytes]]:
+    """Read a whole signed transaction file, see streamSignedFile."""
+    return list(streamSignedFile(path))
+
+
+class TransactionFactory(ScriptsBase):
+    """
+    Builds and signs Scripts transactions in bulk, without a node.
+
+    Every method takes parallel input arrays and returns a SignedBatch with
+    one group per input row. Identical rows produce identical transactions
+    (and txids), which algod accepts only once per validity window.
+
+    Args:
+        app_id (int): the app called
+        sp (SuggestedParams): params for every transaction, e.g. fetched earlier on a connected machine
+        tipper, reporter, governance_address (Account, optional): default signers, as in Scripts
+        workers (int, optional): signing processes, os.cpu_count() by default
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        sp: transaction.SuggestedParams,
+        tipper: Optional[Account] = None,
+        reporter: Optional[Account] = None,
+        governance_address: Optional[Account] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        super().__init__(None, tipper, reporter, governance_address, app_id)
+        self.sp = sp
+        self.workers = workers or os.cpu_count() or 1
+
+    def sign(self, groups: Sequence[Sequence[Tuple[transaction.Transaction, Account]]]) -> SignedBatch:
+        """Sign groups of (transaction, signer) pairs, across processes for large batches."""
+        jobs = [
+            (signer.getPrivateKey(), base64.b64decode(encoding.msgpack_encode(txn)))
+            for group in groups
+            for txn, signer in group
+        ]
+        if len(jobs) < POOL_THRESHOLD or self.workers == 1:
+            signed = signRaw(jobs)
+        else:
+            chunks = [jobs[start:end] for start, end in _chunks(len(jobs), CHUNK_SIZE)]
+            with ProcessPoolExecutor(self.workers) as executor:
+                signed = [stxn for chunk in executor.map(signRaw, chunks) for stxn in chunk]
+
+        batch, start = [], 0
+        for group in groups:
+            end = start + len(group)
+            batch.append(signed[start:end])
+            start = end
+        return SignedBatch(batch)
+
+    def create(
+        self,
+        approval: bytes,
+        clear: bytes,
+        apps: Sequence[Tuple[int, str]],
+        group_size: int = MAX_GROUP_SIZE,
+    ) -> SignedBatch:
+        """
+        App creates of the same compiled programs for (tellor app id, query id) pairs, from the tipper.
+
+        The creates are grouped atomically, `group_size` at a time; creates
+        with the same pair are identical, so each pair should appear once.
+        """
+        txns = [self._deploy_txn(approval, clear, app_id, query_id, self.sp) for app_id, query_id in apps]
+        return self.sign(_atomicGroups(txns, self.tipper, group_size))
+
+    def fund(self, app_ids: Sequence[int], amount: int = APP_FUNDING, group_size: int = MAX_GROUP_SIZE) -> SignedBatch:
+        """Payments of `amount` from the tipper to the account of every app, grouped like create."""
+        txns = [self._fund_app_txn(self.sp, app_id, amount) for app_id in app_ids]
+        return self.sign(_atomicGroups(txns, self.tipper, group_size))
+
+    def stake(self, reporters: Sequence[Account], amounts: Sequence[int]) -> SignedBatch:
+        """A pay + stake() group per reporter."""
+        return self.sign(
+            [
+                [(txn, reporter) for txn in self._stake_txns(amount, self.sp, reporter)]
+                for reporter, amount in zip(reporters, amounts)
+            ]
+        )
+
+    def bid(self, bidders: Sequence[Account], predictions: Sequence[int]) -> SignedBatch:
+        """A pay + OptIn bid group per bidder."""
+        return self.sign(
+            [
+                [(txn, bidder) for txn in self._bid_txns(bidder, prediction, self.sp)]
+                for bidder, prediction in zip(bidders, predictions)
+            ]
+        )
+
+    def report(
+        self, query_ids: Sequence[bytes], values: Sequence[bytes], reporters: Optional[Sequence[Account]] = None
+    ) -> SignedBatch:
+        """A report() call per (query id, value), from `reporters` or the default reporter."""
+        reporters = reporters or [self.reporter] * len(values)
+        return self.sign(
+            [
+                [(self._report_txn(query_id, value, self.sp, reporter), reporter)]
+                for query_id, value, reporter in zip(query_ids, values, reporters)
+            ]
+        )
+
+    def vote(self, votes: Sequence[int]) -> SignedBatch:
+        """A vote() call per vote, from the governance address."""
+        return self.sign([[(self._vote_txn(vote, self.sp), self.governance_address)] for vote in votes])
+
+    def withdraw(self, reporters: Sequence[Account]) -> SignedBatch:
+        """A withdraw() call per reporter."""
+        return self.sign([[(self._withdraw_txn(self.sp, reporter), reporter)] for reporter in reporters])
@@ -0,0 +1,89 @@
+import base64
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+
+import src.scripts.factory as factory
+import src.utils.artifacts as artifacts
+from src.scripts.factory import readSignedFile
+from src.scripts.factory import TransactionFactory
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.params import getParamsProvider
+from src.utils.testing.provisioning import getAccountPool
+
+
+@pytest.fixture
+def scripts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getAccountPool(client).get()
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    return s
+
+
+def _factory(scripts, **kwargs):
+    return TransactionFactory(
+        scripts.app_id,
+        getParamsProvider(scripts.client).get(),
+        reporter=scripts.reporter,
+        governance_address=scripts.governance_address,
+        **kwargs,
+    )
+
+
+def test_signatures_match_the_sdk(scripts):
+    f = _factory(scripts)
+    sp = f.sp
+
+    batch = f.report([b"1"] * 3, [b"10", b"11", b"12"])
+
+    for signed, value in zip(batch, [b"10", b"11", b"12"]):
+        expected = scripts._report_txn(b"1", value, sp).sign(scripts.reporter.getPrivateKey())
+        assert signed == [base64.b64decode(encoding.msgpack_encode(expected))]
+    assert batch.txids[0] == scripts._report_txn(b"1", b"10", sp).get_txid()
+
+
+def test_batched_bids_run_the_contract(scripts, node):
+    bidders = getAccountPool(scripts.client).getMany(20)
+
+    batch = _factory(scripts).bid(bidders, list(range(20)))
+    for group in batch:
+        scripts.client.send_raw_transaction(base64.b64encode(b"".join(group)))
+
+    assert len(batch) == 40
+    assert all(txid in node.ledger.confirmed for txid in batch.txids)
+    scripts.state.load()
+    assert scripts.state[b"num_bidders"] == 20
+
+
+def test_signed_file_round_trip(scripts, tmp_path):
+    reporters = [Account(account.generate_account()[0]) for _ in range(3)]
+    f = _factory(scripts)
+    stake = f.stake(reporters, [1_000_000] * 3)
+    reports = f.report([b"1"] * 3, [b"1", b"2", b"3"], reporters)
+    path = tmp_path / "stake.stxn"
+
+    stake.write(str(path))
+    with open(path, "ab") as out:
+        for group in reports:
+            out.write(b"".join(group))
+
+    groups = readSignedFile(str(path))
+    assert groups == stake.groups + reports.groups
+    assert [len(g) for g in groups] == [2, 2, 2, 1, 1, 1]
+
+
+def test_process_pool_signing(scripts, monkeypatch):
+    values = [str(i).encode() for i in range(300)]
+    inline = _factory(scripts, workers=1).report([b"1"] * 300, values)
+
+    monkeypatch.setattr(factory, "POOL_THRESHOLD", 0)
+    monkeypatch.setattr(factory, "CHUNK_SIZE", 64)
+    pooled = _factory(scripts, workers=2).report([b"1"] * 300, values)
+
+    assert pooled.groups == inline.groups
@@ -1,10 +1,10 @@
 import os
 
-from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
 from src.utils.account import Account
-from src.utils.testing.resources import fundAccount
+from src.utils.clients import algod_client
+from src.utils.testing.provisioning import fundAccounts
 
 
 def fund_devnet_accounts():
@@ -14,10 +14,7 @@ def fund_devnet_accounts():
     """
     load_dotenv()
 
-    algo_address = "http://localhost:4001"
-    algo_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-    client = AlgodClient(algod_address=algo_address, algod_token=algo_token)
+    client = algod_client("devnet")
 
     reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
     tipper = Account.FromMnemonic(os.getenv("TIPPER_MNEMONIC"))
@@ -25,8 +22,7 @@ def fund_devnet_accounts():
 
     accounts = [reporter, tipper, governance]
 
-    for i in accounts:
-        fundAccount(client, i.addr)
+    fundAccounts(client, [a.addr for a in accounts])
 
     print("devnet accounts funded")
 
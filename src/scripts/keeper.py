@@ -0,0 +1,290 @@
+"""
+Keeper that settles many prediction games (auction app instances) as their tellor values come in.
+
+Anyone can settle a bid with a NoOp call naming the bidder (see
+methods.settle_bidder), so the keeper settles every bid of a game with its
+own key and pays the fees; it never holds the bidders' keys. Every poll
+reads the `value` of each linked tellor app once, however many games share
+it; a game whose value changed since it was tracked is ready, and its
+remaining bids are settled in atomic groups of up to GROUP_SIZE calls to
+that app. The groups of all ready games are signed and sent from a worker
+pool with at most `max_in_flight` of them unconfirmed at once, and one
+ConfirmationTracker confirms them all.
+
+A game that fails is retried after a backoff (in rounds) without holding up
+the others, and given up on after MAX_FAILURES attempts.
+
+A games file lists the apps and the addresses of their bidders:
+
+    [{"app_id": 1234, "bidders": ["ADDRESS", ...]}, ...]
+
+and the keeper's account is read from KEEPER_MNEMONIC.
+
+usage: python -m src.scripts.keeper GAMES.json [-n network]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from src.scripts.scripts import ScriptsBase
+from src.utils.account import Account
+from src.utils.clients import algod_client
+from src.utils.params import getParamsProvider
+from src.utils.util import ConfirmationTracker
+from src.utils.util import decodeLocalStates
+from src.utils.util import StateView
+
+GROUP_SIZE = 16
+DEFAULT_WORKERS = 8
+# unconfirmed settlement groups allowed at once
+MAX_IN_FLIGHT = 64
+MAX_FAILURES = 8
+MAX_BACKOFF_ROUNDS = 64
+
+
+class Game:
+    """
+    One auction app the keeper settles.
+
+    Attributes:
+        app_id (int): the auction app
+        tellor_app_id (int): the app whose `value` settles it
+        bidders (list): addresses of the bidders not settled yet
+        baseline (bytes, optional): the tellor value when tracking started, None to settle on any value
+        failures (int): failed attempts in a row
+        retry_round (int): round before which a failed game isn't retried
+        settled_round (int, optional): round the last bid was settled in
+    """
+
+    def __init__(
+        self, app_id: int, tellor_app_id: int, bidders: Sequence[str], baseline: Optional[bytes] = None
+    ) -> None:
+        self.app_id = app_id
+        self.tellor_app_id = tellor_app_id
+        self.bidders: List[str] = list(bidders)
+        self.baseline = baseline
+        self.scripts = ScriptsBase(None, None, None, None, app_id)
+
+        self.failures = 0
+        self.retry_round = 0
+        self.last_error: Optional[str] = None
+        self.settled_round: Optional[int] = None
+        # whether to drop bids settled or cleared by their bidders before the next attempt
+        self.recheck = False
+
+    @property
+    def status(self) -> str:
+        if not self.bidders:
+            return "settled"
+        if self.failures >= MAX_FAILURES:
+            return "failed"
+        return "waiting"
+
+    def __repr__(self) -> str:
+        return "Game({}, {} bidders, {})".format(self.app_id, len(self.bidders), self.status)
+
+
+class SettlementKeeper:
+    """
+    Settles every tracked game once its tellor value updates.
+
+    Args:
+        client (AlgodClient): the node games are read from and settled on
+        keeper (Account): signs the settlement calls and pays their fees
+        workers (int): games signed and sent concurrently
+        max_in_flight (int): unconfirmed settlement groups allowed at once
+        timeout (int): rounds a settlement group may take to confirm
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        keeper: Account,
+        workers: int = DEFAULT_WORKERS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        timeout: int = 10,
+    ) -> None:
+        self.client = client
+        self.keeper = keeper
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.games: Dict[int, Game] = {}
+        self._stop = threading.Event()
+
+    def track(self, app_id: int, bidders: Sequence[str], wait_for_update: bool = True) -> Game:
+        """
+        Settle the bids of `bidders` (addresses) in `app_id` once its tellor value changes.
+
+        Args:
+            wait_for_update (bool): if False, settle as soon as the tellor app has any value
+        """
+        state = StateView(self.client.application_info(app_id)["params"].get("global-state", []))
+        tellor_app_id = state[b"tellor_app_id"]
+        baseline = self._tellor_value(tellor_app_id) if wait_for_update else None
+        game = self.games[app_id] = Game(app_id, tellor_app_id, bidders, baseline)
+        return game
+
+    def untrack(self, app_id: int) -> None:
+        self.games.pop(app_id, None)
+
+    def _tellor_value(self, tellor_app_id: int) -> Optional[bytes]:
+        try:
+            info = self.client.application_info(tellor_app_id)
+        except AlgodHTTPError:
+            return None
+        value = StateView(info["params"].get("global-state", [])).get(b"value")
+        return value if isinstance(value, bytes) else None
+
+    def ready(self, round: int) -> List[Game]:
+        """The games whose tellor value changed since they were tracked, due for an attempt by `round`."""
+        pending = [g for g in self.games.values() if g.status == "waiting" and g.retry_round <= round]
+        values = {
+            tellor_app_id: self._tellor_value(tellor_app_id) for tellor_app_id in {g.tellor_app_id for g in pending}
+        }
+        return [g for g in pending if values[g.tellor_app_id] is not None and values[g.tellor_app_id] != g.baseline]
+
+    def poll(self) -> List[Game]:
+        """
+        Settle every ready game and wait for the settlements to confirm.
+
+        Returns:
+            list: the games attempted, see Game.status for how each went
+        """
+        round = self.client.status()["last-round"]
+        games = self.ready(round)
+        if not games:
+            return []
+
+        sp = getParamsProvider(self.client).get()
+        tracker = ConfirmationTracker(self.client, self.timeout)
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        tracker.start()
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                for game, future in [(g, executor.submit(self._settle, g, sp, tracker, slots)) for g in games]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self._failed(game, e, round)
+        finally:
+            tracker.stop()
+        return games
+
+    def _settle(
+        self,
+        game: Game,
+        sp: transaction.SuggestedParams,
+        tracker: ConfirmationTracker,
+        slots: threading.BoundedSemaphore,
+    ) -> None:
+        if game.recheck:
+            self._drop_settled(game)
+
+        bidders = list(game.bidders)
+        sent: List[Tuple[List[str], Future]] = []
+        error: Optional[Exception] = None
+        for start in range(0, len(bidders), GROUP_SIZE):
+            end = start + GROUP_SIZE
+            chunk = bidders[start:end]
+            txns = [game.scripts._settle_bidder_txn(self.keeper, bidder, game.tellor_app_id, sp) for bidder in chunk]
+            if len(txns) > 1:
+                txns = transaction.assign_group_id(txns)
+            signed = [txn.sign(self.keeper.getPrivateKey()) for txn in txns]
+
+            slots.acquire()
+            try:
+                self.client.send_transactions(signed)
+            except Exception as e:
+                slots.release()
+                error = e
+                break
+            sent.append((chunk, tracker.track(signed[-1].get_txid(), callback=lambda _: slots.release())))
+
+        for chunk, future in sent:
+            try:
+                response = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            game.bidders = [b for b in game.bidders if b not in chunk]
+            if not game.bidders:
+                game.settled_round = response.confirmedRound
+
+        if error is not None:
+            raise error
+        game.failures = 0
+        game.last_error = None
+
+    def _failed(self, game: Game, e: Exception, round: int) -> None:
+        game.failures += 1
+        game.last_error = str(e)
+        game.retry_round = round + min(2**game.failures, MAX_BACKOFF_ROUNDS)
+        # e.g. a bidder settled or cleared state on their own
+        game.recheck = True
+
+    def _drop_settled(self, game: Game) -> None:
+        states = decodeLocalStates([self.client.account_info(address) for address in game.bidders], game.app_id)
+        game.bidders = [b for b in game.bidders if b in states and b"prediction" in states[b]]
+        game.recheck = False
+
+    def run(self) -> None:
+        """Poll once a round until stop() is called or every game is settled or given up on."""
+        self._stop.clear()
+        round = self.client.status()["last-round"]
+        while not self._stop.is_set() and any(g.status == "waiting" for g in self.games.values()):
+            self.poll()
+            round = self.client.status_after_block(round)["last-round"]
+
+    def stop(self) -> None:
+        """Stop run() after the current poll."""
+        self._stop.set()
+
+    def summary(self) -> Dict[str, Any]:
+        """Number of games per status, and the last error of every game that has one."""
+        counts: Dict[str, int] = {}
+        for game in self.games.values():
+            counts[game.status] = counts.get(game.status, 0) + 1
+        return {
+            "games": counts,
+            "errors": {g.app_id: g.last_error for g in self.games.values() if g.last_error is not None},
+        }
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Settle prediction games as their tellor values update")
+    parser.add_argument("games", help="JSON file of {app_id, bidders: [address, ...]} objects")
+    parser.add_argument("-n", "--network", default=None, help="network in the nodes section of config.yml")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parsed = parser.parse_args(args)
+
+    account = Account.FromMnemonic(os.getenv("KEEPER_MNEMONIC"))
+    keeper = SettlementKeeper(algod_client(parsed.network), account, workers=parsed.workers)
+    with open(parsed.games) as f:
+        for entry in json.load(f):
+            keeper.track(entry["app_id"], entry["bidders"])
+    print("tracking", len(keeper.games), "games")
+
+    try:
+        keeper.run()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(keeper.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,134 @@
+import base64
+
+import pytest
+from algosdk.future import transaction
+
+import src.utils.artifacts as artifacts
+from src.scripts.keeper import SettlementKeeper
+from src.scripts.scripts import Scripts
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.params import getParamsProvider
+from src.utils.testing.auction import TELLOR_STUB
+from src.utils.testing.provisioning import getAccountPool
+from src.utils.util import decodeLocalStates
+from src.utils.util import waitForTransaction
+
+
+@pytest.fixture
+def tipper(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    return getAccountPool(algod_client()).get()
+
+
+def _tellor(client, tipper, value):
+    """A stand-in tellor app reporting `value`; every call to it reports its first argument."""
+    stub = base64.b64decode(client.compile(TELLOR_STUB)["result"])
+    txn = transaction.ApplicationCreateTxn(
+        sender=tipper.getAddress(),
+        sp=getParamsProvider(client).get(),
+        on_complete=transaction.OnComplete.NoOpOC,
+        approval_program=stub,
+        clear_program=stub,
+        global_schema=transaction.StateSchema(num_uints=0, num_byte_slices=1),
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0),
+        app_args=[value.to_bytes(8, "big")],
+    )
+    client.send_transaction(txn.sign(tipper.getPrivateKey()))
+    return waitForTransaction(client, txn.get_txid()).applicationIndex
+
+
+def _report(client, tipper, tellor_app_id, value):
+    txn = transaction.ApplicationNoOpTxn(
+        tipper.getAddress(), getParamsProvider(client).get(), tellor_app_id, app_args=[value.to_bytes(8, "big")]
+    )
+    client.send_transaction(txn.sign(tipper.getPrivateKey()))
+    waitForTransaction(client, txn.get_txid())
+
+
+def _game(client, tipper, tellor_app_id, predictions):
+    """Deploy an auction app on `tellor_app_id` and have a new bidder bid on each prediction."""
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=tellor_app_id, query_id="1")
+    bidders = getAccountPool(client).getMany(len(predictions))
+    sp = getParamsProvider(client).get()
+    for bidder, prediction in zip(bidders, predictions):
+        txns = s._bid_txns(bidder, prediction, sp)
+        client.send_transactions([txn.sign(bidder.getPrivateKey()) for txn in txns])
+    return s.app_id, bidders
+
+
+def _balance(client, address):
+    return client.account_info(address)["amount"]
+
+
+def test_settles_every_game_once_the_value_updates(tipper, node):
+    client = algod_client()
+    tellor = _tellor(client, tipper, 1000)
+    games = [_game(client, tipper, tellor, [900 + i, 2000, 5000]) for i in range(3)]
+    keeper = SettlementKeeper(client, tipper)
+    for app_id, bidders in games:
+        keeper.track(app_id, [b.getAddress() for b in bidders])
+
+    assert keeper.poll() == []
+
+    _report(client, tipper, tellor, 1000)
+    assert keeper.poll() == []
+
+    _report(client, tipper, tellor, 950)
+    client.calls.clear()
+    settled = keeper.poll()
+
+    assert [g.status for g in settled] == ["settled"] * 3
+    # one read of the shared tellor app, not one per game
+    assert client.calls["applicationInfo"] == 1
+    for app_id, bidders in games:
+        assert _balance(client, keeper.games[app_id].scripts.app_address) == 0
+        # settled with the keeper's key alone, the bids are gone from the bidders' local state
+        states = decodeLocalStates([client.account_info(b.getAddress()) for b in bidders], app_id)
+        assert all(b"prediction" not in state for state in states.values())
+
+
+def test_groups_and_back_pressure(tipper, node):
+    client = algod_client()
+    tellor = _tellor(client, tipper, 1)
+    app_id, bidders = _game(client, tipper, tellor, list(range(40)))
+    keeper = SettlementKeeper(client, tipper, max_in_flight=1)
+    keeper.track(app_id, [b.getAddress() for b in bidders])
+
+    _report(client, tipper, tellor, 7)
+    client.calls.clear()
+    (game,) = keeper.poll()
+
+    assert game.status == "settled"
+    # 40 settle calls in groups of 16
+    assert client.calls["submit"] == 3
+
+
+def test_a_failing_game_does_not_hold_up_the_others(tipper, node):
+    client = algod_client()
+    tellor = _tellor(client, tipper, 1)
+    broken, brokenBidders = _game(client, tipper, tellor, [1, 2])
+    healthy, healthyBidders = _game(client, tipper, tellor, [3, 4])
+    keeper = SettlementKeeper(client, tipper)
+    keeper.track(broken, [b.getAddress() for b in brokenBidders])
+    keeper.track(healthy, [b.getAddress() for b in healthyBidders])
+
+    _report(client, tipper, tellor, 2)
+    # a bidder settles on their own, the keeper's group for that game is now rejected
+    leaver = keeper.games[broken]
+    txn = leaver.scripts._settle_txn(brokenBidders[0], tellor, getParamsProvider(client).get())
+    client.send_transaction(txn.sign(brokenBidders[0].getPrivateKey()))
+    waitForTransaction(client, txn.get_txid())
+
+    keeper.poll()
+    assert keeper.games[healthy].status == "settled"
+    assert leaver.status == "waiting" and leaver.failures == 1 and leaver.last_error
+
+    # not retried before its backoff is over
+    assert keeper.ready(client.status()["last-round"]) == []
+    client.status_after_block(leaver.retry_round)
+
+    keeper.poll()
+    assert leaver.status == "settled"
+    assert keeper.summary() == {"games": {"settled": 2}, "errors": {}}
@@ -2,12 +2,12 @@ import os
 import sys
 from typing import Dict
 
-from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
 from src.assets.asset import Asset
 from src.scripts.scripts import Scripts
 from src.utils.account import Account
+from src.utils.clients import algod_client
 from src.utils.configs import get_configs
 from src.utils.util import getBalances
 
@@ -21,10 +21,7 @@ def report(app_id: int, query_id: str, network: str, sources: Dict):
     asset.update_price()
     value = asset.price
 
-    algo_address = "http://localhost:4001"
-    algo_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-    client = AlgodClient(algod_address=algo_address, algod_token=algo_token)
+    client = algod_client(network)
 
     print("current network: ", network)
     reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
@@ -0,0 +1,357 @@
+"""
+Long-running reporter that keeps every feed in config.yml up to date.
+
+config.yml and the reporter mnemonic are loaded once; the algod client,
+reporter account and suggested params are reused for every cycle. Each
+query id in `apis` is a Feed with its own cadence, reported to the app
+deployed for it (see src.scripts.deploy and its app registry); a query id
+with no deployed app is rejected at startup. Feeds that fall due
+together are priced in one aggregation pass and reported together, and a
+price is only reported when it moved by more than the feed's deviation
+threshold since the last report (or its heartbeat has passed). Optional
+per-feed settings go in a `reporter` section, e.g.
+
+    reporter:
+      interval: 60          # seconds between price checks
+      deviation: 0.005      # report on a 0.5% move...
+      heartbeat: 3600       # ...or at least once an hour
+      metrics_interval: 300 # seconds between metrics printouts
+      metrics_port: 9100    # serve node round-trip metrics for Prometheus
+      feeds:
+        ETH/USD:
+          interval: 15
+
+usage: python -m src.scripts.reporter [-n network]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from src.assets.asset import Asset
+from src.assets.asset import PriceError
+from src.assets.asset import update_prices
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.clients import algod_client
+from src.utils.configs import get_configs
+from src.utils.configs import read_registry
+from src.utils.metrics import enable as enable_metrics
+from src.utils.metrics import serve as serve_metrics
+
+DEFAULT_INTERVAL = 60.0
+DEFAULT_DEVIATION = 0.0
+DEFAULT_METRICS_INTERVAL = 300.0
+
+logger = logging.getLogger(__name__)
+
+
+class FeedMetrics:
+    """Counters and latencies of one feed since the reporter started."""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.checks = 0
+        self.reports = 0
+        self.skipped = 0
+        self.failures = 0
+        self.fetch_seconds = 0.0
+        self.report_seconds = 0.0
+        self.last_value: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The metrics as a dict, with mean latencies and reports per minute."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "checks": self.checks,
+            "reports": self.reports,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "fetch_latency": self.fetch_seconds / self.checks if self.checks else None,
+            "report_latency": self.report_seconds / self.reports if self.reports else None,
+            "reports_per_minute": self.reports * 60 / elapsed,
+            "last_value": self.last_value,
+            "last_error": self.last_error,
+        }
+
+
+class Feed:
+    """
+    One query id reported on its own cadence.
+
+    Args:
+        asset (src.assets.asset.Asset): the price feed of the query id
+        app_id (int): the app the query id is reported to
+        interval (float): seconds between price checks
+        deviation (float): fraction the price must move from the last reported value to be reported again
+        heartbeat (float, optional): seconds after which the price is reported even if it didn't move
+    """
+
+    def __init__(
+        self,
+        asset: Asset,
+        app_id: int,
+        interval: float = DEFAULT_INTERVAL,
+        deviation: float = DEFAULT_DEVIATION,
+        heartbeat: Optional[float] = None,
+    ) -> None:
+        self.asset = asset
+        self.app_id = app_id
+        self.interval = interval
+        self.deviation = deviation
+        self.heartbeat = heartbeat
+        self.due = 0.0
+        self.last_reported: Optional[int] = None
+        self.last_reported_at = 0.0
+        self.metrics = FeedMetrics()
+
+    @property
+    def query_id(self) -> str:
+        return self.asset.query_id
+
+    def should_report(self, value: int, now: float) -> bool:
+        """Whether `value` moved enough from the last report, or the heartbeat is due."""
+        if self.last_reported is None:
+            return True
+        if self.heartbeat is not None and now - self.last_reported_at >= self.heartbeat:
+            return True
+        return abs(value - self.last_reported) >= self.deviation * abs(self.last_reported)
+
+    def schedule(self, now: float) -> None:
+        """Set the next check one interval after this one, skipping checks missed while busy."""
+        self.due += self.interval
+        if self.due <= now:
+            self.due = now + self.interval
+
+    def __repr__(self) -> str:
+        return "Feed({!r}, app_id={}, interval={})".format(self.query_id, self.app_id, self.interval)
+
+
+class Reporter:
+    """
+    Schedules price checks for many feeds and reports each to its own app.
+
+    Args:
+        scripts (src.scripts.scripts.Scripts): reporter account and client the values are reported with
+        feeds (list of Feed): the feeds to keep up to date, at least one
+        max_in_flight (int): unconfirmed report transactions allowed at once per app, see Scripts.report_pipelined
+    """
+
+    def __init__(self, scripts: Scripts, feeds: List[Feed], max_in_flight: int = 16) -> None:
+        if not feeds:
+            raise ValueError("no feeds to report")
+        self.scripts = scripts
+        self.feeds = feeds
+        self.max_in_flight = max_in_flight
+        self._stop = threading.Event()
+        # app id -> the Scripts reporting to it
+        self._apps: Dict[int, Scripts] = {scripts.app_id: scripts}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], scripts: Scripts, apps: Dict[str, int]) -> "Reporter":
+        """
+        Build a feed for every query id in config["apis"], with settings from config["reporter"].
+
+        Args:
+            apps (dict): query id -> app id of the deployed apps, e.g. a network's entry of the app registry
+        Raises:
+            ValueError: if a query id has no app
+        """
+        missing = [query_id for query_id in config["apis"] if query_id not in apps]
+        if missing:
+            raise ValueError("no app deployed for query ids: {}".format(", ".join(missing)))
+
+        settings = config.get("reporter") or {}
+        feeds = []
+        for query_id, sources in config["apis"].items():
+            feed = {**settings, **(settings.get("feeds") or {}).get(query_id, {})}
+            feeds.append(
+                Feed(
+                    Asset(query_id=query_id, sources=sources),
+                    app_id=int(apps[query_id]),
+                    interval=float(feed.get("interval", DEFAULT_INTERVAL)),
+                    deviation=float(feed.get("deviation", DEFAULT_DEVIATION)),
+                    heartbeat=None if feed.get("heartbeat") is None else float(feed["heartbeat"]),
+                )
+            )
+        return cls(scripts, feeds)
+
+    def run_once(self, now: Optional[float] = None) -> List[Feed]:
+        """
+        Check every feed that is due: price them in one pass, then report the ones that moved.
+
+        Returns:
+            the feeds whose value was reported
+        """
+        now = time.time() if now is None else now
+        due = [feed for feed in self.feeds if feed.due <= now]
+        if not due:
+            return []
+
+        start = time.perf_counter()
+        try:
+            update_prices([feed.asset for feed in due])
+        except PriceError:
+            # the assets that could be priced are updated, the others keep their old value
+            pass
+        # all due feeds are fetched concurrently, each is charged the whole pass
+        fetched = time.perf_counter() - start
+
+        pending = []
+        for feed in due:
+            feed.schedule(now)
+            feed.metrics.checks += 1
+            feed.metrics.fetch_seconds += fetched
+            value = feed.asset.price
+            if not any(feed.asset.accepted.values()):
+                feed.metrics.failures += 1
+                feed.metrics.last_error = "; ".join("{}: {}".format(k, v) for k, v in feed.asset.errors.items())
+            elif value is not None and feed.should_report(value, now):
+                pending.append((feed, value))
+            else:
+                feed.metrics.skipped += 1
+
+        return self._report(pending, now)
+
+    def _report(self, pending: List[Any], now: float) -> List[Feed]:
+        feeds = {feed.query_id: (feed, value) for feed, value in pending}
+        submitted = time.perf_counter()
+        reported = []
+
+        def on_result(query_id: str, value: int, future: Future) -> None:
+            feed, _ = feeds[query_id]
+            if future.exception() is not None:
+                feed.metrics.failures += 1
+                feed.metrics.last_error = str(future.exception())
+                return
+            feed.metrics.reports += 1
+            feed.metrics.report_seconds += time.perf_counter() - submitted
+            feed.metrics.last_value = value
+            feed.last_reported = value
+            feed.last_reported_at = now
+            reported.append(feed)
+
+        byApp: Dict[int, List[Any]] = {}
+        for feed, value in pending:
+            byApp.setdefault(feed.app_id, []).append((feed.query_id, value))
+        calls = [(self._scripts(app_id).report_pipelined, reports) for app_id, reports in byApp.items()]
+
+        if len(calls) == 1:
+            report_pipelined, reports = calls[0]
+            report_pipelined(reports, max_in_flight=self.max_in_flight, on_result=on_result)
+        elif calls:
+            # the apps' reports land in the same blocks instead of one app after the other
+            with ThreadPoolExecutor(len(calls)) as executor:
+                futures = [
+                    executor.submit(call, reports, max_in_flight=self.max_in_flight, on_result=on_result)
+                    for call, reports in calls
+                ]
+                for future in futures:
+                    future.result()
+        return reported
+
+    def _scripts(self, app_id: int) -> Scripts:
+        if app_id not in self._apps:
+            self._apps[app_id] = Scripts(
+                client=self.scripts.client,
+                tipper=None,
+                reporter=self.scripts.reporter,
+                governance_address=None,
+                app_id=app_id,
+            )
+        return self._apps[app_id]
+
+    def run(self, metrics_interval: Optional[float] = DEFAULT_METRICS_INTERVAL) -> None:
+        """Check feeds as they fall due until stop() is called, printing metrics every `metrics_interval` seconds."""
+        self._stop.clear()
+        printed = time.time()
+        while not self._stop.is_set():
+            now = time.time()
+            due = [feed for feed in self.feeds if feed.due <= now]
+            try:
+                self.run_once(now)
+            except Exception as e:
+                # a node or network error fails this cycle's feeds, the daemon keeps going
+                logger.exception("reporting cycle failed")
+                self._failed(due, now, e)
+            now = time.time()
+            if metrics_interval is not None and now - printed >= metrics_interval:
+                print(self.format_metrics())
+                printed = now
+            self._stop.wait(max(min(feed.due for feed in self.feeds) - now, 0))
+
+    def _failed(self, due: List[Feed], now: float, error: Exception) -> None:
+        """Count a cycle that raised against its feeds, and check them again an interval later."""
+        for feed in due:
+            feed.metrics.failures += 1
+            feed.metrics.last_error = "{}: {}".format(type(error).__name__, error)
+            if feed.due <= now:
+                feed.schedule(now)
+
+    def stop(self) -> None:
+        """Stop run() after the current cycle."""
+        self._stop.set()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per query id metrics, see FeedMetrics.snapshot."""
+        return {feed.query_id: feed.metrics.snapshot() for feed in self.feeds}
+
+    def format_metrics(self) -> str:
+        """The metrics as a table, one feed per row."""
+        rows = [
+            "{:>16} {:>7} {:>8} {:>8} {:>9} {:>9} {:>10}".format(
+                "query id", "checks", "reports", "skipped", "failures", "fetch ms", "report ms"
+            )
+        ]
+        for query_id, m in self.metrics().items():
+            rows.append(
+                "{:>16} {:>7} {:>8} {:>8} {:>9} {:>9} {:>10}".format(
+                    query_id,
+                    m["checks"],
+                    m["reports"],
+                    m["skipped"],
+                    m["failures"],
+                    "-" if m["fetch_latency"] is None else "{:.0f}".format(m["fetch_latency"] * 1000),
+                    "-" if m["report_latency"] is None else "{:.0f}".format(m["report_latency"] * 1000),
+                )
+            )
+        return "\n".join(rows)
+
+
+def main(args: List[str]) -> None:
+    load_dotenv()
+    config = get_configs(args)
+    network = config.network
+
+    client = algod_client(network)
+    reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
+    s = Scripts(client=client, reporter=reporter, governance_address=None, tipper=None)
+
+    daemon = Reporter.from_config(config, s, read_registry().get(network, {}))
+    print("current network: ", network)
+    print("reporter address:", reporter.addr)
+    print("feeds:", ", ".join(repr(feed) for feed in daemon.feeds))
+
+    settings = config.get("reporter") or {}
+    if settings.get("metrics_port"):
+        enable_metrics()
+        serve_metrics(int(settings["metrics_port"]))
+        print("metrics:", "http://localhost:{}/metrics".format(settings["metrics_port"]))
+    try:
+        daemon.run(metrics_interval=float(settings.get("metrics_interval", DEFAULT_METRICS_INTERVAL)))
+    except KeyboardInterrupt:
+        print(daemon.format_metrics())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+
+from src.assets.asset import Asset
+from src.scripts.reporter import Feed
+from src.scripts.reporter import Reporter
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.exchange import FakeExchange
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+
+@pytest.fixture
+def exchange():
+    with FakeExchange({"algo": {"price": 1.0}, "eth": {"price": 3000.0}}) as exchange:
+        yield exchange
+
+
+@pytest.fixture
+def scripts():
+    client = FakeAlgodClient(FakeLedger())
+    reporter = Account(account.generate_account()[0])
+    client.ledger.fund(reporter.getAddress(), 10_000_000)
+    return Scripts(client=client, tipper=None, reporter=reporter, governance_address=None, app_id=1234)
+
+
+APPS = {"ALGO/USD": 1234, "ETH/USD": 1235}
+
+
+def _config(exchange):
+    return {
+        "apis": {
+            "ALGO/USD": {"ex": {"url": exchange.url("algo"), "path": "price"}},
+            "ETH/USD": {"ex": {"url": exchange.url("eth"), "path": "price"}},
+        },
+        "reporter": {"interval": 60, "deviation": 0.01, "feeds": {"ETH/USD": {"interval": 10}}},
+    }
+
+
+def test_feeds_from_config(exchange, scripts):
+    reporter = Reporter.from_config(_config(exchange), scripts, APPS)
+
+    assert [(f.query_id, f.app_id, f.interval, f.deviation) for f in reporter.feeds] == [
+        ("ALGO/USD", 1234, 60, 0.01),
+        ("ETH/USD", 1235, 10, 0.01),
+    ]
+
+
+def test_feeds_need_an_app(exchange, scripts):
+    with pytest.raises(ValueError, match="ETH/USD"):
+        Reporter.from_config(_config(exchange), scripts, {"ALGO/USD": 1234})
+    with pytest.raises(ValueError):
+        Reporter(scripts, [])
+
+
+def test_feeds_run_on_their_own_cadence(exchange, scripts):
+    reporter = Reporter.from_config(_config(exchange), scripts, APPS)
+
+    assert len(reporter.run_once(now=1000)) == 2
+    # each query id is reported to its own app
+    reports = {
+        stxn.transaction.app_args[1]: stxn.transaction.index for stxn in scripts.client.ledger.confirmed.values()
+    }
+    assert reports == {b"ALGO/USD": 1234, b"ETH/USD": 1235}
+
+    exchange.prices["algo"] = {"price": 2.0}
+    exchange.prices["eth"] = {"price": 4000.0}
+    assert [f.query_id for f in reporter.run_once(now=1010)] == ["ETH/USD"]
+    assert reporter.run_once(now=1015) == []
+    # ETH/USD is checked again but didn't move
+    assert [f.query_id for f in reporter.run_once(now=1060)] == ["ALGO/USD"]
+    assert reporter.metrics()["ETH/USD"]["skipped"] == 1
+
+
+def test_deviation_threshold(exchange, scripts):
+    feed = Feed(Asset("ALGO/USD", [exchange.url("algo")]), app_id=1234, interval=1, deviation=0.05, heartbeat=100)
+    exchange.prices["algo"] = 1.0
+    reporter = Reporter(scripts, [feed])
+
+    reporter.run_once(now=0)
+    exchange.prices["algo"] = 1.04
+    assert reporter.run_once(now=1) == []
+    exchange.prices["algo"] = 1.06
+    assert reporter.run_once(now=2) == [feed]
+    assert reporter.run_once(now=3) == []
+    # the heartbeat reports an unchanged price
+    assert reporter.run_once(now=102) == [feed]
+
+    metrics = reporter.metrics()["ALGO/USD"]
+    assert (metrics["checks"], metrics["reports"], metrics["skipped"]) == (5, 3, 2)
+    assert metrics["last_value"] == 1_060_000
+    assert metrics["report_latency"] > 0
+
+
+def test_failed_feed_does_not_report(exchange, scripts):
+    reporter = Reporter.from_config(_config(exchange), scripts, APPS)
+    exchange.failures["eth"] = 503
+
+    assert [f.query_id for f in reporter.run_once(now=0)] == ["ALGO/USD"]
+
+    metrics = reporter.metrics()["ETH/USD"]
+    assert metrics["failures"] == 1 and "503" in metrics["last_error"]
+    assert "ETH/USD" in reporter.format_metrics()
+
+
+def test_run_survives_node_errors(exchange, scripts, monkeypatch):
+    exchange.prices["algo"] = 1.0
+    reporter = Reporter(scripts, [Feed(Asset("ALGO/USD", [exchange.url("algo")]), app_id=1234, interval=0.01)])
+    report_pipelined = scripts.report_pipelined
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise AlgodHTTPError("timed out", 504)
+        reporter.stop()
+        return report_pipelined(*args, **kwargs)
+
+    monkeypatch.setattr(scripts, "report_pipelined", flaky)
+    reporter.run(metrics_interval=None)
+
+    assert len(calls) == 2
+    metrics = reporter.metrics()["ALGO/USD"]
+    assert metrics["failures"] == 1 and "timed out" in metrics["last_error"]
+    assert metrics["reports"] == 1
@@ -1,7 +1,15 @@
+import threading
+from base64 import b64decode
+from concurrent.futures import Future
+from concurrent.futures import wait
+from typing import Callable
+from typing import Iterable
+from typing import List
 from typing import Optional
 from typing import Tuple
 
 from algosdk import encoding
+from algosdk.error import AlgodHTTPError
 from algosdk.future import transaction
 from algosdk.logic import get_application_address
 from algosdk.v2client.algod import AlgodClient
@@ -9,15 +17,161 @@ from algosdk.v2client.algod import AlgodClient
 from src.contracts.approval import approval_program
 from src.contracts.approval import clear_state_program
 from src.utils.account import Account
-from src.utils.util import fullyCompileContract
-from src.utils.util import getAppGlobalState
+from src.utils.artifacts import get_program_cache
+from src.utils.metrics import timed
+from src.utils.params import getParamsProvider
+from src.utils.state import AppState
+from src.utils.state import getAppState
+from src.utils.util import ConfirmationTracker
 from src.utils.util import waitForTransaction
 
 APPROVAL_PROGRAM = b""
 CLEAR_STATE_PROGRAM = b""
 
+# microAlgos paid with every bid, see methods.bid
+BID_AMOUNT = 1000
+# microAlgos a new app account is funded with: the minimum balance of an
+# account, plus the fee of the inner payment that settles the auction
+APP_FUNDING = 100_000 + 1000
 
-class Scripts:
+
+class ScriptsBase:
+    """
+    Accounts, app id and transaction builders shared by Scripts and AsyncScripts
+
+    builders return unsigned transactions; sending and waiting is left to subclasses.
+    """
+
+    def __init__(
+        self,
+        client,
+        tipper: Account,
+        reporter: Account,
+        governance_address: Account,
+        app_id: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.tipper = tipper
+        self.reporter = reporter
+        self.governance_address = governance_address
+        self.app_id = app_id
+        if self.app_id is not None:
+            self.app_address = get_application_address(self.app_id)
+
+    def _set_app_id(self, app_id: int) -> None:
+        self.app_id = app_id
+        self.app_address = get_application_address(self.app_id)
+
+    def _deploy_txn(
+        self, approval: bytes, clear: bytes, app_id: int, query_id: str, sp: transaction.SuggestedParams
+    ) -> transaction.ApplicationCreateTxn:
+        globalSchema = transaction.StateSchema(num_uints=7, num_byte_slices=6)
+        localSchema = transaction.StateSchema(num_uints=1, num_byte_slices=0)
+
+        app_args = [
+            app_id,
+            query_id.encode("utf-8"),
+        ]
+
+        return transaction.ApplicationCreateTxn(
+            sender=self.tipper.getAddress(),
+            on_complete=transaction.OnComplete.NoOpOC,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=globalSchema,
+            local_schema=localSchema,
+            app_args=app_args,
+            sp=sp,
+        )
+
+    def _stake_txns(
+        self, stake_amount: int, sp: transaction.SuggestedParams, reporter: Optional[Account] = None
+    ) -> List[transaction.Transaction]:
+        reporter = reporter or self.reporter
+        payTxn = transaction.PaymentTxn(
+            sender=reporter.getAddress(),
+            receiver=self.app_address,
+            amt=stake_amount,
+            sp=sp,
+        )
+
+        stakeInTx = transaction.ApplicationNoOpTxn(
+            sender=reporter.getAddress(), index=self.app_id, app_args=[b"stake"], sp=sp
+        )
+
+        return transaction.assign_group_id([payTxn, stakeInTx])
+
+    def _fund_app_txn(
+        self, sp: transaction.SuggestedParams, app_id: Optional[int] = None, amount: int = APP_FUNDING
+    ) -> transaction.PaymentTxn:
+        return transaction.PaymentTxn(
+            sender=self.tipper.getAddress(),
+            receiver=get_application_address(app_id or self.app_id),
+            amt=amount,
+            sp=sp,
+        )
+
+    def _bid_txns(
+        self, bidder: Account, prediction: int, sp: transaction.SuggestedParams
+    ) -> List[transaction.Transaction]:
+        payTxn = transaction.PaymentTxn(
+            sender=bidder.getAddress(),
+            receiver=self.app_address,
+            amt=BID_AMOUNT,
+            sp=sp,
+        )
+
+        bidTxn = transaction.ApplicationOptInTxn(
+            sender=bidder.getAddress(), index=self.app_id, app_args=[prediction], sp=sp
+        )
+
+        return transaction.assign_group_id([payTxn, bidTxn])
+
+    def _settle_txn(self, bidder: Account, tellor_app_id: int, sp: transaction.SuggestedParams):
+        return transaction.ApplicationCloseOutTxn(
+            sender=bidder.getAddress(),
+            index=self.app_id,
+            foreign_apps=[tellor_app_id],
+            sp=sp,
+        )
+
+    def _settle_bidder_txn(self, settler: Account, bidder: str, tellor_app_id: int, sp: transaction.SuggestedParams):
+        return transaction.ApplicationNoOpTxn(
+            sender=settler.getAddress(),
+            index=self.app_id,
+            accounts=[bidder],
+            foreign_apps=[tellor_app_id],
+            sp=sp,
+        )
+
+    def _report_txn(
+        self, query_id: bytes, value: bytes, sp: transaction.SuggestedParams, reporter: Optional[Account] = None
+    ):
+        return transaction.ApplicationNoOpTxn(
+            sender=(reporter or self.reporter).getAddress(),
+            index=self.app_id,
+            app_args=[b"report", query_id, value],
+            sp=sp,
+        )
+
+    def _vote_txn(self, gov_vote: int, sp: transaction.SuggestedParams):
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address.getAddress(),
+            index=self.app_id,
+            app_args=[b"vote", gov_vote],
+            sp=sp,
+        )
+
+    def _withdraw_txn(self, sp: transaction.SuggestedParams, reporter: Optional[Account] = None):
+        return transaction.ApplicationNoOpTxn(
+            sender=(reporter or self.reporter).getAddress(),
+            index=self.app_id,
+            app_args=[b"withdraw"],
+            sp=sp,
+        )
+
+
+class Scripts(ScriptsBase):
     """
     A collection of helper scripts for quickly calling contract methods
     used only for testing and deploying
@@ -49,18 +203,21 @@ class Scripts:
 
         """
 
-        self.client = client
-        self.tipper = tipper
-        self.reporter = reporter
-        self.governance_address = governance_address
-        self.app_id = app_id
-        if self.app_id is not None:
-            self.app_address = get_application_address(self.app_id)
+        super().__init__(client, tipper, reporter, governance_address, app_id)
+        self.params = getParamsProvider(client)
+
+    @property
+    def state(self) -> AppState:
+        """The local mirror of the app's state, kept current from the calls made through these scripts."""
+        return getAppState(self.client, self.app_id)
 
     def get_contracts(self, client: AlgodClient) -> Tuple[bytes, bytes]:
         """
         Get the compiled TEAL contracts for the tellor contract.
 
+        Programs are kept in memory for the process and in the on-disk
+        program cache (see src.utils.artifacts) across processes.
+
         Args:
             client: An algod client that has the ability to compile TEAL programs.
         Returns:
@@ -71,15 +228,23 @@ class Scripts:
         global CLEAR_STATE_PROGRAM
 
         if len(APPROVAL_PROGRAM) == 0:
-            APPROVAL_PROGRAM = fullyCompileContract(client, approval_program())
-            CLEAR_STATE_PROGRAM = fullyCompileContract(client, clear_state_program())
+            cache = get_program_cache()
+            network = getParamsProvider(client).get().gen
+
+            def compile(teal: str) -> bytes:
+                return b64decode(client.compile(teal)["result"])
+
+            APPROVAL_PROGRAM = cache.program(cache.teal("approval", approval_program), network, compile)
+            CLEAR_STATE_PROGRAM = cache.program(cache.teal("clear_state", clear_state_program), network, compile)
 
         return APPROVAL_PROGRAM, CLEAR_STATE_PROGRAM
 
+    @timed("scripts.deploy")
     def deploy(self, app_id: int, query_id: str) -> int:
         """
         Deploy a new tellor reporting contract.
-        calls create() method on contract
+        calls create() method on contract,
+        then funds the app account with APP_FUNDING
 
         Args:
             client: An algod client.
@@ -87,29 +252,13 @@ class Scripts:
             governance_address: the account that can vote to dispute reports
             query_id: the ID of the data requested to be put on chain
             query_data: the in-depth specifications of the data requested
+
         Returns:
             int: The ID of the newly created auction app.
         """
         approval, clear = self.get_contracts(self.client)
 
-        globalSchema = transaction.StateSchema(num_uints=7, num_byte_slices=6)
-        localSchema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
-
-        app_args = [
-            app_id,
-            query_id.encode("utf-8"),
-        ]
-
-        txn = transaction.ApplicationCreateTxn(
-            sender=self.tipper.getAddress(),
-            on_complete=transaction.OnComplete.NoOpOC,
-            approval_program=approval,
-            clear_program=clear,
-            global_schema=globalSchema,
-            local_schema=localSchema,
-            app_args=app_args,
-            sp=self.client.suggested_params(),
-        )
+        txn = self._deploy_txn(approval, clear, app_id, query_id, self.params.get())
 
         signedTxn = txn.sign(self.tipper.getPrivateKey())
 
@@ -117,10 +266,16 @@ class Scripts:
 
         response = waitForTransaction(self.client, signedTxn.get_txid())
         assert response.applicationIndex is not None and response.applicationIndex > 0
-        self.app_id = response.applicationIndex
-        self.app_address = get_application_address(self.app_id)
+        self._set_app_id(response.applicationIndex)
+        self.state.seed(response)
+
+        # bids to an app account below the minimum balance are rejected
+        fundTxn = self._fund_app_txn(self.params.get())
+        self.client.send_transaction(fundTxn.sign(self.tipper.getPrivateKey()))
+        waitForTransaction(self.client, fundTxn.get_txid())
         return self.app_id
 
+    @timed("scripts.stake")
     def stake(self, stake_amount=None) -> None:
         """
         Send 2-txn group transaction to...
@@ -130,33 +285,38 @@ class Scripts:
         Args:
             stake_amount (int): override stake_amount for testing purposes
         """
-        appGlobalState = getAppGlobalState(self.client, self.app_id)
-
         if stake_amount is None:
-            stake_amount = appGlobalState[b"stake_amount"]
+            stake_amount = self.state[b"stake_amount"]
 
-        suggestedParams = self.client.suggested_params()
-
-        payTxn = transaction.PaymentTxn(
-            sender=self.reporter.getAddress(),
-            receiver=self.app_address,
-            amt=stake_amount,
-            sp=suggestedParams,
-        )
-
-        stakeInTx = transaction.ApplicationNoOpTxn(
-            sender=self.reporter.getAddress(), index=self.app_id, app_args=[b"stake"], sp=self.client.suggested_params()
-        )
-
-        transaction.assign_group_id([payTxn, stakeInTx])
+        payTxn, stakeInTx = self._stake_txns(stake_amount, self.params.get())
 
         signedPayTxn = payTxn.sign(self.reporter.getPrivateKey())
         signedAppCallTxn = stakeInTx.sign(self.reporter.getPrivateKey())
 
         self.client.send_transactions([signedPayTxn, signedAppCallTxn])
 
-        waitForTransaction(self.client, stakeInTx.get_txid())
+        self.state.apply(waitForTransaction(self.client, stakeInTx.get_txid()))
+
+    @timed("scripts.bid")
+    def bid(self, bidder: Account, prediction: int) -> None:
+        """
+        Send 2-txn group transaction to...
+        - pay the bid amount from the bidder to the contract
+        - opt the bidder in with their prediction, calling bid() on the contract
+
+        see src.scripts.bid for placing many bids at once
+
+        Args:
+            bidder (src.utils.account.Account): the account placing the bid
+            prediction (int): the value the bidder predicts the tellor oracle will report
+        """
+        payTxn, bidTxn = self._bid_txns(bidder, prediction, self.params.get())
+
+        self.client.send_transactions([payTxn.sign(bidder.getPrivateKey()), bidTxn.sign(bidder.getPrivateKey())])
+
+        self.state.apply(waitForTransaction(self.client, bidTxn.get_txid()))
 
+    @timed("scripts.report")
     def report(self, query_id: bytes, value: bytes):
         """
         Call report() on the contract to set the current value on the contract
@@ -166,17 +326,75 @@ class Scripts:
             - value (bytes): the data the reporter submits on chain
         """
 
-        submitValueTxn = transaction.ApplicationNoOpTxn(
-            sender=self.reporter.getAddress(),
-            index=self.app_id,
-            app_args=[b"report", query_id, value],
-            sp=self.client.suggested_params(),
-        )
+        submitValueTxn = self._report_txn(query_id, value, self.params.get())
 
         signedSubmitValueTxn = submitValueTxn.sign(self.reporter.getPrivateKey())
         self.client.send_transaction(signedSubmitValueTxn)
-        waitForTransaction(self.client, signedSubmitValueTxn.get_txid())
+        self.state.apply(waitForTransaction(self.client, signedSubmitValueTxn.get_txid()))
 
+    @timed("scripts.report_pipelined")
+    def report_pipelined(
+        self,
+        reports: Iterable[Tuple[bytes, bytes]],
+        max_in_flight: int = 16,
+        on_result: Optional[Callable[[bytes, bytes, Future], None]] = None,
+    ) -> List[Future]:
+        """
+        Call report() on the contract for a stream of values without waiting on each one
+
+        up to `max_in_flight` report transactions are kept unconfirmed at a time;
+        one ConfirmationTracker confirms them all, so many reports can land per block.
+        identical (query_id, value) pairs sent within the same round have the
+        same txid and only the first one is accepted by the node.
+
+        Args:
+            - reports (iterable of (bytes, bytes)): (query_id, value) pairs to report, in order
+            - max_in_flight (int): number of unconfirmed report transactions allowed at once
+            - on_result (callable, optional): called with (query_id, value, future) as each report
+              confirms or fails
+        Returns:
+            list of Futures, one per report, all resolved: PendingTxnResponse on
+            confirmation, or the exception that rejected the report
+        """
+        tracker = ConfirmationTracker(self.client)
+        slots = threading.BoundedSemaphore(max_in_flight)
+        futures: List[Future] = []
+
+        def settled(query_id: bytes, value: bytes, future: Future) -> None:
+            slots.release()
+            if future.exception() is None:
+                self.state.apply(future.result())
+            if on_result is not None:
+                on_result(query_id, value, future)
+
+        tracker.start()
+        try:
+            for query_id, value in reports:
+                slots.acquire()
+
+                signedTxn = self._report_txn(query_id, value, self.params.get()).sign(self.reporter.getPrivateKey())
+                try:
+                    self.client.send_transaction(signedTxn)
+                except Exception as e:
+                    if isinstance(e, AlgodHTTPError):
+                        # the node may have rejected stale params (a fee raise, a passed validity window)
+                        self.params.invalidate()
+                    future = Future()
+                    future.set_exception(e)
+                    settled(query_id, value, future)
+                else:
+                    future = tracker.track(
+                        signedTxn.get_txid(), callback=lambda f, q=query_id, v=value: settled(q, v, f)
+                    )
+                futures.append(future)
+
+            wait(futures)
+        finally:
+            tracker.stop()
+
+        return futures
+
+    @timed("scripts.vote")
     def vote(self, gov_vote: int):
         """
         Use the governance contract to approve or deny a value
@@ -189,27 +407,18 @@ class Scripts:
             gov_vote (int, 0 or 1): binary decision to approve or reject a value
         """
 
-        txn = transaction.ApplicationNoOpTxn(
-            sender=self.governance_address.getAddress(),
-            index=self.app_id,
-            app_args=[b"vote", gov_vote],
-            sp=self.client.suggested_params(),
-        )
+        txn = self._vote_txn(gov_vote, self.params.get())
         signedTxn = txn.sign(self.governance_address.getPrivateKey())
         self.client.send_transaction(signedTxn)
-        waitForTransaction(self.client, signedTxn.get_txid())
+        self.state.apply(waitForTransaction(self.client, signedTxn.get_txid()))
 
+    @timed("scripts.withdraw")
     def withdraw(self):
         """
         Sends the reporter their stake back and removes their permission to report
         calls withdraw() on the contract
         """
-        txn = transaction.ApplicationNoOpTxn(
-            sender=self.reporter.getAddress(),
-            index=self.app_id,
-            app_args=[b"withdraw"],
-            sp=self.client.suggested_params(),
-        )
+        txn = self._withdraw_txn(self.params.get())
         signedTxn = txn.sign(self.reporter.getPrivateKey())
         self.client.send_transaction(signedTxn)
-        waitForTransaction(self.client, signedTxn.get_txid())
+        self.state.apply(waitForTransaction(self.client, signedTxn.get_txid()))
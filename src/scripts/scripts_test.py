@@ -0,0 +1,66 @@
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+
+from src.scripts.scripts import APP_FUNDING
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import PendingTxnResponse
+
+APP_ID = 1234
+
+
+@pytest.fixture
+def client():
+    return FakeAlgodClient(FakeLedger())
+
+
+@pytest.fixture
+def scripts(client):
+    reporter = Account(account.generate_account()[0])
+    client.ledger.fund(reporter.getAddress(), 10_000_000)
+    return Scripts(client=client, tipper=None, reporter=reporter, governance_address=None, app_id=APP_ID)
+
+
+def test_report(scripts, client):
+    scripts.report(query_id=b"1", value=b"3500")
+
+    block = client.ledger.blocks[client.ledger.round]
+    assert len(block["txns"]) == 1
+
+
+def test_report_pipelined(scripts, client):
+    client.ledger.roundDelay = 0.01
+    results = []
+    reports = [(b"1", str(price).encode()) for price in range(100)]
+
+    futures = scripts.report_pipelined(reports, max_in_flight=25, on_result=lambda q, v, f: results.append(v))
+
+    assert all(isinstance(f.result(), PendingTxnResponse) for f in futures)
+    assert sorted(results) == sorted(v for _, v in reports)
+    # many reports land per block instead of one report per block
+    assert client.ledger.round < 50
+
+
+def test_report_pipelined_reports_failures(scripts, client):
+    futures = scripts.report_pipelined([(b"1", b"10"), (b"1", b"10"), (b"1", b"11")])
+
+    assert futures[0].result().confirmedRound is not None
+    assert isinstance(futures[1].exception(), AlgodHTTPError)
+    assert futures[2].result().confirmedRound is not None
+    # params are fetched again after the node rejects a report
+    assert client.calls["suggestedParams"] == 2
+
+
+def test_bid(scripts, client):
+    bidder = Account(account.generate_account()[0])
+    client.ledger.fund(bidder.getAddress(), 1_000_000)
+    client.ledger.fund(scripts.app_address, APP_FUNDING)
+
+    scripts.bid(bidder, 5000)
+
+    block = client.ledger.blocks[client.ledger.round]
+    assert len(block["txns"]) == 2
+    assert [app["id"] for app in client.account_info(bidder.getAddress())["apps-local-state"]] == [APP_ID]
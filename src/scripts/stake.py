@@ -2,11 +2,11 @@ import os
 import sys
 from typing import Optional
 
-from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
 from src.scripts.scripts import Scripts
 from src.utils.account import Account
+from src.utils.clients import algod_client
 from src.utils.configs import get_configs
 from src.utils.util import getBalances
 
@@ -14,10 +14,7 @@ from src.utils.util import getBalances
 def stake(app_id: Optional[int], network: str):
     load_dotenv()
 
-    algo_address = "http://localhost:4001"
-    algo_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-    client = AlgodClient(algod_address=algo_address, algod_token=algo_token)
+    client = algod_client(network)
 
     print("current network: ", network)
     reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
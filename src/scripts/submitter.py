@@ -0,0 +1,304 @@
+"""
+Streaming submission of pre-signed transaction files.
+
+A Submitter reads groups of msgpack SignedTxns (from SignedBatch.write,
+`goal clerk sign` or any iterable) and POSTs their raw bytes to algod from
+a pool of worker threads. Submissions are paced by a token bucket, groups
+refused because the transaction pool is full (or because the node could
+not be reached) are retried with backoff, and txids already sent are
+skipped. One ConfirmationTracker confirms everything that was accepted.
+
+usage: python -m src.scripts.submitter FILE [FILE ...] [--rate TPS] [--workers N] [-n NETWORK]
+"""
+import argparse
+import base64
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from itertools import chain
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import numpy as np
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+from src.scripts.factory import streamSignedFile
+from src.scripts.factory import txidOf
+from src.utils.clients import algod_client
+from src.utils.metrics import get_metrics
+from src.utils.metrics import REQUEST_RETRIES
+from src.utils.util import ConfirmationTracker
+from src.utils.util import PendingTxnResponse
+
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 8
+RETRY_MIN_BACKOFF = 0.01
+RETRY_MAX_BACKOFF = 1.0
+# rounds a submitted txid may take to confirm
+CONFIRMATION_ROUNDS = 10
+
+# algod errors that go away once the pool drains
+TRANSIENT_ERRORS = ("transaction pool is full",)
+DUPLICATE_ERROR = "already in ledger"
+
+
+def isTransient(e: Exception) -> bool:
+    """Whether a failed submission is worth retrying as is."""
+    if isinstance(e, AlgodHTTPError):
+        code = getattr(e, "code", None)
+        return (code is not None and code >= 500) or any(message in str(e) for message in TRANSIENT_ERRORS)
+    return isinstance(e, OSError)
+
+
+class TokenBucket:
+    """
+    Paces a sustained `rate` of tokens per second, allowing bursts of up to `burst`.
+
+    A request for more tokens than the bucket holds (e.g. a 16 transaction
+    group with a burst of 10) waits for a full bucket and leaves it in debt.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive, got {}".format(rate))
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until `tokens` are available and take them."""
+        needed = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return
+                delay = (needed - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class SubmitMetrics:
+    """Counters and confirmation latencies of one Submitter run."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.lastConfirmed: Optional[float] = None
+        self.groups = 0
+        self.submitted = 0
+        self.duplicates = 0
+        self.retries = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+        # txid -> reason, for groups algod refused and txids that never confirmed
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, counter: str, count: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def fail(self, txids: List[str], reason: str) -> None:
+        with self._lock:
+            self.failed += len(txids)
+            for txid in txids:
+                self.errors[txid] = reason
+
+    def confirm(self, latency: float) -> None:
+        with self._lock:
+            self.confirmed += 1
+            self.latencies.append(latency)
+            self.lastConfirmed = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The metrics as a dict, with sustained TPS and latency percentiles in seconds."""
+        end = self.lastConfirmed or self.finished or time.monotonic()
+        elapsed = max(end - self.started, 1e-9)
+        p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99]) if self.latencies else (None, None, None)
+        return {
+            "groups": self.groups,
+            "submitted": self.submitted,
+            "duplicates": self.duplicates,
+            "retries": self.retries,
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+            "seconds": elapsed,
+            "tps": self.confirmed / elapsed,
+            "latency_p50": p50,
+            "latency_p90": p90,
+            "latency_p99": p99,
+        }
+
+    def format(self) -> str:
+        m = self.snapshot()
+        latencies = " ".join(
+            "{}={}".format(p, "-" if m[key] is None else "{:.0f}ms".format(m[key] * 1000))
+            for p, key in (("p50", "latency_p50"), ("p90", "latency_p90"), ("p99", "latency_p99"))
+        )
+        return (
+            "{submitted} submitted, {confirmed} confirmed, {failed} failed, {duplicates} duplicates, "
+            "{retries} retries in {seconds:.2f}s: {tps:.1f} TPS, latency ".format(**m) + latencies
+        )
+
+
+class Submitter:
+    """
+    Submits pre-signed transaction groups to algod concurrently and confirms them.
+
+    Args:
+        client (AlgodClient): the node submitted to
+        workers (int): concurrent submissions
+        rate (float, optional): sustained transactions per second, unlimited if None
+        burst (float, optional): transactions allowed above the rate at once, `rate` by default
+        retries (int): attempts after the first for groups refused by a transient error
+        timeout (int): rounds a submitted txid may take to confirm
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        workers: int = DEFAULT_WORKERS,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        retries: int = DEFAULT_RETRIES,
+        timeout: int = CONFIRMATION_ROUNDS,
+    ) -> None:
+        self.client = client
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.retries = retries
+        self.timeout = timeout
+
+    def submit(
+        self,
+        groups: Iterable[List[bytes]],
+        on_confirmed: Optional[Callable[[str, PendingTxnResponse], None]] = None,
+    ) -> SubmitMetrics:
+        """
+        Submit `groups` of msgpack-encoded SignedTxns, read lazily, and wait for them to confirm.
+
+        Args:
+            groups (iterable of list of bytes): the atomic groups to submit, in order
+            on_confirmed (callable, optional): called with (txid, PendingTxnResponse) as each transaction confirms
+        Returns:
+            SubmitMetrics: what happened to every transaction
+        """
+        metrics = SubmitMetrics()
+        tracker = ConfirmationTracker(self.client, self.timeout)
+        tracker.start()
+
+        seen = set()
+        confirmations: List[Future] = []
+        # bounds how far reading runs ahead of the workers
+        inFlight = threading.BoundedSemaphore(self.workers * 4)
+
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                for group in groups:
+                    txids = [txidOf(signed) for signed in group]
+                    if seen.intersection(txids):
+                        metrics.add("duplicates", len(group))
+                        continue
+                    seen.update(txids)
+                    metrics.add("groups")
+
+                    inFlight.acquire()
+                    future = executor.submit(self._send, group, txids, metrics, tracker, confirmations, on_confirmed)
+                    future.add_done_callback(lambda _: inFlight.release())
+            wait(confirmations)
+        finally:
+            tracker.stop()
+        metrics.finished = time.monotonic()
+        return metrics
+
+    def submitFiles(self, paths: Iterable[str]) -> SubmitMetrics:
+        """Stream signed transaction files to algod one after the other, see submit."""
+        return self.submit(chain.from_iterable(streamSignedFile(path) for path in paths))
+
+    def _send(
+        self,
+        group: List[bytes],
+        txids: List[str],
+        metrics: SubmitMetrics,
+        tracker: ConfirmationTracker,
+        confirmations: List[Future],
+        on_confirmed: Optional[Callable[[str, PendingTxnResponse], None]] = None,
+    ) -> None:
+        raw = base64.b64encode(b"".join(group))
+        delay = RETRY_MIN_BACKOFF
+        sentAt = time.monotonic()
+        for attempt in range(self.retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire(len(group))
+            try:
+                sentAt = time.monotonic()
+                self.client.send_raw_transaction(raw)
+                metrics.add("submitted", len(group))
+                break
+            except Exception as e:
+                if DUPLICATE_ERROR in str(e):
+                    # an earlier attempt (or run) got through, its response didn't
+                    metrics.add("duplicates", len(group))
+                    break
+                if not isTransient(e) or attempt == self.retries:
+                    metrics.fail(txids, str(e))
+                    return
+                reason = "pool full" if any(message in str(e) for message in TRANSIENT_ERRORS) else "unavailable"
+            metrics.add("retries")
+            get_metrics().inc(REQUEST_RETRIES, reason=reason)
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_BACKOFF)
+
+        for txid in txids:
+            confirmations.append(tracker.track(txid, callback=self._confirmed(txid, sentAt, metrics, on_confirmed)))
+
+    @staticmethod
+    def _confirmed(
+        txid: str,
+        sentAt: float,
+        metrics: SubmitMetrics,
+        on_confirmed: Optional[Callable[[str, PendingTxnResponse], None]],
+    ):
+        def callback(future: Future) -> None:
+            if future.exception() is not None:
+                metrics.fail([txid], str(future.exception()))
+            else:
+                metrics.confirm(time.monotonic() - sentAt)
+                if on_confirmed is not None:
+                    on_confirmed(txid, future.result())
+
+        return callback
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Stream signed transaction files to algod")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--rate", type=float, default=None, help="sustained transactions per second")
+    parser.add_argument("--burst", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("-n", "--network", default=None, help="network in the nodes section of config.yml")
+    parsed = parser.parse_args(args)
+
+    submitter = Submitter(algod_client(parsed.network), parsed.workers, parsed.rate, parsed.burst)
+    metrics = submitter.submitFiles(parsed.files)
+    print(metrics.format())
+    for txid, reason in metrics.errors.items():
+        print(txid, reason)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
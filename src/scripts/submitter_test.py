@@ -0,0 +1,121 @@
+import base64
+import time
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+
+import src.scripts.submitter as submitter
+from src.scripts.factory import SignedBatch
+from src.scripts.factory import signRaw
+from src.scripts.submitter import Submitter
+from src.scripts.submitter import TokenBucket
+from src.utils.account import Account
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+
+def _payments(client, count, amount=0):
+    """A batch of `count` signed payments from a freshly funded account."""
+    sender = Account(account.generate_account()[0])
+    client.ledger.fund(sender.getAddress(), 10_000_000_000)
+    sp = client.suggested_params()
+    txns = [
+        transaction.PaymentTxn(sender.getAddress(), sp, sender.getAddress(), amount, note=str(i).encode())
+        for i in range(count)
+    ]
+    signed = signRaw([(sender.getPrivateKey(), base64.b64decode(encoding.msgpack_encode(txn))) for txn in txns])
+    return SignedBatch([[stxn] for stxn in signed])
+
+
+def test_streams_a_file_and_confirms_it(tmp_path):
+    client = FakeAlgodClient(FakeLedger(maxTxnsPerBlock=50))
+    batch = _payments(client, 300)
+    path = tmp_path / "payments.stxn"
+    batch.write(str(path))
+
+    metrics = Submitter(client, workers=4).submitFiles([str(path)])
+
+    m = metrics.snapshot()
+    assert (m["submitted"], m["confirmed"], m["failed"]) == (300, 300, 0)
+    assert all(txid in client.ledger.confirmed for txid in batch.txids)
+    assert client.calls["submit"] == 300
+    assert 0 < m["latency_p50"] <= m["latency_p90"] <= m["latency_p99"]
+    assert m["tps"] > 0
+
+
+def test_retries_while_the_pool_is_full():
+    client = FakeAlgodClient(FakeLedger(maxTxnsPerBlock=20, poolCapacity=20))
+    batch = _payments(client, 200)
+
+    metrics = Submitter(client, workers=8).submit(batch)
+
+    assert metrics.retries > 0
+    assert (metrics.confirmed, metrics.failed) == (200, 0)
+    assert len(client.ledger.confirmed) == 200
+
+
+def test_skips_duplicates(tmp_path):
+    client = FakeAlgodClient(FakeLedger())
+    batch = _payments(client, 20)
+    path = tmp_path / "payments.stxn"
+    batch.write(str(path))
+
+    metrics = Submitter(client).submitFiles([str(path), str(path)])
+    assert (metrics.submitted, metrics.duplicates, metrics.confirmed) == (20, 20, 20)
+    assert client.calls["submit"] == 20
+
+    # already confirmed by the first run: algod refuses them, nothing is lost
+    again = Submitter(client).submit(batch)
+    assert (again.submitted, again.duplicates, again.failed) == (0, 20, 0)
+
+
+def test_rejections_are_not_retried():
+    client = FakeAlgodClient(FakeLedger())
+    batch = _payments(client, 3, amount=100_000_000_000)
+
+    metrics = Submitter(client).submit(batch)
+
+    assert (metrics.failed, metrics.retries, client.calls["submit"]) == (3, 0, 0)
+    assert all("overspend" in metrics.errors[txid] for txid in batch.txids)
+
+
+def test_rate_limit():
+    client = FakeAlgodClient(FakeLedger())
+    batch = _payments(client, 60)
+
+    start = time.monotonic()
+    metrics = Submitter(client, rate=200, burst=10).submit(batch)
+
+    # 10 go out at once, the other 50 at 200 per second
+    assert time.monotonic() - start >= 0.25
+    assert metrics.confirmed == 60
+
+
+class _Clock:
+    """Stands in for the time module; sleeping advances the clock instantly."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_lends_to_large_groups(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(submitter, "time", clock)
+    bucket = TokenBucket(rate=100, burst=4)
+
+    bucket.acquire(16)
+    assert clock.sleeps == []
+    bucket.acquire(1)
+
+    # the group took the full bucket and left it 12 tokens in debt, paid back at 100 per second
+    assert sum(clock.sleeps) == pytest.approx(0.13)
@@ -1,9 +1,6 @@
-from src.utils.testing.resources import getTemporaryAccount
+from src.utils.testing.provisioning import getAccountPool
 
 
 class Accounts:
     def __init__(self, client) -> None:
-        self.tipper = getTemporaryAccount(client)
-        self.reporter = getTemporaryAccount(client)
-        self.governance = getTemporaryAccount(client)
-        self.bad_actor = getTemporaryAccount(client)
+        self.tipper, self.reporter, self.governance, self.bad_actor = getAccountPool(client).getMany(4)
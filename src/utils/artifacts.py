@@ -0,0 +1,131 @@
+"""
+Content-addressed on-disk cache for generated TEAL and compiled programs.
+
+Two levels, so a warm process skips both compilation steps:
+- PyTeal -> TEAL, keyed on a hash of the contract sources, the program
+  name, the TEAL version and the pyteal version
+- TEAL -> bytecode, keyed on a hash of the TEAL itself, the TEAL version,
+  the pyteal version and the genesis id of the compiling node
+
+The cache directory defaults to .teal_cache at the repository root and can
+be moved with the TEAL_CACHE_DIR environment variable.
+"""
+import hashlib
+import os
+import tempfile
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Callable
+from typing import Optional
+
+from pyteal import compileTeal
+from pyteal import Expr
+from pyteal import Mode
+
+TEAL_VERSION = 5
+PYTEAL_VERSION = package_version("pyteal")
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent / "contracts"
+
+
+def _cache_directory() -> Path:
+    return Path(os.environ.get("TEAL_CACHE_DIR") or Path(__file__).resolve().parent.parent.parent / ".teal_cache")
+
+
+def contracts_source_hash(directory: Path = CONTRACTS_DIR) -> str:
+    """Return a hash of every PyTeal source file the contracts are built from."""
+    digest = hashlib.sha256()
+    for path in sorted(directory.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class ProgramCache:
+    """
+    Reads and writes cached TEAL and program bytes under `directory`.
+
+    Entries are written atomically, so concurrent test workers can share a cache.
+
+    Args:
+        directory (Path, optional): where artifacts live, see module docstring for the default
+        version (int): TEAL version programs are generated for
+    """
+
+    def __init__(self, directory: Optional[Path] = None, version: int = TEAL_VERSION) -> None:
+        self.directory = Path(directory) if directory is not None else _cache_directory()
+        self.version = version
+        self.sourceHash = contracts_source_hash()
+
+    def _key(self, *parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in (str(self.version), PYTEAL_VERSION, *parts):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            return (self.directory / name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, name: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.directory / name)
+
+    def teal(self, name: str, program: Callable[[], Expr]) -> str:
+        """
+        Return the TEAL generated from `program`, running compileTeal only on a cache miss.
+
+        Args:
+            name (str): program name, e.g. "approval"; part of the cache key
+            program (callable): returns the PyTeal expression of the program
+        """
+        key = self._key("teal", self.sourceHash, name) + ".teal"
+        cached = self._read(key)
+        if cached is not None:
+            return cached.decode()
+
+        teal = compileTeal(program(), mode=Mode.Application, version=self.version)
+        self._write(key, teal.encode())
+        return teal
+
+    def lookup_program(self, teal: str, network: str) -> Optional[bytes]:
+        """Return the cached bytecode of `teal` compiled on `network`, if any."""
+        return self._read(self._key("program", network, teal) + ".bin")
+
+    def store_program(self, teal: str, network: str, program: bytes) -> None:
+        """Cache the bytecode `program` that `teal` compiled to on `network`."""
+        self._write(self._key("program", network, teal) + ".bin", program)
+
+    def program(self, teal: str, network: str, compile: Callable[[str], bytes]) -> bytes:
+        """
+        Return the bytecode of `teal`, calling `compile` only on a cache miss.
+
+        Args:
+            teal (str): TEAL source
+            network (str): genesis id of the compiling node, keeps fake and real nodes apart
+            compile (callable): compiles TEAL source to bytecode, e.g. through algod
+        """
+        cached = self.lookup_program(teal, network)
+        if cached is not None:
+            return cached
+
+        program = compile(teal)
+        self.store_program(teal, network, program)
+        return program
+
+
+_cache: Optional[ProgramCache] = None
+
+
+def get_program_cache() -> ProgramCache:
+    """Return the process-wide program cache."""
+    global _cache
+
+    if _cache is None:
+        _cache = ProgramCache()
+    return _cache
@@ -0,0 +1,65 @@
+import pytest
+from algosdk import account
+
+import src.scripts.scripts as scripts
+import src.utils.artifacts as artifacts
+from src.contracts.approval import approval_program
+from src.contracts.approval import clear_state_program
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.artifacts import ProgramCache
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ProgramCache(tmp_path)
+    monkeypatch.setattr(artifacts, "_cache", cache)
+    monkeypatch.setattr(scripts, "APPROVAL_PROGRAM", b"")
+    monkeypatch.setattr(scripts, "CLEAR_STATE_PROGRAM", b"")
+    return cache
+
+
+def test_teal_generated_once(cache):
+    built = []
+
+    def program():
+        built.append(1)
+        return clear_state_program()
+
+    first = cache.teal("clear_state", program)
+    assert ProgramCache(cache.directory).teal("clear_state", program) == first
+    assert len(built) == 1
+
+
+def test_programs_keyed_by_network(cache):
+    compiled = []
+
+    def compile(teal):
+        compiled.append(teal)
+        return b"\x05" + teal.encode()
+
+    teal = cache.teal("approval", approval_program)
+    assert cache.program(teal, "fake-v1", compile) == cache.program(teal, "fake-v1", compile)
+    assert len(compiled) == 1
+
+    cache.program(teal, "testnet-v1.0", compile)
+    assert len(compiled) == 2
+
+
+def test_get_contracts_skips_compile_when_warm(cache, monkeypatch):
+    client = FakeAlgodClient(FakeLedger())
+    tipper = Account(account.generate_account()[0])
+    s = Scripts(client, tipper, tipper, tipper.getAddress())
+
+    cold = s.get_contracts(client)
+    assert client.calls["compile"] == 2
+
+    # a fresh process: nothing in memory, everything on disk
+    monkeypatch.setattr(scripts, "APPROVAL_PROGRAM", b"")
+    monkeypatch.setattr(scripts, "CLEAR_STATE_PROGRAM", b"")
+    client.calls.clear()
+
+    assert s.get_contracts(client) == cold
+    assert client.calls["compile"] == 0
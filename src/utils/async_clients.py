@@ -0,0 +1,306 @@
+"""
+asyncio counterparts of the algod client, params cache and confirmation tracker.
+
+One AsyncAlgodClient holds one aiohttp connection pool, one params cache and
+one confirmation tracker, so any number of coroutines on the same event loop
+can submit and wait on transactions while sharing a single poll per block.
+"""
+import asyncio
+import base64
+import json
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from urllib import parse
+
+import aiohttp
+import msgpack
+from algosdk import constants
+from algosdk import encoding
+from algosdk import error
+from algosdk.encoding import future_msgpack_decode
+from algosdk.future import transaction
+
+from src.utils.clients import get_registry
+from src.utils.clients import POOL_SIZE
+from src.utils.clients import REQUEST_TIMEOUT
+from src.utils.params import DEFAULT_VALID_ROUNDS
+from src.utils.params import ParamsProvider
+from src.utils.util import PendingTxnResponse
+
+
+class AsyncAlgodClient:
+    """
+    asyncio-native algod client over a keep-alive aiohttp connection pool.
+
+    Method names and return values mirror algosdk's AlgodClient.
+
+    Args:
+        algod_token (str): algod API token
+        algod_address (str): algod address
+        headers (dict, optional): extra header name/value for all requests
+        pool_size (int): maximum number of open connections
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers=None, pool_size: int = POOL_SIZE) -> None:
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.params = AsyncParamsProvider(self)
+        self.tracker = AsyncConfirmationTracker(self)
+
+    @classmethod
+    def for_network(cls, network: Optional[str] = None) -> "AsyncAlgodClient":
+        """Build a client for a network configured in config.yml (see src.utils.clients)."""
+        node = get_registry().node(network)
+        return cls(node["algod_token"], node["algod_address"])
+
+    async def __aenter__(self) -> "AsyncAlgodClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop the confirmation tracker and close the connection pool."""
+        await self.tracker.stop()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        """Execute a given request, see AlgodClient.algod_request."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+
+        header = dict(self.headers or {})
+        header.update(headers or {})
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+        if requrl not in constants.unversioned_paths:
+            requrl = "/v2" + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        async with self._session.request(method, self.algod_address + requrl, headers=header, data=data) as resp:
+            body = await resp.read()
+
+        if resp.status >= 400:
+            try:
+                message = json.loads(body)["message"]
+            except (ValueError, KeyError, TypeError):
+                message = body.decode("utf-8", errors="replace")
+            raise error.AlgodHTTPError(message, resp.status)
+
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return body
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/status/wait-for-block-after/" + str(block_num))
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def send_raw_transaction(self, txn: bytes) -> str:
+        """Broadcast msgpack-encoded signed transaction bytes, return the (first) txid."""
+        headers = {"Content-Type": "application/x-binary"}
+        return (await self.algod_request("POST", "/transactions", data=txn, headers=headers))["txId"]
+
+    async def send_transaction(self, txn) -> str:
+        return await self.send_transactions([txn])
+
+    async def send_transactions(self, txns) -> str:
+        for txn in txns:
+            assert not isinstance(txn, transaction.Transaction), "Attempt to send UNSIGNED transaction {}".format(txn)
+        return await self.send_raw_transaction(b"".join(base64.b64decode(encoding.msgpack_encode(t)) for t in txns))
+
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/transactions/pending/" + transaction_id, {"format": "json"})
+
+    async def pending_transactions(self, max_txns: int = 0, response_format: str = "json"):
+        query: Dict[str, Any] = {"format": response_format}
+        if max_txns:
+            query["max"] = max_txns
+        return await self.algod_request("GET", "/transactions/pending", query, response_format=response_format)
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/accounts/" + address)
+
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/applications/" + str(application_id))
+
+    async def block_info(self, block: int, response_format: str = "json"):
+        return await self.algod_request(
+            "GET", "/blocks/" + str(block), {"format": response_format}, response_format=response_format
+        )
+
+    async def compile(self, source: str) -> Dict[str, Any]:
+        headers = {"Content-Type": "application/x-binary"}
+        return await self.algod_request("POST", "/teal/compile", data=source.encode("utf-8"), headers=headers)
+
+
+class AsyncParamsProvider(ParamsProvider):
+    """ParamsProvider whose get() is a coroutine; concurrent callers share one fetch."""
+
+    def __init__(self, client: AsyncAlgodClient, ttl: float = 30.0, maxRoundDelta: int = 10) -> None:
+        super().__init__(client, ttl, maxRoundDelta)
+        self._fetching: Optional[asyncio.Lock] = None
+
+    async def get(
+        self, first: Optional[int] = None, last: Optional[int] = None, validRounds: int = DEFAULT_VALID_ROUNDS
+    ) -> transaction.SuggestedParams:
+        if self._isStale():
+            if self._fetching is None:
+                self._fetching = asyncio.Lock()
+            async with self._fetching:
+                if self._isStale():
+                    params = await self.client.suggested_params()
+                    with self._lock:
+                        self._store(params)
+
+        with self._lock:
+            return self._window(first, last, validRounds)
+
+
+class AsyncConfirmationTracker:
+    """
+    asyncio version of ConfirmationTracker.
+
+    A single poll task waits on each new block once and resolves the futures of
+    every tracked txid; txids that left the pool are looked up concurrently.
+
+    Args:
+        client (AsyncAlgodClient): the algorand node we wait on
+        timeout (int): number of rounds a txid may stay unconfirmed after being tracked
+    """
+
+    def __init__(self, client: AsyncAlgodClient, timeout: int = 10) -> None:
+        self.client = client
+        self.timeout = timeout
+        self.lastRound: Optional[int] = None
+
+        # txid -> (deadline round, future)
+        self.outstanding: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._firstStatus: Optional[asyncio.Future] = None
+
+    async def track(self, txID: str, timeout: Optional[int] = None) -> asyncio.Future:
+        """Start tracking a submitted txid; the returned future resolves to its PendingTxnResponse."""
+        if self.lastRound is None:
+            # concurrent first callers share one status request
+            if self._firstStatus is None:
+                self._firstStatus = asyncio.ensure_future(self.client.status())
+                self._firstStatus.add_done_callback(self._firstStatusDone)
+            lastRound = (await self._firstStatus)["last-round"]
+            self.lastRound = max(self.lastRound or 0, lastRound)
+
+        if txID not in self.outstanding:
+            deadline = self.lastRound + (self.timeout if timeout is None else timeout)
+            self.outstanding[txID] = (deadline, asyncio.get_running_loop().create_future())
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self.outstanding[txID][1]
+
+    def _firstStatusDone(self, future: asyncio.Future) -> None:
+        # a failed status request is shared by its waiters only, the next caller asks again
+        if future.cancelled() or future.exception() is not None:
+            self._firstStatus = None
+
+    async def wait(self, txIDs: List[str], timeout: Optional[int] = None) -> List[PendingTxnResponse]:
+        """Track `txIDs` and return their PendingTxnResponses, raising the first failure."""
+        futures = [await self.track(txID, timeout) for txID in txIDs]
+        await asyncio.wait(futures)
+        return [f.result() for f in futures]
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            while self.outstanding:
+                await self.check()
+                if self.outstanding:
+                    status = await self.client.status_after_block(self.lastRound)
+                    self.lastRound = status["last-round"]
+                    self.client.params.observeRound(self.lastRound)
+        except Exception as e:
+            for txID in list(self.outstanding):
+                self._resolve(txID, exception=e)
+
+    async def check(self) -> None:
+        """Resolve every outstanding txid that has left the pool as of the last seen round."""
+        txIDs = list(self.outstanding)
+        if not txIDs:
+            return
+
+        pooled = await self._pooledTxIDs() if len(txIDs) > 1 else set()
+        left = [txID for txID in txIDs if txID not in pooled]
+        infos = await asyncio.gather(
+            *(self.client.pending_transaction_info(txID) for txID in left), return_exceptions=True
+        )
+
+        for txID, pending_txn in zip(left, infos):
+            if isinstance(pending_txn, error.AlgodHTTPError):
+                self._resolve(txID, exception=pending_txn)
+            elif isinstance(pending_txn, BaseException):
+                raise pending_txn
+            elif pending_txn.get("confirmed-round", 0) > 0:
+                self._resolve(txID, result=PendingTxnResponse(pending_txn))
+            elif pending_txn["pool-error"]:
+                self._resolve(txID, exception=Exception("Pool error: {}".format(pending_txn["pool-error"])))
+
+        for txID in list(self.outstanding):
+            deadline, _ = self.outstanding[txID]
+            if self.lastRound >= deadline:
+                self._resolve(
+                    txID, exception=Exception("Transaction {} not confirmed by round {}".format(txID, deadline))
+                )
+
+    async def _pooledTxIDs(self) -> Set[str]:
+        pool = msgpack.unpackb(await self.client.pending_transactions(response_format="msgpack"), raw=False)
+        return {future_msgpack_decode(stxn).get_txid() for stxn in pool.get("top-transactions") or []}
+
+    def _resolve(self, txID: str, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        _, future = self.outstanding.pop(txID)
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+async def waitForTransaction(client: AsyncAlgodClient, txID: str) -> PendingTxnResponse:
+    return (await client.tracker.wait([txID]))[0]
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from .async_clients import AsyncConfirmationTracker
+
+
+class _FlakyStatusClient:
+    """Answers status() with an error the first time."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def status(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("node unreachable")
+        return {"last-round": 7}
+
+
+def test_tracker_retries_a_failed_first_status():
+    client = _FlakyStatusClient()
+    tracker = AsyncConfirmationTracker(client)
+    tracker._run = lambda: asyncio.sleep(0)
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await tracker.track("A")
+        await tracker.track("B")
+
+    asyncio.run(run())
+
+    assert client.calls == 2
+    assert tracker.lastRound == 7
+    assert list(tracker.outstanding) == ["B"]
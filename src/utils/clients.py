@@ -0,0 +1,292 @@
+"""
+Pooled algod/indexer/kmd clients, one set per network.
+
+The sdk clients open a new urllib connection for every request. The clients
+here send their requests through a per-client pool of keep-alive
+http.client connections instead.
+
+Node addresses come from the `nodes` section of config.yml, e.g.
+
+    nodes:
+      testnet:
+        algod_address: https://testnet-api.example.com
+        algod_token: ""
+
+and any network or key that isn't configured falls back to the local sandbox.
+"""
+import http.client
+import json
+import os
+import queue
+import threading
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from urllib import parse
+
+import yaml
+from algosdk import constants
+from algosdk import error
+from algosdk import kmd
+from algosdk.kmd import KMDClient
+from algosdk.v2client import algod
+from algosdk.v2client import indexer
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+from src.utils.metrics import get_metrics
+from src.utils.metrics import instrument
+from src.utils.metrics import REQUEST_RETRIES
+
+SANDBOX_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
+SANDBOX_NODE = {
+    "algod_address": "http://localhost:4001",
+    "algod_token": SANDBOX_TOKEN,
+    "indexer_address": "http://localhost:8980",
+    "indexer_token": SANDBOX_TOKEN,
+    "kmd_address": "http://localhost:4002",
+    "kmd_token": SANDBOX_TOKEN,
+}
+DEFAULT_NETWORK = "devnet"
+POOL_SIZE = 32
+REQUEST_TIMEOUT = 60
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections to one host, handed out one request at a time.
+
+    Idle connections are kept for reuse; at most `size` are kept idle, extra
+    ones opened under load are closed after use.
+
+    Args:
+        address (str): base url of the node, e.g. http://localhost:4001
+        size (int): number of idle connections kept open
+        timeout (float): socket timeout in seconds
+    """
+
+    def __init__(self, address: str, size: int = POOL_SIZE, timeout: float = REQUEST_TIMEOUT) -> None:
+        url = parse.urlsplit(address)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.prefix = url.path.rstrip("/")
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(
+        self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes] = None
+    ) -> Tuple[int, bytes]:
+        """Send one request and return its status code and body."""
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._connect()
+            reused = False
+
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionError):
+            conn.close()
+            if not reused:
+                raise
+            # the server dropped an idle connection, retry once on a fresh one
+            get_metrics().inc(REQUEST_RETRIES, host="{}:{}".format(self.host, self.port), reason="stale connection")
+            conn = self._connect()
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        try:
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close or self._idle.qsize() >= self.size:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        return resp.status, data
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+def _path(version: str, requrl: str, params: Optional[Dict[str, Any]]) -> str:
+    if requrl not in constants.unversioned_paths:
+        requrl = version + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return requrl
+
+
+def _sorted(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Sort the keys of `response` and its nested dicts, as the sdk's IndexerClient does."""
+    return {k: _sorted(v) if isinstance(v, dict) else v for k, v in sorted(response.items())}
+
+
+def _error_message(body: bytes) -> str:
+    text = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)["message"]
+    except (ValueError, KeyError, TypeError):
+        return text
+
+
+class PooledAlgodClient(AlgodClient):
+    """AlgodClient that sends its requests over a keep-alive connection pool."""
+
+    def __init__(self, algod_token, algod_address, headers=None, pool_size: int = POOL_SIZE):
+        super().__init__(algod_token, algod_address, headers)
+        self.pool = ConnectionPool(algod_address, pool_size)
+
+    @instrument("algod")
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        header = dict(self.headers or {})
+        header.update(headers or {})
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+
+        status, body = self.pool.request(method, _path(algod.api_version_path_prefix, requrl, params), header, data)
+        if status >= 400:
+            raise error.AlgodHTTPError(_error_message(body), status)
+
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return body
+
+
+class PooledIndexerClient(IndexerClient):
+    """IndexerClient that sends its requests over a keep-alive connection pool."""
+
+    def __init__(self, indexer_token, indexer_address, headers=None, pool_size: int = POOL_SIZE):
+        super().__init__(indexer_token, indexer_address, headers)
+        self.pool = ConnectionPool(indexer_address, pool_size)
+
+    @instrument("indexer")
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None):
+        header = dict(self.headers or {})
+        header.update(headers or {})
+        if requrl not in constants.no_auth and self.indexer_token:
+            header[constants.indexer_auth_header] = self.indexer_token
+
+        status, body = self.pool.request(method, _path(indexer.api_version_path_prefix, requrl, params), header, data)
+        if status >= 400:
+            raise error.IndexerHTTPError(_error_message(body))
+        return _sorted(json.loads(body))
+
+
+class PooledKMDClient(KMDClient):
+    """KMDClient that sends its requests over a keep-alive connection pool."""
+
+    def __init__(self, kmd_token, kmd_address, pool_size: int = POOL_SIZE):
+        super().__init__(kmd_token, kmd_address)
+        self.pool = ConnectionPool(kmd_address, pool_size)
+
+    @instrument("kmd")
+    def kmd_request(self, method, requrl, params=None, data=None):
+        header = {} if requrl in constants.no_auth else {constants.kmd_auth_header: self.kmd_token}
+        body = json.dumps(data, indent=2).encode() if data else None
+
+        status, body = self.pool.request(method, _path(kmd.api_version_path_prefix, requrl, params), header, body)
+        if status >= 400:
+            raise error.KMDHTTPError(_error_message(body))
+        return json.loads(body)
+
+
+class ClientRegistry:
+    """
+    Builds each network's algod, indexer and kmd client once and hands out the same instances.
+
+    Args:
+        nodes (dict): network name -> node settings, as in the `nodes` section of config.yml
+        default_network (str): network used when callers don't name one
+    """
+
+    def __init__(self, nodes: Optional[Dict[str, Dict[str, str]]] = None, default_network: str = DEFAULT_NETWORK):
+        self.nodes = nodes or {}
+        self.default_network = default_network
+        self._clients: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path: str = "config.yml") -> "ClientRegistry":
+        """Build a registry from the `nodes` and `network` entries of a config file, if it exists."""
+        config: Dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path) as ymlfile:
+                config = yaml.safe_load(ymlfile) or {}
+        return cls(nodes=config.get("nodes"), default_network=config.get("network", DEFAULT_NETWORK))
+
+    def node(self, network: Optional[str] = None) -> Dict[str, str]:
+        """Return the node settings of `network`, filled in with sandbox defaults."""
+        return {**SANDBOX_NODE, **self.nodes.get(network or self.default_network, {})}
+
+    def _get(self, kind: str, network: Optional[str], build) -> Any:
+        key = (kind, network or self.default_network)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = build(self.node(network))
+            return self._clients[key]
+
+    def register(self, network: Optional[str] = None, **clients: Any) -> None:
+        """Hand out the given clients (by kind: algod, indexer, kmd) for `network` instead of building them."""
+        with self._lock:
+            for kind, client in clients.items():
+                self._clients[(kind, network or self.default_network)] = client
+
+    def algod(self, network: Optional[str] = None) -> PooledAlgodClient:
+        return self._get("algod", network, lambda n: PooledAlgodClient(n["algod_token"], n["algod_address"]))
+
+    def indexer(self, network: Optional[str] = None) -> PooledIndexerClient:
+        return self._get("indexer", network, lambda n: PooledIndexerClient(n["indexer_token"], n["indexer_address"]))
+
+    def kmd(self, network: Optional[str] = None) -> PooledKMDClient:
+        return self._get("kmd", network, lambda n: PooledKMDClient(n["kmd_token"], n["kmd_address"]))
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_registry() -> ClientRegistry:
+    """Return the process-wide registry, loading config.yml on first use."""
+    global _registry
+
+    if _registry is None:
+        _registry = ClientRegistry.from_config()
+    return _registry
+
+
+def algod_client(network: Optional[str] = None) -> PooledAlgodClient:
+    """Return the shared algod client of `network` (default network if None)."""
+    return get_registry().algod(network)
+
+
+def indexer_client(network: Optional[str] = None) -> PooledIndexerClient:
+    """Return the shared indexer client of `network` (default network if None)."""
+    return get_registry().indexer(network)
+
+
+def kmd_client(network: Optional[str] = None) -> PooledKMDClient:
+    """Return the shared kmd client of `network` (default network if None)."""
+    return get_registry().kmd(network)
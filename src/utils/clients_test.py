@@ -0,0 +1,151 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+from .clients import ClientRegistry
+from .clients import ConnectionPool
+from .clients import PooledAlgodClient
+from .clients import PooledKMDClient
+from .clients import SANDBOX_NODE
+from .testing.ledger import FakeAlgodServer
+from .testing.ledger import FakeLedger
+from .testing.ledger import LedgerError
+from .testing.node import _route
+from .testing.node import FakeKMD
+from .testing.node import KMD_ROUTES
+from .wallet import KMD_WALLET_NAME
+
+
+@pytest.fixture
+def server():
+    with FakeAlgodServer(FakeLedger()) as server:
+        yield server
+
+
+def test_pooled_client_reuses_connection(server):
+    client = PooledAlgodClient("a" * 64, server.address)
+
+    for _ in range(20):
+        assert client.status()["last-round"] == 1
+    client.suggested_params()
+
+    assert server.requests == 21
+    assert server.connections == 1
+
+
+def test_pooled_client_errors(server):
+    client = PooledAlgodClient("a" * 64, server.address)
+
+    with pytest.raises(AlgodHTTPError) as e:
+        client.application_info(1)
+    assert e.value.code == 404
+    assert "application does not exist" in str(e.value)
+
+
+class _RefusingConnection:
+    """A connection whose requests fail, recording whether it was closed."""
+
+    def __init__(self, error):
+        self.error = error
+        self.closed = False
+
+    def request(self, *args, **kwargs):
+        raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_closes_a_failed_retry_connection():
+    pool = ConnectionPool("http://localhost:1")
+    stale, fresh = _RefusingConnection(ConnectionResetError()), _RefusingConnection(TimeoutError())
+    pool._idle.put(stale)
+    pool._connect = lambda: fresh
+
+    with pytest.raises(TimeoutError):
+        pool.request("GET", "/health", {})
+
+    assert stale.closed and fresh.closed
+    assert pool._idle.empty()
+
+
+def test_stock_client_opens_a_connection_per_request(server):
+    client = AlgodClient("a" * 64, server.address)
+
+    for _ in range(5):
+        client.status()
+
+    assert server.connections == 5
+
+
+@pytest.fixture
+def kmd_server():
+    """A FakeKMD served over HTTP, recording the paths it was asked for in `paths`."""
+    kmd, paths = FakeKMD([account.generate_account()[0]]), []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            paths.append(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(length)) if length else {}
+            try:
+                response, code = _route(kmd, KMD_ROUTES, self.command, self.path, data)[1], 200
+            except LedgerError as e:
+                response, code = {"message": str(e)}, e.code
+            body = json.dumps(response).encode()
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    httpd.paths = paths
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_pooled_kmd_client_uses_kmd_paths(kmd_server):
+    client = PooledKMDClient("a" * 64, "http://{}:{}".format(*kmd_server.server_address[:2]))
+
+    (wallet,) = client.list_wallets()
+    handle = client.init_wallet_handle(wallet["id"], "")
+
+    assert wallet["name"] == KMD_WALLET_NAME
+    assert len(client.list_keys(handle)) == 1
+    assert client.versions() == ["v1"]
+    assert kmd_server.paths == ["/v1/wallets", "/v1/wallet/init", "/v1/key/list", "/versions"]
+
+
+def test_registry_shares_clients_per_network():
+    registry = ClientRegistry(nodes={"testnet": {"algod_address": "https://testnet.example", "algod_token": ""}})
+
+    assert registry.algod() is registry.algod("devnet")
+    assert registry.algod("testnet") is not registry.algod()
+    assert registry.algod("testnet").algod_address == "https://testnet.example"
+    assert registry.kmd("testnet").kmd_address == SANDBOX_NODE["kmd_address"]
+
+
+def test_registry_from_config(tmp_path):
+    path = tmp_path / "config.yml"
+    path.write_text("network: testnet\nnodes:\n  testnet:\n    indexer_address: https://idx.example\n")
+
+    registry = ClientRegistry.from_config(str(path))
+
+    assert registry.default_network == "testnet"
+    assert registry.indexer().indexer_address == "https://idx.example"
+    assert ClientRegistry.from_config(str(tmp_path / "missing.yml")).nodes == {}
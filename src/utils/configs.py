@@ -1,9 +1,33 @@
 import argparse
+import json
+import os
+from typing import Dict
 from typing import List
 
 import yaml
 from box import Box
 
+# network -> {query id: app id} of the apps deployed by src.scripts.deploy
+REGISTRY_PATH = "apps.json"
+
+
+def read_registry(path: str = REGISTRY_PATH) -> Dict[str, Dict[str, int]]:
+    """read the app registry, empty if none was written yet"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_registry(network: str, apps: Dict[str, int], path: str = REGISTRY_PATH) -> None:
+    """add the app ids of `apps` (query id -> app id) on `network` to the registry, replacing older ones"""
+    registry = read_registry(path)
+    registry.setdefault(network, {}).update(apps)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
 
 def get_configs(args: List[str]) -> Box:
     """get all signer configurations from passed flags or yaml file"""
@@ -43,6 +67,11 @@ def get_configs(args: List[str]) -> Box:
         if arg is not None:
             config[flag] = arg[0]
 
+    # app ids deployed for the query id take the place of the ones in the yaml file
+    registered = read_registry().get(config.get("network"), {})
+    if config.get("query_id") in registered:
+        config["app_id"] = {**(config.get("app_id") or {}), config["network"]: registered[config["query_id"]]}
+
     # enable dot notation for accessing configs
     config = Box(config)
 
@@ -0,0 +1,30 @@
+import json
+
+from src.utils.configs import get_configs
+from src.utils.configs import read_registry
+from src.utils.configs import write_registry
+
+
+def test_registry(tmp_path):
+    path = str(tmp_path / "apps.json")
+    assert read_registry(path) == {}
+
+    write_registry("testnet", {"a": 1, "b": 2}, path)
+    write_registry("testnet", {"b": 3}, path)
+    write_registry("devnet", {"a": 4}, path)
+
+    assert read_registry(path) == {"testnet": {"a": 1, "b": 3}, "devnet": {"a": 4}}
+
+
+def test_registered_app_ids_override_the_yaml_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.yml").write_text(
+        json.dumps({"network": "testnet", "query_id": "a", "app_id": {"testnet": 1, "devnet": 2}})
+    )
+    assert get_configs([]).app_id == {"testnet": 1, "devnet": 2}
+
+    write_registry("testnet", {"a": 10, "b": 20})
+
+    assert get_configs([]).app_id == {"testnet": 10, "devnet": 2}
+    assert get_configs(["-qid", "b"]).app_id == {"testnet": 20, "devnet": 2}
+    assert get_configs(["-qid", "c"]).app_id == {"testnet": 1, "devnet": 2}
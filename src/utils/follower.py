@@ -0,0 +1,457 @@
+"""
+Follow the chain once and fan the app calls of our apps out to any number of subscribers.
+
+A BlockFollower waits on each new round with one `status_after_block` and
+reads each block with one `block_info`, however many consumers subscribe.
+Application calls to the followed app ids, inner calls included, are
+decoded into typed events:
+
+- BidEvent: an OptIn with a prediction (methods.bid)
+- SettleEvent: a bid settled by its bidder's CloseOut (methods.settle) or by
+  anyone's NoOp naming the bidder (methods.settle_bidder), or a ClearState
+  that paid the pot out (methods.leave), with the payouts its inner
+  transactions made
+- ReportEvent, StakeEvent, VoteEvent, WithdrawEvent: the NoOp calls of Scripts
+- ClearEvent: any other ClearState, forfeiting the bid
+- AppEvent: any other call
+
+Subscribers get events through a Subscription (a blocking generator) or an
+asyncio.Queue, filtered by event kind and app id. Every followed round is
+also passed to the ParamsProvider of the client and, if given, to a
+LocalStore (see src.utils.store) that is synced up to the round before, so
+they stay current with no requests of their own.
+"""
+import asyncio
+import http.client
+import logging
+import queue
+import threading
+from base64 import b64decode
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.params import getParamsProvider
+from src.utils.store import LocalStore
+
+# seconds to wait after a failed read before following again
+RETRY_SECONDS = 1.0
+# errors of the node or the network, which following retries; anything else is a bug and stops it
+NODE_ERRORS = (AlgodHTTPError, OSError, http.client.HTTPException)
+
+logger = logging.getLogger(__name__)
+
+
+class AppEvent:
+    """
+    An application call to a followed app, as confirmed in a block.
+
+    Attributes:
+        round (int): the block the call was confirmed in
+        timestamp (int): the block's timestamp
+        index (int): the call's position among the block's transactions
+        app_id (int): the app called
+        sender (str): the account that called it
+        args (list of bytes): the call's application args
+    """
+
+    kind = "call"
+
+    def __init__(self, round: int, timestamp: int, index: int, app_id: int, sender: str, args: List[bytes]) -> None:
+        self.round = round
+        self.timestamp = timestamp
+        self.index = index
+        self.app_id = app_id
+        self.sender = sender
+        self.args = args
+
+    def _fields(self) -> Dict[str, Any]:
+        return {}
+
+    def __repr__(self) -> str:
+        fields = "".join(", {}={!r}".format(k, v) for k, v in self._fields().items())
+        return "{}(round={}, app_id={}, sender={}{})".format(
+            type(self).__name__, self.round, self.app_id, self.sender, fields
+        )
+
+
+class BidEvent(AppEvent):
+    kind = "bid"
+
+    @property
+    def prediction(self) -> int:
+        return int.from_bytes(self.args[0], "big")
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"prediction": self.prediction}
+
+
+class SettleEvent(AppEvent):
+    """
+    Attributes:
+        bidder (str): the account whose bid was settled, the sender unless someone else settled it
+        payouts (list of (str, int)): receiver and amount of each payment the app made
+    """
+
+    kind = "settle"
+
+    def __init__(
+        self, *args: Any, bidder: Optional[str] = None, payouts: Optional[List[Tuple[str, int]]] = None
+    ) -> None:
+        super().__init__(*args)
+        self.bidder = bidder or self.sender
+        self.payouts = payouts or []
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"bidder": self.bidder, "payouts": self.payouts}
+
+
+class ReportEvent(AppEvent):
+    kind = "report"
+
+    @property
+    def query_id(self) -> bytes:
+        return self.args[1]
+
+    @property
+    def value(self) -> bytes:
+        return self.args[2]
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"query_id": self.query_id, "value": self.value}
+
+
+class StakeEvent(AppEvent):
+    """Attributes: amount (int): microAlgos paid to the app in the same group"""
+
+    kind = "stake"
+
+    def __init__(self, *args: Any, amount: int = 0) -> None:
+        super().__init__(*args)
+        self.amount = amount
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"amount": self.amount}
+
+
+class VoteEvent(AppEvent):
+    kind = "vote"
+
+    @property
+    def vote(self) -> int:
+        return int.from_bytes(self.args[1], "big")
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"vote": self.vote}
+
+
+class WithdrawEvent(AppEvent):
+    kind = "withdraw"
+
+
+class ClearEvent(AppEvent):
+    kind = "clear"
+
+
+# NoOp calls by their first argument
+_METHODS = {b"report": ReportEvent, b"stake": StakeEvent, b"vote": VoteEvent, b"withdraw": WithdrawEvent}
+
+
+def _address(value: str) -> str:
+    return encoding.encode_address(b64decode(value))
+
+
+def decodeBlock(block: Dict[str, Any], appIDs: Set[int]) -> List[AppEvent]:
+    """
+    Decode the calls to `appIDs` in a block (in algod's JSON shape) into events.
+
+    Inner app calls, e.g. from another app calling a followed one, are
+    decoded too, after the transaction that made them and with its index.
+    """
+    round, timestamp = block["rnd"], block.get("ts", 0)
+    stxns = block.get("txns") or []
+    events: List[AppEvent] = []
+    for index, outer in enumerate(stxns):
+        for stxn in _withInner(outer):
+            txn = stxn.get("txn", {})
+            appID = txn.get("apid")
+            if txn.get("type") != "appl" or appID not in appIDs:
+                continue
+
+            args = [b64decode(a) for a in txn.get("apaa") or []]
+            fields = (round, timestamp, index, appID, _address(txn["snd"]), args)
+            onComplete = txn.get("apan") or transaction.OnComplete.NoOpOC
+            if onComplete == transaction.OnComplete.OptInOC:
+                events.append(BidEvent(*fields))
+            elif onComplete == transaction.OnComplete.CloseOutOC:
+                events.append(SettleEvent(*fields, payouts=_payouts(stxn)))
+            elif onComplete == transaction.OnComplete.ClearStateOC:
+                # the last unsettled bidder clearing pays the pot out
+                payouts = _payouts(stxn)
+                events.append(SettleEvent(*fields, payouts=payouts) if payouts else ClearEvent(*fields))
+            elif onComplete == transaction.OnComplete.NoOpOC and not args and txn.get("apat"):
+                bidder = _address(txn["apat"][0])
+                events.append(SettleEvent(*fields, bidder=bidder, payouts=_payouts(stxn)))
+            elif onComplete != transaction.OnComplete.NoOpOC or not args:
+                events.append(AppEvent(*fields))
+            elif args[0] == b"stake":
+                events.append(StakeEvent(*fields, amount=_groupPayment(stxns, txn.get("grp"), appID)))
+            else:
+                events.append(_METHODS.get(args[0], AppEvent)(*fields))
+    return events
+
+
+def _withInner(stxn: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """A transaction of a block followed by its inner transactions, depth first, like store.touchedBy walks them."""
+    yield stxn
+    for inner in (stxn.get("dt") or {}).get("itx") or []:
+        yield from _withInner(inner)
+
+
+def _payouts(stxn: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Receiver and amount of every payment made by the inner transactions of a call, closing amounts included."""
+    payouts = []
+    for inner in (stxn.get("dt") or {}).get("itx") or []:
+        txn = inner.get("txn", {})
+        if txn.get("type") != "pay":
+            continue
+        if txn.get("rcv") and txn.get("amt"):
+            payouts.append((_address(txn["rcv"]), txn["amt"]))
+        if txn.get("close"):
+            payouts.append((_address(txn["close"]), inner.get("ca", 0)))
+    return payouts
+
+
+def _groupPayment(stxns: List[Dict[str, Any]], group: Optional[str], appID: int) -> int:
+    if group is None:
+        return 0
+    appAddress = get_application_address(appID)
+    return sum(
+        stxn["txn"].get("amt", 0)
+        for stxn in stxns
+        if stxn.get("txn", {}).get("grp") == group
+        and stxn["txn"].get("type") == "pay"
+        and stxn["txn"].get("rcv")
+        and _address(stxn["txn"]["rcv"]) == appAddress
+    )
+
+
+class Subscription:
+    """
+    Events delivered to one consumer, in order; iterating blocks until the next one.
+
+    Iteration ends once the subscription is closed, by close() or when the follower stops.
+    """
+
+    def __init__(self, follower: "BlockFollower", kinds: Optional[Set[str]], appIDs: Optional[Set[int]]) -> None:
+        self.follower = follower
+        self.kinds = kinds
+        self.appIDs = appIDs
+        self._queue: "queue.Queue[Optional[AppEvent]]" = queue.Queue()
+
+    def wants(self, event: AppEvent) -> bool:
+        return (self.kinds is None or event.kind in self.kinds) and (self.appIDs is None or event.app_id in self.appIDs)
+
+    def put(self, event: Optional[AppEvent]) -> None:
+        self._queue.put(event)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[AppEvent]:
+        """The next event, None if the subscription is closed; raises queue.Empty after `timeout` seconds."""
+        return self._queue.get(timeout=timeout)
+
+    def __iter__(self) -> Iterator[AppEvent]:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self) -> None:
+        self.follower.unsubscribe(self)
+        self.put(None)
+
+
+class _AsyncSubscription(Subscription):
+    def __init__(self, follower: "BlockFollower", kinds: Optional[Set[str]], appIDs: Optional[Set[int]]) -> None:
+        super().__init__(follower, kinds, appIDs)
+        self.loop = asyncio.get_running_loop()
+        self.asyncQueue: "asyncio.Queue[Optional[AppEvent]]" = asyncio.Queue()
+
+    def put(self, event: Optional[AppEvent]) -> None:
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.asyncQueue.put_nowait, event)
+
+
+class BlockFollower:
+    """
+    Reads every new block once and publishes the calls to `app_ids` it contains.
+
+    Args:
+        client (AlgodClient): the node followed
+        app_ids (iterable of int): the apps whose calls are published
+        start (int, optional): the first round to read, the round after the latest one by default
+        store (LocalStore, optional): a store to apply the followed blocks to, see the module docstring
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        app_ids: Iterable[int],
+        start: Optional[int] = None,
+        store: Optional[LocalStore] = None,
+    ) -> None:
+        self.client = client
+        self.appIDs: Set[int] = set(app_ids)
+        self.store = store
+        # the last round read, None until the first poll
+        self.round: Optional[int] = None if start is None else start - 1
+
+        self.subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    ## SUBSCRIBERS
+    def follow(self, app_id: int) -> None:
+        with self._lock:
+            self.appIDs.add(app_id)
+
+    def unfollow(self, app_id: int) -> None:
+        with self._lock:
+            self.appIDs.discard(app_id)
+
+    def subscribe(self, kinds: Optional[Iterable[str]] = None, app_ids: Optional[Iterable[int]] = None) -> Subscription:
+        """
+        Receive the events of `kinds` (e.g. "bid", "settle") for `app_ids`, all of them by default.
+
+        Returns:
+            Subscription: iterate it, or get() from it, to receive the events
+        """
+        subscription = Subscription(self, _set(kinds), _set(app_ids))
+        with self._lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def subscribe_async(
+        self, kinds: Optional[Iterable[str]] = None, app_ids: Optional[Iterable[int]] = None
+    ) -> "asyncio.Queue[Optional[AppEvent]]":
+        """
+        Receive events on an asyncio.Queue of the running event loop, see subscribe.
+
+        None is put on the queue when the follower stops.
+        """
+        subscription = _AsyncSubscription(self, _set(kinds), _set(app_ids))
+        with self._lock:
+            self.subscriptions.append(subscription)
+        return subscription.asyncQueue
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    def publish(self, events: Iterable[AppEvent]) -> None:
+        with self._lock:
+            subscriptions = list(self.subscriptions)
+        for event in events:
+            for subscription in subscriptions:
+                if subscription.wants(event):
+                    subscription.put(event)
+
+    ## FOLLOWING
+    def poll(self) -> List[AppEvent]:
+        """
+        Read every block after the last one read, up to the latest round, and publish their events.
+
+        The first poll without a `start` round only learns the latest round.
+
+        Returns:
+            list: the events published
+        """
+        latest = self.client.status()["last-round"]
+        if self.round is None:
+            self.round = latest
+            getParamsProvider(self.client).observeRound(latest)
+            return []
+        return self._readUpTo(latest)
+
+    def _readUpTo(self, latest: int) -> List[AppEvent]:
+        published: List[AppEvent] = []
+        while self.round < latest:
+            round = self.round + 1
+            block = self.client.block_info(round)["block"]
+            with self._lock:
+                appIDs = set(self.appIDs)
+            events = decodeBlock(block, appIDs)
+
+            if self.store is not None and self.store.synced == round - 1:
+                self.store.apply(block)
+            getParamsProvider(self.client).observeRound(round)
+            self.round = round
+
+            self.publish(events)
+            published.extend(events)
+        return published
+
+    def run(self) -> None:
+        """
+        Follow every new round until stop() is called.
+
+        Node and network errors are logged and retried from the last round
+        read; any other error is logged, closes every subscription and is raised.
+        """
+        if self.round is None:
+            self.poll()
+        while not self._stop.is_set():
+            try:
+                status = self.client.status_after_block(self.round)
+                if self._stop.is_set():
+                    break
+                self._readUpTo(status["last-round"])
+            except NODE_ERRORS:
+                # the client already retried; try again from the last round read
+                logger.warning("reading round %s failed, retrying", self.round + 1, exc_info=True)
+                self._stop.wait(RETRY_SECONDS)
+            except Exception:
+                logger.exception("stopped following at round %s", self.round)
+                self._closeSubscriptions()
+                raise
+
+    def start(self) -> None:
+        """Follow the chain from a background thread until stop() is called."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self.round is None:
+            self.poll()
+        self._thread = threading.Thread(target=self.run, name="BlockFollower", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop following once the current wait returns, and close every subscription."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._closeSubscriptions()
+
+    def _closeSubscriptions(self) -> None:
+        with self._lock:
+            subscriptions, self.subscriptions = self.subscriptions, []
+        for subscription in subscriptions:
+            subscription.put(None)
+
+
+def _set(values: Optional[Iterable[Any]]) -> Optional[Set[Any]]:
+    return None if values is None else set(values)
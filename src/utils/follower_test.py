@@ -0,0 +1,233 @@
+import asyncio
+import base64
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+import src.utils.artifacts as artifacts
+import src.utils.follower as follower_module
+from src.scripts.keeper_test import _game
+from src.scripts.keeper_test import _report
+from src.scripts.keeper_test import _tellor
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.follower import BlockFollower
+from src.utils.follower import decodeBlock
+from src.utils.follower import ReportEvent
+from src.utils.store import LocalStore
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.testing.provisioning import getAccountPool
+from src.utils.util import waitForTransaction
+
+APP_ID = 1234
+
+
+@pytest.fixture
+def client():
+    return FakeAlgodClient(FakeLedger())
+
+
+@pytest.fixture
+def scripts(client):
+    accounts = [Account(account.generate_account()[0]) for _ in range(3)]
+    for a in accounts:
+        client.ledger.fund(a.getAddress(), 10_000_000)
+    return Scripts(client, *accounts, app_id=APP_ID)
+
+
+def test_calls_are_decoded_once_per_round(scripts, client):
+    follower = BlockFollower(client, [APP_ID])
+    follower.poll()
+    everything, reports = follower.subscribe(), follower.subscribe(kinds=["report"])
+    start = client.ledger.round
+    bidder = scripts.tipper
+
+    scripts.stake(2_000_000)
+    scripts.report(b"1", b"3500")
+    scripts.vote(1)
+    scripts.bid(bidder, 3400)
+    scripts.withdraw()
+    Scripts(client, scripts.tipper, scripts.reporter, scripts.governance_address, app_id=APP_ID + 1).report(b"1", b"0")
+    client.calls.clear()
+
+    events = follower.poll()
+
+    assert [e.kind for e in events] == ["stake", "report", "vote", "bid", "withdraw"]
+    stake, report, vote, bid, withdraw = events
+    assert (stake.sender, stake.amount) == (scripts.reporter.getAddress(), 2_000_000)
+    assert (report.query_id, report.value, report.round) == (b"1", b"3500", start + 2)
+    assert vote.vote == 1 and vote.sender == scripts.governance_address.getAddress()
+    assert (bid.prediction, bid.sender) == (3400, bidder.getAddress())
+    assert client.calls["blockInfo"] == client.ledger.round - start
+    assert client.calls["status"] == 1
+
+    everything.close()
+    reports.close()
+    assert list(everything) == events
+    assert list(reports) == [report]
+
+
+def test_settlement_payouts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getAccountPool(client).get()
+    tellor = _tellor(client, tipper, 1)
+    app_id, bidders = _game(client, tipper, tellor, [10, 20])
+    s = Scripts(client, tipper, tipper, tipper, app_id)
+    pot = client.account_info(s.app_address)["amount"]
+    follower = BlockFollower(client, [app_id])
+    follower.poll()
+
+    _report(client, tipper, tellor, 19)
+    for bidder in bidders:
+        txn = s._settle_txn(bidder, tellor, client.suggested_params())
+        client.send_transaction(txn.sign(bidder.getPrivateKey()))
+        waitForTransaction(client, txn.get_txid())
+
+    first, last = follower.poll()
+
+    assert (first.kind, first.payouts) == ("settle", [])
+    # the pot less the inner payment's fee is closed out to the closest bidder
+    assert last.payouts == [(bidders[1].getAddress(), pot - 1000)]
+
+
+def test_third_party_settles_and_clearing_payouts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getAccountPool(client).get()
+    tellor = _tellor(client, tipper, 1)
+    app_id, bidders = _game(client, tipper, tellor, [10, 20])
+    s = Scripts(client, tipper, tipper, tipper, app_id)
+    follower = BlockFollower(client, [app_id])
+    follower.poll()
+    settles = follower.subscribe(kinds=["settle"])
+
+    _report(client, tipper, tellor, 19)
+    txn = s._settle_bidder_txn(tipper, bidders[0].getAddress(), tellor, client.suggested_params())
+    client.send_transaction(txn.sign(tipper.getPrivateKey()))
+    waitForTransaction(client, txn.get_txid())
+    pot = client.account_info(s.app_address)["amount"]
+    # the last unsettled bidder leaves, paying the pot out to the only settled bid
+    txn = transaction.ApplicationClearStateTxn(bidders[1].getAddress(), client.suggested_params(), app_id)
+    client.send_transaction(txn.sign(bidders[1].getPrivateKey()))
+    waitForTransaction(client, txn.get_txid())
+    follower.poll()
+    follower.stop()
+
+    settled, cleared = settles
+    assert (settled.sender, settled.bidder, settled.payouts) == (tipper.getAddress(), bidders[0].getAddress(), [])
+    assert cleared.sender == bidders[1].getAddress()
+    assert cleared.payouts == [(bidders[0].getAddress(), pot - 1000)]
+
+
+def test_asyncio_subscribers(scripts, client):
+    follower = BlockFollower(client, [APP_ID])
+    follower.poll()
+
+    async def consume():
+        queue = follower.subscribe_async(kinds=["report"])
+        scripts.report(b"1", b"10")
+        scripts.vote(0)
+        scripts.report(b"1", b"11")
+        await asyncio.get_running_loop().run_in_executor(None, follower.poll)
+        follower.stop()
+        events = []
+        while (event := await queue.get()) is not None:
+            events.append(event)
+        return events
+
+    events = asyncio.run(consume())
+
+    assert [e.value for e in events] == [b"10", b"11"]
+
+
+def test_background_follower_feeds_the_store(scripts, tmp_path):
+    client = FakeAlgodClient(FakeLedger(roundDelay=0.01))
+    client.ledger.fund(scripts.reporter.getAddress(), 10_000_000)
+    s = Scripts(client, None, scripts.reporter, None, app_id=APP_ID)
+    store = LocalStore(client, str(tmp_path / "store.sqlite"), statusTtl=3600)
+    store.sync()
+    follower = BlockFollower(client, [APP_ID], store=store)
+    subscription = follower.subscribe()
+    follower.start()
+    try:
+        s.report(b"1", b"10")
+        event = subscription.get(timeout=5)
+    finally:
+        follower.stop()
+
+    assert isinstance(event, ReportEvent) and event.value == b"10"
+    assert list(subscription) == []
+    assert store.synced == follower.round
+
+
+def test_inner_calls_are_decoded():
+    caller, other = 77, 78
+    sender = account.generate_account()[1]
+
+    def key(address):
+        return base64.b64encode(encoding.decode_address(address)).decode()
+
+    def call(appID, sender, *args):
+        return {"type": "appl", "apid": appID, "snd": key(sender), "apaa": [base64.b64encode(a).decode() for a in args]}
+
+    block = {
+        "rnd": 9,
+        "txns": [
+            {
+                "txn": call(caller, sender, b"forward"),
+                "dt": {"itx": [{"txn": call(APP_ID, get_application_address(caller), b"report", b"1", b"42")}]},
+            },
+            {"txn": call(other, sender)},
+        ],
+    }
+
+    (event,) = decodeBlock(block, {APP_ID})
+
+    assert isinstance(event, ReportEvent)
+    assert (event.index, event.sender, event.value) == (0, get_application_address(caller), b"42")
+
+
+def test_run_retries_node_errors(scripts, client, monkeypatch):
+    monkeypatch.setattr(follower_module, "RETRY_SECONDS", 0)
+    follower = BlockFollower(client, [APP_ID])
+    follower.poll()
+    subscription = follower.subscribe()
+    failures = [AlgodHTTPError("timed out", 504), ConnectionResetError()]
+    statusAfterBlock = client.status_after_block
+
+    def flaky(round):
+        if failures:
+            raise failures.pop(0)
+        return statusAfterBlock(round)
+
+    scripts.report(b"1", b"10")
+    monkeypatch.setattr(client, "status_after_block", flaky)
+    follower.start()
+    try:
+        event = subscription.get(timeout=5)
+    finally:
+        follower.stop()
+
+    assert failures == []
+    assert event.value == b"10"
+
+
+def test_run_raises_other_errors(client, monkeypatch):
+    follower = BlockFollower(client, [APP_ID])
+    follower.poll()
+    subscription = follower.subscribe()
+    client.ledger.produceBlock()
+    monkeypatch.setattr(client, "block_info", lambda round: {"block": {"txns": []}})
+
+    with pytest.raises(KeyError):
+        follower.run()
+    # subscribers aren't left waiting on a follower that stopped
+    assert list(subscription) == []
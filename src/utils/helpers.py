@@ -3,81 +3,57 @@ Module containing helper functions for accessing Algorand blockchain.
 Forked from https://github.com/ipaleka/algorand-contracts-testing
 """
 import base64
-import os
-import pty
-import subprocess
 import time
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 from algosdk import account
 from algosdk import mnemonic
+from algosdk.error import AlgodHTTPError
 from algosdk.error import IndexerHTTPError
+from algosdk.error import KMDHTTPError
 from algosdk.future.transaction import LogicSig
 from algosdk.future.transaction import LogicSigTransaction
 from algosdk.future.transaction import PaymentTxn
-from algosdk.v2client import algod
-from algosdk.v2client import indexer
 
 from src.utils.account import Account
+from src.utils.artifacts import get_program_cache
+from src.utils.clients import algod_client
+from src.utils.clients import indexer_client
+from src.utils.clients import kmd_client
+from src.utils.metrics import timed
+from src.utils.params import getParamsProvider
+from src.utils.store import getLocalStore
+from src.utils.util import waitForTransaction
+from src.utils.wallet import exportKey
 
 INDEXER_TIMEOUT = 10  # 61 for devMode
+INDEXER_MIN_BACKOFF = 0.01
+INDEXER_MAX_BACKOFF = 1.0
+INDEXER_WORKERS = 8
 
 
-## SANDBOX
-def _cli_passphrase_for_account(address):
-    """Return passphrase for provided address."""
-    process = call_sandbox_command("goal", "account", "export", "-a", address)
-
-    if process.stderr:
-        raise RuntimeError(process.stderr.decode("utf8"))
-
-    passphrase = ""
-    parts = process.stdout.decode("utf8").split('"')
-    if len(parts) > 1:
-        passphrase = parts[1]
-    if passphrase == "":
-        raise ValueError(
-            "Can't retrieve passphrase from the address: %s\nOutput: %s" % (address, process.stdout.decode("utf8"))
-        )
-    return passphrase
-
-
-def _sandbox_directory():
-    """Return full path to Algorand's sandbox executable.
-
-    The location of sandbox directory is retrieved either from the SANDBOX_DIR
-    environment variable or if it's not set then the location of sandbox directory
-    is implied to be the sibling of this Django project in the directory tree.
-    """
-    return os.environ.get("SANDBOX_DIR") or str(Path(__file__).resolve().parent.parent.parent / "sandbox")
-
-
-def _sandbox_executable():
-    """Return full path to Algorand's sandbox executable."""
-    return _sandbox_directory() + "/sandbox"
-
-
-def call_sandbox_command(*args):
-    """Call and return sandbox command composed from provided arguments."""
-    return subprocess.run([_sandbox_executable(), *args], stdin=pty.openpty()[1], capture_output=True)
+## KMD
+def _passphrase_for_account(address, kmd=None):
+    """Return passphrase for provided address, exported from the node's default kmd wallet."""
+    try:
+        return mnemonic.from_private_key(exportKey(kmd or kmd_client(), address))
+    except KMDHTTPError as e:
+        raise ValueError("Can't retrieve passphrase from the address: %s" % address) from e
 
 
 ## CLIENTS
 def _algod_client():
-    """Instantiate and return Algod client object."""
-    algod_address = "http://localhost:4001"
-    algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-    return algod.AlgodClient(algod_token, algod_address)
+    """Return the shared, connection-pooled Algod client object."""
+    return algod_client()
 
 
 def _indexer_client():
-    """Instantiate and return Indexer client object."""
-    indexer_address = "http://localhost:8980"
-    indexer_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-    return indexer.IndexerClient(indexer_token, indexer_address)
+    """Return the shared, connection-pooled Indexer client object."""
+    return indexer_client()
 
 
 ## TRANSACTIONS
+@timed("helpers.add_transaction")
 def _add_transaction(sender, receiver, passphrase, amount, note):
     """Create and sign transaction from provided arguments.
 
@@ -86,7 +62,7 @@ def _add_transaction(sender, receiver, passphrase, amount, note):
     Returned two-tuple of empty strings marks successful transaction.
     """
     client = _algod_client()
-    params = client.suggested_params()
+    params = getParamsProvider(client).get()
     unsigned_txn = PaymentTxn(sender, params, receiver, amount, None, note.encode())
     signed_txn = unsigned_txn.sign(mnemonic.to_private_key(passphrase))
     transaction_id = client.send_transaction(signed_txn)
@@ -102,24 +78,12 @@ def _wait_for_confirmation(client, transaction_id, timeout):
         transaction_id (str): the transaction to wait for
         timeout (int): maximum number of rounds to wait
     Returns:
-        dict: pending transaction information, or throws an error if the transaction
-            is not confirmed or rejected in the next timeout rounds
+        PendingTxnResponse: pending transaction information
+    Raises:
+        Exception: if the transaction is rejected or not confirmed in the next timeout rounds,
+            or AlgodHTTPError if the node can't be asked about it (this used to return None)
     """
-    start_round = client.status()["last-round"] + 1
-    current_round = start_round
-
-    while current_round < start_round + timeout:
-        try:
-            pending_txn = client.pending_transaction_info(transaction_id)
-        except Exception:
-            return
-        if pending_txn.get("confirmed-round", 0) > 0:
-            return pending_txn
-        elif pending_txn["pool-error"]:
-            raise Exception("pool error: {}".format(pending_txn["pool-error"]))
-        client.status_after_block(current_round)
-        current_round += 1
-    raise Exception("pending tx not found in timeout rounds, timeout value = : {}".format(timeout))
+    return waitForTransaction(client, transaction_id, timeout)
 
 
 def create_payment_transaction(escrow_address, params, receiver, amount):
@@ -127,6 +91,7 @@ def create_payment_transaction(escrow_address, params, receiver, amount):
     return PaymentTxn(escrow_address, params, receiver, amount)
 
 
+@timed("helpers.process_logic_sig_transaction")
 def process_logic_sig_transaction(logic_sig, payment_transaction):
     """Create logic signature transaction and send it to the network."""
     client = _algod_client()
@@ -136,6 +101,7 @@ def process_logic_sig_transaction(logic_sig, payment_transaction):
     return transaction_id
 
 
+@timed("helpers.process_transactions")
 def process_transactions(transactions):
     """Send provided grouped `transactions` to network and wait for confirmation."""
     client = _algod_client()
@@ -146,7 +112,7 @@ def process_transactions(transactions):
 
 def suggested_params():
     """Return the suggested params from the algod client."""
-    return _algod_client().suggested_params()
+    return getParamsProvider(_algod_client()).get()
 
 
 ## CREATING
@@ -156,18 +122,20 @@ def add_standalone_account():
     return Account(privateKey=private_key)
 
 
-def fund_account(address: Account, initial_funds=1000000000):
-    """Fund provided `address` with `initial_funds` amount of microAlgos."""
-    initial_funds_address = _initial_funds_address()
-    if initial_funds_address is None:
-        raise Exception("Initial funds weren't transferred!")
-    _add_transaction(
-        initial_funds_address,
-        address.getAddress(),
-        _cli_passphrase_for_account(initial_funds_address),
-        initial_funds,
-        "Initial funds",
-    )
+def fund_account(address: Account, initial_funds=1000000000, funder=None):
+    """
+    Fund provided `address` with `initial_funds` amount of microAlgos.
+
+    from `funder` if given, else from the node's genesis account, with its key exported from kmd.
+    """
+    if funder is not None:
+        sender, passphrase = funder.getAddress(), funder.getMnemonic()
+    else:
+        sender = _initial_funds_address()
+        if sender is None:
+            raise Exception("Initial funds weren't transferred!")
+        passphrase = _passphrase_for_account(sender)
+    _add_transaction(sender, address.getAddress(), passphrase, initial_funds, "Initial funds")
 
 
 ## RETRIEVING
@@ -187,33 +155,98 @@ def _initial_funds_address():
     )
 
 
-def account_balance(address):
-    """Return funds balance of the account having provided address."""
-    account_info = _algod_client().account_info(address)
+def account_balance(address, maxAge=None):
+    """
+    Return funds balance of the account having provided address.
+
+    with `maxAge`, the balance is read through the local store and may be up to that many rounds old.
+    """
+    if maxAge is None:
+        account_info = _algod_client().account_info(address)
+    else:
+        account_info = getLocalStore(_algod_client()).account(address, maxAge)
     return account_info.get("amount")
 
 
-def transaction_info(transaction_id):
-    """Return transaction with provided id."""
-    timeout = 0
-    while timeout < INDEXER_TIMEOUT:
+def _confirmed_round(client, transaction_id):
+    """Return the round algod confirmed `transaction_id` in, None if algod doesn't know."""
+    try:
+        return client.pending_transaction_info(transaction_id).get("confirmed-round")
+    except AlgodHTTPError:
+        return None
+
+
+def _backoff():
+    """Yield sleep intervals doubling from INDEXER_MIN_BACKOFF up to INDEXER_MAX_BACKOFF."""
+    delay = INDEXER_MIN_BACKOFF
+    while True:
+        yield delay
+        delay = min(delay * 2, INDEXER_MAX_BACKOFF)
+
+
+def wait_for_indexer(round, timeout=INDEXER_TIMEOUT):
+    """Wait until the indexer has ingested `round`, backing off between health checks."""
+    indexer = _indexer_client()
+    deadline = time.monotonic() + timeout
+    for delay in _backoff():
+        if indexer.health()["round"] >= round:
+            return
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError("Timeout reached waiting for the indexer to reach round {}".format(round))
+        time.sleep(delay)
+
+
+def transactions_info(transaction_ids, timeout=INDEXER_TIMEOUT):
+    """
+    Return the indexer records of `transaction_ids`, in order.
+
+    Waits for the indexer to reach the round algod confirmed them in, then
+    looks them up concurrently; ids algod no longer remembers are retried
+    with backoff until they show up or `timeout` seconds have passed.
+    """
+    client = _algod_client()
+    indexer = _indexer_client()
+    deadline = time.monotonic() + timeout
+
+    rounds = [_confirmed_round(client, transaction_id) for transaction_id in transaction_ids]
+    known = [r for r in rounds if r]
+    if known:
+        wait_for_indexer(max(known), timeout)
+
+    def lookup(transaction_id):
         try:
-            transaction = _indexer_client().transaction(transaction_id)
-            break
+            return indexer.transaction(transaction_id)
         except IndexerHTTPError:
-            time.sleep(1)
-            timeout += 1
-    else:
-        raise TimeoutError("Timeout reached waiting for transaction to be available in indexer")
+            return None
+
+    found = {}
+    with ThreadPoolExecutor(INDEXER_WORKERS) as executor:
+        for delay in _backoff():
+            missing = [t for t in transaction_ids if t not in found]
+            for transaction_id, transaction in zip(missing, executor.map(lookup, missing)):
+                if transaction is not None:
+                    found[transaction_id] = transaction
+            if len(found) == len(set(transaction_ids)):
+                return [found[t] for t in transaction_ids]
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError("Timeout reached waiting for transaction to be available in indexer")
+            time.sleep(delay)
 
-    return transaction
+
+def transaction_info(transaction_id):
+    """Return transaction with provided id."""
+    return transactions_info([transaction_id])[0]
 
 
 ## UTILITY
 def _compile_source(source):
-    """Compile and return teal binary code."""
-    compile_response = _algod_client().compile(source)
-    return base64.b64decode(compile_response["result"])
+    """Compile and return teal binary code, reusing the on-disk program cache."""
+    client = _algod_client()
+
+    def compile(teal):
+        return base64.b64decode(client.compile(teal)["result"])
+
+    return get_program_cache().program(source, suggested_params().gen, compile)
 
 
 def logic_signature(teal_source):
@@ -0,0 +1,89 @@
+import pytest
+from algosdk import account
+from algosdk import mnemonic
+from algosdk.future import transaction
+
+from src.utils.account import Account
+from src.utils.clients import algod_client
+from src.utils.helpers import _passphrase_for_account
+from src.utils.helpers import account_balance
+from src.utils.helpers import fund_account
+from src.utils.helpers import transaction_info
+from src.utils.helpers import transactions_info
+from src.utils.helpers import wait_for_indexer
+from src.utils.params import getParamsProvider
+from src.utils.testing.resources import getTemporaryAccount
+
+
+LAG_POLLS = 3
+
+
+@pytest.fixture
+def lagging(node):
+    """The node's indexer, serving new blocks only after LAG_POLLS health checks."""
+    node.indexer.indexer.lagPolls = LAG_POLLS
+    return node.indexer
+
+
+def _payments(count):
+    """Send `count` confirmed payments and return their txids."""
+    client = algod_client()
+    sender = getTemporaryAccount(client)
+    sp = getParamsProvider(client).get()
+    signed = [
+        transaction.PaymentTxn(sender.getAddress(), sp, sender.getAddress(), i).sign(sender.getPrivateKey())
+        for i in range(count)
+    ]
+    for stxn in signed:
+        client.send_transaction(stxn)
+    return [stxn.get_txid() for stxn in signed]
+
+
+def test_transaction_info_waits_for_the_indexer(lagging):
+    (txid,) = _payments(1)
+
+    record = transaction_info(txid)
+
+    assert record["transaction"]["id"] == txid
+    # looked up as soon as the indexer catches up, with one health check per poll
+    assert lagging.calls["health"] == LAG_POLLS + 1
+    assert lagging.calls["transaction"] == 1
+
+
+def test_transactions_info_waits_once_for_many(lagging):
+    txids = _payments(20)
+
+    records = transactions_info(txids)
+
+    assert [r["transaction"]["id"] for r in records] == txids
+    assert lagging.calls["transaction"] == 20
+    assert lagging.calls["health"] == LAG_POLLS + 1
+
+
+def test_wait_for_indexer_times_out(lagging):
+    with pytest.raises(TimeoutError):
+        wait_for_indexer(algod_client().status()["last-round"] + 1, timeout=0.3)
+    # backing off 10, 20, 40 and 80ms leaves time for at most 5 checks before the timeout
+    assert 1 <= lagging.calls["health"] <= 5
+
+
+def test_unknown_transaction_times_out(node):
+    with pytest.raises(TimeoutError, match="indexer"):
+        transactions_info(["A" * 52], timeout=0.2)
+
+
+def test_passphrase_for_account(node):
+    key = node.ledger.genesisKeys[0]
+
+    assert _passphrase_for_account(account.address_from_private_key(key)) == mnemonic.from_private_key(key)
+    with pytest.raises(ValueError, match="passphrase"):
+        _passphrase_for_account(account.generate_account()[1])
+
+
+def test_fund_account_from_a_funder(node):
+    funder = getTemporaryAccount(algod_client())
+    receiver = Account(account.generate_account()[0])
+
+    fund_account(receiver, 1_000_000, funder=funder)
+
+    assert account_balance(receiver.getAddress()) == 1_000_000
@@ -0,0 +1,228 @@
+"""
+Export the application call history of an app from the indexer to columnar files.
+
+The rounds to export are split into windows that are paged through
+concurrently, each with the indexer's `next` token. Every app call becomes
+one row with its decoded app args, global and local state deltas and logs,
+and each run writes one Parquet (or Arrow IPC) file into the output
+directory, so the directory reads as one dataset, e.g. with
+pyarrow.dataset.dataset(directory). A checkpoint next to the files records
+the last exported round, so a re-run only fetches the rounds after it; the
+first run starts at the round the app was created in.
+
+usage: python -m src.utils.history APP_ID DIRECTORY [--format arrow] [-n network]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from algosdk.v2client.indexer import IndexerClient
+
+from src.utils.clients import indexer_client
+from src.utils.util import decodeDelta
+
+PAGE_SIZE = 1000
+WINDOW_ROUNDS = 10_000
+WORKERS = 4
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+DELTA_TYPE = pa.list_(
+    pa.struct([("key", pa.binary()), ("action", pa.uint8()), ("uint", pa.uint64()), ("bytes", pa.binary())])
+)
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("round", pa.uint64()),
+        ("round_time", pa.uint64()),
+        ("intra_round_offset", pa.uint32()),
+        ("sender", pa.string()),
+        ("fee", pa.uint64()),
+        ("group", pa.binary()),
+        ("on_completion", pa.string()),
+        ("created", pa.bool_()),
+        ("app_args", pa.list_(pa.binary())),
+        ("global_delta", DELTA_TYPE),
+        ("local_delta", pa.list_(pa.struct([("address", pa.string()), ("delta", DELTA_TYPE)]))),
+        ("logs", pa.list_(pa.binary())),
+    ]
+)
+
+
+def fetchAppCalls(
+    indexer: IndexerClient, appID: int, minRound: int, maxRound: int, pageSize: int = PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield the indexer records of every call to `appID` in rounds [minRound, maxRound], following next tokens."""
+    token = None
+    while True:
+        page = indexer.search_transactions(
+            limit=pageSize,
+            next_page=token,
+            txn_type="appl",
+            application_id=appID,
+            min_round=minRound,
+            max_round=maxRound,
+        )
+        yield from page["transactions"]
+        token = page.get("next-token")
+        if not page["transactions"] or not token:
+            return
+
+
+def _delta(delta: List[Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for pair in delta:
+        ((key, value),) = decodeDelta([pair]).items()
+        rows.append(
+            {
+                "key": key,
+                "action": pair["value"]["action"],
+                "uint": value if isinstance(value, int) else None,
+                "bytes": value if isinstance(value, bytes) else None,
+            }
+        )
+    return rows
+
+
+def decodeAppCall(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten an indexer app call record into a row of SCHEMA."""
+    app = record["application-transaction"]
+    return {
+        "id": record["id"],
+        "round": record["confirmed-round"],
+        "round_time": record.get("round-time"),
+        "intra_round_offset": record.get("intra-round-offset"),
+        "sender": record["sender"],
+        "fee": record["fee"],
+        "group": base64.b64decode(record["group"]) if record.get("group") else None,
+        "on_completion": app["on-completion"],
+        "created": "created-application-index" in record,
+        "app_args": [base64.b64decode(arg) for arg in app.get("application-args", [])],
+        "global_delta": _delta(record.get("global-state-delta", [])),
+        "local_delta": [
+            {"address": entry["address"], "delta": _delta(entry["delta"])}
+            for entry in record.get("local-state-delta", [])
+        ],
+        "logs": [base64.b64decode(log) for log in record.get("logs", [])],
+    }
+
+
+class HistoryExporter:
+    """
+    Exports the app calls of one app into `directory`, resuming from its checkpoint.
+
+    Args:
+        indexer (IndexerClient): the indexer history is read from
+        appID (int): the app whose calls are exported
+        directory (str): where the files and the checkpoint are written
+        format (str): "parquet" or "arrow"
+        windowRounds (int): rounds per concurrently fetched window
+        workers (int): windows fetched at once
+    """
+
+    def __init__(
+        self,
+        indexer: IndexerClient,
+        appID: int,
+        directory: str,
+        format: str = "parquet",
+        windowRounds: int = WINDOW_ROUNDS,
+        workers: int = WORKERS,
+    ) -> None:
+        if format not in FORMATS:
+            raise ValueError("unknown format: {}".format(format))
+        self.indexer = indexer
+        self.appID = appID
+        self.directory = Path(directory)
+        self.format = format
+        self.windowRounds = windowRounds
+        self.workers = workers
+
+    @property
+    def checkpointPath(self) -> Path:
+        # datasets skip files starting with "_", so the checkpoint doesn't get read as data
+        return self.directory / "_app-{}.checkpoint.json".format(self.appID)
+
+    def checkpoint(self) -> int:
+        """The last exported round, 0 if nothing was exported yet."""
+        try:
+            return json.loads(self.checkpointPath.read_text())["round"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _saveCheckpoint(self, round: int) -> None:
+        tmp = self.checkpointPath.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"app-id": self.appID, "round": round}))
+        os.replace(tmp, self.checkpointPath)
+
+    def createdAt(self) -> int:
+        """The round the app was created in, from the indexer."""
+        return max(self.indexer.applications(self.appID)["application"].get("created-at-round", 1), 1)
+
+    def _window(self, bounds: Tuple[int, int]) -> List[Dict[str, Any]]:
+        return [decodeAppCall(r) for r in fetchAppCalls(self.indexer, self.appID, *bounds)]
+
+    def export(self, maxRound: Optional[int] = None) -> Optional[Path]:
+        """
+        Export the calls after the checkpoint up to `maxRound` (the indexer's round by default).
+
+        Returns:
+            the file written, None if there were no new calls
+        """
+        if maxRound is None:
+            maxRound = self.indexer.health()["round"]
+        checkpoint = self.checkpoint()
+        # a first export starts at the app's creation instead of paging through every round since genesis
+        first = checkpoint + 1 if checkpoint else self.createdAt()
+        if first > maxRound:
+            return None
+
+        windows = [
+            (start, min(start + self.windowRounds - 1, maxRound))
+            for start in range(first, maxRound + 1, self.windowRounds)
+        ]
+        with ThreadPoolExecutor(min(self.workers, len(windows))) as executor:
+            rows = [row for window in executor.map(self._window, windows) for row in window]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = None
+        if rows:
+            path = self.directory / "app-{}-rounds-{}-{}{}".format(self.appID, first, maxRound, FORMATS[self.format])
+            table = pa.Table.from_pylist(rows, schema=SCHEMA)
+            if self.format == "parquet":
+                pq.write_table(table, path)
+            else:
+                with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+                    writer.write_table(table)
+
+        self._saveCheckpoint(maxRound)
+        return path
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Export the app call history of an app")
+    parser.add_argument("app_id", type=int)
+    parser.add_argument("directory")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("-n", "--network", default=None, help="network in the nodes section of config.yml")
+    parsed = parser.parse_args(args)
+
+    exporter = HistoryExporter(indexer_client(parsed.network), parsed.app_id, parsed.directory, parsed.format)
+    start = exporter.checkpoint()
+    path = exporter.export()
+    print(f"exported rounds {start + 1}-{exporter.checkpoint()} of app {parsed.app_id} to {path or 'nothing new'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
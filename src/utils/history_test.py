@@ -0,0 +1,89 @@
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+import src.utils.artifacts as artifacts
+from src.scripts.scripts import Scripts
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.clients import indexer_client
+from src.utils.history import fetchAppCalls
+from src.utils.history import HistoryExporter
+from src.utils.params import getParamsProvider
+from src.utils.testing.resources import getTemporaryAccount
+
+
+@pytest.fixture
+def scripts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path / "teal"))
+    client = algod_client()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    return s
+
+
+def _bid(scripts, prediction):
+    bidder = getTemporaryAccount(scripts.client)
+    txns = scripts._bid_txns(bidder, prediction, getParamsProvider(scripts.client).get())
+    scripts.client.send_transactions([t.sign(bidder.getPrivateKey()) for t in txns])
+    return bidder
+
+
+def test_fetch_pages_through_calls(scripts):
+    for prediction in range(5):
+        _bid(scripts, prediction)
+
+    records = list(fetchAppCalls(indexer_client(), scripts.app_id, 1, scripts.client.status()["last-round"], 2))
+
+    assert [r["application-transaction"]["on-completion"] for r in records] == ["noop"] + ["optin"] * 5
+
+
+def test_export_decodes_calls(scripts, tmp_path):
+    bidder = _bid(scripts, 5000)
+    exporter = HistoryExporter(indexer_client(), scripts.app_id, str(tmp_path / "out"), windowRounds=2)
+
+    path = exporter.export()
+    table = pq.read_table(path).to_pylist()
+
+    assert [(row["on_completion"], row["created"]) for row in table] == [("noop", True), ("optin", False)]
+    assert table[0]["app_args"] == [(1).to_bytes(8, "big"), b"1"]
+    assert {d["key"]: d["uint"] for d in table[0]["global_delta"]}[b"num_bidders"] == 0
+    assert table[1]["local_delta"] == [
+        {"address": bidder.getAddress(), "delta": [{"key": b"prediction", "action": 2, "uint": 5000, "bytes": None}]}
+    ]
+
+
+def test_export_resumes_from_checkpoint(scripts, tmp_path):
+    out = tmp_path / "out"
+    exporter = HistoryExporter(indexer_client(), scripts.app_id, str(out), format="arrow", windowRounds=3)
+    _bid(scripts, 1)
+
+    assert exporter.export() is not None
+    assert exporter.export() is None
+    checkpoint = exporter.checkpoint()
+
+    _bid(scripts, 2)
+    _bid(scripts, 3)
+    path = exporter.export()
+
+    assert path.name.startswith("app-{}-rounds-{}-".format(scripts.app_id, checkpoint + 1))
+    rows = ds.dataset(str(out), format="arrow").to_table().to_pylist()
+    assert sorted(row["app_args"][0][-1] for row in rows if row["on_completion"] == "optin") == [1, 2, 3]
+    assert len({row["id"] for row in rows}) == len(rows) == 4
+
+
+def test_first_export_starts_at_app_creation(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path / "teal"))
+    client = algod_client()
+    for _ in range(30):
+        node.ledger.produceBlock()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    exporter = HistoryExporter(indexer_client(), s.app_id, str(tmp_path / "out"), windowRounds=1)
+
+    assert exporter.createdAt() > 30
+    path = exporter.export()
+
+    assert path.name.startswith("app-{}-rounds-{}-".format(s.app_id, exporter.createdAt()))
@@ -0,0 +1,251 @@
+"""
+Latency histograms and counters for node round trips, in Prometheus text format.
+
+The request methods of the algod, indexer and kmd clients (pooled and fake)
+are wrapped with `instrument`, so every client call (suggested_params,
+send_transaction, pending_transaction_info, compile, ...) is timed under
+its route, e.g. /transactions/pending/{txid}. ConfirmationTracker
+records how many rounds each transaction took to confirm, and the Scripts
+and helpers operations built from those calls are timed as a whole with
+`timed`.
+
+Nothing is recorded unless the METRICS environment variable is set or
+enable() is called; until then an instrumented call costs one attribute
+check. `prometheus()` renders what was recorded and `serve(port)` exposes
+it at /metrics for scraping.
+"""
+import bisect
+import functools
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_BUCKETS = (1, 2, 3, 4, 5, 10, 20, 50, 100)
+
+REQUEST_SECONDS = "algorand_request_duration_seconds"
+REQUEST_ERRORS = "algorand_request_errors_total"
+REQUEST_RETRIES = "algorand_request_retries_total"
+CONFIRMATION_ROUNDS = "algorand_confirmation_rounds"
+CONFIRMATIONS = "algorand_confirmations_total"
+OPERATION_SECONDS = "algorand_operation_duration_seconds"
+
+DESCRIPTIONS = {
+    REQUEST_SECONDS: "Latency of node requests by client and route.",
+    REQUEST_ERRORS: "Node requests that failed, by client, route and status.",
+    REQUEST_RETRIES: "Requests sent again, by reason.",
+    CONFIRMATION_ROUNDS: "Rounds from tracking a transaction until it confirmed.",
+    CONFIRMATIONS: "Tracked transactions by outcome.",
+    OPERATION_SECONDS: "Latency of Scripts and helpers operations, round trips included.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# address, txid and numeric path segments, replaced so routes have few distinct values
+_ROUTE_PARAMS = [
+    (re.compile(r"/[A-Z2-7]{58}(?=/|$)"), "/{address}"),
+    (re.compile(r"/[A-Z2-7]{52}(?=/|$)"), "/{txid}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{id}"),
+]
+
+
+class Histogram:
+    """Counts of observed values per bucket (upper bounds, exclusive of +Inf), with their sum."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs as Prometheus exposes them, ending with +Inf."""
+        total, pairs = 0, []
+        for bound, count in zip([*map(_number, self.buckets), "+Inf"], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    pairs = ['{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metrics:
+    """Histograms and counters keyed by metric name and labels, recorded only while `enabled`."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: str) -> None:
+        """Add `value` to the histogram `name` with `labels`."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def inc(self, name: str, count: float = 1, **labels: str) -> None:
+        """Add `count` to the counter `name` with `labels`."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + count
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def prometheus(self) -> str:
+        """Everything recorded, in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append("# HELP {} {}".format(name, DESCRIPTIONS.get(name, name)))
+                lines.append("# TYPE {} counter".format(name))
+                for labels, value in sorted(series.items()):
+                    lines.append("{}{} {}".format(name, _labels(labels), _number(value)))
+            for name, histograms in sorted(self._histograms.items()):
+                lines.append("# HELP {} {}".format(name, DESCRIPTIONS.get(name, name)))
+                lines.append("# TYPE {} histogram".format(name))
+                for labels, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append("{}_bucket{} {}".format(name, _labels(labels, 'le="{}"'.format(bound)), count))
+                    lines.append("{}_sum{} {}".format(name, _labels(labels), repr(histogram.sum)))
+                    lines.append("{}_count{} {}".format(name, _labels(labels), histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics(enabled=bool(os.environ.get("METRICS")))
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics."""
+    return _metrics
+
+
+def enable() -> None:
+    _metrics.enabled = True
+
+
+def disable() -> None:
+    _metrics.enabled = False
+
+
+@functools.lru_cache(maxsize=4096)
+def route(requrl: str) -> str:
+    """The route of a request path, with addresses, txids and ids replaced by placeholders."""
+    for pattern, placeholder in _ROUTE_PARAMS:
+        requrl = pattern.sub(placeholder, requrl)
+    return requrl
+
+
+def instrument(client: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Time a client's request method, called as (self, method, requrl, ...), under `client` and the route."""
+
+    def decorate(request: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(request)
+        def wrapper(self: Any, method: str, requrl: str, *args: Any, **kwargs: Any) -> Any:
+            if not _metrics.enabled:
+                return request(self, method, requrl, *args, **kwargs)
+
+            start = time.perf_counter()
+            status = None
+            try:
+                return request(self, method, requrl, *args, **kwargs)
+            except Exception as e:
+                status = str(getattr(e, "code", None) or type(e).__name__)
+                raise
+            finally:
+                labels = {"client": client, "method": method, "route": route(requrl)}
+                _metrics.observe(REQUEST_SECONDS, time.perf_counter() - start, **labels)
+                if status is not None:
+                    _metrics.inc(REQUEST_ERRORS, status=status, **labels)
+
+        return wrapper
+
+    return decorate
+
+
+def timed(operation: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Time every call of the decorated function as `operation`."""
+
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _metrics.enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                _metrics.observe(OPERATION_SECONDS, time.perf_counter() - start, operation=operation, outcome=outcome)
+
+        return wrapper
+
+    return decorate
+
+
+def serve(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve the process-wide metrics at http://host:port/metrics from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = _metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,114 @@
+import urllib.request
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from src.scripts.scripts import Scripts
+from src.utils.clients import algod_client
+from src.utils.metrics import CONFIRMATION_ROUNDS
+from src.utils.metrics import CONFIRMATIONS
+from src.utils.metrics import get_metrics
+from src.utils.metrics import Metrics
+from src.utils.metrics import OPERATION_SECONDS
+from src.utils.metrics import REQUEST_ERRORS
+from src.utils.metrics import REQUEST_SECONDS
+from src.utils.metrics import route
+from src.utils.metrics import serve
+from src.utils.params import getParamsProvider
+from src.utils.testing.resources import getTemporaryAccount
+from src.utils.util import waitForTransaction
+
+TXID = "A" * 52
+
+
+@pytest.fixture
+def metrics():
+    metrics = get_metrics()
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def _pay(client):
+    sender = getTemporaryAccount(client)
+    txn = transaction.PaymentTxn(sender.getAddress(), getParamsProvider(client).get(), sender.getAddress(), 0)
+    signed = txn.sign(sender.getPrivateKey())
+    client.send_transaction(signed)
+    return signed.get_txid()
+
+
+def test_nothing_is_recorded_when_disabled(node):
+    waitForTransaction(algod_client(), _pay(algod_client()))
+
+    assert get_metrics().prometheus() == "\n"
+
+
+def test_requests_are_timed_by_route(node, metrics):
+    client = algod_client()
+    waitForTransaction(client, _pay(client))
+    with pytest.raises(AlgodHTTPError):
+        client.pending_transaction_info(TXID)
+
+    pending = metrics.histogram(REQUEST_SECONDS, client="algod", method="GET", route="/transactions/pending/{txid}")
+    assert pending.count >= 2
+    assert metrics.histogram(REQUEST_SECONDS, client="algod", method="POST", route="/transactions").count >= 1
+    assert (
+        metrics.counter(
+            REQUEST_ERRORS, client="algod", method="GET", route="/transactions/pending/{txid}", status="404"
+        )
+        == 1
+    )
+    assert metrics.histogram(CONFIRMATION_ROUNDS).count >= 1
+    assert metrics.counter(CONFIRMATIONS, outcome="confirmed") >= 1
+
+
+def test_operations_are_timed(node, metrics):
+    client = algod_client()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper, app_id=1234)
+
+    s.report(b"1", b"10")
+
+    assert metrics.histogram(OPERATION_SECONDS, operation="scripts.report", outcome="ok").count == 1
+    assert metrics.histogram(OPERATION_SECONDS, operation="resources.getTemporaryAccount", outcome="ok").count == 1
+
+
+def test_prometheus_format():
+    metrics = Metrics(enabled=True)
+    metrics.inc("requests_total", client="algod")
+    for value in (0.002, 0.02, 20):
+        metrics.observe("latency_seconds", value, buckets=(0.01, 1), route='/a"b')
+
+    assert metrics.prometheus().splitlines() == [
+        "# HELP requests_total requests_total",
+        "# TYPE requests_total counter",
+        'requests_total{client="algod"} 1',
+        "# HELP latency_seconds latency_seconds",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a\\"b",le="0.01"} 1',
+        'latency_seconds_bucket{route="/a\\"b",le="1"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a\\"b"} 20.022',
+        'latency_seconds_count{route="/a\\"b"} 3',
+    ]
+
+
+def test_route_placeholders():
+    address = "B" * 58
+    assert route("/accounts/{}/applications/12".format(address)) == "/accounts/{address}/applications/{id}"
+    assert route("/transactions/pending/{}".format(TXID)) == "/transactions/pending/{txid}"
+    assert route("/status/wait-for-block-after/7") == "/status/wait-for-block-after/{id}"
+
+
+def test_serve(metrics):
+    metrics.inc("requests_total")
+    server = serve(0, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen("http://127.0.0.1:{}/metrics".format(server.server_address[1])) as response:
+            assert b"requests_total 1" in response.read()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,105 @@
+import copy
+import threading
+import time
+import weakref
+from typing import Optional
+
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client.algod import AlgodClient
+
+# algod suggests a 1000 round validity window
+DEFAULT_VALID_ROUNDS = 1000
+
+
+class ParamsProvider:
+    """
+    Caches the SuggestedParams of one algod node so bursts of transactions share one fetch.
+
+    The cached params are refreshed when any of these happen:
+    - `ttl` seconds have passed since the last fetch
+    - a round more than `maxRoundDelta` rounds past the fetched round was observed
+    - invalidate() was called, e.g. because the network fee changed
+
+    Every get() returns a copy, so callers can set their own validity window.
+    By default the window starts at the latest observed round, so transactions
+    built from cached params in later rounds still get distinct txids.
+
+    Args:
+        client (AlgodClient): the algorand node params are fetched from
+        ttl (float): seconds the cached params stay fresh
+        maxRoundDelta (int): rounds the chain may advance before params are refetched
+    """
+
+    def __init__(self, client: AlgodClient, ttl: float = 30.0, maxRoundDelta: int = 10) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.maxRoundDelta = maxRoundDelta
+
+        self.fetches = 0
+        self._params: Optional[SuggestedParams] = None
+        self._fetchedAt = 0.0
+        self._latestRound = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, first: Optional[int] = None, last: Optional[int] = None, validRounds: int = DEFAULT_VALID_ROUNDS
+    ) -> SuggestedParams:
+        """
+        Return a copy of the cached params, fetching new ones if they went stale.
+
+        Args:
+            first (int, optional): first valid round, defaults to the latest observed round
+            last (int, optional): last valid round, defaults to `first` + `validRounds`
+            validRounds (int): length of the validity window when `last` isn't given
+        """
+        with self._lock:
+            if self._isStale():
+                self._store(self.client.suggested_params())
+            return self._window(first, last, validRounds)
+
+    def observeRound(self, round: int) -> None:
+        """Tell the provider the chain reached `round`, so params go stale after `maxRoundDelta` rounds."""
+        with self._lock:
+            self._latestRound = max(self._latestRound, round)
+
+    def observeFee(self, fee: int) -> None:
+        """Tell the provider the current network fee; a change invalidates the cached params."""
+        with self._lock:
+            if self._params is not None and fee != self._params.fee:
+                self._params = None
+
+    def invalidate(self) -> None:
+        """Drop the cached params so the next get() refetches them."""
+        with self._lock:
+            self._params = None
+
+    def _store(self, params: SuggestedParams) -> None:
+        self._params = params
+        self._fetchedAt = time.monotonic()
+        self._latestRound = max(self._latestRound, params.first)
+        self.fetches += 1
+
+    def _window(self, first: Optional[int], last: Optional[int], validRounds: int) -> SuggestedParams:
+        sp = copy.copy(self._params)
+        sp.first = self._latestRound if first is None else first
+        sp.last = sp.first + validRounds if last is None else last
+        return sp
+
+    def _isStale(self) -> bool:
+        return (
+            self._params is None
+            or time.monotonic() - self._fetchedAt > self.ttl
+            or self._latestRound - self._params.first > self.maxRoundDelta
+        )
+
+
+_providers: "weakref.WeakKeyDictionary[AlgodClient, ParamsProvider]" = weakref.WeakKeyDictionary()
+_providersLock = threading.Lock()
+
+
+def getParamsProvider(client: AlgodClient) -> ParamsProvider:
+    """Return the ParamsProvider shared by everything using `client`."""
+    with _providersLock:
+        if client not in _providers:
+            _providers[client] = ParamsProvider(client)
+        return _providers[client]
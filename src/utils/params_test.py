@@ -0,0 +1,63 @@
+from .params import getParamsProvider
+from .params import ParamsProvider
+from .testing.ledger import FakeAlgodClient
+from .testing.ledger import FakeLedger
+
+
+def test_params_are_cached():
+    client = FakeAlgodClient(FakeLedger())
+    params = ParamsProvider(client)
+
+    for _ in range(10):
+        params.get()
+
+    assert client.calls["suggestedParams"] == 1
+
+
+def test_params_follow_observed_rounds():
+    client = FakeAlgodClient(FakeLedger())
+    params = ParamsProvider(client, maxRoundDelta=5)
+
+    assert params.get().first == 1
+    params.observeRound(4)
+    assert params.get().first == 4
+    assert client.calls["suggestedParams"] == 1
+
+    client.ledger.waitForBlockAfter(9)
+    params.observeRound(10)
+    assert params.get().first == 10
+    assert client.calls["suggestedParams"] == 2
+
+
+def test_params_custom_window():
+    params = ParamsProvider(FakeAlgodClient(FakeLedger()))
+
+    sp = params.get(first=3, validRounds=10)
+    assert (sp.first, sp.last) == (3, 13)
+
+    sp = params.get(first=3, last=5)
+    assert (sp.first, sp.last) == (3, 5)
+
+    # copies are handed out, the cached params stay untouched
+    assert params.get().last == 1001
+
+
+def test_params_fee_change_invalidates():
+    client = FakeAlgodClient(FakeLedger())
+    params = ParamsProvider(client, ttl=3600)
+
+    params.get()
+    params.observeFee(0)
+    params.get()
+    assert client.calls["suggestedParams"] == 1
+
+    params.observeFee(10)
+    params.get()
+    assert client.calls["suggestedParams"] == 2
+
+
+def test_getParamsProvider_is_shared_per_client():
+    client = FakeAlgodClient(FakeLedger())
+
+    assert getParamsProvider(client) is getParamsProvider(client)
+    assert getParamsProvider(client) is not getParamsProvider(FakeAlgodClient(FakeLedger()))
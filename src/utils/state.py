@@ -0,0 +1,172 @@
+"""
+Local mirror of an app's global and local state, kept current from state deltas.
+
+The state is read from the node once; after that every confirmed app call
+the mirror is shown (a PendingTxnResponse) has its global and local state
+deltas applied, so reads are served from memory. Calls made by other
+accounts aren't seen, so with `reconcileRounds` the mirror reloads itself
+from the node once it is that many rounds behind the latest round it saw.
+"""
+import base64
+import threading
+import weakref
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from algosdk import encoding
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.util import decodeDelta
+from src.utils.util import decodeState
+from src.utils.util import PendingTxnResponse
+from src.utils.util import StateValue
+
+
+def _address(value: str) -> str:
+    """Return an address from pending info, which algod sends as a string and msgpack-style nodes as base64."""
+    if encoding.is_valid_address(value):
+        return value
+    return encoding.encode_address(base64.b64decode(value))
+
+
+class AppState:
+    """
+    Global state of one app, and the local state of the accounts read through it.
+
+    Args:
+        client (AlgodClient): the node state is loaded from
+        appID (int): the app mirrored
+        reconcileRounds (int, optional): reload once the state is this many rounds old; never if None
+    """
+
+    def __init__(self, client: AlgodClient, appID: int, reconcileRounds: Optional[int] = None) -> None:
+        self.client = client
+        self.appID = appID
+        self.reconcileRounds = reconcileRounds
+
+        # round the state is known to be current at, None until loaded
+        self.round: Optional[int] = None
+        self.latestRound = 0
+        self.loads = 0
+        self._global: Dict[bytes, StateValue] = {}
+        # address -> local state, None if the account isn't opted in
+        self._local: Dict[str, Optional[Dict[bytes, StateValue]]] = {}
+        self._lock = threading.RLock()
+
+    def load(self) -> None:
+        """Read the global state from the node and forget the local states read so far."""
+        with self._lock:
+            round = self.client.status()["last-round"]
+            appInfo = self.client.application_info(self.appID)
+            self._global = decodeState(appInfo["params"].get("global-state", []))
+            self._local = {}
+            self.round = self.latestRound = max(round, self.latestRound)
+            self.loads += 1
+
+    def _current(self) -> None:
+        if self.round is None:
+            self.load()
+        elif self.reconcileRounds is not None and self.latestRound - self.round >= self.reconcileRounds:
+            self.load()
+
+    def getGlobal(self) -> Dict[bytes, StateValue]:
+        """Return a copy of the global state."""
+        with self._lock:
+            self._current()
+            return dict(self._global)
+
+    def get(self, key: bytes, default: Optional[StateValue] = None) -> Optional[StateValue]:
+        """Return one global state value."""
+        with self._lock:
+            self._current()
+            return self._global.get(key, default)
+
+    def __getitem__(self, key: bytes) -> StateValue:
+        with self._lock:
+            self._current()
+            return self._global[key]
+
+    def getLocal(self, address: str) -> Optional[Dict[bytes, StateValue]]:
+        """Return a copy of an account's local state, None if it isn't opted in."""
+        with self._lock:
+            self._current()
+            if address not in self._local:
+                self._local[address] = self._readLocal(address)
+            local = self._local[address]
+            return None if local is None else dict(local)
+
+    def _readLocal(self, address: str) -> Optional[Dict[bytes, StateValue]]:
+        for app in self.client.account_info(address).get("apps-local-state", []):
+            if app["id"] == self.appID:
+                return decodeState(app.get("key-value", []))
+        return None
+
+    def seed(self, response: PendingTxnResponse) -> None:
+        """Start from the creation of the app, whose global delta is the whole initial state."""
+        with self._lock:
+            self._global = {}
+            self._local = {}
+            self.round = self.latestRound = response.confirmedRound or 0
+            self._applyDeltas(response)
+
+    def apply(self, response: PendingTxnResponse) -> bool:
+        """
+        Apply the state deltas of a confirmed transaction.
+
+        Returns:
+            bool: whether the transaction called this app and wasn't already reflected in the state
+        """
+        with self._lock:
+            round = response.confirmedRound
+            if round is None:
+                return False
+            self.latestRound = max(self.latestRound, round)
+            txn = response.txn.get("txn", {})
+            if txn.get("apid") != self.appID or self.round is None or round <= self.round:
+                return False
+
+            sender = _address(txn["snd"])
+            onComplete = txn.get("apan", transaction.OnComplete.NoOpOC)
+            if onComplete == transaction.OnComplete.OptInOC:
+                self._local[sender] = {}
+            self._applyDeltas(response)
+            if onComplete in (transaction.OnComplete.CloseOutOC, transaction.OnComplete.ClearStateOC):
+                self._local[sender] = None
+            return True
+
+    def _applyDeltas(self, response: PendingTxnResponse) -> None:
+        _update(self._global, response.globalStateDelta or [])
+        for entry in response.localStateDelta or []:
+            address = _address(entry["address"])
+            # an unread account's local state is read in full when first asked for
+            if self._local.get(address) is not None:
+                _update(self._local[address], entry["delta"])
+
+    def observeRound(self, round: int) -> None:
+        """Note that the chain reached `round`, for reconciliation."""
+        with self._lock:
+            self.latestRound = max(self.latestRound, round)
+
+
+def _update(state: Dict[bytes, StateValue], delta: List[Any]) -> None:
+    for key, value in decodeDelta(delta).items():
+        if value is None:
+            state.pop(key, None)
+        else:
+            state[key] = value
+
+
+_states: "weakref.WeakKeyDictionary[AlgodClient, Dict[int, AppState]]" = weakref.WeakKeyDictionary()
+_statesLock = threading.Lock()
+
+
+def getAppState(client: AlgodClient, appID: int) -> AppState:
+    """Return the AppState of `appID` shared by everything using `client`."""
+    with _statesLock:
+        states = _states.setdefault(client, {})
+        if appID not in states:
+            states[appID] = AppState(client, appID)
+        return states[appID]
@@ -0,0 +1,84 @@
+import pytest
+
+import src.utils.artifacts as artifacts
+from src.scripts.scripts import Scripts
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.params import getParamsProvider
+from src.utils.state import AppState
+from src.utils.state import getAppState
+from src.utils.testing.resources import getTemporaryAccount
+from src.utils.util import getAppGlobalState
+from src.utils.util import waitForTransaction
+
+
+@pytest.fixture
+def scripts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    return s
+
+
+def _bid(scripts, prediction):
+    bidder = getTemporaryAccount(scripts.client)
+    txns = scripts._bid_txns(bidder, prediction, getParamsProvider(scripts.client).get())
+    scripts.client.send_transactions([t.sign(bidder.getPrivateKey()) for t in txns])
+    return bidder, waitForTransaction(scripts.client, txns[1].get_txid())
+
+
+def test_state_is_seeded_by_deploy(scripts):
+    calls = scripts.client.totalCalls
+
+    assert scripts.state[b"tellor_query_id"] == b"1"
+    assert scripts.state.loads == 0
+    assert scripts.client.totalCalls == calls
+    assert scripts.state.getGlobal() == getAppGlobalState(scripts.client, scripts.app_id)
+
+
+def test_deltas_are_applied(scripts):
+    state = scripts.state
+    bidder, response = _bid(scripts, 5000)
+    calls = scripts.client.totalCalls
+
+    assert state.apply(response)
+    assert state[b"num_bidders"] == 1
+    assert state.getLocal(bidder.getAddress()) == {b"prediction": 5000}
+    assert scripts.client.totalCalls == calls
+    # deltas carry the new values, so applying a response twice is harmless
+    state.apply(response)
+    assert state[b"num_bidders"] == 1
+
+    assert state.getGlobal() == getAppGlobalState(scripts.client, scripts.app_id)
+
+
+def test_local_state_is_read_once(scripts):
+    bidder, response = _bid(scripts, 42)
+    state = AppState(scripts.client, scripts.app_id)
+
+    assert state.getLocal(bidder.getAddress()) == {b"prediction": 42}
+    assert state.getLocal(scripts.tipper.getAddress()) is None
+    calls = scripts.client.totalCalls
+    state.getLocal(bidder.getAddress())
+    assert scripts.client.totalCalls == calls
+    assert state.loads == 1
+
+
+def test_reconciliation(scripts):
+    state = AppState(scripts.client, scripts.app_id, reconcileRounds=2)
+    state.getGlobal()
+
+    # a bid the mirror isn't shown
+    _bid(scripts, 7)
+    assert state[b"num_bidders"] == 0
+
+    state.observeRound(scripts.client.status()["last-round"] + 2)
+    assert state[b"num_bidders"] == 1
+    assert state.loads == 2
+
+
+def test_state_is_shared_per_client_and_app(scripts):
+    assert getAppState(scripts.client, scripts.app_id) is scripts.state
+    assert getAppState(scripts.client, scripts.app_id + 1) is not scripts.state
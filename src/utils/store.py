@@ -0,0 +1,284 @@
+"""
+Persistent local store of account info, app global state and block headers.
+
+A LocalStore keeps what algod returned in SQLite along with the round it
+was read at, so reads of the same account or app within a freshness bound
+cost no round trip, across calls and processes. One database file is kept
+per network (genesis id), by default under .local_store at the repository
+root; LOCAL_STORE_DIR moves it.
+
+An entry read at round R is served to a read with `maxAge` while the
+store's latest round is at most R + maxAge. While the store follows the
+chain (`sync`, `follow`, or a BlockFollower applying blocks), the latest
+round is the last one followed, trusted for `statusTtl` seconds after it
+was followed; otherwise every read asks algod's status for it, so an
+entry is never served past its `maxAge`.
+
+`sync` follows the chain block by block: it saves each block header and
+forgets the cached accounts and apps its transactions touched (senders,
+receivers, close-to, clawback and freeze target addresses, app call
+accounts and called apps, and the same for inner transactions). While the
+store follows the chain this way, the entries it still holds are known to
+be unchanged up to the last synced round, however long ago they were read.
+
+Pending rewards accrue without transactions, so on networks paying
+rewards the `amount` of a cached account lags by the rewards since it was read.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from base64 import b64decode
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from algosdk import encoding
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.params import getParamsProvider
+
+# catching up on more blocks than this starts following again from the latest round
+MAX_CATCH_UP = 1000
+
+# transaction fields holding an address, base64 of the public key in blocks
+_ADDRESS_FIELDS = ("snd", "rcv", "close", "asnd", "arcv", "aclose", "fadd")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (address TEXT PRIMARY KEY, round INTEGER NOT NULL, info TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS apps (app_id INTEGER PRIMARY KEY, round INTEGER NOT NULL, info TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS blocks (round INTEGER PRIMARY KEY, header TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS touched (kind TEXT NOT NULL, key TEXT NOT NULL, round INTEGER NOT NULL,
+    PRIMARY KEY (kind, key));
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def _store_directory() -> Path:
+    return Path(os.environ.get("LOCAL_STORE_DIR") or Path(__file__).resolve().parent.parent.parent / ".local_store")
+
+
+def touchedBy(txns: Iterable[Dict[str, Any]]) -> Tuple[Set[str], Set[int]]:
+    """The addresses and app ids whose state the transactions of a block (in algod's JSON shape) may have changed."""
+    addresses: Set[str] = set()
+    apps: Set[int] = set()
+    pending = list(txns)
+    while pending:
+        stxn = pending.pop()
+        txn = stxn.get("txn", {})
+        for field in _ADDRESS_FIELDS:
+            if txn.get(field):
+                addresses.add(encoding.encode_address(b64decode(txn[field])))
+        for account in txn.get("apat") or []:
+            addresses.add(encoding.encode_address(b64decode(account)))
+        for appID in (txn.get("apid"), stxn.get("apid")):
+            if appID:
+                apps.add(appID)
+        pending.extend((stxn.get("dt") or {}).get("itx") or [])
+    return addresses, apps
+
+
+class LocalStore:
+    """
+    Write-through cache of one network's accounts, apps and block headers in SQLite.
+
+    Args:
+        client (AlgodClient): the node entries are read from when the store has none fresh enough
+        path (str, optional): the database file, see the module docstring for the default
+        statusTtl (float): seconds the latest round learnt from following the chain is trusted for
+    """
+
+    def __init__(self, client: AlgodClient, path: Optional[str] = None, statusTtl: float = 5.0) -> None:
+        self.client = client
+        if path is None:
+            directory = _store_directory()
+            directory.mkdir(parents=True, exist_ok=True)
+            path = str(directory / "{}.sqlite".format(getParamsProvider(client).get().gen))
+        self.path = path
+        self.statusTtl = statusTtl
+
+        self.hits = 0
+        self.misses = 0
+        self._round = 0
+        # when sync or apply last followed the chain
+        self._followedAt: Optional[float] = None
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    ## ROUNDS
+    def _meta(self, key: str) -> Optional[int]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _setMeta(self, key: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def synced(self) -> Optional[int]:
+        """The last round `sync` applied, None if the store never followed the chain."""
+        with self._lock:
+            return self._meta("synced")
+
+    def observeRound(self, round: int) -> None:
+        """Tell the store the chain reached `round`."""
+        with self._lock:
+            self._round = max(self._round, round)
+
+    def latestRound(self) -> int:
+        """The latest round, asking algod's status unless the store followed the chain in the last `statusTtl` seconds."""
+        with self._lock:
+            if self._followedAt is None or time.monotonic() - self._followedAt > self.statusTtl:
+                self.observeRound(self.client.status()["last-round"])
+            return self._round
+
+    def _currentAt(self, kind: str, key: str, round: int) -> int:
+        """The round an entry read at `round` is known to be unchanged up to."""
+        synced, since = self._meta("synced"), self._meta("since")
+        if synced is None or round < since:
+            return round
+        touched = self._db.execute("SELECT round FROM touched WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        if touched is not None and touched[0] > round:
+            return round
+        return max(round, synced)
+
+    ## ENTRIES
+    def _get(self, kind: str, key: str, maxAge: int, fetch) -> Dict[str, Any]:
+        table, column, rowKey = ("accounts", "address", key) if kind == "account" else ("apps", "app_id", int(key))
+        latest = self.latestRound()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT round, info FROM {} WHERE {} = ?".format(table, column), (rowKey,)
+            ).fetchone()
+            if row is not None and self._currentAt(kind, key, row[0]) >= latest - maxAge:
+                self.hits += 1
+                return json.loads(row[1])
+            self.misses += 1
+
+        info = fetch()
+        # an app's info carries no round, it is at least as new as the latest round before the read
+        round = info.get("round", latest)
+        with self._lock:
+            self.observeRound(round)
+            self._db.execute(
+                "INSERT OR REPLACE INTO {} ({}, round, info) VALUES (?, ?, ?)".format(table, column),
+                (rowKey, round, json.dumps(info)),
+            )
+        return info
+
+    def account(self, address: str, maxAge: int = 0) -> Dict[str, Any]:
+        """An account's info as algod's account_info returns it, at most `maxAge` rounds old."""
+        return self._get("account", address, maxAge, lambda: self.client.account_info(address))
+
+    def application(self, appID: int, maxAge: int = 0) -> Dict[str, Any]:
+        """An app's info as algod's application_info returns it, at most `maxAge` rounds old."""
+        return self._get("app", str(appID), maxAge, lambda: self.client.application_info(appID))
+
+    def block(self, round: int) -> Dict[str, Any]:
+        """The header of block `round`, i.e. the block without its transactions; headers never change."""
+        with self._lock:
+            row = self._db.execute("SELECT header FROM blocks WHERE round = ?", (round,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+        block = self.client.block_info(round)["block"]
+        with self._lock:
+            self.observeRound(round)
+            return self._putBlock(block)
+
+    def lastBlock(self, maxAge: int = 0) -> Dict[str, Any]:
+        """The header of the newest stored block, if at most `maxAge` rounds old, else of the latest block."""
+        latest = self.latestRound()
+        with self._lock:
+            row = self._db.execute("SELECT round, header FROM blocks ORDER BY round DESC LIMIT 1").fetchone()
+            if row is not None and row[0] >= latest - maxAge:
+                self.hits += 1
+                return json.loads(row[1])
+        return self.block(latest)
+
+    def _putBlock(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        header = {k: v for k, v in block.items() if k != "txns"}
+        self._db.execute(
+            "INSERT OR REPLACE INTO blocks (round, header) VALUES (?, ?)", (header["rnd"], json.dumps(header))
+        )
+        return header
+
+    ## FOLLOWING
+    def sync(self) -> List[int]:
+        """
+        Apply every block since the last synced round, up to the latest round.
+
+        Returns:
+            list: the rounds applied
+        """
+        latest = self.client.status()["last-round"]
+        with self._lock:
+            self.observeRound(latest)
+            self._followedAt = time.monotonic()
+            synced = self._meta("synced")
+            if synced is None or latest - synced > MAX_CATCH_UP:
+                # entries read from here on are followed, older ones keep the round they were read at
+                self._db.execute("DELETE FROM touched")
+                self._setMeta("since", latest)
+                self._setMeta("synced", latest)
+                return []
+
+        applied = []
+        for round in range(synced + 1, latest + 1):
+            self.apply(self.client.block_info(round)["block"])
+            applied.append(round)
+        return applied
+
+    def apply(self, block: Dict[str, Any]) -> None:
+        """Save a block's header and forget what its transactions touched; blocks must be applied in order."""
+        round = block["rnd"]
+        addresses, apps = touchedBy(block.get("txns") or [])
+        keys = [("account", address) for address in addresses] + [("app", str(appID)) for appID in apps]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._putBlock(block)
+                self._db.executemany("DELETE FROM accounts WHERE address = ?", [(a,) for a in addresses])
+                self._db.executemany("DELETE FROM apps WHERE app_id = ?", [(a,) for a in apps])
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO touched (kind, key, round) VALUES (?, ?, ?)",
+                    [(kind, key, round) for kind, key in keys],
+                )
+                self._setMeta("synced", round)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self.observeRound(round)
+            self._followedAt = time.monotonic()
+
+    def follow(self, stop: threading.Event) -> None:
+        """Sync after every new block until `stop` is set."""
+        while not stop.is_set():
+            self.sync()
+            self.client.status_after_block(self._meta("synced"))
+
+
+_stores: "weakref.WeakKeyDictionary[AlgodClient, LocalStore]" = weakref.WeakKeyDictionary()
+_storesLock = threading.Lock()
+
+
+def getLocalStore(client: AlgodClient) -> LocalStore:
+    """Return the LocalStore shared by everything using `client`."""
+    with _storesLock:
+        if client not in _stores:
+            _stores[client] = LocalStore(client)
+        return _stores[client]
@@ -0,0 +1,144 @@
+import base64
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+
+from src.utils.account import Account
+from src.utils.store import LocalStore
+from src.utils.store import touchedBy
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.util import getBalances
+from src.utils.util import getLastBlockTimestamp
+
+
+@pytest.fixture
+def client():
+    return FakeAlgodClient(FakeLedger())
+
+
+@pytest.fixture
+def store(client, tmp_path):
+    store = LocalStore(client, str(tmp_path / "store.sqlite"), statusTtl=0)
+    yield store
+    store.close()
+
+
+def _account(client, amount=1_000_000):
+    a = Account(account.generate_account()[0])
+    client.ledger.fund(a.getAddress(), amount)
+    return a
+
+
+def _pay(client, sender, receiver, amount):
+    txn = transaction.PaymentTxn(sender.getAddress(), client.suggested_params(), receiver.getAddress(), amount)
+    client.send_transaction(txn.sign(sender.getPrivateKey()))
+    client.ledger.produceBlock()
+
+
+def test_entries_are_served_within_max_age(client, store):
+    a = _account(client)
+
+    assert store.account(a.getAddress(), maxAge=2)["amount"] == 1_000_000
+    client.ledger.fund(a.getAddress(), 1)
+    client.ledger.produceBlock()
+    client.ledger.produceBlock()
+    assert store.account(a.getAddress(), maxAge=2)["amount"] == 1_000_000
+    assert client.calls["accountInfo"] == 1
+
+    client.ledger.produceBlock()
+    assert store.account(a.getAddress(), maxAge=2)["amount"] == 1_000_001
+    assert client.calls["accountInfo"] == 2
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_unfollowed_reads_ask_for_the_latest_round(client, tmp_path):
+    store = LocalStore(client, str(tmp_path / "store.sqlite"))
+    a, b = _account(client, 10_000_000), _account(client)
+    assert store.account(b.getAddress(), maxAge=0)["amount"] == 1_000_000
+
+    _pay(client, a, b, 1_000_000)
+
+    assert store.account(b.getAddress(), maxAge=0)["amount"] == 2_000_000
+    store.close()
+
+
+def test_sync_keeps_untouched_entries_current(client, store):
+    a, b, c = _account(client), _account(client), _account(client)
+    store.sync()
+    store.account(a.getAddress())
+    store.account(c.getAddress())
+
+    _pay(client, a, b, 1000)
+    for _ in range(5):
+        client.ledger.produceBlock()
+    assert store.sync() == list(range(client.ledger.round - 5, client.ledger.round + 1))
+    client.calls.clear()
+
+    # untouched since it was read, so still current with maxAge=0
+    assert store.account(c.getAddress(), maxAge=0)["amount"] == 1_000_000
+    assert client.calls["accountInfo"] == 0
+    # the payment's sender was forgotten
+    assert store.account(a.getAddress(), maxAge=0)["amount"] == 1_000_000 - 1000 - 1000
+    assert client.calls["accountInfo"] == 1
+
+
+def test_block_headers_persist(client, store, tmp_path):
+    for _ in range(3):
+        client.ledger.produceBlock()
+
+    header = store.lastBlock()
+    assert header["rnd"] == client.ledger.round and "txns" not in header
+    store.close()
+
+    reopened = LocalStore(client, store.path, statusTtl=0)
+    client.calls.clear()
+    assert reopened.block(client.ledger.round) == header
+    assert client.calls["blockInfo"] == 0
+    reopened.close()
+
+
+def test_touched_by():
+    a, b, c, d = (account.generate_account()[1] for _ in range(4))
+
+    def key(address):
+        return base64.b64encode(encoding.decode_address(address)).decode()
+
+    txns = [
+        {"txn": {"type": "pay", "snd": key(a), "rcv": key(b)}},
+        {
+            "txn": {"type": "appl", "snd": key(b), "apid": 7, "apat": [key(c)]},
+            "dt": {"itx": [{"txn": {"type": "pay", "snd": key(c), "rcv": key(d)}}]},
+        },
+        {"txn": {"type": "appl", "snd": key(a)}, "apid": 8},
+    ]
+
+    assert touchedBy(txns) == ({a, b, c, d}, {7, 8})
+
+
+def test_freezes_touch_their_target():
+    manager, target = (account.generate_account()[1] for _ in range(2))
+
+    def key(address):
+        return base64.b64encode(encoding.decode_address(address)).decode()
+
+    freeze = {"txn": {"type": "afrz", "snd": key(manager), "fadd": key(target), "faid": 7, "afrz": True}}
+
+    assert touchedBy([freeze]) == ({manager, target}, set())
+
+
+def test_helpers_read_through_the_store(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("LOCAL_STORE_DIR", str(tmp_path))
+    a = _account(client)
+    client.ledger.produceBlock()
+
+    assert getBalances(client, a.getAddress(), maxAge=10) == {0: 1_000_000}
+    assert getBalances(client, a.getAddress(), maxAge=10) == {0: 1_000_000}
+    block, timestamp = getLastBlockTimestamp(client, maxAge=10)
+    assert getLastBlockTimestamp(client, maxAge=10) == (block, timestamp)
+
+    assert client.calls["accountInfo"] == 1
+    assert client.calls["blockInfo"] == 1
+    assert getLastBlockTimestamp(client)[1] == timestamp
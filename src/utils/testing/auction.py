@@ -0,0 +1,131 @@
+"""
+Runs the prediction auction contract on a FakeLedger through the TEAL interpreter.
+
+AuctionSimulator deploys a stand-in tellor app holding a reported value and
+the auction app, and exposes bid/settle calls that return each call's
+EvalResult, so tests and benchmarks can check behaviour and opcode cost.
+"""
+import base64
+from typing import List
+from typing import Optional
+
+from algosdk import account
+from algosdk.future import transaction
+from pyteal import compileTeal
+from pyteal import Mode
+
+from src.contracts.approval import approval_program
+from src.contracts.approval import clear_state_program
+from src.scripts.scripts import ScriptsBase
+from src.utils.account import Account
+from src.utils.testing.avm import APP_BUDGET
+from src.utils.testing.avm import AVMError
+from src.utils.testing.avm import EvalResult
+from src.utils.testing.avm import evaluateGroup
+from src.utils.testing.ledger import FakeLedger
+from src.utils.testing.ledger import GENESIS_HASH
+from src.utils.testing.ledger import GENESIS_ID
+from src.utils.testing.ledger import MIN_FEE
+
+# stand-in for the tellor app: stores its first create arg as "value"
+TELLOR_STUB = """#pragma version 5
+byte "value"
+txna ApplicationArgs 0
+app_global_put
+int 1
+"""
+
+FUNDING_AMOUNT = 10_000_000
+
+
+class AuctionSimulator:
+    """
+    The auction contract deployed on a FakeLedger next to a tellor stand-in reporting `value`.
+
+    Args:
+        value (int): value the stand-in tellor app reports
+        budget (int, optional): opcode budget per app call, unlimited if None
+        approval (str, optional): approval program TEAL, compiled from src.contracts if None
+        clear (str, optional): clear state program TEAL, compiled from src.contracts if None
+    """
+
+    def __init__(
+        self,
+        value: int,
+        budget: Optional[int] = APP_BUDGET,
+        approval: Optional[str] = None,
+        clear: Optional[str] = None,
+    ) -> None:
+        self.ledger = FakeLedger()
+        self.budget = budget
+        self.bidders: List[Account] = []
+
+        self.tipper = self.newAccount()
+        stub = self.compile(TELLOR_STUB)
+        self.tellorAppID = self._create(
+            transaction.ApplicationCreateTxn(
+                sender=self.tipper.getAddress(),
+                sp=self.params(),
+                on_complete=transaction.OnComplete.NoOpOC,
+                approval_program=stub,
+                clear_program=stub,
+                global_schema=transaction.StateSchema(num_uints=0, num_byte_slices=1),
+                local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0),
+                app_args=[value.to_bytes(8, "big")],
+            )
+        )
+
+        self.scripts = ScriptsBase(None, self.tipper, self.tipper, self.tipper)
+        approval = approval or compileTeal(approval_program(), mode=Mode.Application, version=5)
+        clear = clear or compileTeal(clear_state_program(), mode=Mode.Application, version=5)
+        deployTxn = self.scripts._deploy_txn(
+            self.compile(approval), self.compile(clear), self.tellorAppID, "1", self.params()
+        )
+        self.createResult = self.call([deployTxn])
+        self.scripts._set_app_id(self.ledger._nextIndex)
+        self.appID = self.scripts.app_id
+        self.call([self.scripts._fund_app_txn(self.params())])
+
+    def compile(self, teal: str) -> bytes:
+        return base64.b64decode(self.ledger.compile(teal.encode())["result"])
+
+    def params(self) -> transaction.SuggestedParams:
+        return transaction.SuggestedParams(
+            MIN_FEE, self.ledger.round, self.ledger.round + 1000, GENESIS_HASH, GENESIS_ID, flat_fee=True
+        )
+
+    def newAccount(self, amount: int = FUNDING_AMOUNT) -> Account:
+        a = Account(account.generate_account()[0])
+        self.ledger.fund(a.getAddress(), amount)
+        return a
+
+    def _create(self, txn: transaction.ApplicationCreateTxn) -> int:
+        self.call([txn])
+        return self.ledger._nextIndex
+
+    def call(self, txns: List[transaction.Transaction]) -> EvalResult:
+        """Apply a group to the ledger and return the EvalResult of its last transaction."""
+        group = evaluateGroup(self.ledger, txns, commit=True, budget=self.budget)
+        if not group.ok:
+            raise AVMError(group.error)
+        return group[-1]
+
+    def bid(self, prediction: int, bidder: Optional[Account] = None) -> EvalResult:
+        """Have `bidder` (a new account by default) bid on `prediction`."""
+        bidder = bidder or self.newAccount()
+        self.bidders.append(bidder)
+        return self.call(self.scripts._bid_txns(bidder, prediction, self.params()))
+
+    def settle(self, bidder: Account) -> EvalResult:
+        """Close `bidder` out of the auction, settling their prediction."""
+        return self.call([self.scripts._settle_txn(bidder, self.tellorAppID, self.params())])
+
+    def settle_bidder(self, bidder: Account, settler: Optional[Account] = None) -> EvalResult:
+        """Have `settler` (the tipper by default) settle `bidder`'s prediction for them."""
+        txn = self.scripts._settle_bidder_txn(
+            settler or self.tipper, bidder.getAddress(), self.tellorAppID, self.params()
+        )
+        return self.call([txn])
+
+    def balance(self, a: Account) -> int:
+        return self.ledger.balances.get(a.getAddress(), 0)
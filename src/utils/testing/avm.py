@@ -0,0 +1,1210 @@
+"""
+TEAL interpreter for running this project's contracts without a node.
+
+Programs are evaluated from the TEAL text compileTeal produces, against a
+copy-on-write view of a FakeLedger's balances and app state, counting
+opcode cost the way the AVM does. Tests and benchmarks use it to check
+contract behaviour and cost per execution path; it implements the TEAL v5
+opcodes and fields this project's contracts use, not the whole AVM.
+"""
+import base64
+import hashlib
+import math
+from collections import Counter
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from algosdk import encoding
+from algosdk import logic
+from algosdk.future import transaction
+
+StackValue = Union[int, bytes]
+
+MAX_UINT = 2 ** 64 - 1
+MAX_BYTES = 4096
+MAX_KEY_LENGTH = 64
+MAX_KEY_VALUE_LENGTH = 128
+# cost every app call in a group contributes to the group's pooled budget
+APP_BUDGET = 700
+MIN_TXN_FEE = 1000
+MIN_BALANCE = 100_000
+ZERO_ADDRESS = bytes(32)
+
+# opcodes that don't cost 1
+OP_COSTS = {"sha256": 35}
+
+TYPE_ENUMS = {"unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6}
+ON_COMPLETIONS = {
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+NAMED_INTS = {**TYPE_ENUMS, **ON_COMPLETIONS}
+
+
+class AVMError(Exception):
+    """A program failed or rejected; `line` is the TEAL source line it stopped at."""
+
+    def __init__(self, message: str, line: Optional[int] = None) -> None:
+        super().__init__(message if line is None else "{} (line {})".format(message, line))
+        self.line = line
+
+
+## ASSEMBLY
+class Instruction:
+    __slots__ = ("op", "args", "line")
+
+    def __init__(self, op: str, args: List[str], line: int) -> None:
+        self.op = op
+        self.args = args
+        self.line = line
+
+
+def _tokenize(line: str) -> List[str]:
+    """Split a TEAL line into tokens, keeping quoted strings whole and dropping comments."""
+    tokens: List[str] = []
+    current = ""
+    quoted = False
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if quoted:
+            current += c
+            if c == "\\" and i + 1 < len(line):
+                current += line[i + 1]
+                i += 1
+            elif c == '"':
+                quoted = False
+        elif c == '"':
+            current += c
+            quoted = True
+        elif line.startswith("//", i):
+            break
+        elif c.isspace():
+            if current:
+                tokens.append(current)
+            current = ""
+        else:
+            current += c
+        i += 1
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def _parseString(token: str) -> bytes:
+    body = token[1:-1]
+    out = bytearray()
+    i = 0
+    escapes = {"n": b"\n", "r": b"\r", "t": b"\t", "\\": b"\\", '"': b'"'}
+    while i < len(body):
+        c = body[i]
+        if c == "\\":
+            nxt = body[i + 1]
+            if nxt == "x":
+                out += bytes.fromhex(body[i + 2] + body[i + 3])
+                i += 4
+                continue
+            out += escapes[nxt]
+            i += 2
+            continue
+        out += c.encode()
+        i += 1
+    return bytes(out)
+
+
+def parseBytes(args: List[str]) -> bytes:
+    """Decode the immediate(s) of a `byte`/`pushbytes` pseudo-op."""
+    first = args[0]
+    if first.startswith('"'):
+        return _parseString(first)
+    if first.startswith("0x"):
+        return bytes.fromhex(first[2:])
+    if first in ("base64", "b64"):
+        return base64.b64decode(args[1])
+    if first in ("base32", "b32"):
+        return base64.b32decode(args[1] + "=" * (-len(args[1]) % 8))
+    if first.startswith(("base64(", "b64(")) and first.endswith(")"):
+        return base64.b64decode(first.split("(", 1)[1][:-1])
+    raise AVMError("unrecognized byte constant {}".format(" ".join(args)))
+
+
+def parseInt(token: str) -> int:
+    if token in NAMED_INTS:
+        return NAMED_INTS[token]
+    return int(token, 0)
+
+
+class Program:
+    """
+    Assembled TEAL text: instructions, the label table and the source lines.
+
+    Args:
+        source (str): TEAL program text, as returned by compileTeal
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.lines = source.splitlines()
+        self.version = 1
+        self.instructions: List[Instruction] = []
+        self.labels: Dict[str, int] = {}
+
+        for number, text in enumerate(self.lines, start=1):
+            tokens = _tokenize(text)
+            if not tokens:
+                continue
+            if tokens[0] == "#pragma":
+                self.version = int(tokens[2])
+            elif len(tokens) == 1 and tokens[0].endswith(":"):
+                self.labels[tokens[0][:-1]] = len(self.instructions)
+            else:
+                self.instructions.append(Instruction(tokens[0], tokens[1:], number))
+
+        for ins in self.instructions:
+            if ins.op in ("b", "bz", "bnz", "callsub") and ins.args[0] not in self.labels:
+                raise AVMError("reference to undefined label {}".format(ins.args[0]), ins.line)
+
+
+@lru_cache(maxsize=64)
+def programFromBytes(program: bytes) -> Program:
+    """
+    Return the Program behind program bytes from FakeLedger.compile.
+
+    The fake node's "bytecode" is a version byte followed by the TEAL text.
+    """
+    try:
+        source = program[1:].decode()
+    except UnicodeDecodeError:
+        source = ""
+    if not source.startswith("#pragma"):
+        raise AVMError("program bytes weren't compiled by the fake node, can't evaluate them")
+    return Program(source)
+
+
+## STATE
+class StateOverlay:
+    """
+    Copy-on-write view of a FakeLedger's balances and app state.
+
+    A group is evaluated against an overlay, which is committed to the ledger
+    only if every transaction in it succeeds.
+    """
+
+    def __init__(self, ledger: Any) -> None:
+        self.ledger = ledger
+        self.round = ledger.round
+        self.balances: Dict[str, int] = {}
+        self.apps: Dict[int, Dict[str, Any]] = {}
+        # (address, app id) -> local state, None once closed out
+        self.locals: Dict[Tuple[str, int], Optional[Dict[bytes, StackValue]]] = {}
+        self.nextIndex = ledger._nextIndex
+
+    def balance(self, address: str) -> int:
+        if address in self.balances:
+            return self.balances[address]
+        return self.ledger.balances.get(address, 0)
+
+    def credit(self, address: str, amount: int) -> None:
+        self.balances[address] = self.balance(address) + amount
+
+    def debit(self, address: str, amount: int) -> None:
+        if self.balance(address) < amount:
+            raise AVMError("overspend (account {}, data {})".format(address, self.balance(address)))
+        self.balances[address] = self.balance(address) - amount
+
+    def app(self, appID: int) -> Dict[str, Any]:
+        if appID not in self.apps:
+            if appID not in self.ledger.apps:
+                raise AVMError("application {} does not exist".format(appID))
+            app = dict(self.ledger.apps[appID])
+            app["global-state"] = OrderedDict(app["global-state"])
+            self.apps[appID] = app
+        return self.apps[appID]
+
+    def createApp(self, creator: str, approval: bytes, clear: bytes, globalSchema: Any, localSchema: Any) -> int:
+        self.nextIndex += 1
+        self.apps[self.nextIndex] = {
+            "creator": creator,
+            "approval-program": approval,
+            "clear-state-program": clear,
+            "global-state": OrderedDict(),
+            "global-state-schema": globalSchema,
+            "local-state-schema": localSchema,
+        }
+        return self.nextIndex
+
+    def local(self, address: str, appID: int) -> Optional[Dict[bytes, StackValue]]:
+        key = (address, appID)
+        if key not in self.locals:
+            state = self.ledger.localStates.get(address, {}).get(appID)
+            self.locals[key] = None if state is None else OrderedDict(state)
+        return self.locals[key]
+
+    def optIn(self, address: str, appID: int) -> None:
+        if self.local(address, appID) is not None:
+            raise AVMError("account {} has already opted in to app {}".format(address, appID))
+        self.locals[(address, appID)] = OrderedDict()
+
+    def closeOut(self, address: str, appID: int) -> None:
+        if self.local(address, appID) is None:
+            raise AVMError("account {} is not opted in to app {}".format(address, appID))
+        self.locals[(address, appID)] = None
+
+    def commit(self) -> None:
+        """Write every change to the ledger."""
+        ledger = self.ledger
+        ledger.balances.update(self.balances)
+        ledger.apps.update(self.apps)
+        for (address, appID), state in self.locals.items():
+            if state is None:
+                ledger.localStates.get(address, {}).pop(appID, None)
+            else:
+                ledger.localStates.setdefault(address, {})[appID] = state
+        ledger._nextIndex = self.nextIndex
+
+
+## EVALUATION
+class EvalResult:
+    """
+    Outcome of one program evaluation.
+
+    Attributes:
+        approved (bool): whether the program approved
+        cost (int): opcode cost spent
+        lineCosts (Counter): TEAL source line -> cost spent on it
+        error (str, optional): why the program failed, if it did
+        logs (list): values passed to `log`
+        innerTxns (list): fields of the inner transactions submitted
+        appID (int, optional): the app called, or created
+        globalDelta (dict): global key -> new value, None if deleted
+        localDeltas (dict): address -> local key -> new value, None if deleted
+    """
+
+    def __init__(self) -> None:
+        self.approved = False
+        self.cost = 0
+        self.lineCosts: Counter = Counter()
+        self.error: Optional[str] = None
+        self.logs: List[bytes] = []
+        self.innerTxns: List[Dict[str, Any]] = []
+        self.appID: Optional[int] = None
+        self.globalDelta: Dict[bytes, Optional[StackValue]] = {}
+        self.localDeltas: Dict[str, Dict[bytes, Optional[StackValue]]] = {}
+
+    def __repr__(self) -> str:
+        return "EvalResult(approved={}, cost={}, error={!r})".format(self.approved, self.cost, self.error)
+
+
+def _address(value: str) -> bytes:
+    return encoding.decode_address(value) if value else ZERO_ADDRESS
+
+
+def _txnField(txn: transaction.Transaction, field: str, index: Optional[int], groupIndex: int) -> StackValue:
+    """Read transaction field `field` (array fields at `index`) as the AVM sees it."""
+    arrays: Dict[str, Callable[[], List[StackValue]]] = {
+        "ApplicationArgs": lambda: list(getattr(txn, "app_args", None) or []),
+        "Accounts": lambda: [_address(txn.sender)] + [_address(a) for a in getattr(txn, "accounts", None) or []],
+        "Applications": lambda: [getattr(txn, "index", 0) or 0] + list(getattr(txn, "foreign_apps", None) or []),
+        "Assets": lambda: list(getattr(txn, "foreign_assets", None) or []),
+    }
+    if field in arrays:
+        values = arrays[field]()
+        if index is None or not 0 <= index < len(values):
+            raise AVMError("invalid {} index {}".format(field, index))
+        return values[index]
+    if field.startswith("Num") and field[3:] in arrays:
+        # Accounts and Applications include the implicit sender/current app
+        return len(arrays[field[3:]]()) - (1 if field[3:] in ("Accounts", "Applications") else 0)
+
+    scalars: Dict[str, Callable[[], StackValue]] = {
+        "Sender": lambda: _address(txn.sender),
+        "Fee": lambda: txn.fee,
+        "FirstValid": lambda: txn.first_valid_round,
+        "LastValid": lambda: txn.last_valid_round,
+        "Note": lambda: txn.note or b"",
+        "Lease": lambda: txn.lease or ZERO_ADDRESS,
+        "Receiver": lambda: _address(getattr(txn, "receiver", None)),
+        "Amount": lambda: getattr(txn, "amt", 0) or 0,
+        "CloseRemainderTo": lambda: _address(getattr(txn, "close_remainder_to", None)),
+        "TypeEnum": lambda: TYPE_ENUMS.get(txn.type, 0),
+        "Type": lambda: txn.type.encode(),
+        "GroupIndex": lambda: groupIndex,
+        "TxID": lambda: base64.b32decode(txn.get_txid() + "===="),
+        "ApplicationID": lambda: getattr(txn, "index", 0) or 0,
+        "OnCompletion": lambda: int(getattr(txn, "on_complete", 0) or 0),
+        "RekeyTo": lambda: _address(txn.rekey_to),
+        "ApprovalProgram": lambda: getattr(txn, "approval_program", None) or b"",
+        "ClearStateProgram": lambda: getattr(txn, "clear_program", None) or b"",
+    }
+    if field not in scalars:
+        raise AVMError("unsupported txn field {}".format(field))
+    return scalars[field]()
+
+
+class Evaluator:
+    """
+    Runs one approval or clear state program for one transaction of a group.
+
+    Args:
+        program (Program): the program to run
+        overlay (StateOverlay): state the program reads and writes
+        group (list): the transactions of the group
+        groupIndex (int): position of the app call in `group`
+        appID (int): the app being called
+        budget (int, optional): opcode budget left for this program, unlimited if None
+    """
+
+    def __init__(
+        self,
+        program: Program,
+        overlay: StateOverlay,
+        group: List[transaction.Transaction],
+        groupIndex: int,
+        appID: int,
+        budget: Optional[int] = APP_BUDGET,
+    ) -> None:
+        self.program = program
+        self.overlay = overlay
+        self.group = group
+        self.groupIndex = groupIndex
+        self.txn = group[groupIndex]
+        self.appID = appID
+        self.appAddress = logic.get_application_address(appID)
+        self.budget = budget
+
+        self.stack: List[StackValue] = []
+        self.scratch: List[StackValue] = [0] * 256
+        self.callStack: List[int] = []
+        self.intc: List[int] = []
+        self.bytec: List[bytes] = []
+        self.pendingInner: Optional[Dict[str, Any]] = None
+        self.result = EvalResult()
+
+    ## stack helpers
+    def push(self, value: StackValue) -> None:
+        if isinstance(value, bytes) and len(value) > MAX_BYTES:
+            raise AVMError("byte slice exceeds {} bytes".format(MAX_BYTES))
+        if len(self.stack) >= 1000:
+            raise AVMError("stack overflow")
+        self.stack.append(value)
+
+    def pop(self) -> StackValue:
+        if not self.stack:
+            raise AVMError("stack underflow")
+        return self.stack.pop()
+
+    def popInt(self) -> int:
+        value = self.pop()
+        if not isinstance(value, int):
+            raise AVMError("expected uint64 but got []byte")
+        return value
+
+    def popBytes(self) -> bytes:
+        value = self.pop()
+        if not isinstance(value, bytes):
+            raise AVMError("expected []byte but got uint64")
+        return value
+
+    def pushInt(self, value: int) -> None:
+        if not 0 <= value <= MAX_UINT:
+            raise AVMError("uint64 overflow" if value > 0 else "uint64 underflow")
+        self.push(value)
+
+    ## references
+    def account(self, value: StackValue) -> str:
+        accounts = [self.txn.sender] + list(getattr(self.txn, "accounts", None) or [])
+        if isinstance(value, int):
+            if value >= len(accounts):
+                raise AVMError("invalid Accounts index {}".format(value))
+            return accounts[value]
+        address = encoding.encode_address(value)
+        if address not in accounts:
+            raise AVMError("unavailable Account {}".format(address))
+        return address
+
+    def application(self, value: int) -> int:
+        apps = [self.appID] + list(getattr(self.txn, "foreign_apps", None) or [])
+        if value < len(apps):
+            return apps[value]
+        if value not in apps:
+            raise AVMError("unavailable App {}".format(value))
+        return value
+
+    def checkKeyValue(self, key: bytes, value: StackValue) -> None:
+        if len(key) > MAX_KEY_LENGTH:
+            raise AVMError("key too long: length was {}, maximum is {}".format(len(key), MAX_KEY_LENGTH))
+        if isinstance(value, bytes) and len(key) + len(value) > MAX_KEY_VALUE_LENGTH:
+            raise AVMError(
+                "key/value total too long: length was {}, maximum is {}".format(
+                    len(key) + len(value), MAX_KEY_VALUE_LENGTH
+                )
+            )
+
+    def checkSchema(self, state: Dict[bytes, StackValue], schema: Any) -> None:
+        if schema is None:
+            return
+        uints = sum(1 for v in state.values() if isinstance(v, int))
+        if uints > (schema.num_uints or 0) or len(state) - uints > (schema.num_byte_slices or 0):
+            raise AVMError("store exceeds schema: {} uints, {} byte slices".format(uints, len(state) - uints))
+
+    ## running
+    def run(self) -> EvalResult:
+        """Evaluate the program, never raising; failures are reported on the result."""
+        result = self.result
+        instructions = self.program.instructions
+        pc = 0
+        line = None
+        try:
+            while True:
+                if pc >= len(instructions):
+                    if len(self.stack) != 1:
+                        raise AVMError("stack len is {} instead of 1".format(len(self.stack)))
+                    result.approved = self._truthy(self.stack[-1])
+                    break
+
+                ins = instructions[pc]
+                line = ins.line
+                cost = OP_COSTS.get(ins.op, 1)
+                result.cost += cost
+                result.lineCosts[ins.line] += cost
+                if self.budget is not None and result.cost > self.budget:
+                    raise AVMError("dynamic cost budget exceeded, executing {}".format(ins.op))
+
+                pc += 1
+                if ins.op == "return":
+                    result.approved = self._truthy(self.pop())
+                    break
+                if ins.op in ("b", "bz", "bnz"):
+                    if ins.op == "b" or (ins.op == "bz") == (self.popInt() == 0):
+                        pc = self.program.labels[ins.args[0]]
+                elif ins.op == "callsub":
+                    self.callStack.append(pc)
+                    pc = self.program.labels[ins.args[0]]
+                elif ins.op == "retsub":
+                    if not self.callStack:
+                        raise AVMError("retsub with empty callstack")
+                    pc = self.callStack.pop()
+                else:
+                    handler = OPCODES.get(ins.op)
+                    if handler is None:
+                        raise AVMError("unsupported opcode {}".format(ins.op))
+                    handler(self, ins.args)
+        except AVMError as e:
+            result.approved = False
+            result.error = str(e) if e.line is not None or line is None else "{} (line {})".format(e, line)
+        if not result.approved and result.error is None:
+            result.error = "rejected by logic"
+        return result
+
+    @staticmethod
+    def _truthy(value: StackValue) -> bool:
+        if not isinstance(value, int):
+            raise AVMError("program must end with a uint64 on the stack")
+        return value != 0
+
+
+def _binaryInt(fn: Callable[[int, int], int]) -> Callable[[Evaluator, List[str]], None]:
+    def op(ev: Evaluator, args: List[str]) -> None:
+        b = ev.popInt()
+        a = ev.popInt()
+        ev.pushInt(fn(a, b))
+
+    return op
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise AVMError("/ 0")
+    return a // b
+
+
+def _mod(a: int, b: int) -> int:
+    if b == 0:
+        raise AVMError("% 0")
+    return a % b
+
+
+def _shift(a: int, b: int, left: bool) -> int:
+    if b > 63:
+        raise AVMError("shift arg > 63")
+    return (a << b) & MAX_UINT if left else a >> b
+
+
+def _equality(negate: bool) -> Callable[[Evaluator, List[str]], None]:
+    def op(ev: Evaluator, args: List[str]) -> None:
+        b = ev.pop()
+        a = ev.pop()
+        if type(a) is not type(b):
+            raise AVMError("cannot compare uint64 to []byte")
+        ev.push(int((a == b) != negate))
+
+    return op
+
+
+def _intConst(ev: Evaluator, args: List[str]) -> None:
+    ev.pushInt(parseInt(args[0]))
+
+
+def _byteConst(ev: Evaluator, args: List[str]) -> None:
+    ev.push(parseBytes(args))
+
+
+def _addr(ev: Evaluator, args: List[str]) -> None:
+    ev.push(encoding.decode_address(args[0]))
+
+
+def _intcblock(ev: Evaluator, args: List[str]) -> None:
+    ev.intc = [parseInt(a) for a in args]
+
+
+def _bytecblock(ev: Evaluator, args: List[str]) -> None:
+    ev.bytec = [parseBytes([a]) for a in args]
+
+
+def _intc(index: Optional[int]) -> Callable[[Evaluator, List[str]], None]:
+    def op(ev: Evaluator, args: List[str]) -> None:
+        i = int(args[0]) if index is None else index
+        if i >= len(ev.intc):
+            raise AVMError("intc {} beyond {} constants".format(i, len(ev.intc)))
+        ev.push(ev.intc[i])
+
+    return op
+
+
+def _bytec(index: Optional[int]) -> Callable[[Evaluator, List[str]], None]:
+    def op(ev: Evaluator, args: List[str]) -> None:
+        i = int(args[0]) if index is None else index
+        if i >= len(ev.bytec):
+            raise AVMError("bytec {} beyond {} constants".format(i, len(ev.bytec)))
+        ev.push(ev.bytec[i])
+
+    return op
+
+
+def _err(ev: Evaluator, args: List[str]) -> None:
+    raise AVMError("err opcode executed")
+
+
+def _assert(ev: Evaluator, args: List[str]) -> None:
+    if ev.popInt() == 0:
+        raise AVMError("assert failed")
+
+
+def _not(ev: Evaluator, args: List[str]) -> None:
+    ev.push(int(ev.popInt() == 0))
+
+
+def _bitNot(ev: Evaluator, args: List[str]) -> None:
+    ev.push(MAX_UINT ^ ev.popInt())
+
+
+def _sqrt(ev: Evaluator, args: List[str]) -> None:
+    ev.push(math.isqrt(ev.popInt()))
+
+
+def _bitlen(ev: Evaluator, args: List[str]) -> None:
+    value = ev.pop()
+    ev.push(value.bit_length() if isinstance(value, int) else int.from_bytes(value, "big").bit_length())
+
+
+def _mulw(ev: Evaluator, args: List[str]) -> None:
+    b = ev.popInt()
+    a = ev.popInt()
+    ev.push((a * b) >> 64)
+    ev.push((a * b) & MAX_UINT)
+
+
+def _addw(ev: Evaluator, args: List[str]) -> None:
+    b = ev.popInt()
+    a = ev.popInt()
+    ev.push((a + b) >> 64)
+    ev.push((a + b) & MAX_UINT)
+
+
+def _len(ev: Evaluator, args: List[str]) -> None:
+    ev.push(len(ev.popBytes()))
+
+
+def _itob(ev: Evaluator, args: List[str]) -> None:
+    ev.push(ev.popInt().to_bytes(8, "big"))
+
+
+def _btoi(ev: Evaluator, args: List[str]) -> None:
+    value = ev.popBytes()
+    if len(value) > 8:
+        raise AVMError("btoi arg too long, got [{}]bytes".format(len(value)))
+    ev.push(int.from_bytes(value, "big"))
+
+
+def _concat(ev: Evaluator, args: List[str]) -> None:
+    b = ev.popBytes()
+    a = ev.popBytes()
+    ev.push(a + b)
+
+
+def _slice(value: bytes, start: int, end: int) -> bytes:
+    if start > end or end > len(value):
+        raise AVMError("extract range [{}:{}] beyond length {}".format(start, end, len(value)))
+    return value[start:end]
+
+
+def _substring(ev: Evaluator, args: List[str]) -> None:
+    ev.push(_slice(ev.popBytes(), int(args[0]), int(args[1])))
+
+
+def _substring3(ev: Evaluator, args: List[str]) -> None:
+    end = ev.popInt()
+    start = ev.popInt()
+    ev.push(_slice(ev.popBytes(), start, end))
+
+
+def _extract(ev: Evaluator, args: List[str]) -> None:
+    value = ev.popBytes()
+    start, length = int(args[0]), int(args[1])
+    ev.push(_slice(value, start, len(value) if length == 0 else start + length))
+
+
+def _extract3(ev: Evaluator, args: List[str]) -> None:
+    length = ev.popInt()
+    start = ev.popInt()
+    ev.push(_slice(ev.popBytes(), start, start + length))
+
+
+def _extractUint(size: int) -> Callable[[Evaluator, List[str]], None]:
+    def op(ev: Evaluator, args: List[str]) -> None:
+        start = ev.popInt()
+        ev.push(int.from_bytes(_slice(ev.popBytes(), start, start + size), "big"))
+
+    return op
+
+
+def _getbyte(ev: Evaluator, args: List[str]) -> None:
+    index = ev.popInt()
+    ev.push(_slice(ev.popBytes(), index, index + 1)[0])
+
+
+def _setbyte(ev: Evaluator, args: List[str]) -> None:
+    value = ev.popInt()
+    index = ev.popInt()
+    target = bytearray(ev.popBytes())
+    if index >= len(target) or value > 255:
+        raise AVMError("setbyte out of range")
+    target[index] = value
+    ev.push(bytes(target))
+
+
+def _sha256(ev: Evaluator, args: List[str]) -> None:
+    ev.push(hashlib.sha256(ev.popBytes()).digest())
+
+
+def _pop(ev: Evaluator, args: List[str]) -> None:
+    ev.pop()
+
+
+def _dup(ev: Evaluator, args: List[str]) -> None:
+    value = ev.pop()
+    ev.push(value)
+    ev.push(value)
+
+
+def _dup2(ev: Evaluator, args: List[str]) -> None:
+    b = ev.pop()
+    a = ev.pop()
+    for value in (a, b, a, b):
+        ev.push(value)
+
+
+def _dig(ev: Evaluator, args: List[str]) -> None:
+    depth = int(args[0])
+    if depth >= len(ev.stack):
+        raise AVMError("dig {} with stack len {}".format(depth, len(ev.stack)))
+    ev.push(ev.stack[-1 - depth])
+
+
+def _swap(ev: Evaluator, args: List[str]) -> None:
+    b = ev.pop()
+    a = ev.pop()
+    ev.push(b)
+    ev.push(a)
+
+
+def _select(ev: Evaluator, args: List[str]) -> None:
+    condition = ev.popInt()
+    b = ev.pop()
+    a = ev.pop()
+    ev.push(b if condition else a)
+
+
+def _cover(ev: Evaluator, args: List[str]) -> None:
+    depth = int(args[0])
+    if depth >= len(ev.stack):
+        raise AVMError("cover {} with stack len {}".format(depth, len(ev.stack)))
+    ev.stack.insert(len(ev.stack) - 1 - depth, ev.stack.pop())
+
+
+def _uncover(ev: Evaluator, args: List[str]) -> None:
+    depth = int(args[0])
+    if depth >= len(ev.stack):
+        raise AVMError("uncover {} with stack len {}".format(depth, len(ev.stack)))
+    ev.push(ev.stack.pop(len(ev.stack) - 1 - depth))
+
+
+def _scratchIndex(value: int) -> int:
+    if not 0 <= value < 256:
+        raise AVMError("invalid scratch space slot {}".format(value))
+    return value
+
+
+def _load(ev: Evaluator, args: List[str]) -> None:
+    ev.push(ev.scratch[_scratchIndex(int(args[0]))])
+
+
+def _store(ev: Evaluator, args: List[str]) -> None:
+    ev.scratch[_scratchIndex(int(args[0]))] = ev.pop()
+
+
+def _loads(ev: Evaluator, args: List[str]) -> None:
+    ev.push(ev.scratch[_scratchIndex(ev.popInt())])
+
+
+def _stores(ev: Evaluator, args: List[str]) -> None:
+    value = ev.pop()
+    ev.scratch[_scratchIndex(ev.popInt())] = value
+
+
+def _txn(ev: Evaluator, args: List[str]) -> None:
+    ev.push(_txnField(ev.txn, args[0], int(args[1]) if len(args) > 1 else None, ev.groupIndex))
+
+
+def _txnas(ev: Evaluator, args: List[str]) -> None:
+    ev.push(_txnField(ev.txn, args[0], ev.popInt(), ev.groupIndex))
+
+
+def _groupTxn(index: int, ev: Evaluator) -> transaction.Transaction:
+    if index >= len(ev.group):
+        raise AVMError("gtxn lookup TxnGroup[{}] but it only has {}".format(index, len(ev.group)))
+    return ev.group[index]
+
+
+def _gtxn(ev: Evaluator, args: List[str]) -> None:
+    index = int(args[0])
+    ev.push(_txnField(_groupTxn(index, ev), args[1], int(args[2]) if len(args) > 2 else None, index))
+
+
+def _gtxns(ev: Evaluator, args: List[str]) -> None:
+    index = ev.popInt()
+    ev.push(_txnField(_groupTxn(index, ev), args[0], int(args[1]) if len(args) > 1 else None, index))
+
+
+def _gtxnsas(ev: Evaluator, args: List[str]) -> None:
+    arrayIndex = ev.popInt()
+    index = ev.popInt()
+    ev.push(_txnField(_groupTxn(index, ev), args[0], arrayIndex, index))
+
+
+def _global(ev: Evaluator, args: List[str]) -> None:
+    overlay = ev.overlay
+    fields: Dict[str, Callable[[], StackValue]] = {
+        "MinTxnFee": lambda: MIN_TXN_FEE,
+        "MinBalance": lambda: MIN_BALANCE,
+        "MaxTxnLife": lambda: 1000,
+        "ZeroAddress": lambda: ZERO_ADDRESS,
+        "GroupSize": lambda: len(ev.group),
+        "LogicSigVersion": lambda: 5,
+        "Round": lambda: overlay.round,
+        "LatestTimestamp": lambda: overlay.ledger.blocks[overlay.round]["ts"],
+        "CurrentApplicationID": lambda: ev.appID,
+        "CreatorAddress": lambda: _address(overlay.app(ev.appID)["creator"]),
+        "CurrentApplicationAddress": lambda: _address(ev.appAddress),
+        "GroupID": lambda: ev.txn.group or ZERO_ADDRESS,
+    }
+    if args[0] not in fields:
+        raise AVMError("unsupported global field {}".format(args[0]))
+    ev.push(fields[args[0]]())
+
+
+def _appOptedIn(ev: Evaluator, args: List[str]) -> None:
+    appID = ev.application(ev.popInt())
+    address = ev.account(ev.pop())
+    ev.push(int(ev.overlay.local(address, appID) is not None))
+
+
+def _localState(ev: Evaluator, address: str, appID: int) -> Dict[bytes, StackValue]:
+    state = ev.overlay.local(address, appID)
+    if state is None:
+        raise AVMError("account {} is not opted in to app {}".format(address, appID))
+    return state
+
+
+def _appLocalGet(ev: Evaluator, args: List[str]) -> None:
+    key = ev.popBytes()
+    address = ev.account(ev.pop())
+    ev.push(_localState(ev, address, ev.appID).get(key, 0))
+
+
+def _appLocalGetEx(ev: Evaluator, args: List[str]) -> None:
+    key = ev.popBytes()
+    appID = ev.application(ev.popInt())
+    address = ev.account(ev.pop())
+    state = ev.overlay.local(address, appID) or {}
+    ev.push(state.get(key, 0))
+    ev.push(int(key in state))
+
+
+def _appLocalPut(ev: Evaluator, args: List[str]) -> None:
+    value = ev.pop()
+    key = ev.popBytes()
+    address = ev.account(ev.pop())
+    ev.checkKeyValue(key, value)
+    state = _localState(ev, address, ev.appID)
+    state[key] = value
+    ev.checkSchema(state, ev.overlay.app(ev.appID).get("local-state-schema"))
+
+
+def _appLocalDel(ev: Evaluator, args: List[str]) -> None:
+    key = ev.popBytes()
+    address = ev.account(ev.pop())
+    _localState(ev, address, ev.appID).pop(key, None)
+
+
+def _appGlobalGet(ev: Evaluator, args: List[str]) -> None:
+    key = ev.popBytes()
+    ev.push(ev.overlay.app(ev.appID)["global-state"].get(key, 0))
+
+
+def _appGlobalGetEx(ev: Evaluator, args: List[str]) -> None:
+    key = ev.popBytes()
+    appID = ev.application(ev.popInt())
+    try:
+        state = ev.overlay.app(appID)["global-state"]
+    except AVMError:
+        state = {}
+    ev.push(state.get(key, 0))
+    ev.push(int(key in state))
+
+
+def _appGlobalPut(ev: Evaluator, args: List[str]) -> None:
+    value = ev.pop()
+    key = ev.popBytes()
+    ev.checkKeyValue(key, value)
+    app = ev.overlay.app(ev.appID)
+    app["global-state"][key] = value
+    ev.checkSchema(app["global-state"], app.get("global-state-schema"))
+
+
+def _appGlobalDel(ev: Evaluator, args: List[str]) -> None:
+    ev.overlay.app(ev.appID)["global-state"].pop(ev.popBytes(), None)
+
+
+def _balance(ev: Evaluator, args: List[str]) -> None:
+    ev.push(ev.overlay.balance(ev.account(ev.pop())))
+
+
+def _log(ev: Evaluator, args: List[str]) -> None:
+    ev.result.logs.append(ev.popBytes())
+
+
+def _itxnBegin(ev: Evaluator, args: List[str]) -> None:
+    if ev.pendingInner is not None:
+        raise AVMError("itxn_begin without itxn_submit")
+    ev.pendingInner = {"Sender": ev.appAddress, "Fee": MIN_TXN_FEE}
+
+
+def _itxnField(ev: Evaluator, args: List[str]) -> None:
+    if ev.pendingInner is None:
+        raise AVMError("itxn_field without itxn_begin")
+    value = ev.pop()
+    field = args[0]
+    if field in ("Receiver", "CloseRemainderTo", "Sender"):
+        if not isinstance(value, bytes) or len(value) != 32:
+            raise AVMError("{} must be a 32 byte address".format(field))
+        value = encoding.encode_address(value)
+    elif field == "Type":
+        field, value = "TypeEnum", TYPE_ENUMS.get(value.decode() if isinstance(value, bytes) else "", 0)
+    elif field not in ("TypeEnum", "Amount", "Fee", "Note"):
+        raise AVMError("unsupported itxn field {}".format(field))
+    ev.pendingInner[field] = value
+
+
+def _itxnSubmit(ev: Evaluator, args: List[str]) -> None:
+    inner = ev.pendingInner
+    if inner is None:
+        raise AVMError("itxn_submit without itxn_begin")
+    ev.pendingInner = None
+    if inner.get("TypeEnum") != TYPE_ENUMS["pay"]:
+        raise AVMError("only payment inner transactions are supported")
+    if inner["Sender"] != ev.appAddress:
+        raise AVMError("inner transaction sender must be the app address")
+
+    overlay = ev.overlay
+    overlay.debit(inner["Sender"], inner["Fee"] + inner.get("Amount", 0))
+    overlay.credit(inner.get("Receiver", encoding.encode_address(ZERO_ADDRESS)), inner.get("Amount", 0))
+    if inner.get("CloseRemainderTo"):
+        inner["ClosingAmount"] = overlay.balance(inner["Sender"])
+        overlay.credit(inner["CloseRemainderTo"], inner["ClosingAmount"])
+        overlay.balances[inner["Sender"]] = 0
+    ev.result.innerTxns.append(inner)
+
+
+def _itxn(ev: Evaluator, args: List[str]) -> None:
+    if not ev.result.innerTxns:
+        raise AVMError("no inner transaction submitted")
+    value = ev.result.innerTxns[-1].get(args[0], 0)
+    ev.push(encoding.decode_address(value) if isinstance(value, str) else value)
+
+
+OPCODES: Dict[str, Callable[[Evaluator, List[str]], None]] = {
+    "int": _intConst,
+    "pushint": _intConst,
+    "byte": _byteConst,
+    "pushbytes": _byteConst,
+    "addr": _addr,
+    "intcblock": _intcblock,
+    "intc": _intc(None),
+    "intc_0": _intc(0),
+    "intc_1": _intc(1),
+    "intc_2": _intc(2),
+    "intc_3": _intc(3),
+    "bytecblock": _bytecblock,
+    "bytec": _bytec(None),
+    "bytec_0": _bytec(0),
+    "bytec_1": _bytec(1),
+    "bytec_2": _bytec(2),
+    "bytec_3": _bytec(3),
+    "err": _err,
+    "assert": _assert,
+    "+": _binaryInt(lambda a, b: a + b),
+    "-": _binaryInt(lambda a, b: a - b),
+    "*": _binaryInt(lambda a, b: a * b),
+    "/": _binaryInt(_div),
+    "%": _binaryInt(_mod),
+    "exp": _binaryInt(lambda a, b: a ** b),
+    "<": _binaryInt(lambda a, b: int(a < b)),
+    ">": _binaryInt(lambda a, b: int(a > b)),
+    "<=": _binaryInt(lambda a, b: int(a <= b)),
+    ">=": _binaryInt(lambda a, b: int(a >= b)),
+    "&&": _binaryInt(lambda a, b: int(bool(a and b))),
+    "||": _binaryInt(lambda a, b: int(bool(a or b))),
+    "&": _binaryInt(lambda a, b: a & b),
+    "|": _binaryInt(lambda a, b: a | b),
+    "^": _binaryInt(lambda a, b: a ^ b),
+    "shl": _binaryInt(lambda a, b: _shift(a, b, True)),
+    "shr": _binaryInt(lambda a, b: _shift(a, b, False)),
+    "==": _equality(False),
+    "!=": _equality(True),
+    "!": _not,
+    "~": _bitNot,
+    "sqrt": _sqrt,
+    "bitlen": _bitlen,
+    "mulw": _mulw,
+    "addw": _addw,
+    "len": _len,
+    "itob": _itob,
+    "btoi": _btoi,
+    "concat": _concat,
+    "substring": _substring,
+    "substring3": _substring3,
+    "extract": _extract,
+    "extract3": _extract3,
+    "extract_uint16": _extractUint(2),
+    "extract_uint32": _extractUint(4),
+    "extract_uint64": _extractUint(8),
+    "getbyte": _getbyte,
+    "setbyte": _setbyte,
+    "sha256": _sha256,
+    "pop": _pop,
+    "dup": _dup,
+    "dup2": _dup2,
+    "dig": _dig,
+    "swap": _swap,
+    "select": _select,
+    "cover": _cover,
+    "uncover": _uncover,
+    "load": _load,
+    "store": _store,
+    "loads": _loads,
+    "stores": _stores,
+    "txn": _txn,
+    "txna": _txn,
+    "txnas": _txnas,
+    "gtxn": _gtxn,
+    "gtxna": _gtxn,
+    "gtxns": _gtxns,
+    "gtxnsa": _gtxns,
+    "gtxnsas": _gtxnsas,
+    "global": _global,
+    "app_opted_in": _appOptedIn,
+    "app_local_get": _appLocalGet,
+    "app_local_get_ex": _appLocalGetEx,
+    "app_local_put": _appLocalPut,
+    "app_local_del": _appLocalDel,
+    "app_global_get": _appGlobalGet,
+    "app_global_get_ex": _appGlobalGetEx,
+    "app_global_put": _appGlobalPut,
+    "app_global_del": _appGlobalDel,
+    "balance": _balance,
+    "log": _log,
+    "itxn_begin": _itxnBegin,
+    "itxn_field": _itxnField,
+    "itxn_submit": _itxnSubmit,
+    "itxn": _itxn,
+}
+
+
+## GROUPS
+class GroupResult:
+    """
+    Outcome of applying one transaction group.
+
+    Attributes:
+        results (list): one EvalResult per app call, None for other transactions
+        error (str, optional): why the group failed, if it did
+        closingAmounts (dict): group index -> amount a payment closed out to its close-to address
+    """
+
+    def __init__(
+        self, results: List[Optional[EvalResult]], error: Optional[str], closingAmounts: Optional[Dict[int, int]] = None
+    ) -> None:
+        self.results = results
+        self.error = error
+        self.closingAmounts = closingAmounts or {}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __getitem__(self, index: int) -> Optional[EvalResult]:
+        return self.results[index]
+
+
+def evaluateGroup(
+    ledger: Any, txns: List[Any], commit: bool = False, budget: Optional[int] = APP_BUDGET
+) -> GroupResult:
+    """
+    Apply a transaction group to `ledger`'s state, running app programs on the way.
+
+    Payments and app calls (create, NoOp, OptIn, CloseOut, ClearState) are
+    applied in order, so later transactions see the effects of earlier ones.
+    App calls share a budget of `budget` per app call in the group. Unlike
+    the AVM, state written by a failing clear state program is kept.
+
+    Args:
+        ledger (FakeLedger): ledger whose state the group is applied to
+        txns (list): Transactions or SignedTransactions of one group
+        commit (bool): write the new state to `ledger` if every transaction succeeds
+        budget (int, optional): opcode budget per app call, unlimited if None
+    """
+    group = [getattr(t, "transaction", t) for t in txns]
+    overlay = StateOverlay(ledger)
+    appCalls = sum(1 for txn in group if txn.type == "appl")
+    remaining = None if budget is None else budget * appCalls
+
+    results: List[Optional[EvalResult]] = []
+    closingAmounts: Dict[int, int] = {}
+    failure: Optional[str] = None
+    for groupIndex, txn in enumerate(group):
+        try:
+            overlay.debit(txn.sender, txn.fee)
+            if txn.type == "pay":
+                overlay.debit(txn.sender, txn.amt)
+                overlay.credit(txn.receiver, txn.amt)
+                if txn.close_remainder_to:
+                    closingAmounts[groupIndex] = overlay.balance(txn.sender)
+                    overlay.credit(txn.close_remainder_to, closingAmounts[groupIndex])
+                    overlay.balances[txn.sender] = 0
+                results.append(None)
+                continue
+            if txn.type != "appl":
+                raise AVMError("unsupported transaction type {}".format(txn.type))
+
+            result = _applyAppCall(overlay, group, groupIndex, remaining)
+        except AVMError as e:
+            failure = failure or "transaction {}: {}".format(groupIndex, e)
+            results.append(None)
+            continue
+
+        results.append(result)
+        if remaining is not None:
+            remaining -= result.cost
+        if not result.approved and int(txn.on_complete or 0) != ON_COMPLETIONS["ClearState"]:
+            failure = failure or "transaction {}: {}".format(groupIndex, result.error)
+
+    failure = failure or minBalanceError(overlay.balances)
+    if commit and failure is None:
+        overlay.commit()
+    return GroupResult(results, failure, closingAmounts)
+
+
+def minBalanceError(balances: Dict[str, int]) -> Optional[str]:
+    """
+    The error algod rejects a group with if it leaves an account it touched below the minimum balance.
+
+    Only the base minimum balance is checked, not the extra for opted in or created apps and assets.
+    """
+    for address, amount in balances.items():
+        if 0 < amount < MIN_BALANCE:
+            return "account {} balance {} below min {}".format(address, amount, MIN_BALANCE)
+    return None
+
+
+def _stateDelta(before: Dict[bytes, StackValue], after: Dict[bytes, StackValue]) -> Dict[bytes, Optional[StackValue]]:
+    """Return key -> new value for every key `after` changed, None for deleted keys."""
+    delta: Dict[bytes, Optional[StackValue]] = {k: v for k, v in after.items() if k not in before or before[k] != v}
+    delta.update((k, None) for k in before if k not in after)
+    return delta
+
+
+def _applyAppCall(overlay: StateOverlay, group: List[Any], groupIndex: int, budget: Optional[int]) -> EvalResult:
+    txn = group[groupIndex]
+    onComplete = int(txn.on_complete or 0)
+
+    if txn.index == 0:
+        appID = overlay.createApp(
+            txn.sender, txn.approval_program, txn.clear_program, txn.global_schema, txn.local_schema
+        )
+    else:
+        appID = txn.index
+    app = overlay.app(appID)
+
+    if onComplete == ON_COMPLETIONS["ClearState"]:
+        result = Evaluator(
+            programFromBytes(app["clear-state-program"]), overlay, group, groupIndex, appID, budget
+        ).run()
+        # the clear state program can't stop the account from leaving
+        overlay.closeOut(txn.sender, appID)
+        result.appID = appID
+        return result
+
+    if onComplete == ON_COMPLETIONS["OptIn"]:
+        overlay.optIn(txn.sender, appID)
+
+    globalBefore = dict(app["global-state"])
+    localsBefore = {}
+    for address in [txn.sender, *(txn.accounts or [])]:
+        state = overlay.local(address, appID)
+        if state is not None:
+            localsBefore[address] = dict(state)
+
+    result = Evaluator(programFromBytes(app["approval-program"]), overlay, group, groupIndex, appID, budget).run()
+    if result.approved and onComplete == ON_COMPLETIONS["CloseOut"]:
+        overlay.closeOut(txn.sender, appID)
+
+    result.appID = appID
+    result.globalDelta = _stateDelta(globalBefore, overlay.app(appID)["global-state"])
+    for address, before in localsBefore.items():
+        after = overlay.local(address, appID)
+        delta = _stateDelta(before, after) if after is not None else {}
+        if delta:
+            result.localDeltas[address] = delta
+    return result
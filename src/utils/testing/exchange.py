@@ -0,0 +1,99 @@
+"""
+Local HTTP stand-in for the exchange price APIs in config.yml.
+
+A FakeExchange serves one JSON document per path on localhost, so Asset
+sources can point at it instead of real exchanges. Paths can be made slow
+or failing to exercise per-source timeouts and the last good value cache.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from src.utils.testing.ledger import _HTTPServer
+
+
+class FakeExchange:
+    """
+    Serves `prices` (path -> JSON document) over HTTP on localhost.
+
+    Usable as a context manager; `url(path)` is the url of a path. A path
+    listed in `delays` answers after that many seconds, one in `failures`
+    answers with that HTTP status code, and an unknown path with 404.
+    `maxInFlight` is the most requests that were being answered at once.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Any]] = None) -> None:
+        self.prices: Dict[str, Any] = dict(prices or {})
+        self.delays: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+        self.requests = 0
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self._lock = threading.Lock()
+
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                with exchange._lock:
+                    exchange.requests += 1
+                    exchange.inFlight += 1
+                    exchange.maxInFlight = max(exchange.maxInFlight, exchange.inFlight)
+                try:
+                    self._answer()
+                finally:
+                    with exchange._lock:
+                        exchange.inFlight -= 1
+
+            def _answer(self) -> None:
+                path = self.path.lstrip("/")
+                time.sleep(exchange.delays.get(path, 0))
+
+                if path in exchange.failures:
+                    code, response = exchange.failures[path], {"message": "unavailable"}
+                elif path in exchange.prices:
+                    code, response = 200, exchange.prices[path]
+                else:
+                    code, response = 404, {"message": "not found"}
+
+                body = json.dumps(response).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client timed out while this path was delayed
+                    pass
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._httpd = _HTTPServer(("127.0.0.1", 0), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    def url(self, path: str) -> str:
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}/{}".format(host, port, path)
+
+    def start(self) -> "FakeExchange":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeExchange":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
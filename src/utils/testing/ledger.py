@@ -0,0 +1,668 @@
+"""
+In-memory stand-in for an algod node.
+
+The ledger keeps a transaction pool, produces blocks on demand (or on every
+submit, in instant mode) and applies the balance/app/asset effects this
+project relies on. With `executePrograms`, app calls run their programs
+through the TEAL interpreter in src.utils.testing.avm. FakeAlgodClient routes
+the regular AlgodClient methods to it in-process and counts every request,
+so benchmarks can compare how many HTTP round-trips a code path costs.
+"""
+import base64
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+import msgpack
+from algosdk import encoding
+from algosdk import error
+from algosdk import logic
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+from nacl.signing import SigningKey
+
+from src.utils.metrics import instrument
+from src.utils.testing.avm import AVMError
+from src.utils.testing.avm import evaluateGroup
+from src.utils.testing.avm import GroupResult
+from src.utils.testing.avm import minBalanceError
+from src.utils.testing.avm import programFromBytes
+
+GENESIS_ID = "fake-v1"
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+GENESIS_TIMESTAMP = 1_640_995_200
+MIN_FEE = 1000
+GENESIS_BALANCE = 4_000_000_000_000_000
+
+
+class LedgerError(Exception):
+    """A request the fake node rejects, carrying the HTTP status algod would return."""
+
+    def __init__(self, message: str, code: int = 400) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def _jsonable(obj: Any) -> Any:
+    """Convert msgpack-style values (bytes keys/values) into algod JSON style."""
+    if isinstance(obj, dict):
+        return {k if isinstance(k, str) else k.decode(): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode()
+    return obj
+
+
+class FakeLedger:
+    """
+    Deterministic ledger that confirms pooled transactions when a block is produced.
+
+    Blocks are produced on demand: whenever a client waits for a round that
+    doesn't exist yet, the ledger produces blocks until it does. Each block
+    takes up to `maxTxnsPerBlock` pooled transactions (whole groups only).
+    Like algod, a pool holding `poolCapacity` transactions refuses more
+    until a block drains it. In instant mode every submit is confirmed in a block of its own right away.
+
+    With `executePrograms`, groups of payments and app calls to apps whose
+    programs came from `compile` are applied by the TEAL interpreter: a
+    group whose program rejects is refused at submit (if nothing else is
+    pooled) or gets a pool-error at block time, and the pending info of app
+    calls carries state deltas and logs. Calls to other apps only have their
+    opt-in/close-out effects applied.
+
+    Args:
+        blockTime (int): seconds between block timestamps
+        maxTxnsPerBlock (int, optional): block capacity, unlimited if None
+        roundDelay (float): wall-clock seconds a waiting client sleeps per produced block
+        instant (bool): produce a block on every submit
+        executePrograms (bool): run app programs through the TEAL interpreter
+        genesisAccounts (int): number of funded accounts with deterministic keys, see `genesisKeys`
+        poolCapacity (int, optional): transaction pool size, unlimited if None
+    """
+
+    def __init__(
+        self,
+        blockTime: int = 4,
+        maxTxnsPerBlock: Optional[int] = None,
+        roundDelay: float = 0.0,
+        instant: bool = False,
+        executePrograms: bool = False,
+        genesisAccounts: int = 0,
+        poolCapacity: Optional[int] = None,
+    ) -> None:
+        self.blockTime = blockTime
+        self.maxTxnsPerBlock = maxTxnsPerBlock
+        self.roundDelay = roundDelay
+        self.instant = instant
+        self.executePrograms = executePrograms
+        self.poolCapacity = poolCapacity
+
+        self.round = 1
+        self.balances: Dict[str, int] = {}
+        self.assets: Dict[str, Dict[int, int]] = {}
+        self.localStates: Dict[str, Dict[int, Dict[bytes, Any]]] = {}
+        self.apps: Dict[int, Dict[str, Any]] = {}
+        self.assetParams: Dict[int, Dict[str, Any]] = {}
+        self.blocks: Dict[int, Dict[str, Any]] = {1: {"rnd": 1, "ts": GENESIS_TIMESTAMP, "txns": []}}
+        # round -> time.monotonic() it was produced at
+        self.producedAt: Dict[int, float] = {1: time.monotonic()}
+
+        # txid -> signed transaction, in arrival order
+        self.pool: "OrderedDict[str, Any]" = OrderedDict()
+        # txid -> pending transaction info, for confirmed and rejected txns
+        self.results: Dict[str, Dict[str, Any]] = {}
+        # txid -> signed transaction, in confirmation order
+        self.confirmed: "OrderedDict[str, Any]" = OrderedDict()
+        # address -> round the account was first funded in, 0 for genesis accounts
+        self.createdAt: Dict[str, int] = {}
+
+        self._nextIndex = 1000
+        self._lock = threading.RLock()
+
+        self.genesisKeys = [genesisKey(i) for i in range(genesisAccounts)]
+        for key in self.genesisKeys:
+            address = encoding.encode_address(base64.b64decode(key)[32:])
+            self.balances[address] = GENESIS_BALANCE
+            self.createdAt[address] = 0
+
+    ## ACCOUNTS
+    def fund(self, address: str, amount: int) -> None:
+        """Credit `amount` microAlgos to `address` outside of any transaction."""
+        with self._lock:
+            self.balances[address] = self.balances.get(address, 0) + amount
+            self.createdAt.setdefault(address, self.round)
+
+    def _newIndex(self) -> int:
+        self._nextIndex += 1
+        return self._nextIndex
+
+    ## SUBMISSION
+    def submit(self, raw: bytes) -> str:
+        """Decode one or more concatenated signed transactions and add them to the pool."""
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(raw)
+        stxns = [encoding.future_msgpack_decode(d) for d in unpacker]
+        if not stxns:
+            raise LedgerError("empty transaction group")
+
+        with self._lock:
+            if self.poolCapacity is not None and len(self.pool) + len(stxns) > self.poolCapacity:
+                raise LedgerError("TransactionPool.Remember: transaction pool is full")
+            txids = [stxn.get_txid() for stxn in stxns]
+            for stxn, txid in zip(stxns, txids):
+                self._check(stxn.transaction, txid)
+            groups = {stxn.transaction.group for stxn in stxns}
+            if len(stxns) > 1 and (len(groups) != 1 or None in groups):
+                raise LedgerError("transactions submitted together must share a group id")
+            # pooled transactions may change the state the group runs against, so they're checked at block time
+            if not self.pool and self._evaluable(stxns):
+                group = evaluateGroup(self, stxns)
+                if not group.ok:
+                    raise LedgerError("transaction {}: logic eval error: {}".format(txids[0], group.error))
+            elif not self.pool and self._minBalanceError(stxns):
+                raise LedgerError("transaction {}: {}".format(txids[0], self._minBalanceError(stxns)))
+            for stxn, txid in zip(stxns, txids):
+                self.pool[txid] = stxn
+            if self.instant:
+                self.produceBlock()
+
+        return txids[0]
+
+    def _check(self, txn: transaction.Transaction, txid: str) -> None:
+        if txid in self.pool or self.results.get(txid, {}).get("confirmed-round"):
+            raise LedgerError("transaction already in ledger: {}".format(txid))
+        if txn.genesis_hash != GENESIS_HASH:
+            raise LedgerError("transaction genesis hash mismatch")
+        if not txn.first_valid_round <= self.round + 1 <= txn.last_valid_round:
+            raise LedgerError(
+                "txn dead: round {} outside of {}--{}".format(
+                    self.round + 1, txn.first_valid_round, txn.last_valid_round
+                )
+            )
+        if txn.fee < MIN_FEE:
+            raise LedgerError("transaction had fee {}, which is less than the minimum {}".format(txn.fee, MIN_FEE))
+        spend = txn.fee + (txn.amt if txn.type == "pay" else 0)
+        if self.balances.get(txn.sender, 0) < spend:
+            raise LedgerError("overspend (account {}, data {})".format(txn.sender, self.balances.get(txn.sender, 0)))
+
+    ## BLOCKS
+    def produceBlock(self) -> int:
+        """Confirm pooled transactions into the next round and return that round."""
+        with self._lock:
+            self.round += 1
+            confirmed = []
+
+            while self.pool:
+                group = self._nextGroup()
+                if self.maxTxnsPerBlock is not None and len(confirmed) + len(group) > self.maxTxnsPerBlock:
+                    break
+                stxns = [self.pool.pop(txid) for txid in group]
+                if any(stxn.transaction.last_valid_round < self.round for stxn in stxns):
+                    results = [{"pool-error": "txn dead", "txn": _jsonable(stxn.dictify())} for stxn in stxns]
+                elif self._evaluable(stxns):
+                    results = self._evaluate(stxns)
+                elif self._minBalanceError(stxns):
+                    error = self._minBalanceError(stxns)
+                    results = [{"pool-error": error, "txn": _jsonable(stxn.dictify())} for stxn in stxns]
+                else:
+                    results = [self._apply(stxn) for stxn in stxns]
+
+                for txid, stxn, result in zip(group, stxns, results):
+                    self.results[txid] = result
+                    if result.get("confirmed-round"):
+                        self.confirmed[txid] = stxn
+                        confirmed.append(_blockTxn(stxn, result))
+
+            for address in self.balances.keys() - self.createdAt.keys():
+                self.createdAt[address] = self.round
+
+            self.blocks[self.round] = {
+                "rnd": self.round,
+                "ts": GENESIS_TIMESTAMP + self.blockTime * (self.round - 1),
+                "txns": confirmed,
+            }
+            self.producedAt[self.round] = time.monotonic()
+            return self.round
+
+    def _nextGroup(self) -> List[str]:
+        first = next(iter(self.pool))
+        group = self.pool[first].transaction.group
+        if group is None:
+            return [first]
+        return [txid for txid, stxn in self.pool.items() if stxn.transaction.group == group]
+
+    def _evaluable(self, stxns: List[Any]) -> bool:
+        """Whether the group can be applied by the TEAL interpreter."""
+        if not self.executePrograms:
+            return False
+        for stxn in stxns:
+            txn = stxn.transaction
+            if txn.type == "pay":
+                continue
+            if txn.type != "appl":
+                return False
+            program = txn.approval_program if txn.index == 0 else self.apps.get(txn.index, {}).get("approval-program")
+            try:
+                programFromBytes(program or b"")
+            except AVMError:
+                return False
+        return True
+
+    def _minBalanceError(self, stxns: List[Any]) -> Optional[str]:
+        """The minimum balance error of a group applied without the interpreter, see avm.minBalanceError."""
+        balances: Dict[str, int] = {}
+
+        def balance(address: str) -> int:
+            return balances.get(address, self.balances.get(address, 0))
+
+        for stxn in stxns:
+            txn = stxn.transaction
+            balances[txn.sender] = balance(txn.sender) - txn.fee
+            if txn.type == "pay":
+                balances[txn.sender] -= txn.amt
+                balances[txn.receiver] = balance(txn.receiver) + txn.amt
+                if txn.close_remainder_to:
+                    balances[txn.close_remainder_to] = balance(txn.close_remainder_to) + balances[txn.sender]
+                    balances[txn.sender] = 0
+        return minBalanceError(balances)
+
+    def _evaluate(self, stxns: List[Any]) -> List[Dict[str, Any]]:
+        group = evaluateGroup(self, stxns, commit=True)
+        if not group.ok:
+            error = "logic eval error: {}".format(group.error)
+            return [{"pool-error": error, "txn": _jsonable(stxn.dictify())} for stxn in stxns]
+        return [self._evaluated(stxn, group, i) for i, stxn in enumerate(stxns)]
+
+    def _evaluated(self, stxn: Any, group: GroupResult, groupIndex: int) -> Dict[str, Any]:
+        """Return the pending info of a transaction the interpreter applied."""
+        result: Dict[str, Any] = {"confirmed-round": self.round, "pool-error": "", "txn": _jsonable(stxn.dictify())}
+        if groupIndex in group.closingAmounts:
+            result["closing-amount"] = group.closingAmounts[groupIndex]
+
+        evaluation = group[groupIndex]
+        if evaluation is None:
+            return result
+        if stxn.transaction.index == 0:
+            result["application-index"] = evaluation.appID
+        if evaluation.globalDelta:
+            result["global-state-delta"] = _encodeDelta(evaluation.globalDelta)
+        if evaluation.localDeltas:
+            result["local-state-delta"] = [
+                {"address": address, "delta": _encodeDelta(delta)} for address, delta in evaluation.localDeltas.items()
+            ]
+        if evaluation.logs:
+            result["logs"] = [base64.b64encode(log).decode() for log in evaluation.logs]
+        if evaluation.innerTxns:
+            result["inner-txns"] = [_encodeInnerTxn(inner) for inner in evaluation.innerTxns]
+        return result
+
+    def _apply(self, stxn: Any) -> Dict[str, Any]:
+        txn = stxn.transaction
+        result: Dict[str, Any] = {"confirmed-round": self.round, "pool-error": "", "txn": _jsonable(stxn.dictify())}
+
+        self.balances[txn.sender] = self.balances.get(txn.sender, 0) - txn.fee
+
+        if txn.type == "pay":
+            self.balances[txn.sender] -= txn.amt
+            self.balances[txn.receiver] = self.balances.get(txn.receiver, 0) + txn.amt
+            if txn.close_remainder_to:
+                result["closing-amount"] = self.balances.pop(txn.sender)
+                self.balances[txn.close_remainder_to] = (
+                    self.balances.get(txn.close_remainder_to, 0) + result["closing-amount"]
+                )
+        elif txn.type == "appl":
+            if txn.index == 0:
+                appID = self._newIndex()
+                self.apps[appID] = {
+                    "creator": txn.sender,
+                    "approval-program": txn.approval_program,
+                    "clear-state-program": txn.clear_program,
+                    "global-state": OrderedDict(),
+                }
+                result["application-index"] = appID
+            elif txn.on_complete == transaction.OnComplete.OptInOC:
+                self.localStates.setdefault(txn.sender, {})[txn.index] = OrderedDict()
+            elif txn.on_complete in (transaction.OnComplete.CloseOutOC, transaction.OnComplete.ClearStateOC):
+                self.localStates.get(txn.sender, {}).pop(txn.index, None)
+        elif txn.type == "acfg" and not txn.index:
+            assetID = self._newIndex()
+            self.assetParams[assetID] = {"creator": txn.sender, "total": txn.total, "unit-name": txn.unit_name}
+            self.assets.setdefault(txn.sender, {})[assetID] = txn.total
+            result["asset-index"] = assetID
+        elif txn.type == "axfer":
+            holdings = self.assets.setdefault(txn.sender, {})
+            holdings[txn.index] = holdings.get(txn.index, 0) - txn.amount
+            receiverHoldings = self.assets.setdefault(txn.receiver, {})
+            receiverHoldings[txn.index] = receiverHoldings.get(txn.index, 0) + txn.amount
+
+        return result
+
+    ## QUERIES
+    def health(self) -> None:
+        """algod's /health answers with an empty body."""
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        """Return node status in algod's JSON shape."""
+        return {"last-round": self.round, "time-since-last-round": 0, "catchup-time": 0}
+
+    def waitForBlockAfter(self, round: int) -> Dict[str, Any]:
+        """Produce blocks until the ledger is past `round`, then return status."""
+        while True:
+            with self._lock:
+                if self.round > round:
+                    return self.status()
+            if self.roundDelay:
+                time.sleep(self.roundDelay)
+            with self._lock:
+                if self.round <= round:
+                    self.produceBlock()
+
+    def suggestedParams(self) -> Dict[str, Any]:
+        """Return transaction params in algod's JSON shape."""
+        return {
+            "consensus-version": "future",
+            "fee": 0,
+            "genesis-hash": GENESIS_HASH,
+            "genesis-id": GENESIS_ID,
+            "last-round": self.round,
+            "min-fee": MIN_FEE,
+        }
+
+    def pendingInfo(self, txid: str) -> Dict[str, Any]:
+        """Return pending transaction info for a pooled, confirmed or rejected txn."""
+        with self._lock:
+            if txid in self.pool:
+                return {"pool-error": "", "txn": _jsonable(self.pool[txid].dictify())}
+            if txid in self.results:
+                return self.results[txid]
+        raise LedgerError("txn does not exist", 404)
+
+    def pendingTransactions(self) -> Dict[str, Any]:
+        """Return the pool in the msgpack-decoded shape algod uses."""
+        with self._lock:
+            stxns = [stxn.dictify() for stxn in self.pool.values()]
+        return {"top-transactions": stxns, "total-transactions": len(stxns)}
+
+    def accountInfo(self, address: str) -> Dict[str, Any]:
+        """Return account info in algod's JSON shape."""
+        with self._lock:
+            return {
+                "address": address,
+                "round": self.round,
+                "amount": self.balances.get(address, 0),
+                "assets": [{"asset-id": k, "amount": v} for k, v in self.assets.get(address, {}).items()],
+                "apps-local-state": [
+                    {"id": appID, "key-value": _encodeState(state)}
+                    for appID, state in self.localStates.get(address, {}).items()
+                ],
+            }
+
+    def applicationInfo(self, appID: int) -> Dict[str, Any]:
+        """Return application info in algod's JSON shape."""
+        with self._lock:
+            if appID not in self.apps:
+                raise LedgerError("application does not exist", 404)
+            app = self.apps[appID]
+            return {
+                "id": appID,
+                "params": {
+                    "creator": app["creator"],
+                    "approval-program": _jsonable(app["approval-program"]),
+                    "clear-state-program": _jsonable(app["clear-state-program"]),
+                    "global-state": _encodeState(app["global-state"]),
+                },
+            }
+
+    def blockInfo(self, round: int) -> Dict[str, Any]:
+        """Return a block in algod's JSON shape."""
+        with self._lock:
+            if round not in self.blocks:
+                raise LedgerError("ledger does not have entry {}".format(round), 404)
+            return {"block": self.blocks[round]}
+
+    def compile(self, source: bytes) -> Dict[str, Any]:
+        """
+        Stand in for TEAL compilation: return deterministic program bytes for `source`.
+
+        The bytes aren't real bytecode but a version byte followed by the TEAL
+        text, so the program can be evaluated (see avm.programFromBytes) even
+        when the bytes come from the on-disk program cache.
+        """
+        program = b"\x05" + source
+        return {"hash": logic.address(program), "result": base64.b64encode(program).decode()}
+
+
+def genesisKey(index: int) -> str:
+    """Return the private key of the `index`th genesis account; the same in every process."""
+    seed = hashlib.sha256("{}-genesis-{}".format(GENESIS_ID, index).encode()).digest()
+    return base64.b64encode(seed + bytes(SigningKey(seed).verify_key)).decode()
+
+
+def _encodeDelta(delta: Dict[bytes, Any]) -> List[Dict[str, Any]]:
+    """Encode a key -> new value (None if deleted) mapping as an algod EvalDelta array."""
+    encoded = []
+    for key, value in delta.items():
+        if value is None:
+            evalDelta: Dict[str, Any] = {"action": 3}
+        elif isinstance(value, int):
+            evalDelta = {"action": 2, "uint": value}
+        else:
+            evalDelta = {"action": 1, "bytes": base64.b64encode(value).decode()}
+        encoded.append({"key": base64.b64encode(key).decode(), "value": evalDelta})
+    return encoded
+
+
+def _blockTxn(stxn: Any, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode a confirmed transaction as algod's blocks carry it, with the app it created and its inner txns."""
+    txn = _jsonable(stxn.dictify())
+    if result.get("application-index"):
+        txn["apid"] = result["application-index"]
+    if result.get("inner-txns"):
+        txn["dt"] = {
+            "itx": [
+                {**inner["txn"], "ca": inner["closing-amount"]} if inner.get("closing-amount") else inner["txn"]
+                for inner in result["inner-txns"]
+            ]
+        }
+    return txn
+
+
+def _encodeInnerTxn(inner: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode the fields of an inner payment as algod's pending info of it."""
+    txn = {"type": "pay", "snd": encoding.decode_address(inner["Sender"]), "fee": inner["Fee"]}
+    if inner.get("Receiver"):
+        txn["rcv"] = encoding.decode_address(inner["Receiver"])
+    if inner.get("Amount"):
+        txn["amt"] = inner["Amount"]
+    if inner.get("CloseRemainderTo"):
+        txn["close"] = encoding.decode_address(inner["CloseRemainderTo"])
+    result = {"pool-error": "", "txn": _jsonable({"txn": txn})}
+    if inner.get("ClosingAmount"):
+        result["closing-amount"] = inner["ClosingAmount"]
+    return result
+
+
+def _encodeState(state: Dict[bytes, Any]) -> List[Dict[str, Any]]:
+    """Encode a key -> int/bytes mapping as an algod TealKeyValue array."""
+    encoded = []
+    for key, value in state.items():
+        if isinstance(value, int):
+            tealValue = {"type": 2, "uint": value, "bytes": ""}
+        else:
+            tealValue = {"type": 1, "uint": 0, "bytes": base64.b64encode(value).decode()}
+        encoded.append({"key": base64.b64encode(key).decode(), "value": tealValue})
+    return encoded
+
+
+ALGOD_ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("GET", re.compile(r"^/status$"), "status"),
+    ("GET", re.compile(r"^/status/wait-for-block-after/(\d+)$"), "waitForBlockAfter"),
+    ("GET", re.compile(r"^/transactions/params$"), "suggestedParams"),
+    ("POST", re.compile(r"^/transactions$"), "submit"),
+    ("GET", re.compile(r"^/transactions/pending$"), "pendingTransactions"),
+    ("GET", re.compile(r"^/transactions/pending/([A-Z2-7]+)$"), "pendingInfo"),
+    ("GET", re.compile(r"^/accounts/([A-Z2-7]+)$"), "accountInfo"),
+    ("GET", re.compile(r"^/applications/(\d+)$"), "applicationInfo"),
+    ("GET", re.compile(r"^/blocks/(\d+)$"), "blockInfo"),
+    ("POST", re.compile(r"^/teal/compile$"), "compile"),
+]
+
+
+def handleAlgodRequest(
+    ledger: FakeLedger, method: str, path: str, data: Optional[bytes] = None, responseFormat: str = "json"
+) -> Tuple[str, Any]:
+    """
+    Answer one algod API request (path without the /v2 prefix) from the ledger.
+
+    Returns:
+        the name of the ledger handler used, and the response: a JSON-style
+        object, or bytes when `responseFormat` is msgpack.
+        Raises LedgerError for unknown routes and rejected requests.
+    """
+    for routeMethod, pattern, handler in ALGOD_ROUTES:
+        match = pattern.match(path)
+        if routeMethod == method and match:
+            break
+    else:
+        raise LedgerError("unknown route {} {}".format(method, path), 404)
+
+    args: List[Any] = [int(a) if a.isdigit() else a for a in match.groups()]
+    if handler in ("submit", "compile"):
+        args = [data]
+
+    response = getattr(ledger, handler)(*args)
+
+    if handler == "submit":
+        return handler, {"txId": response}
+    if responseFormat == "msgpack":
+        return handler, msgpack.packb(response, use_bin_type=True)
+    if handler == "pendingTransactions":
+        return handler, _jsonable(response)
+    return handler, response
+
+
+class FakeAlgodClient(AlgodClient):
+    """
+    AlgodClient whose requests are answered in-process by a FakeLedger.
+
+    Every request is counted in `calls` (keyed by ledger handler name),
+    which stands in for the number of HTTP round-trips against a real node.
+    """
+
+    def __init__(self, ledger: FakeLedger) -> None:
+        super().__init__("a" * 64, "http://fake-algod")
+        self.ledger = ledger
+        self.calls: Counter = Counter()
+
+    @property
+    def totalCalls(self) -> int:
+        return sum(self.calls.values())
+
+    @instrument("algod")
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        try:
+            handler, response = handleAlgodRequest(self.ledger, method, requrl, data, response_format)
+        except LedgerError as e:
+            raise error.AlgodHTTPError(str(e), e.code)
+        self.calls[handler] += 1
+        return response
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+class FakeAlgodServer:
+    """
+    Serves a FakeLedger over real HTTP/1.1 (with keep-alive) on localhost.
+
+    Usable as a context manager; `address` is the algod address to connect to.
+    """
+
+    def __init__(self, ledger: FakeLedger) -> None:
+        self.ledger = ledger
+        self.requests = 0
+        self.connections = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server.connections += 1
+
+            def do_GET(self) -> None:
+                self._handle()
+
+            def do_POST(self) -> None:
+                self._handle()
+
+            def _handle(self) -> None:
+                server.requests += 1
+                url = urlparse(self.path)
+                path = url.path[3:] if url.path.startswith("/v2/") else url.path
+                responseFormat = parse_qs(url.query).get("format", ["json"])[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                data = self.rfile.read(length) if length else None
+
+                try:
+                    _, response = handleAlgodRequest(server.ledger, self.command, path, data, responseFormat)
+                    code = 200
+                except LedgerError as e:
+                    response, code = {"message": str(e)}, e.code
+
+                body = response if isinstance(response, bytes) else json.dumps(response).encode()
+                self.send_response(code)
+                self.send_header(
+                    "Content-Type", "application/msgpack" if isinstance(response, bytes) else "application/json"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._httpd = _HTTPServer(("127.0.0.1", 0), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self) -> "FakeAlgodServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeAlgodServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
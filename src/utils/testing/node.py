@@ -0,0 +1,514 @@
+"""
+In-process stand-ins for the indexer and kmd of a sandbox node.
+
+FakeIndexer answers the indexer API from a FakeLedger's confirmed
+transactions and state, and FakeKMD keeps an unencrypted default wallet
+holding the ledger's genesis keys. FakeNode puts both next to the ledger's
+FakeAlgodClient, so code that builds its clients from a ClientRegistry runs
+against the fake node unchanged (see src/conftest.py).
+"""
+import base64
+import re
+import time
+from collections import Counter
+from collections import OrderedDict
+from itertools import islice
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk import account
+from algosdk import encoding
+from algosdk import error
+from algosdk.kmd import KMDClient
+from algosdk.v2client.indexer import IndexerClient
+
+from src.utils.clients import ClientRegistry
+from src.utils.metrics import instrument
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.testing.ledger import LedgerError
+from src.utils.wallet import KMD_WALLET_NAME
+from src.utils.wallet import KMD_WALLET_PASSWORD
+
+INDEXER_PAGE_LIMIT = 1000
+ON_COMPLETION_NAMES = ["noop", "optin", "closeout", "clear", "update", "delete"]
+
+
+## INDEXER
+class FakeIndexer:
+    """
+    Indexer API over a FakeLedger, caught up with every produced block.
+
+    Transaction records are built lazily, in confirmation order, from the
+    ledger's confirmed transactions and their pending info. With `lag`, a
+    block only becomes visible `lag` seconds after the ledger produced it,
+    like an indexer still ingesting the latest rounds; with `lagPolls`, only
+    once that many health checks were answered since the indexer first saw
+    it, so tests can count the checks a waiting client makes.
+
+    Args:
+        ledger (FakeLedger): the ledger indexed
+        lag (float): seconds between a block's production and the indexer serving it
+        lagPolls (int): health checks answered between a block's production and the indexer serving it
+    """
+
+    def __init__(self, ledger: FakeLedger, lag: float = 0.0, lagPolls: int = 0) -> None:
+        self.ledger = ledger
+        self.lag = lag
+        self.lagPolls = lagPolls
+        self.polls = 0
+        # round -> health checks answered when the round was first seen
+        self._seenAt: Dict[int, int] = {}
+        self._records: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+
+    @property
+    def round(self) -> int:
+        if not self.lag and not self.lagPolls:
+            return self.ledger.round
+        visible = time.monotonic() - self.lag
+        with self.ledger._lock:
+            for r in self.ledger.producedAt.keys() - self._seenAt.keys():
+                self._seenAt[r] = self.polls
+            return max(
+                (
+                    r
+                    for r, at in self.ledger.producedAt.items()
+                    if at <= visible and self.polls - self._seenAt[r] >= self.lagPolls
+                ),
+                default=1,
+            )
+
+    def _sync(self) -> List[Dict[str, Any]]:
+        """Build the records of transactions confirmed since the last call, up to the visible round."""
+        visible = self.round
+        with self.ledger._lock:
+            for txid, stxn in islice(self.ledger.confirmed.items(), len(self._records), None):
+                previous = self._records[-1] if self._records else None
+                round = self.ledger.results[txid]["confirmed-round"]
+                if round > visible:
+                    break
+                offset = previous["intra-round-offset"] + 1 if previous and previous["confirmed-round"] == round else 0
+                self._positions[txid] = len(self._records)
+                self._records.append(self._record(txid, stxn, round, offset))
+        return self._records
+
+    def _record(self, txid: str, stxn: Any, round: int, offset: int) -> Dict[str, Any]:
+        """Return a confirmed transaction in the indexer's JSON shape."""
+        txn = stxn.transaction
+        info = self.ledger.results[txid]
+        record: Dict[str, Any] = {
+            "id": txid,
+            "confirmed-round": round,
+            "round-time": self.ledger.blocks[round]["ts"],
+            "intra-round-offset": offset,
+            "tx-type": txn.type,
+            "sender": txn.sender,
+            "fee": txn.fee,
+            "first-valid": txn.first_valid_round,
+            "last-valid": txn.last_valid_round,
+            "genesis-id": txn.genesis_id,
+            "genesis-hash": txn.genesis_hash,
+        }
+        if txn.note:
+            record["note"] = base64.b64encode(txn.note).decode()
+        if txn.group:
+            record["group"] = base64.b64encode(txn.group).decode()
+
+        if txn.type == "pay":
+            record["payment-transaction"] = {
+                "receiver": txn.receiver,
+                "amount": txn.amt,
+                "close-amount": info.get("closing-amount", 0),
+            }
+            if txn.close_remainder_to:
+                record["payment-transaction"]["close-remainder-to"] = txn.close_remainder_to
+        elif txn.type == "appl":
+            record["application-transaction"] = {
+                "application-id": txn.index,
+                "on-completion": ON_COMPLETION_NAMES[int(txn.on_complete or 0)],
+                "application-args": [base64.b64encode(arg).decode() for arg in txn.app_args or []],
+                "accounts": list(txn.accounts or []),
+                "foreign-apps": list(txn.foreign_apps or []),
+                "foreign-assets": list(txn.foreign_assets or []),
+            }
+            if "application-index" in info:
+                record["created-application-index"] = info["application-index"]
+            for key in ("global-state-delta", "local-state-delta", "logs"):
+                if key in info:
+                    record[key] = info[key]
+            if info.get("inner-txns"):
+                record["inner-txns"] = [_innerRecord(inner, round) for inner in info["inner-txns"]]
+        elif txn.type == "acfg":
+            record["asset-config-transaction"] = {
+                "asset-id": txn.index or 0,
+                "params": {
+                    "creator": txn.sender,
+                    "total": txn.total,
+                    "decimals": txn.decimals,
+                    "unit-name": txn.unit_name,
+                    "name": txn.asset_name,
+                    "url": txn.url,
+                },
+            }
+            if "asset-index" in info:
+                record["created-asset-index"] = info["asset-index"]
+        elif txn.type == "axfer":
+            record["asset-transfer-transaction"] = {
+                "asset-id": txn.index,
+                "amount": txn.amount,
+                "receiver": txn.receiver,
+            }
+        return record
+
+    ## ROUTES
+    def health(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self.ledger._lock:
+            self.polls += 1
+        round = self.round
+        return {
+            "round": round,
+            "db-available": True,
+            "is-migrating": False,
+            "message": str(round),
+            "version": "fake",
+        }
+
+    def transaction(self, txid: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        records = self._sync()
+        if txid not in self._positions:
+            raise LedgerError("no transaction found for transaction id: {}".format(txid), 404)
+        return {"current-round": self.round, "transaction": records[self._positions[txid]]}
+
+    def searchTransactions(self, params: Dict[str, Any], address: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return one page of confirmed transactions matching the query, oldest first.
+
+        Supports the limit, next, round, min-round, max-round, address,
+        address-role, tx-type, txid, application-id, asset-id and note-prefix
+        filters. Like the indexer, the response has a next-token whenever the
+        page isn't empty.
+        """
+        records = self._sync()
+        address = address or params.get("address")
+        limit = min(int(params.get("limit") or INDEXER_PAGE_LIMIT), INDEXER_PAGE_LIMIT)
+        start = int(params.get("next") or 0)
+        notePrefix = base64.b64decode(params["note-prefix"]) if params.get("note-prefix") else None
+
+        page = []
+        for position in range(start, len(records)):
+            if len(page) == limit:
+                break
+            record = records[position]
+            if _matches(record, params, address, notePrefix):
+                page.append(record)
+        else:
+            position = len(records)
+
+        response: Dict[str, Any] = {"current-round": self.round, "transactions": page}
+        if page:
+            response["next-token"] = str(position)
+        return response
+
+    def accountTransactions(self, address: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.searchTransactions(params, address)
+
+    def _account(self, address: str) -> Dict[str, Any]:
+        info = self.ledger.accountInfo(address)
+        return {
+            **info,
+            "amount-without-pending-rewards": info["amount"],
+            "created-at-round": self.ledger.createdAt.get(address, 0),
+            "deleted": False,
+            "pending-rewards": 0,
+            "rewards": 0,
+            "round": self.round,
+            "status": "Offline",
+            "created-apps": [
+                {"id": appID, "params": self.ledger.applicationInfo(appID)["params"]}
+                for appID, app in self.ledger.apps.items()
+                if app["creator"] == address
+            ],
+        }
+
+    def accounts(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return one page of accounts, ordered by address; `next` is the last address seen."""
+        limit = min(int(params.get("limit") or INDEXER_PAGE_LIMIT), INDEXER_PAGE_LIMIT)
+        appID = int(params.get("application-id") or 0)
+        with self.ledger._lock:
+            addresses = sorted(a for a in self.ledger.balances if a > params.get("next", ""))
+            if appID:
+                addresses = [a for a in addresses if appID in self.ledger.localStates.get(a, {})]
+            page = [self._account(a) for a in addresses[:limit]]
+
+        response: Dict[str, Any] = {"current-round": self.round, "accounts": page}
+        if page:
+            response["next-token"] = page[-1]["address"]
+        return response
+
+    def accountInfo(self, address: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self.ledger._lock:
+            if address not in self.ledger.createdAt:
+                raise LedgerError("no accounts found for address: {}".format(address), 404)
+            return {"current-round": self.round, "account": self._account(address)}
+
+    def application(self, appID: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            application = self.ledger.applicationInfo(appID)
+        except LedgerError:
+            raise LedgerError("no application found for application-id: {}".format(appID), 404)
+        created = next((r["confirmed-round"] for r in self._sync() if r.get("created-application-index") == appID), 0)
+        return {
+            "current-round": self.round,
+            "application": {**application, "created-at-round": created, "deleted": False},
+        }
+
+    def block(self, round: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        records = self._sync()
+        with self.ledger._lock:
+            if round not in self.ledger.blocks or round > self.round:
+                raise LedgerError("error while looking up block for round '{}': block not found".format(round), 404)
+            block = self.ledger.blocks[round]
+        return {
+            "round": round,
+            "timestamp": block["ts"],
+            "genesis-id": self.ledger.suggestedParams()["genesis-id"],
+            "genesis-hash": self.ledger.suggestedParams()["genesis-hash"],
+            "transactions": [r for r in records if r["confirmed-round"] == round],
+        }
+
+
+def _innerRecord(inner: Dict[str, Any], round: int) -> Dict[str, Any]:
+    """Convert the pending info of an inner payment into the indexer's shape."""
+    txn = inner["txn"]["txn"]
+
+    def address(key: str) -> Optional[str]:
+        return encoding.encode_address(base64.b64decode(txn[key])) if key in txn else None
+
+    payment = {"receiver": address("rcv"), "amount": txn.get("amt", 0)}
+    if "close" in txn:
+        payment["close-remainder-to"] = address("close")
+    return {
+        "tx-type": "pay",
+        "sender": address("snd"),
+        "fee": txn["fee"],
+        "confirmed-round": round,
+        "payment-transaction": payment,
+    }
+
+
+def _participants(record: Dict[str, Any], role: Optional[str]) -> List[str]:
+    payment = record.get("payment-transaction") or record.get("asset-transfer-transaction") or {}
+    if role == "sender":
+        return [record["sender"]]
+    if role == "receiver":
+        return [payment.get("receiver")]
+    return [record["sender"], payment.get("receiver"), payment.get("close-remainder-to")]
+
+
+def _matches(record: Dict[str, Any], params: Dict[str, Any], address: Optional[str], notePrefix: Optional[bytes]):
+    round = record["confirmed-round"]
+    if params.get("round") and round != int(params["round"]):
+        return False
+    if params.get("min-round") and round < int(params["min-round"]):
+        return False
+    if params.get("max-round") and round > int(params["max-round"]):
+        return False
+    if params.get("tx-type") and record["tx-type"] != params["tx-type"]:
+        return False
+    if params.get("txid") and record["id"] != params["txid"]:
+        return False
+    if address and address not in _participants(record, params.get("address-role")):
+        return False
+    if params.get("application-id"):
+        appID = int(params["application-id"])
+        app = record.get("application-transaction", {})
+        if appID not in (app.get("application-id"), record.get("created-application-index")):
+            return False
+    if params.get("asset-id"):
+        assetID = int(params["asset-id"])
+        asset = record.get("asset-transfer-transaction") or record.get("asset-config-transaction") or {}
+        if assetID not in (asset.get("asset-id"), record.get("created-asset-index")):
+            return False
+    if notePrefix is not None and not base64.b64decode(record.get("note", "")).startswith(notePrefix):
+        return False
+    return True
+
+
+INDEXER_ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("GET", re.compile(r"^/transactions$"), "searchTransactions"),
+    ("GET", re.compile(r"^/transactions/([A-Z2-7]+)$"), "transaction"),
+    ("GET", re.compile(r"^/accounts$"), "accounts"),
+    ("GET", re.compile(r"^/accounts/([A-Z2-7]+)$"), "accountInfo"),
+    ("GET", re.compile(r"^/accounts/([A-Z2-7]+)/transactions$"), "accountTransactions"),
+    ("GET", re.compile(r"^/applications/(\d+)$"), "application"),
+    ("GET", re.compile(r"^/blocks/(\d+)$"), "block"),
+]
+
+
+def handleIndexerRequest(
+    indexer: FakeIndexer, method: str, path: str, params: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Answer one indexer API request (path without the /v2 prefix).
+
+    Returns:
+        the name of the FakeIndexer handler used, and the JSON-style response.
+        Raises LedgerError for unknown routes and missing entities.
+    """
+    return _route(indexer, INDEXER_ROUTES, method, path, params or {})
+
+
+def _route(backend: Any, routes: List[Any], method: str, path: str, body: Dict[str, Any]) -> Tuple[str, Any]:
+    for routeMethod, pattern, handler in routes:
+        match = pattern.match(path)
+        if routeMethod == method and match:
+            args = [int(a) if a.isdigit() else a for a in match.groups()]
+            return handler, getattr(backend, handler)(*args, body)
+    raise LedgerError("unknown route {} {}".format(method, path), 404)
+
+
+class FakeIndexerClient(IndexerClient):
+    """IndexerClient whose requests are answered in-process by a FakeIndexer, counted in `calls`."""
+
+    def __init__(self, indexer: FakeIndexer) -> None:
+        super().__init__("", "http://fake-indexer")
+        self.indexer = indexer
+        self.calls: Counter = Counter()
+
+    @instrument("indexer")
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None):
+        try:
+            handler, response = handleIndexerRequest(self.indexer, method, requrl, params)
+        except LedgerError as e:
+            raise error.IndexerHTTPError(str(e))
+        self.calls[handler] += 1
+        return response
+
+
+## KMD
+class FakeKMD:
+    """
+    kmd with one unencrypted wallet, KMD_WALLET_NAME, holding `keys`.
+
+    Args:
+        keys (list): base64 private keys, e.g. FakeLedger.genesisKeys
+    """
+
+    def __init__(self, keys: List[str]) -> None:
+        walletKeys = OrderedDict((account.address_from_private_key(key), key) for key in keys)
+        self.wallets = {"1": {"id": "1", "name": KMD_WALLET_NAME, "keys": walletKeys}}
+        # wallet handle token -> wallet id
+        self.handles: Dict[str, str] = {}
+
+    def _wallet(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        token = data.get("wallet_handle_token")
+        if token not in self.handles:
+            raise LedgerError("handle does not exist", 401)
+        return self.wallets[self.handles[token]]
+
+    def _checkPassword(self, data: Dict[str, Any]) -> None:
+        if data.get("wallet_password", "") != KMD_WALLET_PASSWORD:
+            raise LedgerError("wrong password", 401)
+
+    ## ROUTES
+    def versions(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"versions": ["v1"]}
+
+    def listWallets(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        wallets = [
+            {"id": w["id"], "name": w["name"], "driver_name": "sqlite", "driver_version": 1, "mnemonic_ux": False}
+            for w in self.wallets.values()
+        ]
+        return {"wallets": wallets}
+
+    def initWallet(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if data.get("wallet_id") not in self.wallets:
+            raise LedgerError("wallet not found", 404)
+        self._checkPassword(data)
+        token = "handle-{}".format(len(self.handles) + 1)
+        self.handles[token] = data["wallet_id"]
+        return {"wallet_handle_token": token, "expires_seconds": 60}
+
+    def releaseWallet(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._wallet(data)
+        del self.handles[data["wallet_handle_token"]]
+        return {}
+
+    def listKeys(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"addresses": list(self._wallet(data)["keys"])}
+
+    def exportKey(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        wallet = self._wallet(data)
+        self._checkPassword(data)
+        if data.get("address") not in wallet["keys"]:
+            raise LedgerError("key does not exist in this wallet", 404)
+        return {"private_key": wallet["keys"][data["address"]]}
+
+    def generateKey(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.importKey({**data, "private_key": account.generate_account()[0]})
+
+    def importKey(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        address = account.address_from_private_key(data["private_key"])
+        self._wallet(data)["keys"][address] = data["private_key"]
+        return {"address": address}
+
+
+KMD_ROUTES = [
+    ("GET", re.compile(r"^/versions$"), "versions"),
+    ("GET", re.compile(r"^/v1/wallets$"), "listWallets"),
+    ("POST", re.compile(r"^/v1/wallet/init$"), "initWallet"),
+    ("POST", re.compile(r"^/v1/wallet/release$"), "releaseWallet"),
+    ("POST", re.compile(r"^/v1/key/list$"), "listKeys"),
+    ("POST", re.compile(r"^/v1/key/export$"), "exportKey"),
+    ("POST", re.compile(r"^/v1/key$"), "generateKey"),
+    ("POST", re.compile(r"^/v1/key/import$"), "importKey"),
+]
+
+
+class FakeKMDClient(KMDClient):
+    """KMDClient whose requests are answered in-process by a FakeKMD, counted in `calls`."""
+
+    def __init__(self, kmd: FakeKMD) -> None:
+        super().__init__("a" * 64, "http://fake-kmd")
+        self.kmd = kmd
+        self.calls: Counter = Counter()
+
+    @instrument("kmd")
+    def kmd_request(self, method, requrl, params=None, data=None):
+        path = requrl if requrl == "/versions" else "/v1" + requrl
+        try:
+            handler, response = _route(self.kmd, KMD_ROUTES, method, path, data or {})
+        except LedgerError as e:
+            raise error.KMDHTTPError(str(e))
+        self.calls[handler] += 1
+        return response
+
+
+## NODE
+class FakeNode:
+    """
+    A FakeLedger with algod, indexer and kmd clients answering from it, like a sandbox node.
+
+    By default the ledger confirms every submit instantly, runs app programs
+    and has `genesisAccounts` funded accounts in kmd's default wallet.
+
+    Args:
+        ledger (FakeLedger, optional): the ledger to serve, a new one if None
+        genesisAccounts (int): number of genesis accounts of a new ledger
+        indexerLag (float): seconds the indexer trails the ledger by, see FakeIndexer
+    """
+
+    def __init__(self, ledger: Optional[FakeLedger] = None, genesisAccounts: int = 3, indexerLag: float = 0.0) -> None:
+        self.ledger = ledger or FakeLedger(instant=True, executePrograms=True, genesisAccounts=genesisAccounts)
+        self.algod = FakeAlgodClient(self.ledger)
+        self.indexer = FakeIndexerClient(FakeIndexer(self.ledger, lag=indexerLag))
+        self.kmd = FakeKMDClient(FakeKMD(self.ledger.genesisKeys))
+
+    def install(self, registry: ClientRegistry, network: Optional[str] = None) -> None:
+        """Have `registry` hand out this node's clients for `network` (its default network if None)."""
+        registry.register(network, algod=self.algod, indexer=self.indexer, kmd=self.kmd)
@@ -0,0 +1,133 @@
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.error import IndexerHTTPError
+
+import src.utils.artifacts as artifacts
+from src.scripts.scripts import Scripts
+from src.utils.artifacts import ProgramCache
+from src.utils.clients import algod_client
+from src.utils.clients import indexer_client
+from src.utils.helpers import account_balance
+from src.utils.helpers import add_standalone_account
+from src.utils.helpers import fund_account
+from src.utils.params import getParamsProvider
+from src.utils.testing.ledger import FakeLedger
+from src.utils.testing.resources import FUNDING_AMOUNT
+from src.utils.testing.resources import getTemporaryAccount
+from src.utils.testing.resources import payAccount
+from src.utils.testing.setup import getGenesisAccounts
+from src.utils.util import getAppGlobalState
+from src.utils.util import PendingTxnResponse
+
+
+@pytest.fixture
+def scripts(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper)
+    s.deploy(app_id=1, query_id="1")
+    return s
+
+
+def test_genesis_accounts_come_from_kmd(node):
+    accounts = getGenesisAccounts()
+
+    assert [a.getPrivateKey() for a in accounts] == node.ledger.genesisKeys
+    assert FakeLedger(genesisAccounts=3).genesisKeys == node.ledger.genesisKeys
+
+
+def test_instant_mode_confirms_each_submit(node):
+    client = algod_client()
+    sender = getTemporaryAccount(client)
+    start = node.ledger.round
+
+    responses = [payAccount(client, sender, sender.getAddress(), i) for i in range(5)]
+
+    assert [r.confirmedRound for r in responses] == list(range(start + 1, start + 6))
+    assert node.ledger.round == start + 5
+
+
+def test_fund_account_from_genesis(node):
+    funded = add_standalone_account()
+
+    fund_account(funded, 5_000_000)
+
+    assert account_balance(funded.getAddress()) == 5_000_000
+    payment = indexer_client().search_transactions(address=funded.getAddress())["transactions"][0]
+    assert payment["payment-transaction"]["amount"] == 5_000_000
+    assert payment["note"]
+
+
+def test_scripts_run_the_contract(scripts, node):
+    client = scripts.client
+    bidder = getTemporaryAccount(client)
+    txns = scripts._bid_txns(bidder, 5000, getParamsProvider(client).get())
+    client.send_transactions([t.sign(bidder.getPrivateKey()) for t in txns])
+
+    bid = PendingTxnResponse(client.pending_transaction_info(txns[1].get_txid()))
+    assert bid.confirmedRound == node.ledger.round
+    assert bid.localStateDelta == [
+        {"address": bidder.getAddress(), "delta": [{"key": "cHJlZGljdGlvbg==", "value": {"action": 2, "uint": 5000}}]}
+    ]
+    assert getAppGlobalState(client, scripts.app_id)[b"num_bidders"] == 1
+
+    found = indexer_client().search_transactions(application_id=scripts.app_id)["transactions"]
+    assert [t["application-transaction"]["on-completion"] for t in found] == ["noop", "optin"]
+    assert found[0]["created-application-index"] == scripts.app_id
+
+
+def test_rejected_program_is_refused_at_submit(scripts):
+    client = scripts.client
+    bidder = getTemporaryAccount(client)
+    pay, bid = scripts._bid_txns(bidder, 5000, getParamsProvider(client).get())
+    pay.amt = 1
+
+    with pytest.raises(AlgodHTTPError, match="logic eval error"):
+        client.send_transactions([pay.sign(bidder.getPrivateKey()), bid.sign(bidder.getPrivateKey())])
+
+
+def test_payments_below_minimum_balance_are_refused(node):
+    client = algod_client()
+    sender = getTemporaryAccount(client)
+    receiver = add_standalone_account()
+
+    with pytest.raises(AlgodHTTPError, match="below min 100000"):
+        payAccount(client, sender, receiver.getAddress(), 1000)
+    payAccount(client, sender, receiver.getAddress(), 100_000)
+    assert account_balance(receiver.getAddress()) == 100_000
+
+
+def test_bids_to_an_unfunded_app_are_refused(node, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_cache", ProgramCache(tmp_path))
+    client = algod_client()
+    tipper = getTemporaryAccount(client)
+    s = Scripts(client, tipper, tipper, tipper)
+    txn = s._deploy_txn(*s.get_contracts(client), 1, "1", getParamsProvider(client).get())
+    client.send_transaction(txn.sign(tipper.getPrivateKey()))
+    unfunded = Scripts(client, tipper, tipper, tipper, node.ledger._nextIndex)
+    bidder = getTemporaryAccount(client)
+    txns = unfunded._bid_txns(bidder, 5000, getParamsProvider(client).get())
+
+    with pytest.raises(AlgodHTTPError, match="below min 100000"):
+        client.send_transactions([t.sign(bidder.getPrivateKey()) for t in txns])
+
+
+def test_indexer_pages_transactions(node):
+    client = algod_client()
+    sender = getTemporaryAccount(client)
+    for i in range(5):
+        payAccount(client, sender, sender.getAddress(), i)
+
+    pages, token = [], None
+    while True:
+        page = indexer_client().search_transactions(address=sender.getAddress(), limit=2, next_page=token)
+        if not page["transactions"]:
+            break
+        pages.append([t["payment-transaction"]["amount"] for t in page["transactions"]])
+        token = page["next-token"]
+
+    # the first payment funded the account from genesis
+    assert pages == [[FUNDING_AMOUNT, 0], [1, 2], [3, 4]]
+    with pytest.raises(IndexerHTTPError, match="no transaction found"):
+        indexer_client().transaction("A" * 52)
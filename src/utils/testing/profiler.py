@@ -0,0 +1,218 @@
+"""
+Opcode-cost profiler for the auction contract.
+
+Runs each branch of the approval program (create, OptIn/bid, CloseOut/settle)
+and the clear state program through the TEAL interpreter and attributes the
+cost of every executed TEAL line to the PyTeal line that built it.
+
+usage: python -m src.utils.testing.profiler [--bidders N] [--budget settle=100 ...]
+"""
+import argparse
+import contextlib
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk.future import transaction
+from pyteal import compileTeal
+from pyteal import Expr
+from pyteal import Mode
+from pyteal.ir import TealComponent
+from pyteal.ir import TealLabel
+from pyteal.ir import TealOp
+
+from src.contracts.approval import approval_program
+from src.contracts.approval import clear_state_program
+from src.utils.testing.auction import AuctionSimulator
+from src.utils.testing.avm import APP_BUDGET
+from src.utils.testing.avm import EvalResult
+
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent.parent / "contracts"
+BRANCHES = ["create", "bid", "settle", "clear"]
+CONSTANT_OPS = {"int", "byte", "addr", "pushint", "pushbytes"}
+
+# (file, line number, function)
+SourceLine = Tuple[str, int, str]
+
+_FRAME = re.compile(r'File "(?P<file>[^"]+)", line (?P<line>\d+), in (?P<function>\S+)')
+
+
+@contextlib.contextmanager
+def _recordAssembly() -> Iterator[List[TealComponent]]:
+    """Record the TealComponents compileTeal assembles, in output order."""
+    assembled: List[TealComponent] = []
+    originals = {cls: cls.assemble for cls in (TealOp, TealLabel)}
+
+    def recording(original):
+        def assemble(self):
+            assembled.append(self)
+            return original(self)
+
+        return assemble
+
+    for cls, original in originals.items():
+        cls.assemble = recording(original)
+    try:
+        yield assembled
+    finally:
+        for cls, original in originals.items():
+            cls.assemble = original
+
+
+def _sourceLine(expr: Optional[Expr]) -> Optional[SourceLine]:
+    """Return the innermost contract source line on the stack that created `expr`."""
+    if expr is None:
+        return None
+    for frame in reversed(getattr(expr, "trace", [])):
+        match = _FRAME.search(frame)
+        if match and Path(match["file"]).resolve().parent == CONTRACTS_DIR:
+            return match["file"], int(match["line"]), match["function"]
+    return None
+
+
+def _attributable(source: Optional[SourceLine]) -> bool:
+    return source is not None and source[2] != "<module>"
+
+
+def sourceMap(program: Expr, version: int = 5) -> Tuple[str, Dict[int, Optional[SourceLine]]]:
+    """
+    Compile `program` and map each TEAL line to the PyTeal line that emitted it.
+
+    Constants defined at module level (e.g. global state keys) are charged to
+    the line that uses them, and branches/stores the compiler adds are charged
+    to the line before them.
+
+    Returns:
+        the TEAL text, and TEAL line number -> (file, line, function), None for labels
+    """
+    with _recordAssembly() as assembled:
+        teal = compileTeal(program, mode=Mode.Application, version=version)
+
+    # line 1 is the #pragma
+    numbers = range(2, len(assembled) + 2)
+    raw = {number: _sourceLine(c.expr) for number, c in zip(numbers, assembled)}
+    lines: Dict[int, Optional[SourceLine]] = {}
+    previous: Optional[SourceLine] = None
+    for number, component in zip(numbers, assembled):
+        source = raw[number]
+        if isinstance(component, TealLabel):
+            source = None
+        elif not _attributable(source) and component.assemble().split()[0] in CONSTANT_OPS:
+            # a constant is charged to the expression consuming it
+            following = (raw[n] for n in numbers if n > number and _attributable(raw[n]))
+            source = next(following, previous)
+        elif not _attributable(source):
+            source = previous
+        else:
+            previous = source
+        lines[number] = source
+    return teal, lines
+
+
+class BranchProfile:
+    """
+    Opcode cost of one program branch, by PyTeal source line.
+
+    Args:
+        name (str): branch name, e.g. "settle"
+        result (EvalResult): evaluation of the branch
+        lines (dict): TEAL line -> PyTeal source line, from sourceMap
+        budget (int): cost the branch may not exceed
+    """
+
+    def __init__(self, name: str, result: EvalResult, lines: Dict[int, Optional[SourceLine]], budget: int) -> None:
+        self.name = name
+        self.cost = result.cost
+        self.budget = budget
+        self.error = result.error
+        self.sourceCosts: Counter = Counter()
+        for tealLine, cost in result.lineCosts.items():
+            self.sourceCosts[lines.get(tealLine)] += cost
+
+    @property
+    def overBudget(self) -> bool:
+        return self.cost > self.budget
+
+    def format(self, top: int = 10) -> str:
+        status = "OVER BUDGET" if self.overBudget else "ok"
+        out = ["{}: {} / {} opcodes ({})".format(self.name, self.cost, self.budget, status)]
+        for source, cost in self.sourceCosts.most_common(top):
+            if source is None:
+                # opcodes PyTeal emitted without a source expression
+                out.append("  {:>5}  <unmapped>".format(cost))
+                continue
+            path, line, function = source
+            text = Path(path).read_text().splitlines()[line - 1].strip()
+            out.append("  {:>5}  {}:{} {}  {}".format(cost, Path(path).name, line, function, text))
+        return "\n".join(out)
+
+
+def profileAuction(bidders: int = 4, budgets: Optional[Dict[str, int]] = None) -> Dict[str, BranchProfile]:
+    """
+    Profile the worst-case path of every branch of the auction contract.
+
+    Every settle moves the running best and the last one pays out, which is
+    the most expensive settle path.
+
+    Args:
+        bidders (int): number of bidders in the auction
+        budgets (dict, optional): branch name -> budget, APP_BUDGET for branches not given
+    """
+    budgets = {**{name: APP_BUDGET for name in BRANCHES}, **(budgets or {})}
+    approval, approvalLines = sourceMap(approval_program())
+    clear, clearLines = sourceMap(clear_state_program())
+
+    value = 5000
+    sim = AuctionSimulator(value, budget=None, approval=approval, clear=clear)
+    # each bid is closer than the previous, so every settle moves the running best
+    bids = [sim.bid(value + bidders - i) for i in range(bidders)]
+    sim.bid(value + bidders + 1)
+    leaver = sim.bidders[-1]
+    cleared = sim.call([transaction.ApplicationClearStateTxn(leaver.getAddress(), sim.params(), sim.appID)])
+    settles = [sim.settle(b) for b in sim.bidders[:bidders]]
+
+    results = {
+        "create": sim.createResult,
+        "bid": max(bids, key=lambda r: r.cost),
+        "settle": max(settles, key=lambda r: r.cost),
+        "clear": cleared,
+    }
+    return {
+        name: BranchProfile(name, result, clearLines if name == "clear" else approvalLines, budgets[name])
+        for name, result in results.items()
+    }
+
+
+def parseBudgets(values: List[str]) -> Dict[str, int]:
+    """Parse branch=budget pairs, e.g. ["settle=100"]."""
+    budgets = {}
+    for value in values:
+        name, _, budget = value.partition("=")
+        if name not in BRANCHES or not budget.isdigit():
+            raise argparse.ArgumentTypeError("expected one of {}=<opcodes>, got {}".format(BRANCHES, value))
+        budgets[name] = int(budget)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Attribute auction contract opcode cost to PyTeal lines")
+    parser.add_argument("--bidders", type=int, default=4)
+    parser.add_argument("--top", type=int, default=10, help="source lines shown per branch")
+    parser.add_argument("--budget", nargs="*", default=[], help="branch=opcodes, e.g. settle=100")
+    args = parser.parse_args()
+
+    profiles = profileAuction(args.bidders, parseBudgets(args.budget))
+    for profile in profiles.values():
+        print(profile.format(args.top))
+        print()
+    if any(p.overBudget for p in profiles.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
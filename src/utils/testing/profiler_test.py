@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from .profiler import BranchProfile
+from .profiler import profileAuction
+from .profiler import sourceMap
+from src.contracts.approval import approval_program
+
+
+def test_sourceMap_points_at_contract_lines():
+    teal, lines = sourceMap(approval_program())
+
+    assert len(lines) == len(teal.splitlines()) - 1
+    functions = {source[2] for source in lines.values() if source is not None}
+    assert {"approval_program", "create", "bid", "settle"} <= functions
+
+
+def test_profile_attributes_all_cost():
+    profiles = profileAuction(bidders=3)
+
+    assert set(profiles) == {"create", "bid", "settle", "clear"}
+    for profile in profiles.values():
+        assert profile.error is None
+        assert sum(profile.sourceCosts.values()) == profile.cost
+        assert not profile.overBudget
+
+
+def test_profile_flags_budget_overruns():
+    profiles = profileAuction(bidders=2, budgets={"settle": 10})
+
+    assert profiles["settle"].overBudget
+    assert "OVER BUDGET" in profiles["settle"].format()
+
+
+def test_format_lists_unmapped_opcodes():
+    teal, lines = sourceMap(approval_program())
+    mapped = next(tealLine for tealLine, source in lines.items() if source is not None)
+    result = SimpleNamespace(cost=5, error=None, lineCosts={mapped: 2, len(lines) + 10: 3})
+
+    text = BranchProfile("settle", result, lines, budget=700).format()
+
+    unmapped, first = (row.split() for row in text.splitlines()[1:])
+    assert unmapped == ["3", "<unmapped>"]
+    assert first[0] == "2" and first[1].startswith("approval.py:")
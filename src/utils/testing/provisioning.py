@@ -0,0 +1,240 @@
+"""
+Bulk funding and a refilling pool of funded temporary accounts.
+
+Payments are packed into atomic groups of up to 16 transactions, the
+groups are submitted concurrently and all of them are confirmed by one
+ConfirmationTracker, so funding N accounts costs about N / 16 submits and
+a couple of rounds instead of one submit and one round per account.
+
+An AccountPool hands out funded accounts and refills itself in the
+background when it runs low. Its size defaults to ACCOUNT_POOL_SIZE and,
+with ACCOUNT_POOL_FILE set, unused accounts are kept in that file and
+reused by later sessions on the same network.
+"""
+import base64
+import json
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk import account
+from algosdk import constants
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.account import Account
+from src.utils.params import getParamsProvider
+from src.utils.testing.setup import getGenesisAccounts
+from src.utils.util import PendingTxnResponse
+from src.utils.util import waitForTransactions
+
+FUNDING_AMOUNT = 100_000_000
+GROUP_SIZE = constants.tx_group_limit
+DEFAULT_POOL_SIZE = 16
+# groups submitted at once
+SUBMIT_WORKERS = 8
+
+
+def fundAccounts(
+    client: AlgodClient,
+    addresses: List[str],
+    amount: int = FUNDING_AMOUNT,
+    funders: Optional[List[Account]] = None,
+) -> List[PendingTxnResponse]:
+    """
+    Pay `amount` to every address, GROUP_SIZE payments per atomic group.
+
+    Args:
+        client (AlgodClient): the node to submit to
+        addresses (list of str): accounts to fund; an address may appear once
+        amount (int): microAlgos paid to each address
+        funders (list of Account, optional): payers, used round-robin; the genesis accounts by default
+    Returns:
+        list: a PendingTxnResponse per address, in the order given
+    """
+    if not addresses:
+        return []
+    funders = funders or getGenesisAccounts()
+    sp = getParamsProvider(client).get()
+
+    groups = []
+    for start in range(0, len(addresses), GROUP_SIZE):
+        end = start + GROUP_SIZE
+        chunk = addresses[start:end]
+        payers = [funders[(start + i) % len(funders)] for i in range(len(chunk))]
+        txns = transaction.assign_group_id(
+            [
+                transaction.PaymentTxn(sender=payer.getAddress(), receiver=address, amt=amount, sp=sp)
+                for payer, address in zip(payers, chunk)
+            ]
+        )
+        groups.append([txn.sign(payer.getPrivateKey()) for payer, txn in zip(payers, txns)])
+
+    with ThreadPoolExecutor(min(SUBMIT_WORKERS, len(groups))) as executor:
+        list(executor.map(client.send_transactions, groups))
+
+    return waitForTransactions(client, [stxn.get_txid() for group in groups for stxn in group])
+
+
+def createAccounts(client: AlgodClient, count: int, amount: int = FUNDING_AMOUNT) -> List[Account]:
+    """Generate `count` new accounts and fund each with `amount`."""
+    accounts = [Account(account.generate_account()[0]) for _ in range(count)]
+    fundAccounts(client, [a.getAddress() for a in accounts], amount)
+    return accounts
+
+
+class AccountPool:
+    """
+    Funded temporary accounts, refilled in the background when running low.
+
+    Args:
+        client (AlgodClient): the node the accounts live on
+        size (int): accounts created per refill
+        lowWater (int, optional): a background refill starts when fewer are left, size // 4 by default
+        amount (int): microAlgos each account is funded with
+        path (str, optional): file unused accounts are persisted to and loaded from
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        size: int = DEFAULT_POOL_SIZE,
+        lowWater: Optional[int] = None,
+        amount: int = FUNDING_AMOUNT,
+        path: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.size = size
+        self.lowWater = size // 4 if lowWater is None else lowWater
+        self.amount = amount
+        self.path = Path(path) if path else None
+
+        self.accounts: List[Account] = []
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Condition()
+        self._refilling: Optional[threading.Thread] = None
+        # snapshots taken and written, see _snapshot
+        self._version = 0
+        self._saved = 0
+        self._saveLock = threading.Lock()
+
+        if self.path is not None:
+            self._load()
+
+    def get(self) -> Account:
+        """Take a funded account, waiting for a refill if the pool is empty."""
+        return self.getMany(1)[0]
+
+    def getMany(self, count: int) -> List[Account]:
+        """Take `count` funded accounts; more than the pool holds are created in one batch."""
+        if count <= 0:
+            return []
+        while True:
+            with self._lock:
+                while len(self.accounts) < count and self._refilling is not None:
+                    self._lock.wait()
+                if self.error is not None:
+                    error, self.error = self.error, None
+                    raise error
+                if len(self.accounts) >= count:
+                    taken, self.accounts = self.accounts[-count:], self.accounts[:-count]
+                    snapshot = self._snapshot()
+                    if len(self.accounts) < self.lowWater and self._refilling is None:
+                        self._refilling = threading.Thread(target=self._refill, name="AccountPool", daemon=True)
+                        self._refilling.start()
+                    break
+                missing = count - len(self.accounts)
+            # other callers may take the new accounts first, in which case this loops to create more
+            self._add(createAccounts(self.client, max(missing, self.size), self.amount))
+        self._save(snapshot)
+        return taken
+
+    def _refill(self) -> None:
+        try:
+            self._add(createAccounts(self.client, self.size, self.amount))
+        except Exception as e:
+            with self._lock:
+                self.error = e
+        finally:
+            with self._lock:
+                self._refilling = None
+                self._lock.notify_all()
+
+    def _add(self, accounts: List[Account]) -> None:
+        with self._lock:
+            self.accounts[:0] = accounts
+            snapshot = self._snapshot()
+            self._lock.notify_all()
+        self._save(snapshot)
+
+    def wait(self) -> None:
+        """Block until a running background refill finishes."""
+        with self._lock:
+            while self._refilling is not None:
+                self._lock.wait()
+
+    ## PERSISTENCE
+    def _genesis(self) -> str:
+        return getParamsProvider(self.client).get().gh
+
+    def _snapshot(self) -> Optional[Tuple[int, List[str]]]:
+        """The unused accounts to persist, numbered so older snapshots never overwrite newer ones; hold the lock."""
+        if self.path is None:
+            return None
+        self._version += 1
+        return self._version, [a.getPrivateKey() for a in self.accounts]
+
+    def _save(self, snapshot: Optional[Tuple[int, List[str]]]) -> None:
+        """Write a snapshot to `path`, outside of the lock so takers aren't held up by the network or disk."""
+        if snapshot is None:
+            return
+        version, keys = snapshot
+        data = json.dumps({"genesis": self._genesis(), "accounts": keys})
+        with self._saveLock:
+            if version <= self._saved:
+                return
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, self.path)
+            self._saved = version
+
+    def _load(self) -> None:
+        """Load the accounts persisted for this network that still hold funds."""
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("genesis") != self._genesis():
+            return
+
+        accounts = [Account(sk) for sk in data.get("accounts", []) if len(base64.b64decode(sk)) == 64]
+
+        def funded(a: Account) -> bool:
+            return self.client.account_info(a.getAddress())["amount"] > 0
+
+        if accounts:
+            with ThreadPoolExecutor(min(SUBMIT_WORKERS, len(accounts))) as executor:
+                self.accounts = [a for a, ok in zip(accounts, executor.map(funded, accounts)) if ok]
+
+
+_pools: "weakref.WeakKeyDictionary[AlgodClient, AccountPool]" = weakref.WeakKeyDictionary()
+_poolsLock = threading.Lock()
+
+
+def getAccountPool(client: AlgodClient) -> AccountPool:
+    """
+    Return the AccountPool shared by everything using `client`.
+
+    Sized by the ACCOUNT_POOL_SIZE environment variable and persisted to
+    ACCOUNT_POOL_FILE when that is set.
+    """
+    with _poolsLock:
+        if client not in _pools:
+            size = int(os.environ.get("ACCOUNT_POOL_SIZE", DEFAULT_POOL_SIZE))
+            _pools[client] = AccountPool(client, size=size, path=os.environ.get("ACCOUNT_POOL_FILE"))
+        return _pools[client]
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account
+
+from src.utils.account import Account
+from src.utils.clients import algod_client
+from src.utils.testing.ledger import FakeAlgodClient
+from src.utils.testing.ledger import FakeLedger
+from src.utils.testing.provisioning import AccountPool
+from src.utils.testing.provisioning import fundAccounts
+from src.utils.testing.provisioning import getAccountPool
+from src.utils.testing.resources import getTemporaryAccount
+from src.utils.testing.setup import getGenesisAccounts
+
+
+def test_fund_accounts_in_groups(node):
+    client = algod_client()
+    addresses = [account.generate_account()[1] for _ in range(40)]
+
+    responses = fundAccounts(client, addresses, amount=1_000_000)
+
+    assert len(responses) == 40
+    assert all(node.ledger.balances[a] == 1_000_000 for a in addresses)
+    # 3 groups of at most 16 payments, one submit each
+    assert client.calls["submit"] == 3
+
+
+def test_fund_accounts_from_one_funder():
+    client = FakeAlgodClient(FakeLedger())
+    funder = Account(account.generate_account()[0])
+    client.ledger.fund(funder.getAddress(), 10_000_000)
+    addresses = [account.generate_account()[1] for _ in range(20)]
+
+    fundAccounts(client, addresses, amount=100_000, funders=[funder])
+
+    assert all(client.ledger.balances[a] == 100_000 for a in addresses)
+    # both groups confirmed together
+    assert client.ledger.round == 2
+
+
+def test_pool_refills_in_background(node):
+    pool = AccountPool(algod_client(), size=8, lowWater=4)
+
+    taken = [pool.get() for _ in range(5)]
+    pool.wait()
+
+    assert len({a.getAddress() for a in taken}) == 5
+    assert len(pool.accounts) == 3 + 8
+    assert all(node.ledger.balances[a.getAddress()] > 0 for a in taken + pool.accounts)
+
+
+def test_pool_get_many_beyond_size(node):
+    pool = AccountPool(algod_client(), size=4)
+
+    accounts = pool.getMany(10)
+
+    assert len({a.getAddress() for a in accounts}) == 10
+
+
+def test_pool_get_many_from_concurrent_callers(node):
+    pool = AccountPool(algod_client(), size=4, lowWater=0)
+
+    with ThreadPoolExecutor(8) as executor:
+        batches = list(executor.map(pool.getMany, [3, 5, 7, 9] * 4))
+
+    assert [len(batch) for batch in batches] == [3, 5, 7, 9] * 4
+    assert len({a.getAddress() for batch in batches for a in batch}) == sum(len(batch) for batch in batches)
+
+
+def test_pool_persists_unused_accounts(node, tmp_path):
+    client = algod_client()
+    path = tmp_path / "pool.json"
+    pool = AccountPool(client, size=6, lowWater=0, path=str(path))
+    used = pool.get()
+
+    reloaded = AccountPool(client, size=6, path=str(path))
+
+    assert sorted(a.getAddress() for a in reloaded.accounts) == sorted(a.getAddress() for a in pool.accounts)
+    assert used.getAddress() not in {a.getAddress() for a in reloaded.accounts}
+
+    # accounts emptied since are not reused
+    drained = reloaded.accounts[0].getAddress()
+    node.ledger.balances[drained] = 0
+    assert drained not in {a.getAddress() for a in AccountPool(client, path=str(path)).accounts}
+
+
+def test_temporary_accounts_share_the_pool(node):
+    client = algod_client()
+
+    getTemporaryAccount(client)
+    getTemporaryAccount(client)
+
+    assert getAccountPool(client) is getAccountPool(client)
+    assert len(getGenesisAccounts()) == 3
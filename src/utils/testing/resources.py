@@ -1,23 +1,26 @@
 from random import choice
 from random import randint
-from typing import List
 
-from algosdk import account
 from algosdk.future import transaction
 from algosdk.v2client.algod import AlgodClient
 
+from .provisioning import FUNDING_AMOUNT
+from .provisioning import getAccountPool
 from .setup import getGenesisAccounts
 from src.utils.account import Account
+from src.utils.metrics import timed
+from src.utils.params import getParamsProvider
 from src.utils.util import PendingTxnResponse
 from src.utils.util import waitForTransaction
 
 
+@timed("resources.payAccount")
 def payAccount(client: AlgodClient, sender: Account, to: str, amount: int) -> PendingTxnResponse:
     txn = transaction.PaymentTxn(
         sender=sender.getAddress(),
         receiver=to,
         amt=amount,
-        sp=client.suggested_params(),
+        sp=getParamsProvider(client).get(),
     )
     signedTxn = txn.sign(sender.getPrivateKey())
 
@@ -25,54 +28,21 @@ def payAccount(client: AlgodClient, sender: Account, to: str, amount: int) -> Pe
     return waitForTransaction(client, signedTxn.get_txid())
 
 
-FUNDING_AMOUNT = 100_000_000
-
-
 def fundAccount(client: AlgodClient, address: str, amount: int = FUNDING_AMOUNT) -> PendingTxnResponse:
     fundingAccount = choice(getGenesisAccounts())
     return payAccount(client, fundingAccount, address, amount)
 
 
-accountList: List[Account] = []
-
-
+@timed("resources.getTemporaryAccount")
 def getTemporaryAccount(client: AlgodClient) -> Account:
-    global accountList
-
-    if len(accountList) == 0:
-        sks = [account.generate_account()[0] for i in range(16)]
-        accountList = [Account(sk) for sk in sks]
-
-        genesisAccounts = getGenesisAccounts()
-        suggestedParams = client.suggested_params()
-
-        txns: List[transaction.Transaction] = []
-        for i, a in enumerate(accountList):
-            fundingAccount = genesisAccounts[i % len(genesisAccounts)]
-            txns.append(
-                transaction.PaymentTxn(
-                    sender=fundingAccount.getAddress(),
-                    receiver=a.getAddress(),
-                    amt=FUNDING_AMOUNT,
-                    sp=suggestedParams,
-                )
-            )
-
-        txns = transaction.assign_group_id(txns)
-        signedTxns = [txn.sign(genesisAccounts[i % len(genesisAccounts)].getPrivateKey()) for i, txn in enumerate(txns)]
-
-        client.send_transactions(signedTxns)
-
-        waitForTransaction(client, signedTxns[0].get_txid())
-
-    return accountList.pop()
+    return getAccountPool(client).get()
 
 
 def optInToAsset(client: AlgodClient, assetID: int, account: Account) -> PendingTxnResponse:
     txn = transaction.AssetOptInTxn(
         sender=account.getAddress(),
         index=assetID,
-        sp=client.suggested_params(),
+        sp=getParamsProvider(client).get(),
     )
     signedTxn = txn.sign(account.getPrivateKey())
 
@@ -101,7 +71,7 @@ def createDummyAsset(client: AlgodClient, total: int, account: Account = None) -
         asset_name=f"Dummy {randomNumber}",
         url=f"https://dummy.asset/{randomNumber}",
         note=randomNote,
-        sp=client.suggested_params(),
+        sp=getParamsProvider(client).get(),
     )
     signedTxn = txn.sign(account.getPrivateKey())
 
@@ -1,17 +1,45 @@
+import logging
+import threading
 from base64 import b64decode
+from binascii import a2b_base64
+from binascii import b2a_base64
+from concurrent.futures import Future
+from concurrent.futures import wait
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Set
 from typing import Tuple
 from typing import Union
 
+import msgpack
+from algosdk.encoding import future_msgpack_decode
+from algosdk.error import AlgodHTTPError
 from algosdk.kmd import KMDClient
 from algosdk.v2client.algod import AlgodClient
 from pyteal import compileTeal
 from pyteal import Expr
 from pyteal import Mode
 
+from src.utils.metrics import CONFIRMATION_ROUNDS
+from src.utils.metrics import CONFIRMATIONS
+from src.utils.metrics import get_metrics
+from src.utils.metrics import ROUND_BUCKETS
+from src.utils.params import getParamsProvider
+from src.utils.store import getLocalStore
+
+StateValue = Union[int, bytes]
+
+# seconds the background tracker waits after a failed poll before polling again
+RETRY_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
 
 class PendingTxnResponse:
     def __init__(self, response: Dict[str, Any]) -> None:
@@ -32,25 +60,197 @@ class PendingTxnResponse:
         self.logs: List[bytes] = [b64decode(l) for l in response.get("logs", [])]
 
 
-def waitForTransaction(client: AlgodClient, txID: str, timeout: int = 10) -> PendingTxnResponse:
-    lastStatus = client.status()
-    lastRound = lastStatus["last-round"]
-    startRound = lastRound
-
-    while lastRound < startRound + timeout:
-        pending_txn = client.pending_transaction_info(txID)
-
-        if pending_txn.get("confirmed-round", 0) > 0:
-            return PendingTxnResponse(pending_txn)
+class ConfirmationTracker:
+    """
+    Confirms many transactions at once by waiting on each new block a single time.
+
+    Instead of polling `pending_transaction_info` for every txid every round,
+    the tracker reads the transaction pool once per round and only asks for
+    the details of txids that have left it. Confirming N transactions that
+    land in R rounds costs roughly 2R + N requests instead of ~2N per round.
+
+    Results are delivered through futures and optional callbacks, resolved
+    with PendingTxnResponse objects (or an exception for rejected/timed out txns).
+
+    Args:
+        client (AlgodClient): the algorand node we wait on
+        timeout (int): number of rounds a txid may stay unconfirmed after being tracked
+    """
+
+    def __init__(self, client: AlgodClient, timeout: int = 10) -> None:
+        self.client = client
+        self.timeout = timeout
+        self.lastRound: Optional[int] = None
+
+        # txid -> (deadline round, future, round it was tracked in)
+        self.outstanding: Dict[str, Tuple[int, Future, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(
+        self, txID: str, callback: Optional[Callable[[Future], None]] = None, timeout: Optional[int] = None
+    ) -> Future:
+        """
+        Start tracking a submitted transaction.
+
+        Args:
+            txID (str): id of a transaction already sent to the node
+            callback (callable, optional): called with the future once it resolves
+            timeout (int, optional): override the tracker's round timeout for this txid
+        Returns:
+            Future: resolves to the transaction's PendingTxnResponse
+        """
+        if self.lastRound is None:
+            self.lastRound = self.client.status()["last-round"]
+            getParamsProvider(self.client).observeRound(self.lastRound)
+
+        with self._lock:
+            if txID in self.outstanding:
+                future = self.outstanding[txID][1]
+            else:
+                future = Future()
+                deadline = self.lastRound + (self.timeout if timeout is None else timeout)
+                self.outstanding[txID] = (deadline, future, self.lastRound)
+                self._wake.set()
+
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def check(self) -> None:
+        """Resolve every outstanding txid that has left the pool as of the last seen round."""
+        with self._lock:
+            if not self.outstanding:
+                return
+            deadlines = [(txID, deadline) for txID, (deadline, _, _) in self.outstanding.items()]
+
+        # a single txid is cheaper to ask about directly than to find in the pool
+        pooled = self._pooledTxIDs() if len(deadlines) > 1 else set()
+
+        for txID, deadline in deadlines:
+            if txID not in pooled:
+                try:
+                    pending_txn = self.client.pending_transaction_info(txID)
+                except AlgodHTTPError as e:
+                    self._resolve(txID, exception=e)
+                    continue
+
+                if pending_txn.get("confirmed-round", 0) > 0:
+                    self._resolve(txID, result=PendingTxnResponse(pending_txn))
+                    continue
+
+                if pending_txn["pool-error"]:
+                    self._resolve(
+                        txID,
+                        exception=Exception("Pool error: {}".format(pending_txn["pool-error"])),
+                        outcome="rejected",
+                    )
+                    continue
+
+            if self.lastRound >= deadline:
+                self._resolve(
+                    txID,
+                    exception=Exception("Transaction {} not confirmed by round {}".format(txID, deadline)),
+                    outcome="timeout",
+                )
+
+    def _pooledTxIDs(self) -> Set[str]:
+        pool = msgpack.unpackb(self.client.pending_transactions(response_format="msgpack"), raw=False)
+        return {future_msgpack_decode(stxn).get_txid() for stxn in pool.get("top-transactions") or []}
+
+    def poll(self) -> int:
+        """
+        Check outstanding txids, then wait for the next block and check again.
+
+        Returns:
+            int: the number of txids still outstanding
+        """
+        self.check()
+        if self.outstanding:
+            status = self.client.status_after_block(self.lastRound)
+            self.lastRound = status["last-round"]
+            getParamsProvider(self.client).observeRound(self.lastRound)
+            self.check()
+        return len(self.outstanding)
+
+    def wait(self, txIDs: List[str], timeout: Optional[int] = None) -> List[PendingTxnResponse]:
+        """
+        Track `txIDs` and block until all of them resolve.
+
+        Returns:
+            list: a PendingTxnResponse per txid, in the order given.
+            Raises the first rejection or timeout encountered.
+        """
+        futures = [self.track(txID, timeout=timeout) for txID in txIDs]
+        if self._thread is not None:
+            wait(futures)
+        while not all(f.done() for f in futures):
+            self.poll()
+        return [f.result() for f in futures]
+
+    def start(self) -> None:
+        """Resolve tracked txids from a background thread until stop() is called."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ConfirmationTracker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.outstanding:
+                try:
+                    self.poll()
+                except Exception:
+                    # e.g. a dropped connection; txids only fail once their deadline passes
+                    logger.warning("confirmation poll failed, retrying", exc_info=True)
+                    self._stop.wait(RETRY_SECONDS)
+            else:
+                self._wake.wait()
+                self._wake.clear()
+
+    def _resolve(
+        self,
+        txID: str,
+        result: Optional[PendingTxnResponse] = None,
+        exception: Optional[BaseException] = None,
+        outcome: str = "error",
+    ) -> None:
+        with self._lock:
+            if txID not in self.outstanding:
+                # resolved meanwhile by another poll
+                return
+            _, future, trackedRound = self.outstanding.pop(txID)
+
+        metrics = get_metrics()
+        if metrics.enabled:
+            if result is not None and result.confirmedRound is not None:
+                metrics.observe(CONFIRMATION_ROUNDS, result.confirmedRound - trackedRound, ROUND_BUCKETS)
+                outcome = "confirmed"
+            metrics.inc(CONFIRMATIONS, outcome=outcome)
+
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
 
-        if pending_txn["pool-error"]:
-            raise Exception("Pool error: {}".format(pending_txn["pool-error"]))
 
-        lastStatus = client.status_after_block(lastRound + 1)
+def waitForTransaction(client: AlgodClient, txID: str, timeout: int = 10) -> PendingTxnResponse:
+    return waitForTransactions(client, [txID], timeout)[0]
 
-        lastRound += 1
 
-    raise Exception("Transaction {} not confirmed after {} rounds".format(txID, timeout))
+def waitForTransactions(client: AlgodClient, txIDs: List[str], timeout: int = 10) -> List[PendingTxnResponse]:
+    return ConfirmationTracker(client, timeout).wait(txIDs)
 
 
 def fullyCompileContract(client: AlgodClient, contract: Expr) -> bytes:
@@ -59,11 +259,11 @@ def fullyCompileContract(client: AlgodClient, contract: Expr) -> bytes:
     return b64decode(response["result"])
 
 
-def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
-    state: Dict[bytes, Union[int, bytes]] = dict()
+def decodeState(stateArray: List[Any]) -> Dict[bytes, StateValue]:
+    state: Dict[bytes, StateValue] = dict()
 
     for pair in stateArray:
-        key = b64decode(pair["key"])
+        key = a2b_base64(pair["key"])
 
         value = pair["value"]
         valueType = value["type"]
@@ -73,7 +273,7 @@ def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
             value = value.get("uint", 0)
         elif valueType == 1:
             # value is byte array
-            value = b64decode(value.get("bytes", ""))
+            value = a2b_base64(value.get("bytes", ""))
         else:
             raise Exception(f"Unexpected state type: {valueType}")
 
@@ -82,15 +282,135 @@ def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
     return state
 
 
-def getAppGlobalState(client: AlgodClient, appID: int) -> Dict[bytes, Union[int, bytes]]:
-    appInfo = client.application_info(appID)
+def _encodeKey(key: Union[bytes, str]) -> str:
+    if isinstance(key, str):
+        key = key.encode()
+    return b2a_base64(key, newline=False).decode()
+
+
+class StateView(Mapping[bytes, StateValue]):
+    """
+    Read-only global or local state that decodes keys and values on access.
+
+    Where decodeState decodes every key and value of a TealKeyValue array up
+    front, a lookup here base64-encodes the key asked for (bytes, or a str
+    taken as utf-8) and decodes only its value, once. Iterating decodes the
+    keys, through `keys` if given: a base64 -> key cache that views of the
+    same app can share. To read every key once, decodeState is faster.
+    """
+
+    def __init__(self, stateArray: List[Any], keys: Optional[Dict[str, bytes]] = None) -> None:
+        self._raw: Dict[str, Dict[str, Any]] = {pair["key"]: pair["value"] for pair in stateArray}
+        self._values: Dict[str, StateValue] = {}
+        self._keys = {} if keys is None else keys
+
+    def __getitem__(self, key: Union[bytes, str]) -> StateValue:
+        encoded = _encodeKey(key)
+        if encoded not in self._raw:
+            raise KeyError(key)
+        return self._value(encoded)
+
+    def _value(self, encoded: str) -> StateValue:
+        if encoded in self._values:
+            return self._values[encoded]
+
+        value = self._raw[encoded]
+        valueType = value["type"]
+        if valueType == 2:
+            decoded: StateValue = value.get("uint", 0)
+        elif valueType == 1:
+            decoded = a2b_base64(value.get("bytes", ""))
+        else:
+            raise Exception(f"Unexpected state type: {valueType}")
+
+        self._values[encoded] = decoded
+        return decoded
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, (bytes, str)) and _encodeKey(key) in self._raw
+
+    def __iter__(self) -> Iterator[bytes]:
+        for encoded in self._raw:
+            key = self._keys.get(encoded)
+            if key is None:
+                key = self._keys[encoded] = a2b_base64(encoded)
+            yield key
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def decode(self) -> Dict[bytes, StateValue]:
+        """Every key and value, as decodeState returns them."""
+        return {key: self._value(encoded) for encoded, key in zip(self._raw, self)}
+
+
+def decodeLocalStates(accounts: Iterable[Dict[str, Any]], appID: int) -> Dict[str, StateView]:
+    """
+    The local state of `appID` of many accounts at once, keyed by address.
+
+    `accounts` are algod account_info results or the accounts of an indexer
+    search; those not opted in to the app are left out. The views share one
+    key cache, so a key every account holds is decoded once, not per account.
+    """
+    keys: Dict[str, bytes] = {}
+    states: Dict[str, StateView] = {}
+    for info in accounts:
+        for app in info.get("apps-local-state") or []:
+            if app["id"] == appID:
+                states[info["address"]] = StateView(app.get("key-value") or [], keys)
+                break
+    return states
+
+
+def decodeDelta(deltaArray: List[Any]) -> Dict[bytes, Optional[StateValue]]:
+    """Decode an EvalDelta array into key -> new value, None for deleted keys."""
+    delta: Dict[bytes, Optional[StateValue]] = dict()
+
+    for pair in deltaArray:
+        key = b64decode(pair["key"])
+
+        value = pair["value"]
+        action = value["action"]
+
+        if action == 1:
+            # set byte array
+            delta[key] = b64decode(value.get("bytes", ""))
+        elif action == 2:
+            # set uint64
+            delta[key] = value.get("uint", 0)
+        elif action == 3:
+            delta[key] = None
+        else:
+            raise Exception(f"Unexpected delta action: {action}")
+
+    return delta
+
+
+def getAppGlobalState(client: AlgodClient, appID: int, maxAge: Optional[int] = None) -> Dict[bytes, StateValue]:
+    """
+    Args:
+        maxAge (int, optional): read through the local store (see src.utils.store),
+            accepting state up to this many rounds old; None to always ask algod
+    """
+    if maxAge is None:
+        appInfo = client.application_info(appID)
+    else:
+        appInfo = getLocalStore(client).application(appID, maxAge)
     return decodeState(appInfo["params"]["global-state"])
 
 
-def getBalances(client: AlgodClient, account: str) -> Dict[int, int]:
+def getBalances(client: AlgodClient, account: str, maxAge: Optional[int] = None) -> Dict[int, int]:
+    """
+    Args:
+        maxAge (int, optional): read through the local store (see src.utils.store),
+            accepting balances up to this many rounds old; None to always ask algod
+    """
     balances: Dict[int, int] = dict()
 
-    accountInfo = client.account_info(account)
+    if maxAge is None:
+        accountInfo = client.account_info(account)
+    else:
+        accountInfo = getLocalStore(client).account(account, maxAge)
 
     # set key 0 to Algo balance
     balances[0] = accountInfo["amount"]
@@ -104,7 +424,17 @@ def getBalances(client: AlgodClient, account: str) -> Dict[int, int]:
     return balances
 
 
-def getLastBlockTimestamp(client: AlgodClient) -> Tuple[int, int]:
+def getLastBlockTimestamp(client: AlgodClient, maxAge: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Args:
+        maxAge (int, optional): read through the local store (see src.utils.store),
+            accepting a block up to this many rounds old; None to always ask algod.
+            blocks from the store come without their transactions
+    """
+    if maxAge is not None:
+        header = getLocalStore(client).lastBlock(maxAge)
+        return {"block": header}, header["ts"]
+
     status = client.status()
     lastRound = status["last-round"]
     block = client.block_info(lastRound)
@@ -0,0 +1,171 @@
+import base64
+from concurrent.futures import Future
+
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from . import util
+from .account import Account
+from .testing.ledger import FakeAlgodClient
+from .testing.ledger import FakeLedger
+from .util import ConfirmationTracker
+from .util import decodeLocalStates
+from .util import decodeState
+from .util import PendingTxnResponse
+from .util import StateView
+from .util import waitForTransaction
+from .util import waitForTransactions
+
+
+def _payment(client, sender: Account, amount: int = 1000, note: bytes = b""):
+    txn = transaction.PaymentTxn(
+        sender=sender.getAddress(),
+        receiver=sender.getAddress(),
+        amt=amount,
+        note=note,
+        sp=client.suggested_params(),
+    )
+    return txn.sign(sender.getPrivateKey())
+
+
+@pytest.fixture
+def client():
+    return FakeAlgodClient(FakeLedger())
+
+
+@pytest.fixture
+def sender(client):
+    sender = Account(account.generate_account()[0])
+    client.ledger.fund(sender.getAddress(), 10_000_000)
+    return sender
+
+
+def test_waitForTransaction(client, sender):
+    signedTxn = _payment(client, sender)
+    client.send_transaction(signedTxn)
+
+    response = waitForTransaction(client, signedTxn.get_txid())
+
+    assert isinstance(response, PendingTxnResponse)
+    assert response.confirmedRound == client.ledger.round
+
+
+def test_waitForTransactions_batches_rounds(client, sender):
+    txIDs = []
+    for i in range(50):
+        signedTxn = _payment(client, sender, note=str(i).encode())
+        txIDs.append(client.send_transaction(signedTxn))
+
+    client.calls.clear()
+    responses = waitForTransactions(client, txIDs)
+
+    assert [r.confirmedRound for r in responses] == [client.ledger.round] * 50
+    # one block wait and two pool reads for the whole batch, then one lookup per txid
+    assert client.calls["waitForBlockAfter"] == 1
+    assert client.calls["pendingTransactions"] == 2
+    assert client.calls["pendingInfo"] == 50
+
+
+def test_tracker_reports_pool_errors(client, sender):
+    signedTxn = _payment(client, sender)
+    client.send_transaction(signedTxn)
+    client.ledger.pool.clear()
+    client.ledger.results[signedTxn.get_txid()] = {"pool-error": "overspend", "txn": {}}
+
+    with pytest.raises(Exception, match="Pool error: overspend"):
+        waitForTransaction(client, signedTxn.get_txid())
+
+
+def test_tracker_times_out(client, sender):
+    client.ledger.maxTxnsPerBlock = 0
+    signedTxn = _payment(client, sender)
+    client.send_transaction(signedTxn)
+
+    with pytest.raises(Exception, match="not confirmed"):
+        waitForTransaction(client, signedTxn.get_txid(), timeout=3)
+
+
+def test_tracker_callbacks_from_background_thread(client, sender):
+    tracker = ConfirmationTracker(client)
+    resolved = []
+
+    tracker.start()
+    try:
+        futures = []
+        for i in range(5):
+            signedTxn = _payment(client, sender, note=str(i).encode())
+            client.send_transaction(signedTxn)
+            futures.append(tracker.track(signedTxn.get_txid(), callback=resolved.append))
+        responses = tracker.wait([signedTxn.get_txid()])
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        tracker.stop()
+
+    assert responses[0].confirmedRound is not None
+    assert len(resolved) == 5 and all(isinstance(f, Future) for f in resolved)
+
+
+def test_background_tracker_retries_failed_polls(client, sender, monkeypatch):
+    monkeypatch.setattr(util, "RETRY_SECONDS", 0)
+    tracker = ConfirmationTracker(client)
+    statusAfterBlock = client.status_after_block
+    failures = [AlgodHTTPError("timed out", 504)]
+
+    def flaky(round):
+        if failures:
+            raise failures.pop()
+        return statusAfterBlock(round)
+
+    monkeypatch.setattr(client, "status_after_block", flaky)
+    signedTxn = _payment(client, sender)
+    client.send_transaction(signedTxn)
+
+    tracker.start()
+    try:
+        # the txid outlives the failed poll instead of failing with it
+        response = tracker.track(signedTxn.get_txid()).result(timeout=5)
+    finally:
+        tracker.stop()
+
+    assert failures == []
+    assert response.confirmedRound is not None
+
+
+def _kv(key: bytes, value):
+    if isinstance(value, int):
+        encoded = {"type": 2, "uint": value}
+    else:
+        encoded = {"type": 1, "bytes": base64.b64encode(value).decode()}
+    return {"key": base64.b64encode(key).decode(), "value": encoded}
+
+
+def test_state_view_decodes_on_access():
+    stateArray = [_kv(b"stake_amount", 200_000), _kv(b"tellor_query_id", b"1"), _kv(b"\xff\x00", 0)]
+    view = StateView(stateArray)
+
+    assert view[b"stake_amount"] == view["stake_amount"] == 200_000
+    assert view[b"\xff\x00"] == 0
+    assert "tellor_query_id" in view and b"missing" not in view
+    assert view.get(b"missing", 7) == 7
+    with pytest.raises(KeyError):
+        view["missing"]
+    assert len(view) == 3
+    assert view.decode() == dict(view) == decodeState(stateArray)
+
+
+def test_decode_local_states_shares_keys():
+    accounts = [
+        {"address": "A", "apps-local-state": [{"id": 1, "key-value": [_kv(b"prediction", 10)]}]},
+        {"address": "B", "apps-local-state": [{"id": 2}, {"id": 1, "key-value": [_kv(b"prediction", 20)]}]},
+        {"address": "C", "apps-local-state": [{"id": 2, "key-value": [_kv(b"prediction", 30)]}]},
+        {"address": "D"},
+    ]
+
+    states = decodeLocalStates(accounts, 1)
+
+    assert {address: state["prediction"] for address, state in states.items()} == {"A": 10, "B": 20}
+    (keyA,), (keyB,) = list(states["A"]), list(states["B"])
+    assert keyA == b"prediction" and keyA is keyB
@@ -0,0 +1,39 @@
+"""
+Keys held in a kmd wallet, by default the node's unencrypted default wallet
+holding its genesis accounts.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+from typing import List
+
+from algosdk.kmd import KMDClient
+
+from src.utils.account import Account
+
+KMD_WALLET_NAME = "unencrypted-default-wallet"
+KMD_WALLET_PASSWORD = ""
+
+
+@contextmanager
+def _walletHandle(kmd: KMDClient, name: str, password: str) -> Iterator[str]:
+    walletID = next((wallet["id"] for wallet in kmd.list_wallets() if wallet["name"] == name), None)
+    if walletID is None:
+        raise Exception("Wallet not found: {}".format(name))
+
+    walletHandle = kmd.init_wallet_handle(walletID, password)
+    try:
+        yield walletHandle
+    finally:
+        kmd.release_wallet_handle(walletHandle)
+
+
+def walletAccounts(kmd: KMDClient, name: str = KMD_WALLET_NAME, password: str = KMD_WALLET_PASSWORD) -> List[Account]:
+    """Every account of the wallet `name`, with its private key exported."""
+    with _walletHandle(kmd, name, password) as walletHandle:
+        return [Account(kmd.export_key(walletHandle, password, addr)) for addr in kmd.list_keys(walletHandle)]
+
+
+def exportKey(kmd: KMDClient, address: str, name: str = KMD_WALLET_NAME, password: str = KMD_WALLET_PASSWORD) -> str:
+    """The private key of `address`, exported from the wallet `name`."""
+    with _walletHandle(kmd, name, password) as walletHandle:
+        return kmd.export_key(walletHandle, password, address)
@@ -0,0 +1,29 @@
+import pytest
+from algosdk import account
+from algosdk.error import KMDHTTPError
+
+from src.utils.clients import kmd_client
+from src.utils.wallet import exportKey
+from src.utils.wallet import walletAccounts
+
+
+def test_wallet_accounts(node):
+    accounts = walletAccounts(kmd_client())
+
+    assert [a.getPrivateKey() for a in accounts] == node.ledger.genesisKeys
+    # every wallet handle is released
+    assert node.kmd.kmd.handles == {}
+
+
+def test_export_key(node):
+    key = node.ledger.genesisKeys[1]
+
+    assert exportKey(kmd_client(), account.address_from_private_key(key)) == key
+    with pytest.raises(KMDHTTPError):
+        exportKey(kmd_client(), account.generate_account()[1])
+    assert node.kmd.kmd.handles == {}
+
+
+def test_unknown_wallet(node):
+    with pytest.raises(Exception, match="Wallet not found"):
+        walletAccounts(kmd_client(), name="missing")